@@ -29,653 +29,111 @@ USAGE:
 ------
 streamlit run app.py
 
-AUTHOR: Simic Energy Services
-VERSION: 2.0.0 (Government Edition - Self-Hosted)
-COMPLIANCE: FedRAMP High Ready
-"""
-
-import streamlit as st
-import requests
-import json
-import traceback
-import os
-from typing import Dict, List, Optional
-from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from enum import Enum
-
-
-# ============================================================================
-# CONFIGURATION
-# ============================================================================
+# Headless batch mode (no Streamlit):
+python -m sves.batch queries.jsonl -o results.jsonl
 
-class LLMProvider(Enum):
-    """Supported LLM providers for self-hosted deployment."""
-    OLLAMA = "ollama"
-    VLLM = "vllm"
-    LM_STUDIO = "lm_studio"
-    CUSTOM_API = "custom_api"
-    AZURE_GOV = "azure_gov"
-
-
-@dataclass
-class LLMConfig:
-    """Configuration for LLM backend."""
-    provider: LLMProvider
-    base_url: str
-    model_name: str
-    api_key: Optional[str] = None
-    max_tokens: int = 4096
-    temperature: float = 0.7
-    timeout: int = 120
-
-
-# Default configurations for different providers
-DEFAULT_CONFIGS = {
-    LLMProvider.OLLAMA: LLMConfig(
-        provider=LLMProvider.OLLAMA,
-        base_url="http://localhost:11434",
-        model_name="llama3.1:70b",
-        max_tokens=4096,
-        temperature=0.7
-    ),
-    LLMProvider.VLLM: LLMConfig(
-        provider=LLMProvider.VLLM,
-        base_url="http://localhost:8000",
-        model_name="meta-llama/Llama-3.1-70B-Instruct",
-        max_tokens=4096,
-        temperature=0.7
-    ),
-    LLMProvider.LM_STUDIO: LLMConfig(
-        provider=LLMProvider.LM_STUDIO,
-        base_url="http://localhost:1234",
-        model_name="local-model",
-        max_tokens=4096,
-        temperature=0.7
-    ),
-    LLMProvider.AZURE_GOV: LLMConfig(
-        provider=LLMProvider.AZURE_GOV,
-        base_url="https://your-resource.openai.azure.us",
-        model_name="gpt-4",
-        api_key=None,  # Set via environment or UI
-        max_tokens=4096,
-        temperature=0.7
-    ),
-}
-
-
-# ============================================================================
-# COMPONENT 1: MOCK KNOWLEDGE BASE
-# ============================================================================
-
-def load_knowledge_base() -> str:
-    """
-    Simulates a RAG system by loading foundational documents directly into context.
-    In production, this would query a vector database (Pinecone, Weaviate, etc.).
-    
-    Returns:
-        str: Concatenated knowledge base content for the LLM's context window.
-    """
-    
-    doc1 = """
-    === DOCUMENT 1: NASA_Glenn_SCWO_Fundamentals.txt ===
-    
-    SUPERCRITICAL WATER OXIDATION (SCWO) - NASA GLENN RESEARCH CENTER
-    
-    Critical Parameters:
-    - Temperature: 647.1 K (373.95°C)
-    - Pressure: 22.064 MPa (3,200 psi)
-    
-    Fundamental Properties:
-    Above the critical point, water exhibits unique properties that make it an exceptional 
-    reaction medium:
-    
-    1. IONIC EQUILIBRIUM COLLAPSE
-       - Ion product (Kw) drops from 10^-14 to 10^-20 or lower
-       - Water behaves as a non-polar solvent
-       - Organic compounds become highly soluble
-       - Salts precipitate out (major operational challenge)
-    
-    2. RADICAL CHEMISTRY
-       - Primary radicals: OH• (hydroxyl), HO₂• (hydroperoxyl), H• (hydrogen atom)
-       - Reaction pathways dominated by radical chain mechanisms
-       - Oxidation rates 100-1000x faster than subcritical conditions
-       - Near-complete destruction (>99.99%) of organic hazardous waste
-    
-    3. MATERIALS CHALLENGES
-       - Hastelloy C-276: Industry standard, but subject to intergranular corrosion
-       - Chloride-accelerated stress corrosion cracking (SCC) at >500°C
-       - Salt precipitation on reactor walls leads to hot spots and thermal fatigue
-       - Titanium liner concepts show promise for chloride environments
-    
-    4. OPERATIONAL REGIMES
-       - Hydrothermal Flames: >600°C, spontaneous ignition of organics in SCW
-       - Salt Management: Critical for continuous operation; requires engineered separators
-       - Residence Time: Typically 30-120 seconds for 99.99% destruction efficiency
-    
-    NASA Glenn Focus Areas:
-    - Closed-loop life support systems for spacecraft
-    - Waste water treatment and resource recovery
-    - Hybrid propulsion systems using SCWO energy release
-    
-    Key References:
-    - Proc. Int. Conf. on SCWO (1995-2018)
-    - NASA/TM-2003-212185: "SCWO for Spacecraft Waste Processing"
-    """
-    
-    doc2 = """
-    === DOCUMENT 2: RTCR_Chemical_Pathways.txt ===
-    
-    RADICAL THERMOCHEMICAL CHAIN REACTIONS (RTCR) FOR IN-SITU H₂ GENERATION
-    
-    MISSION OBJECTIVE:
-    Induce and sustain radical-mediated hydrogen production from ultramafic rock 
-    formations using supercritical water as the reaction initiator and medium.
-    
-    TARGET LITHOLOGY:
-    - Olivine: (Mg,Fe)₂SiO₄ - Primary reactant
-    - Serpentinite: Mg₃Si₂O₅(OH)₄ - Pre-hydrated ultramafic phase
-    - Chromite: FeCr₂O₄ - Iron source for redox coupling
-    
-    PROPOSED RTCR MECHANISM (SIMPLIFIED):
-    
-    Step 1: Initiation (Supercritical Regime, T > 400°C, P > 25 MPa)
-        H₂O → OH• + H•
-        (Water dissociation enhanced by extreme PT conditions)
-    
-    Step 2: Iron Oxidation (Primary H₂ Source)
-        Fe²⁺(olivine) + OH• → Fe³⁺ + OH⁻ + e⁻
-        2H• + 2e⁻ → H₂ ↑
-        (Net reaction: Olivine oxidation releases hydrogen)
-    
-    Step 3: Radical Propagation
-        OH• + CH₄(trace) → CH₃• + H₂O
-        CH₃• + H₂O → CH₃OH + H•
-        (Methane from deep carbon sources sustains radical pool)
-    
-    Step 4: Chain Branching (CRITICAL - Enables autocatalysis)
-        H• + O₂ → OH• + O•
-        O• + H₂O → 2OH•
-        (Net: 1 radical → 3 radicals, exponential growth if uncontrolled)
-    
-    ENGINEERING CHALLENGES:
-    
-    1. THERMAL RUNAWAY PREVENTION
-       - Exothermic reactions can cause T spike from 450°C to >800°C in <10 seconds
-       - Solution: Pulsed injection of SCW coolant, active quenching zones
-    
-    2. REACTION FRONT CONTROL
-       - Desired: Slow, sustained propagation (1-10 cm/day)
-       - Risk: Explosive detonation front if oxygen/fuel ratio not controlled
-       - Mitigation: Inert gas (N₂, Ar) dilution, pressure modulation
-    
-    3. HYDROGEN CAPTURE EFFICIENCY
-       - H₂ highly diffusive in fractured rock
-       - Requires engineered production wells with sealed completion zones
-       - Target: >60% capture efficiency at pilot scale
-    
-    4. CATALYST POISONING
-       - Sulfur species (H₂S, SO₂) from pyrite (FeS₂) inhibit radical chains
-       - Heavy metals (Ni, Cr) can catalyze unwanted side reactions
-       - Solution: Pre-treatment of formation with acid wash
-    
-    SAFETY PROTOCOLS:
-    - Real-time downhole temperature and pressure monitoring (fiber optic sensors)
-    - Emergency shut-off valves at surface and depth intervals
-    - Seismic monitoring for induced microearthquakes (M < 2.0 acceptable)
-    - H₂S detection systems (OSHA PEL: 10 ppm TWA, 15 ppm STEL)
-    
-    ECONOMIC VIABILITY THRESHOLD:
-    - Production: >500 kg H₂/day per well
-    - Operational cost: <$2.50/kg H₂ (competitive with SMR)
-    - Well lifetime: >5 years continuous operation
-    """
-    
-    doc3 = """
-    === DOCUMENT 3: Cosmos_X9_Drilling_Challenges.txt ===
-    
-    COSMOS X-9: SUPERCRITICAL WATER DRILLING FOR CRYSTALLINE FORMATIONS
-    
-    CONCEPT OVERVIEW:
-    Replace conventional oil-based or water-based muds with Supercritical Water (SCW) 
-    as the primary drilling fluid. Target applications: geothermal wells, deep hard-rock 
-    mineral exploration, and ultra-deep scientific drilling.
-    
-    TECHNICAL ADVANTAGES:
-    
-    1. ENHANCED RATE OF PENETRATION (ROP)
-       - Conventional drilling in granite: 2-8 m/hr
-       - SCW thermal spalling assistance: Projected 15-30 m/hr
-       - Mechanism: Thermal shock induces microfractures ahead of bit
-    
-    2. REDUCED BIT WEAR
-       - SCW acts as cooling fluid despite high temperature (paradoxical effect)
-       - Lower viscosity reduces frictional drag on PDC cutters
-       - Extended bit life: 400-600 meters vs. 150-250 meters (conventional)
-    
-    3. ROCK FRAGMENTATION PHYSICS
-       - Quartz (α → β transition at 573°C): Volume expansion creates weakness planes
-       - Feldspar thermal expansion coefficient mismatch with quartz → grain boundary failure
-       - SCW penetrates microcracks, flash-vaporizes upon pressure drop → explosive comminution
-    
-    OPERATIONAL CHALLENGES:
-    
-    1. EXTREME DOWNHOLE TEMPERATURES (PRIMARY CONCERN)
-       - Surface injection: 400-450°C (SCW regime maintained)
-       - Bottomhole circulating temperature (BHCT): 350-550°C (depends on depth & geothermal gradient)
-       - Problem: Exceeds rating of standard elastomers, MWD tools, and logging instruments
-       - Solution: Ceramic-insulated drill string, high-temperature electronics (SiC-based)
-    
-    2. WELLBORE STABILITY UNDER THERMAL CYCLING
-       - Heating phase (drilling): Rock expands, compressive hoop stress
-       - Cooling phase (trip out): Rock contracts, tensile hoop stress → spalling
-       - Cyclic loading can induce progressive wellbore enlargement
-       - Mitigation: Controlled heating/cooling rates (<50°C/hr), casing schedule optimization
-    
-    3. CUTTINGS TRANSPORT (CRITICAL FAILURE MODE)
-       - SCW viscosity: 0.05-0.08 cP (vs. 30-80 cP for conventional mud)
-       - Settling velocity of cuttings 100x higher → bed accumulation
-       - Consequence: Stuck pipe, loss of circulation, well control incidents
-       - Engineering Solution:
-         a) High annular velocity: >1.5 m/s (requires high pump rates)
-         b) Pulsed flow regime: Alternating high/low flow creates turbulent bursts
-         c) Hydraulic jetting at bit: Local high-velocity jets sweep cuttings
-    
-    4. MATERIALS & CORROSION
-       - Drill pipe: Inconel 625 or 718 (nickel-based superalloy)
-       - BOP seals: Graphite-based composite, rated to 350°C
-       - Corrosion mechanism: Oxygen-rich SCW causes rapid oxidation of carbon steel
-         - Corrosion rate: 0.5-2.0 mm/year (vs. 0.05 mm/year in oil-based mud)
-       - Solution: Chromium oxide passivation layer, oxygen scavenger injection (hydrazine)
-    
-    5. PRESSURE MANAGEMENT
-       - Must maintain P > 22.1 MPa throughout entire circulating system
-       - Subcritical regions → two-phase flow → pump cavitation → catastrophic failure
-       - Backpressure control: Automated choke system at surface, ±0.5 MPa tolerance
-    
-    SURFACE EQUIPMENT REQUIREMENTS:
-    - High-pressure, high-temperature pump: 30 MPa, 450°C, 2000 LPM
-    - Heat exchanger: Recover thermal energy from returns (efficiency >70%)
-    - Solids separation: Cyclone separators rated for SCW (no mechanical screens)
-    - Emergency cooling system: Rapid quench capability in <60 seconds
-    
-    FIELD TEST RESULTS (HYPOTHETICAL - 2024 PILOT):
-    - Location: Iceland Geothermal Field, basaltic formation
-    - Depth: 3,200 meters
-    - Average ROP: 22 m/hr (vs. 6 m/hr conventional baseline)
-    - Incidents: 2 stuck pipe events (both resolved), 1 BOP seal failure (thermal runaway event)
-    - Conclusion: Concept viable with improved real-time temperature control
-    
-    REGULATORY & SAFETY CONSIDERATIONS:
-    - OSHA confined space entry protocols for high-temperature environments
-    - API RP 53: Blowout Prevention Equipment Systems (modified for SCW compatibility)
-    - Environmental impact: SCW returns must be cooled to <90°C before disposal
-    - Personnel exclusion zone: 50-meter radius during circulation operations
-    """
-    
-    # Concatenate all documents with clear delimiters
-    knowledge_base = f"""
-{'='*80}
-SIMIC VIRTUAL EXPERT SYSTEM - FOUNDATIONAL KNOWLEDGE BASE
-{'='*80}
+# Search the audit log:
+python -m sves.audit --user alice --since 2026-10-01T00:00
 
-The following documents represent the core technical knowledge for RTCR 
-and Cosmos X-9 technologies. Use this information to answer user queries 
-with precision and depth.
+# Parameter sweep of a native tool (test campaign design):
+python -m sves.sweep rtcr -p temperature_c=400:500:11 -p o2_fraction=0,0.01,0.05 -o sweep.npz
 
-{doc1}
+# Import recorded well data for the query_well_data tool:
+python -m sves.welldata import iceland-pilot pilot_rop.csv --description "Iceland pilot, well IP-1"
+python -m sves.welldata import iceland-pilot-events incidents.csv --kind events
 
-{doc2}
+# Live downhole telemetry (alerts in the UI, well state in every prompt):
+SVES_TELEMETRY=csv:/data/well.csv,udp:127.0.0.1:5140 streamlit run app.py
 
-{doc3}
+ARCHITECTURE:
+------------
+This file is the Streamlit front end only. The engine lives in the ``sves``
+package and is importable without Streamlit:
+  sves.knowledge  Foundational knowledge base documents
+  sves.clients    LLM backend clients, replica pooling and failover
+  sves.agent      System prompt assembly and get_sves_response()
+  sves.audit      Append-only audit log of queries, responses and config changes
+  sves.sweep      Parallel, cached parameter sweeps over the native tools
+  sves.water      IAPWS water property tables (density, viscosity, cp, pKw)
+  sves.telemetry  Streaming downhole telemetry, runaway/pressure alerts, well state
+  sves.welldata   Memory-mapped columnar store of recorded well and pilot-test data
 
-{'='*80}
-END OF KNOWLEDGE BASE
-{'='*80}
+AUTHOR: Simic Energy Services
+VERSION: 2.0.0 (Government Edition - Self-Hosted)
+COMPLIANCE: FedRAMP High Ready
 """
-    
-    return knowledge_base
+
+import streamlit as st
+import dataclasses
+import io
+import math
+import os
+import time
+import uuid
+
+from sves.admission import AdmissionRequest
+from sves.agent import build_system_prompt, get_sves_response_stream
+from sves.audit import audit_config_change, audit_user, get_audit_log
+from sves.balancer import ROUTING_STRATEGIES
+from sves.clients import (
+    AdmissionControlledClient, PooledLLMClient, ResilientLLMClient, create_llm_client, get_backend_status
+)
+from sves.coalesce import get_single_flight
+from sves.config import DEFAULT_CONFIGS, LLMProvider, load_config_overrides, parse_replica_urls
+from sves.conversations import get_conversation_store, open_conversation
+from sves.metrics import RequestTrace, get_metrics, record_stage, start_metrics_exporter
+from sves.prompt_cache import get_prompt_cache
+from sves.response_cache import ResponseCacheConfig, get_response_cache
+from sves.retrieval import RetrievalConfig
+from sves.drilling import FORMATIONS
+from sves.rtcr import LITHOLOGY_FE2
+from sves.sweep import SWEEP_TOOLS, SweepSpec, run_sweep, save_sweep
+from sves.telemetry import CRITICAL, get_telemetry_monitor
+from sves.warmup import get_warmup, start_warm_up
+from sves.water import preload_water_properties
 
 
 # ============================================================================
-# COMPONENT 2: LLM BACKEND CLIENTS
+# COMPONENT 1: STREAMLIT USER INTERFACE
 # ============================================================================
 
-class LLMClient(ABC):
-    """Abstract base class for LLM clients."""
-    
-    @abstractmethod
-    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
-        """Generate a response from the LLM."""
-        pass
-    
-    @abstractmethod
-    def health_check(self) -> bool:
-        """Check if the LLM backend is available."""
-        pass
-
-
-class OllamaClient(LLMClient):
-    """Client for Ollama local LLM server."""
-    
-    def __init__(self, config: LLMConfig):
-        self.config = config
-        self.api_url = f"{config.base_url}/api/chat"
-        self.health_url = f"{config.base_url}/api/tags"
-    
-    def health_check(self) -> bool:
-        """Check if Ollama server is running."""
-        try:
-            response = requests.get(self.health_url, timeout=5)
-            return response.status_code == 200
-        except:
-            return False
-    
-    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
-        """Generate response using Ollama API."""
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": prompt})
-        
-        payload = {
-            "model": self.config.model_name,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": self.config.temperature,
-                "num_predict": self.config.max_tokens
-            }
-        }
-        
-        response = requests.post(
-            self.api_url,
-            json=payload,
-            timeout=self.config.timeout
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["message"]["content"]
-
-
-class VLLMClient(LLMClient):
-    """Client for vLLM OpenAI-compatible server."""
-    
-    def __init__(self, config: LLMConfig):
-        self.config = config
-        self.api_url = f"{config.base_url}/v1/chat/completions"
-        self.health_url = f"{config.base_url}/health"
-    
-    def health_check(self) -> bool:
-        """Check if vLLM server is running."""
-        try:
-            response = requests.get(self.health_url, timeout=5)
-            return response.status_code == 200
-        except:
-            return False
-    
-    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
-        """Generate response using vLLM OpenAI-compatible API."""
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": prompt})
-        
-        headers = {"Content-Type": "application/json"}
-        if self.config.api_key:
-            headers["Authorization"] = f"Bearer {self.config.api_key}"
-        
-        payload = {
-            "model": self.config.model_name,
-            "messages": messages,
-            "max_tokens": self.config.max_tokens,
-            "temperature": self.config.temperature
-        }
-        
-        response = requests.post(
-            self.api_url,
-            json=payload,
-            headers=headers,
-            timeout=self.config.timeout
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-
-
-class LMStudioClient(LLMClient):
-    """Client for LM Studio local server (OpenAI-compatible)."""
-    
-    def __init__(self, config: LLMConfig):
-        self.config = config
-        self.api_url = f"{config.base_url}/v1/chat/completions"
-    
-    def health_check(self) -> bool:
-        """Check if LM Studio server is running."""
-        try:
-            response = requests.get(f"{self.config.base_url}/v1/models", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
-    
-    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
-        """Generate response using LM Studio OpenAI-compatible API."""
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": prompt})
-        
-        payload = {
-            "model": self.config.model_name,
-            "messages": messages,
-            "max_tokens": self.config.max_tokens,
-            "temperature": self.config.temperature
-        }
-        
-        response = requests.post(
-            self.api_url,
-            json=payload,
-            timeout=self.config.timeout
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-
-
-class AzureGovClient(LLMClient):
-    """Client for Azure Government OpenAI service."""
-    
-    def __init__(self, config: LLMConfig):
-        self.config = config
-        self.api_version = "2024-02-15-preview"
-        self.api_url = f"{config.base_url}/openai/deployments/{config.model_name}/chat/completions?api-version={self.api_version}"
-    
-    def health_check(self) -> bool:
-        """Check if Azure OpenAI endpoint is accessible."""
-        try:
-            # Simple connectivity check
-            response = requests.get(
-                self.config.base_url,
-                headers={"api-key": self.config.api_key or ""},
-                timeout=5
-            )
-            return response.status_code in [200, 401, 403]  # Endpoint exists
-        except:
-            return False
-    
-    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
-        """Generate response using Azure Government OpenAI API."""
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": prompt})
-        
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": self.config.api_key
-        }
-        
-        payload = {
-            "messages": messages,
-            "max_tokens": self.config.max_tokens,
-            "temperature": self.config.temperature
-        }
-        
-        response = requests.post(
-            self.api_url,
-            json=payload,
-            headers=headers,
-            timeout=self.config.timeout
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-
-
-def create_llm_client(config: LLMConfig) -> LLMClient:
-    """Factory function to create the appropriate LLM client."""
-    client_map = {
-        LLMProvider.OLLAMA: OllamaClient,
-        LLMProvider.VLLM: VLLMClient,
-        LLMProvider.LM_STUDIO: LMStudioClient,
-        LLMProvider.AZURE_GOV: AzureGovClient,
-        LLMProvider.CUSTOM_API: VLLMClient,  # Use OpenAI-compatible client
-    }
-    
-    client_class = client_map.get(config.provider)
-    if not client_class:
-        raise ValueError(f"Unsupported provider: {config.provider}")
-    
-    return client_class(config)
-
+# Minimum seconds between incremental re-renders of a streaming response
+STREAM_RENDER_INTERVAL = 0.05
 
-# ============================================================================
-# COMPONENT 3: AI AGENT CORE
-# ============================================================================
+# Request header naming the signed-in user, set by an authenticating reverse
+# proxy (e.g. oauth2-proxy); audit records fall back to the session id
+AUDIT_USER_HEADER = os.environ.get("SVES_AUDIT_USER_HEADER", "X-Forwarded-User")
 
-def build_system_prompt() -> str:
-    """Build the system prompt with knowledge base."""
-    knowledge_base = load_knowledge_base()
-    
-    system_prompt = f"""You are the Simic Virtual Expert System (SVES), a world-class AI expert in supercritical chemistry, drilling engineering, and geomechanics. You possess deep expertise in:
-
-1. Supercritical Water Oxidation (SCWO) and supercritical fluid chemistry
-2. Radical Thermochemical Chain Reactions (RTCR) for hydrogen generation
-3. Advanced drilling technologies, particularly the Cosmos X-9 supercritical drilling system
-4. Geomechanics, wellbore stability, and subsurface engineering
-5. Chemical kinetics, thermodynamics, and process safety
-
-CONTEXT - YOUR FOUNDATIONAL KNOWLEDGE BASE:
-{knowledge_base}
-
-AVAILABLE TOOLS AND CAPABILITIES:
-
-You have access to simulated Python tools for technical analysis and experimental design. When the user's query requires calculations, simulations, or structured experimental plans, you MUST generate the appropriate Python code in a markdown code block. Do NOT just describe what should be done—generate executable code.
-
-**Tool 1: design_rtcr_experiment**
-Purpose: Design a detailed RTCR experimental protocol
-Usage: When user asks to design an experiment, plan a test, or create an experimental setup
-Output: Generate a Python function that returns a structured dictionary with:
-- reactant_recipe (rock composition, water ratios, additives)
-- safety_precautions (temperature limits, pressure relief, monitoring systems)
-- expected_products (H2 yield predictions, byproducts, reaction timeline)
-
-**Tool 2: analyze_drilling_scenario**
-Purpose: Analyze drilling performance and provide engineering recommendations
-Usage: When user asks about drilling problems, ROP optimization, or wellbore stability
-Output: Generate a Python function that performs calculations and returns:
-- analysis (quantitative assessment of the scenario)
-- recommendation (specific engineering actions)
-- risk_factors (identified hazards with severity ratings)
-
-RESPONSE GUIDELINES:
-
-1. **Precision**: Use specific numbers, equations, and technical terminology from the knowledge base
-2. **Safety First**: Always prioritize operational safety and regulatory compliance
-3. **Actionable**: Provide concrete recommendations, not just theoretical discussions
-4. **Code When Needed**: If the query involves calculations or structured planning, generate Python code
-5. **Cite Knowledge**: Reference specific documents when drawing on the knowledge base
-6. **Acknowledge Limits**: If information is not in the knowledge base, state assumptions clearly
-
-When generating code:
-- Use proper Python syntax with type hints
-- Include docstrings explaining the function's purpose
-- Add comments for complex calculations
-- Use numpy for numerical operations
-- Return structured dictionaries with clear keys
-- Include a demonstration call that executes the function
-
-Now, respond to the user's query with expert-level technical depth."""
-
-    return system_prompt
-
-
-def get_sves_response(
-    user_query: str, 
-    llm_client: LLMClient, 
-    conversation_history: List[Dict] = None
-) -> str:
-    """
-    Core AI reasoning engine. Calls the self-hosted LLM.
-    
-    Args:
-        user_query: The user's question or request
-        llm_client: The LLM client to use for generation
-        conversation_history: Previous messages in the conversation
-        
-    Returns:
-        str: LLM's expert response
-        
-    Raises:
-        Exception: If LLM call fails
-    """
-    
-    try:
-        # Build system prompt
-        system_prompt = build_system_prompt()
-        
-        # Prepare conversation history
-        if conversation_history is None:
-            conversation_history = []
-        
-        # Generate response
-        response = llm_client.generate(
-            prompt=user_query,
-            system_prompt=system_prompt,
-            conversation_history=conversation_history
-        )
-        
-        return response
-        
-    except requests.exceptions.ConnectionError:
-        raise Exception(
-            "Cannot connect to LLM server. Please ensure your self-hosted model is running.\n\n"
-            "For Ollama: Run 'ollama serve' and 'ollama pull llama3.1:70b'\n"
-            "For vLLM: Run 'python -m vllm.entrypoints.openai.api_server --model meta-llama/Llama-3.1-70B-Instruct'"
-        )
-    except requests.exceptions.Timeout:
-        raise Exception(
-            "LLM request timed out. The model may be loading or the request is too complex.\n"
-            "Try a simpler query or increase the timeout setting."
-        )
-    except requests.exceptions.HTTPError as e:
-        raise Exception(f"LLM server error: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Error generating response: {str(e)}\n\n{traceback.format_exc()}")
 
+def audit_identity() -> str:
+    """The user this session's audit records are attributed to."""
+    context = getattr(st, "context", None)  # Streamlit >= 1.37
+    headers = getattr(context, "headers", None)
+    user = headers.get(AUDIT_USER_HEADER) if headers else None
+    return user or f"session:{st.session_state.session_id}"
 
-# ============================================================================
-# COMPONENT 4: STREAMLIT USER INTERFACE
-# ============================================================================
 
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
+    if 'conversation' not in st.session_state:
+        # Persisted; only a bounded window of recent messages stays in memory
+        st.session_state.conversation = open_conversation()
     if 'llm_config' not in st.session_state:
-        st.session_state.llm_config = DEFAULT_CONFIGS[LLMProvider.OLLAMA]
+        st.session_state.llm_config = load_config_overrides(DEFAULT_CONFIGS[LLMProvider.OLLAMA])
     if 'llm_client' not in st.session_state:
         st.session_state.llm_client = None
+    if 'retrieval_config' not in st.session_state:
+        st.session_state.retrieval_config = RetrievalConfig()
+    if 'cache_config' not in st.session_state:
+        st.session_state.cache_config = ResponseCacheConfig()
+    if 'last_trace' not in st.session_state:
+        st.session_state.last_trace = None
+    if 'sweep_result' not in st.session_state:
+        st.session_state.sweep_result = None
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex  # Fair-queueing identity
+        with audit_user(audit_identity()):
+            audit_config_change("llm", st.session_state.llm_config)
 
 
 def render_sidebar():
@@ -688,16 +146,21 @@ def render_sidebar():
         # LLM Configuration
         st.subheader("⚙️ LLM Configuration")
         
-        # Provider selection
+        # Provider selection (defaults to the deployment configuration)
+        current_config = st.session_state.llm_config
+        provider_options = [p.value for p in LLMProvider]
         provider = st.selectbox(
             "AI Backend",
-            options=[p.value for p in LLMProvider],
-            index=0,
+            options=provider_options,
+            index=provider_options.index(current_config.provider.value),
             help="Select your self-hosted LLM provider"
         )
         
         selected_provider = LLMProvider(provider)
-        default_config = DEFAULT_CONFIGS.get(selected_provider, DEFAULT_CONFIGS[LLMProvider.OLLAMA])
+        if selected_provider == current_config.provider:
+            default_config = current_config
+        else:
+            default_config = DEFAULT_CONFIGS.get(selected_provider, DEFAULT_CONFIGS[LLMProvider.OLLAMA])
         
         # Server URL
         base_url = st.text_input(
@@ -714,32 +177,95 @@ def render_sidebar():
         )
         
         # API Key (for Azure Gov or secured endpoints)
-        api_key = None
+        api_key = default_config.api_key
         if selected_provider in [LLMProvider.AZURE_GOV, LLMProvider.CUSTOM_API]:
             api_key = st.text_input(
                 "API Key",
                 type="password",
-                help="API key for secured endpoints"
-            )
+                help="API key for secured endpoints (leave empty to keep the configured key)"
+            ) or default_config.api_key
         
         # Advanced settings
         with st.expander("Advanced Settings"):
             max_tokens = st.slider("Max Tokens", 512, 8192, 4096)
+            context_window = st.select_slider(
+                "Context Window (tokens)",
+                options=[4096, 8192, 16384, 32768, 65536, 131072],
+                value=8192,
+                help="Model context length; older conversation turns are summarized to fit"
+            )
             temperature = st.slider("Temperature", 0.0, 1.0, 0.7)
             timeout = st.slider("Timeout (seconds)", 30, 300, 120)
+            pool_maxsize = st.slider(
+                "Max Connections per Host", 1, 64, min(max(default_config.pool_maxsize, 1), 64),
+                help="Size of the shared keep-alive connection pool for this backend"
+            )
+            replica_text = st.text_area(
+                "Replica URLs (optional)",
+                value="\n".join(default_config.replica_urls or []),
+                help="One base URL per line. With two or more, requests are load balanced "
+                     "across the replicas and Server URL is ignored."
+            )
+            routing = st.selectbox(
+                "Replica Routing",
+                options=list(ROUTING_STRATEGIES),
+                index=list(ROUTING_STRATEGIES).index(default_config.routing),
+                help="least_outstanding: fewest in-flight requests; ewma: lowest measured latency"
+            )
+            max_retries = st.slider(
+                "Retries per Backend", 0, 5, default_config.max_retries,
+                help="Retries with jittered backoff for connection errors and 429/502/503/504"
+            )
+            max_concurrency = st.slider(
+                "Max Concurrent Requests", 0, 32, default_config.max_concurrency,
+                help="Backend calls run at once per replica (shared by all sessions); "
+                     "the rest queue with chat ahead of batch jobs. 0 = unlimited"
+            )
+            model_keep_alive = default_config.model_keep_alive
+            if selected_provider in (LLMProvider.OLLAMA, LLMProvider.LM_STUDIO):
+                model_keep_alive = int(st.number_input(
+                    "Model Keep-Alive (seconds)",
+                    min_value=-1,
+                    value=model_keep_alive if model_keep_alive is not None else 0,
+                    step=60,
+                    help="How long the server keeps the model loaded after a request: "
+                         "-1 = indefinitely, 0 = server default (Ollama unloads after 5 minutes)"
+                )) or None
+            fallback_values = st.multiselect(
+                "Fallback Providers",
+                options=[p.value for p in LLMProvider if p != selected_provider],
+                default=[p.value for p in (default_config.fallback_providers or [])
+                         if p != selected_provider],
+                help="Tried in order when the primary backend fails or its circuit is open"
+            )
         
         # Apply configuration
         if st.button("🔄 Apply Configuration", use_container_width=True):
-            st.session_state.llm_config = LLMConfig(
+            previous_config = st.session_state.llm_config
+            # replace() keeps the fields without a sidebar input (pool_*,
+            # keep_alive, ...) instead of resetting them to LLMConfig defaults
+            st.session_state.llm_config = dataclasses.replace(
+                default_config,
                 provider=selected_provider,
                 base_url=base_url,
                 model_name=model_name,
                 api_key=api_key,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                timeout=timeout
+                timeout=timeout,
+                context_window=context_window,
+                pool_maxsize=pool_maxsize,
+                replica_urls=parse_replica_urls(replica_text),
+                routing=routing,
+                max_retries=max_retries,
+                max_concurrency=max_concurrency,
+                model_keep_alive=model_keep_alive,
+                fallback_providers=[LLMProvider(v) for v in fallback_values] or None
             )
+            with audit_user(audit_identity()):
+                audit_config_change("llm", st.session_state.llm_config, previous=previous_config)
             st.session_state.llm_client = create_llm_client(st.session_state.llm_config)
+            start_warm_up(st.session_state.llm_config, st.session_state.retrieval_config)
             st.success("✅ Configuration applied!")
         
         # Connection status
@@ -747,15 +273,129 @@ def render_sidebar():
         st.subheader("📡 Connection Status")
         
         if st.session_state.llm_client:
-            if st.session_state.llm_client.health_check():
+            status = get_backend_status(st.session_state.llm_client)
+            if status.healthy is None:
+                st.info(f"⏳ Checking connection to {selected_provider.value}...")
+            elif status.healthy:
                 st.success(f"✅ Connected to {selected_provider.value}")
-                st.caption(f"Model: {model_name}")
+                st.caption(f"Model: {model_name} | Probe latency: {status.latency_ms:.0f} ms")
             else:
                 st.error(f"❌ Cannot connect to {selected_provider.value}")
                 st.caption("Ensure your LLM server is running")
+            if status.stale:
+                st.caption("⚠️ Status is out of date; the backend probe has not completed recently")
+            warmup = get_warmup(st.session_state.llm_config)
+            if warmup is not None:
+                if not warmup.done:
+                    st.caption(f"🔥 Loading model and priming prompt cache... ({warmup.seconds:.0f}s)")
+                elif warmup.ok:
+                    st.caption(f"🔥 Model warm (ready in {warmup.seconds:.1f}s)")
+                else:
+                    errors = "; ".join(r.error for r in warmup.results if r.error)
+                    st.caption(f"⚠️ Model warm-up failed: {errors}")
+            client = st.session_state.llm_client
+            if isinstance(client, ResilientLLMClient):
+                for key, breaker in client.breaker_states():
+                    if breaker["state"] != "closed":
+                        retry_note = f", retry in {breaker['retry_in_s']:.0f}s" if breaker["retry_in_s"] else ""
+                        st.caption(f"🔌 Circuit {breaker['state']}: {key.split('|')[0]}{retry_note}")
+                client = client.backends[0][1]
+            if isinstance(client, AdmissionControlledClient):
+                load = client.controller.snapshot()
+                st.caption(
+                    f"🚦 {load['active']}/{load['max_concurrency']} requests running | "
+                    f"{load['waiting']} queued | {load['rejected']} rejected"
+                )
+                client = client.client
+            if isinstance(client, PooledLLMClient):
+                for replica in client.balancer.snapshot():
+                    state_icon = "⛔" if replica["ejected"] else "🟢"
+                    latency = f"{replica['ewma_ms']:.0f} ms" if replica["ewma_ms"] is not None else "n/a"
+                    st.caption(
+                        f"{state_icon} {replica['replica']} | in-flight {replica['outstanding']} | "
+                        f"EWMA {latency} | {replica['failures']}/{replica['requests']} failed"
+                    )
         else:
             st.warning("⚠️ Click 'Apply Configuration' to connect")
-        
+
+        # Knowledge base retrieval settings (applied immediately)
+        with st.expander("📚 Knowledge Retrieval"):
+            retrieval_config = st.session_state.retrieval_config
+            previous_retrieval = dataclasses.replace(retrieval_config)
+            retrieval_config.enabled = st.checkbox(
+                "Retrieve relevant sections only",
+                value=retrieval_config.enabled,
+                help="When off, the full knowledge base is sent with every query"
+            )
+            retrieval_config.top_k = st.slider("Top-k Sections", 1, 12, retrieval_config.top_k)
+            retrieval_config.token_budget = st.slider(
+                "Context Token Budget", 250, 8000, retrieval_config.token_budget, step=250,
+                help="Maximum approximate tokens of knowledge base excerpts per query"
+            )
+            with audit_user(audit_identity()):
+                audit_config_change("retrieval", retrieval_config, previous=previous_retrieval)
+
+        # Response cache policy and statistics
+        with st.expander("⚡ Response Cache"):
+            cache_config = st.session_state.cache_config
+            previous_cache = dataclasses.replace(cache_config)
+            cache_config.enabled = st.checkbox("Enable response cache", value=cache_config.enabled)
+            cache_config.cache_nondeterministic = st.checkbox(
+                "Cache sampled responses (temperature > 0)",
+                value=cache_config.cache_nondeterministic,
+                help="By default only deterministic (temperature 0) responses are cached"
+            )
+            cache_config.semantic = st.checkbox(
+                "Serve near-duplicate questions",
+                value=cache_config.semantic,
+                help="Semantic tier: reuse answers to similar questions above the threshold"
+            )
+            cache_config.semantic_threshold = st.slider(
+                "Similarity Threshold", 0.80, 0.99, cache_config.semantic_threshold, step=0.01,
+                help="Near-duplicates must also name the same numbers (depths, temperatures, ...)"
+            )
+            with audit_user(audit_identity()):
+                audit_config_change("response_cache", cache_config, previous=previous_cache)
+            cache_stats = get_response_cache().stats()
+            st.caption(
+                f"Hit rate: {cache_stats['hit_rate']:.0%} | "
+                f"Hits: {cache_stats['hits']} exact, {cache_stats['semantic_hits']} semantic, "
+                f"{cache_stats['disk_hits']} disk | Misses: {cache_stats['misses']}"
+            )
+            st.caption(f"Entries: {cache_stats['entries']} in memory, {cache_stats['disk_entries']} on disk")
+            flight_stats = get_single_flight().stats()
+            st.caption(
+                f"Coalesced: {flight_stats['coalesced']} requests joined an in-flight generation "
+                f"({flight_stats['in_flight']} in flight)"
+            )
+            if st.button("Clear Response Cache", use_container_width=True):
+                get_response_cache().clear()
+
+        # System prompt cache statistics
+        with st.expander("🧠 System Prompt Cache"):
+            prompt_stats = get_prompt_cache().stats()
+            if not prompt_stats["builds"]:
+                build_system_prompt()  # Ensure the prompt has been built at least once
+                prompt_stats = get_prompt_cache().stats()
+            st.caption(
+                f"Size: {prompt_stats['prompt_chars']:,} chars "
+                f"(~{prompt_stats['approx_tokens']:,} tokens)"
+            )
+            st.caption(f"Last build: {prompt_stats['build_time_ms']:.2f} ms")
+            st.caption(f"Builds: {prompt_stats['builds']} | Cache hits: {prompt_stats['hits']}")
+
+        # Per-request stage timings and process-wide backend metrics
+        with st.expander("📈 Performance"):
+            render_performance_panel()
+
+        # Parameter sweeps over the native tools (results charted in the main area)
+        with st.expander("🧪 Parameter Sweep"):
+            render_sweep_panel()
+
+        # Live downhole telemetry (SVES_TELEMETRY sources)
+        with st.expander("🌡️ Well Telemetry"):
+            render_telemetry_panel()
+
         st.markdown("---")
         
         # System description
@@ -770,9 +410,16 @@ def render_sidebar():
         **Security Features:**
         - 🔒 Self-hosted LLM (no data leaves your network)
         - 🏛️ FedRAMP High ready architecture
-        - 📊 Full audit logging capability
+        - 📊 Audit log of every query, response and configuration change
         - 🔐 No external API dependencies
         """)
+        audit_log = get_audit_log()
+        if audit_log.directory is None:
+            st.caption("⚠️ Audit logging is disabled (SVES_AUDIT_DIR=0)")
+        else:
+            st.caption(f"Audit log: {audit_log.directory}")
+            if audit_log.write_errors:
+                st.error(f"{audit_log.write_errors} audit records failed to write")
         
         st.markdown("---")
         
@@ -787,10 +434,132 @@ def render_sidebar():
         st.markdown("---")
         st.caption("Simic Energy Services | v2.0.0 Government Edition")
         
-        # Clear conversation button
-        if st.button("🗑️ Clear Conversation", use_container_width=True):
-            st.session_state.messages = []
+        # Start a new conversation; the current one stays in the store
+        if st.button("🆕 New Conversation", use_container_width=True):
+            st.session_state.conversation = open_conversation()
             st.rerun()
+        
+        with st.expander("🗂️ Recent Conversations"):
+            for info in get_conversation_store().list_conversations(limit=10):
+                if info.id == st.session_state.conversation.id:
+                    continue
+                label = f"{info.title or 'Untitled'} ({info.message_count} messages)"
+                if st.button(label, key=f"conversation-{info.id}", use_container_width=True):
+                    st.session_state.conversation = open_conversation(info.id)
+                    st.rerun()
+
+
+def render_performance_panel():
+    """Render the last request's stage breakdown and aggregate backend metrics."""
+    trace = st.session_state.last_trace
+    if trace is None:
+        st.caption("No requests yet")
+    else:
+        source = " (response cache)" if trace.cached else " (shared generation)" if trace.coalesced else ""
+        st.caption("**Last request**" + source)
+        for name, ms in trace.stages_ms.items():
+            st.caption(f"{name}: {ms:,.0f} ms")
+        if trace.ttft_ms is not None:
+            st.caption(f"First token: {trace.ttft_ms:,.0f} ms")
+        if trace.prompt_tokens or trace.completion_tokens:
+            rate = f" | {trace.tokens_per_sec:.1f} tok/s" if trace.tokens_per_sec else ""
+            st.caption(f"Tokens: {trace.prompt_tokens:,} prompt, {trace.completion_tokens:,} completion{rate}")
+
+    summary = get_metrics().summary()
+    stages = summary.get("sves_stage_duration_seconds", [])
+    if stages:
+        st.caption("**Mean stage time (all sessions)**")
+        for series in sorted(stages, key=lambda s: s["labels"]["stage"]):
+            st.caption(f"{series['labels']['stage']}: {series['mean'] * 1000:,.0f} ms × {series['count']}")
+    completion_tokens = sum(s["value"] for s in summary.get("sves_llm_completion_tokens_total", []))
+    if completion_tokens:
+        prompt_tokens = sum(s["value"] for s in summary.get("sves_llm_prompt_tokens_total", []))
+        st.caption(f"Backend tokens: {prompt_tokens:,.0f} prompt, {completion_tokens:,.0f} completion")
+
+
+def render_telemetry_panel():
+    """Render the latest reading of every telemetry sensor and recent alerts."""
+    monitor = get_telemetry_monitor()
+    states = monitor.sensor_states()
+    if not states:
+        st.caption("No telemetry received (set SVES_TELEMETRY)")
+        return
+    now = time.time()
+    for state in sorted(states, key=lambda s: s["sensor"]):
+        readings = [f"{state[key]:.{digits}f} {unit}" for key, digits, unit in
+                    (("temperature_c", 0, "°C"), ("rate_c_s", 1, "°C/s"), ("pressure_mpa", 2, "MPa"))
+                    if math.isfinite(state[key])]
+        st.caption(f"**{state['sensor']}**: " + ", ".join(readings) + f" ({now - state['timestamp']:.0f} s ago)")
+    alerts = monitor.recent_alerts(limit=10)
+    if alerts:
+        st.caption("**Recent alerts**")
+        for alert in alerts:
+            status = "" if alert.active else " (cleared)"
+            st.caption(f"{alert.describe()}{status}")
+
+
+def render_sweep_panel():
+    """Render the sweep form; runs the sweep on the process pool when submitted."""
+    tool_name = st.selectbox("Tool", list(SWEEP_TOOLS), format_func=lambda name: {
+        "rtcr": "RTCR experiment (design_rtcr_experiment)",
+        "drilling": "Drilling scenario (analyze_drilling_scenario)",
+    }.get(name, name))
+    tool = SWEEP_TOOLS[tool_name]
+    inputs = list(tool.inputs)
+    x_name = st.selectbox("Swept input", inputs)
+    default = tool.inputs[x_name]
+    low = st.number_input("From", value=float(default) * 0.8, format="%g")
+    high = st.number_input("To", value=float(default) * 1.2, format="%g")
+    count = st.slider("Points", 2, 50, 11)
+    series_name = st.selectbox("Series (optional)", ["(none)"] + [name for name in inputs if name != x_name])
+    series_values = []
+    if series_name != "(none)":
+        text = st.text_input("Series values (comma-separated)", value=f"{tool.inputs[series_name]:g}")
+        try:
+            series_values = [float(v) for v in text.split(",") if v.strip()]
+        except ValueError:
+            st.error("Series values must be numbers")
+    if tool_name == "rtcr":
+        fixed = {"lithology": st.selectbox("Lithology", list(LITHOLOGY_FE2))}
+    else:
+        fixed = {"formation": st.selectbox("Formation", list(FORMATIONS))}
+
+    if st.button("Run Sweep", use_container_width=True):
+        parameters = {x_name: [low + (high - low) * i / (count - 1) for i in range(count)]}
+        if series_values:
+            parameters[series_name] = series_values
+        bar = st.progress(0.0)
+        st.session_state.sweep_result = run_sweep(
+            SweepSpec(tool=tool_name, parameters=parameters, fixed=fixed),
+            progress=lambda done, total: bar.progress(done / max(total, 1))
+        )
+    result = st.session_state.sweep_result
+    if result is not None:
+        st.caption(f"Last sweep: {len(result.data)} points ({result.computed} computed, "
+                   f"{result.cached} cached) in {result.seconds:.1f} s")
+        for message, count in result.errors.items():
+            st.warning(f"{count} point(s) not evaluated: {message}")
+
+
+def render_sweep_results():
+    """Chart the last sweep: one output against the first swept input, a line per series value."""
+    result = st.session_state.sweep_result
+    with st.expander("🧪 Sweep Results", expanded=True):
+        tool = SWEEP_TOOLS[result.spec.tool]
+        names = list(result.spec.parameters)
+        output = st.selectbox("Output", list(tool.outputs) + list(tool.flags))
+        columns = result.columns()
+        x_values = list(result.spec.parameters[names[0]])
+        series = list(result.spec.parameters[names[1]]) if len(names) > 1 else [None]
+        # Grid points are ordered with the last parameter varying fastest
+        values = columns[output].astype(float).reshape(len(x_values), len(series))
+        chart = {names[0]: x_values}
+        for j, value in enumerate(series):
+            chart[output if value is None else f"{names[1]}={value:g}"] = values[:, j]
+        st.line_chart(chart, x=names[0])
+        buffer = io.BytesIO()
+        save_sweep(buffer, result)
+        st.download_button("Download (.npz)", buffer.getvalue(), file_name=f"sweep-{result.spec.tool}.npz")
 
 
 def render_chat_interface():
@@ -798,16 +567,28 @@ def render_chat_interface():
     st.title("🔬 Simic Virtual Expert System")
     st.markdown("*Self-Hosted AI for RTCR & Cosmos X-9 Technologies*")
     
-    # Status banner
-    if st.session_state.llm_client and st.session_state.llm_client.health_check():
+    # Status banner (cached status from the background health monitor)
+    status = get_backend_status(st.session_state.llm_client) if st.session_state.llm_client else None
+    if status and status.healthy:
         st.success(f"🟢 Connected to {st.session_state.llm_config.model_name}")
     else:
         st.warning("🟡 Configure and connect to your LLM server in the sidebar")
     
+    # Active critical telemetry alerts (thermal runaway, pressure below the floor)
+    for alert in get_telemetry_monitor().active_alerts():
+        if alert.severity == CRITICAL:
+            st.error(f"🚨 {alert.describe()}")
+    
+    if st.session_state.sweep_result is not None:
+        render_sweep_results()
+    
     st.markdown("---")
     
-    # Display conversation history
-    for message in st.session_state.messages:
+    # Display the latest messages; older ones are loaded from the store on request
+    conversation = st.session_state.conversation
+    if conversation.has_hidden and st.button("⬆️ Load older messages"):
+        conversation.show_older()
+    for message in conversation.visible_messages():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
@@ -818,49 +599,88 @@ def render_chat_interface():
             st.error("⚠️ Please configure and apply LLM settings in the sidebar.")
             return
         
-        # Check connection
-        if not st.session_state.llm_client.health_check():
+        # Check connection; an unknown or stale status lets the request through
+        if status and status.healthy is False and not status.stale:
             st.error("⚠️ Cannot connect to LLM server. Please check your configuration.")
             return
         
-        # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        # Add user message to chat history (the model gets the running summary
+        # plus the messages after it; see Conversation.history())
+        conversation_history = conversation.history()
+        conversation.append("user", prompt)
         
         # Display user message
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Generate AI response
+        # Generate AI response, rendering tokens as they arrive
         with st.chat_message("assistant"):
-            with st.spinner("🔬 Analyzing query with self-hosted LLM..."):
-                try:
-                    # Prepare conversation history for API
-                    conversation_history = [
-                        {"role": msg["role"], "content": msg["content"]}
-                        for msg in st.session_state.messages[:-1]
-                        if msg["role"] in ["user", "assistant"]
-                    ]
-                    
-                    # Get response from self-hosted LLM
-                    response = get_sves_response(
+            placeholder = st.empty()
+            placeholder.markdown("🔬 *Analyzing query with self-hosted LLM...*")
+            try:
+                # Stream response from self-hosted LLM, tracing each stage
+                trace = RequestTrace()
+                admission = AdmissionRequest(session=st.session_state.session_id)
+                parts = []
+                
+                def show_queue_position():
+                    if admission.queued and not parts:
+                        placeholder.markdown(
+                            f"⏳ *Waiting for the LLM backend: position {admission.position} "
+                            f"of {admission.queue_depth} in the queue...*"
+                        )
+                
+                with trace.activate(), admission.activate(), audit_user(audit_identity()):
+                    stream = get_sves_response_stream(
                         user_query=prompt,
                         llm_client=st.session_state.llm_client,
-                        conversation_history=conversation_history
+                        conversation_history=conversation_history,
+                        retrieval_config=st.session_state.retrieval_config,
+                        cache_config=st.session_state.cache_config,
+                        conversation_summary=conversation.summary,
+                        on_summary=conversation.record_summary,
+                        on_wait=show_queue_position
                     )
                     
-                    # Display response
-                    st.markdown(response)
-                    
-                    # Add assistant response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    last_render = 0.0
+                    render_time = 0.0
+                    for delta in stream:
+                        parts.append(delta)
+                        # Throttle re-renders; each one re-sends the message to the browser
+                        now = time.perf_counter()
+                        if now - last_render >= STREAM_RENDER_INTERVAL:
+                            placeholder.markdown("".join(parts) + "▌")
+                            last_render = time.perf_counter()
+                            render_time += last_render - now
                     
-                except Exception as e:
-                    error_message = f"❌ **Error**: {str(e)}"
-                    st.error(error_message)
+                    response = "".join(parts)
+                    now = time.perf_counter()
+                    placeholder.markdown(response)
+                    record_stage("ui_render", render_time + time.perf_counter() - now)
+                st.session_state.last_trace = trace
+                
+                metrics = stream.metrics
+                if metrics.cached:
+                    st.caption("⚡ Served from response cache")
+                elif trace.coalesced:
+                    st.caption("🔗 Shared with an identical question already being answered")
+                elif metrics.ttft_ms is not None and metrics.total_ms is not None:
+                    queued = f" · Queued {admission.wait_ms / 1000:.1f}s" if admission.wait_ms >= 100 else ""
+                    st.caption(
+                        f"⏱️ First token {metrics.ttft_ms / 1000:.2f}s · "
+                        f"Total {metrics.total_ms / 1000:.1f}s{queued}"
+                    )
+                
+                # Add assistant response to chat history
+                conversation.append("assistant", response)
+                
+            except Exception as e:
+                error_message = f"❌ **Error**: {str(e)}"
+                placeholder.error(error_message)
 
 
 # ============================================================================
-# COMPONENT 5: MAIN APPLICATION
+# COMPONENT 2: MAIN APPLICATION
 # ============================================================================
 
 def main():
@@ -896,6 +716,9 @@ def main():
         </style>
     """, unsafe_allow_html=True)
     
+    # Metrics endpoint/file sink (SVES_METRICS_PORT / SVES_METRICS_FILE)
+    start_metrics_exporter()
+    
     # Initialize session state
     initialize_session_state()
     
@@ -906,6 +729,15 @@ def main():
         except Exception:
             pass  # Will show warning in UI
     
+    # Load the model and prime the shared prompt prefix once per process
+    start_warm_up(st.session_state.llm_config, st.session_state.retrieval_config)
+    
+    # Memory-map (building on first run) the water property tables used by the tools
+    preload_water_properties()
+    
+    # Start the telemetry sources so alerts and the well state are live before the first question
+    get_telemetry_monitor()
+    
     # Render UI components
     render_sidebar()
     render_chat_interface()
@@ -0,0 +1,103 @@
+"""
+Import-time benchmark for the SVES core engine.
+
+Imports each core module in a fresh interpreter several times and fails
+(exit code 1) if the median import time exceeds its budget, or if a module
+that must stay off the core import path (Streamlit, NumPy) gets loaded.
+Run it in CI after changes to ``sves/``:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 9 --scale 2.0 --json
+
+Budgets are wall-clock milliseconds for the import statement alone
+(interpreter start-up excluded) on a typical developer machine; use
+``--scale`` on slower hosts rather than editing them.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module -> median import budget in milliseconds
+BUDGETS_MS = {
+    "sves": 15.0,
+    "sves.config": 25.0,
+    "sves.agent": 250.0,    # Dominated by requests/urllib3
+    "sves.batch": 275.0,
+}
+
+# Modules that importing the core engine must not load
+FORBIDDEN_MODULES = ("streamlit", "numpy")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000.0
+print(json.dumps({{"ms": elapsed_ms, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> Dict[str, object]:
+    """Import ``module`` in ``runs`` fresh interpreters; return timings and leaks."""
+    samples: List[float] = []
+    loaded: List[str] = []
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    code = _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = sorted(set(loaded) | set(result["loaded"]))
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "forbidden_loaded": loaded,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("SVES_IMPORT_BUDGET_SCALE", "1.0")),
+                        help="Multiply every budget (slow CI hosts); env SVES_IMPORT_BUDGET_SCALE")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args(argv)
+
+    # Warm the bytecode cache so the first sample does not include compilation
+    subprocess.run([sys.executable, "-c", "import sves.batch"], cwd=REPO_ROOT, check=True)
+
+    results = []
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        result = measure(module, args.runs)
+        result["budget_ms"] = round(budget * args.scale, 2)
+        result["ok"] = result["median_ms"] <= result["budget_ms"] and not result["forbidden_loaded"]
+        failed = failed or not result["ok"]
+        results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok  " if r["ok"] else "FAIL"
+            leaks = f"  loaded: {', '.join(r['forbidden_loaded'])}" if r["forbidden_loaded"] else ""
+            print(f"{status} {r['module']:<12} median {r['median_ms']:8.1f} ms  "
+                  f"(budget {r['budget_ms']:.0f} ms, min {r['min_ms']:.1f}, max {r['max_ms']:.1f}){leaks}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
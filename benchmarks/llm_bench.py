@@ -0,0 +1,229 @@
+"""
+End-to-end latency/throughput benchmark for the SVES LLM clients.
+
+Drives OllamaClient, VLLMClient and LMStudioClient against the local mock
+server (benchmarks/mock_server.py) or a real server, over a grid of
+concurrency levels and conversation history lengths, and reports per cell:
+p50/p95/p99 latency, p50/p95 time-to-first-token, requests/sec and errors.
+
+Results are printed as a table on stderr and written as JSON (stdout or
+``--output``) with the git commit, so runs can be compared across commits:
+
+    python benchmarks/llm_bench.py --output bench-$(git rev-parse --short HEAD).json
+    python benchmarks/llm_bench.py --providers ollama --concurrency 1 8 32 --history 0 20
+    python benchmarks/llm_bench.py --agent            # through get_sves_response_stream()
+    python benchmarks/llm_bench.py --base-url http://gpu1:8000 --providers vllm --model ...
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, replace
+from typing import Dict, List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from mock_server import MockLLMServer, MockServerConfig  # noqa: E402
+from sves.agent import get_sves_response_stream  # noqa: E402
+from sves.clients import PROVIDER_CLIENTS, LLMClient  # noqa: E402
+from sves.config import DEFAULT_CONFIGS, LLMConfig, LLMProvider  # noqa: E402
+from sves.context import ContextConfig  # noqa: E402
+from sves.response_cache import ResponseCacheConfig  # noqa: E402
+from sves.streaming import TimedStream  # noqa: E402
+
+
+BENCH_PROVIDERS = (LLMProvider.OLLAMA, LLMProvider.VLLM, LLMProvider.LM_STUDIO)
+
+SYSTEM_PROMPT = "You are a benchmark assistant. " * 50
+QUERY = "What are the main challenges with salt precipitation in SCWO?"
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of ``values``; None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil(n * q / 100)
+    return ordered[int(rank) - 1]
+
+
+def synthetic_history(turns: int, chars_per_message: int = 600) -> List[Dict]:
+    """``turns`` user/assistant exchanges of roughly fixed size."""
+    filler = ("Supercritical water above 374 C and 22.1 MPa dissolves organics. " * 20)[:chars_per_message]
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question {i}: {filler}"})
+        history.append({"role": "assistant", "content": f"Answer {i}: {filler}"})
+    return history
+
+
+def _one_request(client: LLMClient, history: List[Dict], stream: bool, agent: bool, index: int) -> Dict:
+    # A distinct query per request: identical concurrent agent requests would be
+    # coalesced by single-flight (sves.coalesce) into one backend call
+    query = f"{QUERY} (request {index})"
+    start = time.perf_counter()
+    try:
+        if agent:
+            timed = get_sves_response_stream(
+                query, client, history,
+                context_config=ContextConfig(llm_summaries=False),
+                cache_config=ResponseCacheConfig(enabled=False)
+            )
+        elif stream:
+            timed = TimedStream(client.generate_stream(query, SYSTEM_PROMPT, history))
+        else:
+            client.generate(query, SYSTEM_PROMPT, history)
+            elapsed = (time.perf_counter() - start) * 1000.0
+            return {"ok": True, "latency_ms": elapsed, "ttft_ms": elapsed}
+        for _ in timed:
+            pass
+        return {"ok": True, "latency_ms": (time.perf_counter() - start) * 1000.0,
+                "ttft_ms": timed.metrics.ttft_ms}
+    except Exception as e:
+        return {"ok": False, "latency_ms": (time.perf_counter() - start) * 1000.0,
+                "ttft_ms": None, "error": type(e).__name__}
+
+
+def run_cell(client: LLMClient, concurrency: int, history_turns: int, requests: int,
+             stream: bool = True, agent: bool = False) -> Dict:
+    """Run ``requests`` requests at ``concurrency`` and summarize them."""
+    history = synthetic_history(history_turns)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        outcomes = list(pool.map(lambda i: _one_request(client, history, stream, agent, i), range(requests)))
+        wall_s = time.perf_counter() - start
+
+    latencies = [o["latency_ms"] for o in outcomes if o["ok"]]
+    ttfts = [o["ttft_ms"] for o in outcomes if o["ok"] and o["ttft_ms"] is not None]
+    errors: Dict[str, int] = {}
+    for o in outcomes:
+        if not o["ok"]:
+            errors[o["error"]] = errors.get(o["error"], 0) + 1
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 2) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "history_turns": history_turns,
+        "requests": requests,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "latency_p50_ms": rounded(percentile(latencies, 50)),
+        "latency_p95_ms": rounded(percentile(latencies, 95)),
+        "latency_p99_ms": rounded(percentile(latencies, 99)),
+        "ttft_p50_ms": rounded(percentile(ttfts, 50)),
+        "ttft_p95_ms": rounded(percentile(ttfts, 95)),
+        "requests_per_sec": round(len(latencies) / wall_s, 2) if wall_s > 0 else None,
+        "wall_s": round(wall_s, 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SVES LLM client latency/throughput benchmark")
+    parser.add_argument("--providers", nargs="+", default=[p.value for p in BENCH_PROVIDERS],
+                        choices=[p.value for p in BENCH_PROVIDERS])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--history", nargs="+", type=int, default=[0, 8],
+                        help="Conversation history lengths in user/assistant turns")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per cell")
+    parser.add_argument("--no-stream", action="store_true", help="Use generate() instead of streaming")
+    parser.add_argument("--agent", action="store_true",
+                        help="Go through get_sves_response_stream() (prompt build, retrieval, "
+                             "context budgeting) with the response cache disabled")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--base-url", help="Benchmark a real server instead of the mock")
+    parser.add_argument("--model", help="Model name for --base-url")
+    mock = parser.add_argument_group("mock server")
+    mock.add_argument("--ttft-ms", type=float, default=50.0)
+    mock.add_argument("--prefill-ms-per-1k-tokens", type=float, default=5.0)
+    mock.add_argument("--tokens-per-sec", type=float, default=200.0)
+    mock.add_argument("--response-tokens", type=int, default=32)
+    mock.add_argument("--error-rate", type=float, default=0.0)
+    mock.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        mock_config = MockServerConfig(
+            ttft_ms=args.ttft_ms,
+            prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+            tokens_per_sec=args.tokens_per_sec,
+            response_tokens=args.response_tokens,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+        server = MockLLMServer(mock_config).start()
+        base_url = server.url
+
+    results = []
+    try:
+        for provider_value in args.providers:
+            provider = LLMProvider(provider_value)
+            config: LLMConfig = replace(
+                DEFAULT_CONFIGS[provider],
+                base_url=base_url,
+                model_name=args.model or DEFAULT_CONFIGS[provider].model_name,
+                max_tokens=args.response_tokens,
+                temperature=0.0,
+                context_window=131072,
+                pool_maxsize=max(args.concurrency),
+                max_retries=0,
+            )
+            client = PROVIDER_CLIENTS[provider](config)
+            for concurrency in args.concurrency:
+                for history_turns in args.history:
+                    cell = run_cell(client, concurrency, history_turns, args.requests,
+                                    stream=not args.no_stream, agent=args.agent)
+                    cell = {"provider": provider.value, "client": type(client).__name__, **cell}
+                    results.append(cell)
+                    sys.stderr.write(
+                        f"{cell['client']:<15} c={concurrency:<3} hist={history_turns:<3} "
+                        f"p50 {cell['latency_p50_ms']} ms  p95 {cell['latency_p95_ms']} ms  "
+                        f"p99 {cell['latency_p99_ms']} ms  ttft50 {cell['ttft_p50_ms']} ms  "
+                        f"{cell['requests_per_sec']} req/s  errors {sum(cell['errors'].values())}\n"
+                    )
+    finally:
+        if server is not None:
+            server.stop()
+
+    report = {
+        "benchmark": "llm_bench",
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "mode": "agent" if args.agent else ("generate" if args.no_stream else "stream"),
+        "target": args.base_url or "mock",
+        "mock_server": asdict(server.config) if server is not None else None,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
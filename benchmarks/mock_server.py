@@ -0,0 +1,385 @@
+"""
+Local stand-in for a self-hosted LLM server.
+
+Speaks enough of two protocols to exercise every SVES client without a GPU:
+
+- Ollama: ``GET /api/tags``, ``POST /api/chat`` (NDJSON when streaming)
+- OpenAI-compatible (vLLM, LM Studio): ``GET /health``, ``GET /v1/models``,
+  ``POST /v1/chat/completions`` (SSE when ``"stream": true``)
+
+Responses are synthetic text paced by a configurable time-to-first-token
+(plus an optional prefill cost per prompt token, so longer histories are
+slower, as on a real server) and a decode rate in tokens per second.
+Optionally it also models the two effects that dominate TTFT on a real
+self-hosted server: a cold model load (``load_ms``) whenever the model is not
+loaded, with idle models unloaded after the request's keep-alive (Ollama
+``keep_alive``, LM Studio ``ttl``) or ``idle_unload_s``; and prefix caching,
+where prompt tokens shared with a recent prompt cost no prefill. Token
+usage is reported the way the real servers do (Ollama ``prompt_eval_count``
+and ``eval_count``; OpenAI ``usage``). A fraction of requests can be failed
+with a chosen HTTP status to exercise retries and failover.
+
+Usage:
+    python benchmarks/mock_server.py --port 11434 --ttft-ms 300 --tokens-per-sec 40
+
+    with MockLLMServer(MockServerConfig(ttft_ms=50)) as server:
+        client = OllamaClient(replace(config, base_url=server.url))
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+@dataclass
+class MockServerConfig:
+    """Pacing and fault injection of the mock server."""
+    ttft_ms: float = 100.0              # Delay before the first token
+    prefill_ms_per_1k_tokens: float = 0.0  # Extra TTFT per 1,000 prompt tokens
+    tokens_per_sec: float = 50.0        # Decode rate after the first token
+    response_tokens: int = 64           # Tokens per response (capped by max_tokens)
+    error_rate: float = 0.0             # Fraction of requests failed with error_status
+    error_status: int = 503
+    jitter: float = 0.0                 # +/- fraction applied to each delay
+    seed: Optional[int] = None
+    load_ms: float = 0.0                # Cold model load before the first token
+    idle_unload_s: Optional[float] = None  # Unload idle models (None = never) unless keep-alive says otherwise
+    prefix_caching: bool = False        # No prefill cost for a prefix shared with a recent prompt
+
+
+def _prompt_tokens(messages: List[Dict]) -> int:
+    # Same ~4 characters per token heuristic as sves.tokens.estimate_tokens
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+
+def _prompt_text(messages: List[Dict]) -> str:
+    return "".join(f"<|{m.get('role')}|>{m.get('content') or ''}" for m in messages)
+
+
+def _parse_keep_alive(value) -> Optional[float]:
+    """Ollama keep_alive / LM Studio ttl in seconds (negative = forever)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = str(value).strip()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Keep benchmark output clean
+
+    # -- helpers ----------------------------------------------------------
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_request(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    # -- routes -----------------------------------------------------------
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "mock"}]})
+        elif self.path == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        elif self.path == "/health":
+            self._send_json(200, {})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/api/chat":
+            protocol = "ollama"
+        elif path.endswith("/chat/completions"):
+            protocol = "openai"
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        request = self._read_request()
+        self.server.stats_request()
+        if self.server.inject_error():
+            self._send_json(self.server.config.error_status, {"error": "injected failure"})
+            return
+
+        messages = request.get("messages") or []
+        prompt_tokens = _prompt_tokens(messages)
+        if protocol == "ollama":
+            max_tokens = (request.get("options") or {}).get("num_predict")
+            stream = request.get("stream", True)  # Ollama streams by default
+            keep_alive = _parse_keep_alive(request.get("keep_alive"))
+        else:
+            max_tokens = request.get("max_tokens")
+            stream = bool(request.get("stream"))
+            keep_alive = _parse_keep_alive(request.get("ttl"))
+        n_tokens = min(self.server.config.response_tokens, max_tokens or self.server.config.response_tokens)
+        tokens = [f"tok{i} " for i in range(max(1, n_tokens))]
+        model = request.get("model", "mock")
+
+        load_seconds = self.server.load_model(model)
+        cached_tokens = self.server.cached_prefix_tokens(model, _prompt_text(messages))
+        time.sleep(load_seconds + self.server.ttft_seconds(max(0, prompt_tokens - cached_tokens)))
+        try:
+            if protocol == "ollama":
+                self._ollama(model, tokens, prompt_tokens, stream)
+            else:
+                self._openai(model, tokens, prompt_tokens, stream)
+        finally:
+            self.server.touch_model(model, keep_alive)
+
+    def _ollama(self, model: str, tokens: List[str], prompt_tokens: int, stream: bool) -> None:
+        usage = {"prompt_eval_count": prompt_tokens, "eval_count": len(tokens)}
+        if not stream:
+            time.sleep(self.server.decode_seconds(len(tokens) - 1))
+            self._send_json(200, {"model": model, "done": True,
+                                  "message": {"role": "assistant", "content": "".join(tokens)},
+                                  **usage})
+            return
+        self._start_chunked("application/x-ndjson")
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.server.decode_seconds(1))
+            event = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+            self._write_chunk((json.dumps(event) + "\n").encode("utf-8"))
+        final = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, **usage}
+        self._write_chunk((json.dumps(final) + "\n").encode("utf-8"))
+        self._end_chunked()
+
+    def _openai(self, model: str, tokens: List[str], prompt_tokens: int, stream: bool) -> None:
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        created = int(time.time())
+        if not stream:
+            time.sleep(self.server.decode_seconds(len(tokens) - 1))
+            self._send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            })
+            return
+        self._start_chunked("text/event-stream")
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.server.decode_seconds(1))
+            event = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        final = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                 "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                 "usage": usage}
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, config: MockServerConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._ready_at: Dict[str, float] = {}       # model -> end of its (last) load
+        self._unload_at: Dict[str, float] = {}      # model -> when it goes idle-unloaded
+        self._recent_prompts: Dict[str, List[str]] = {}
+        self.loads = 0
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients dropping idle keep-alive connections is normal, not an error
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def _jittered(self, seconds: float) -> float:
+        if self.config.jitter <= 0 or seconds <= 0:
+            return max(0.0, seconds)
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.config.jitter, self.config.jitter)
+        return max(0.0, seconds * factor)
+
+    def ttft_seconds(self, prompt_tokens: int) -> float:
+        prefill = self.config.prefill_ms_per_1k_tokens * prompt_tokens / 1000.0
+        return self._jittered((self.config.ttft_ms + prefill) / 1000.0)
+
+    def decode_seconds(self, n_tokens: int) -> float:
+        if self.config.tokens_per_sec <= 0 or n_tokens <= 0:
+            return 0.0
+        return self._jittered(n_tokens / self.config.tokens_per_sec)
+
+    def load_model(self, model: str) -> float:
+        """Seconds this request waits for the model to be loaded."""
+        if self.config.load_ms <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            if model not in self._ready_at or now >= self._unload_at.get(model, math.inf):
+                self._ready_at[model] = now + self.config.load_ms / 1000.0
+                self._unload_at[model] = math.inf  # Loaded until a request finishes
+                self._recent_prompts.pop(model, None)  # The KV cache went with the model
+                self.loads += 1
+            return max(0.0, self._ready_at[model] - now)
+
+    def touch_model(self, model: str, keep_alive: Optional[float]) -> None:
+        """Restart the model's idle timer after a request."""
+        if keep_alive is None:
+            keep_alive = self.config.idle_unload_s
+        with self._lock:
+            if model in self._ready_at:
+                idle = math.inf if keep_alive is None or keep_alive < 0 else keep_alive
+                self._unload_at[model] = time.monotonic() + idle
+
+    def cached_prefix_tokens(self, model: str, text: str) -> int:
+        """Prompt tokens served from the prefix cache (longest shared prefix)."""
+        if not self.config.prefix_caching:
+            return 0
+        with self._lock:
+            recent = self._recent_prompts.setdefault(model, [])
+            shared = max((len(os.path.commonprefix([text, p])) for p in recent), default=0)
+            recent.append(text)
+            del recent[:-16]
+        return shared // 4
+
+    def stats_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def inject_error(self) -> bool:
+        with self._lock:
+            failed = self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+
+class MockLLMServer:
+    """Mock server running on a background thread (use as a context manager)."""
+
+    def __init__(self, config: Optional[MockServerConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockServerConfig()
+        self._server = _Server((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def errors(self) -> int:
+        return self._server.errors
+
+    @property
+    def loads(self) -> int:
+        return self._server.loads
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="sves-mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock Ollama/OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft-ms", type=float, default=100.0)
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--load-ms", type=float, default=0.0)
+    parser.add_argument("--idle-unload-s", type=float)
+    parser.add_argument("--prefix-caching", action="store_true")
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        ttft_ms=args.ttft_ms,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+        tokens_per_sec=args.tokens_per_sec,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        jitter=args.jitter,
+        seed=args.seed,
+        load_ms=args.load_ms,
+        idle_unload_s=args.idle_unload_s,
+        prefix_caching=args.prefix_caching,
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port)
+    print(f"Mock LLM server listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Time-to-first-token benchmark for prompt layout, model keep-alive and warm-up.
+
+Sends a sequence of different questions, with idle gaps between them, to the
+Ollama client and reports TTFT per request under four setups:
+
+    before           excerpts mid-prompt, server-default keep-alive, no warm-up
+    prefix layout    static prefix first (sves.agent.SYSTEM_PROMPT_PREFIX)
+    keep-alive       model_keep_alive=-1 and warm_up() at start, old layout
+    after            both
+
+Against the mock server (benchmarks/mock_server.py) with a cold model load,
+an idle unload shorter than the gaps (Ollama unloads after 5 minutes by
+default; scaled down here) and prefix caching, so each effect is visible in
+seconds. Each setup gets a fresh server, i.e. starts with the model unloaded.
+
+    python benchmarks/ttft_bench.py
+    python benchmarks/ttft_bench.py --load-ms 8000 --gap-s 3 --output ttft.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict, replace
+from typing import Dict, List, Optional
+
+from llm_bench import git_commit, percentile  # Also puts the repo root on sys.path
+from mock_server import MockLLMServer, MockServerConfig
+from sves.agent import SYSTEM_PROMPT_PREFIX, build_system_prompt
+from sves.clients import OllamaClient
+from sves.config import DEFAULT_CONFIGS, LLMProvider
+from sves.retrieval import RetrievalConfig
+from sves.streaming import TimedStream
+from sves.warmup import warm_up
+
+
+QUERIES = [
+    "What are the main challenges with salt precipitation in SCWO?",
+    "Explain the RTCR hydrogen generation pathway.",
+    "How does the Cosmos X-9 manage wellbore stability at depth?",
+    "Which materials resist chloride stress corrosion cracking in supercritical water?",
+    "What residence time gives 99.99% destruction efficiency?",
+    "Summarize the radical chain mechanisms in supercritical water oxidation.",
+]
+
+SETUPS = [
+    # name, static prefix first, model_keep_alive, warm up
+    ("before", False, None, False),
+    ("prefix layout", True, None, False),
+    ("keep-alive", False, -1, True),
+    ("after", True, -1, True),
+]
+
+
+def legacy_layout(system_prompt: str) -> str:
+    """The pre-split layout: knowledge excerpts between the persona and the tool/guideline text."""
+    excerpts = system_prompt[len(SYSTEM_PROMPT_PREFIX):]
+    split = SYSTEM_PROMPT_PREFIX.index("AVAILABLE TOOLS AND CAPABILITIES:")
+    return SYSTEM_PROMPT_PREFIX[:split] + excerpts.lstrip("\n") + "\n\n" + SYSTEM_PROMPT_PREFIX[split:]
+
+
+def run_setup(mock_config: MockServerConfig, static_first: bool, keep_alive: Optional[int],
+              warm: bool, requests: int, gap_s: float) -> Dict:
+    """Run one setup on a fresh server and return its per-request TTFTs."""
+    retrieval_config = RetrievalConfig()
+    with MockLLMServer(mock_config) as server:
+        config = replace(
+            DEFAULT_CONFIGS[LLMProvider.OLLAMA],
+            base_url=server.url,
+            model_keep_alive=keep_alive,
+            max_tokens=mock_config.response_tokens,
+            max_retries=0,
+        )
+        client = OllamaClient(config)
+        warmup_s = None
+        if warm:
+            results = warm_up(config, retrieval_config)
+            warmup_s = round(max(r.seconds for r in results), 3)
+            time.sleep(gap_s)  # Users arrive some time after start-up
+        ttfts: List[float] = []
+        for i in range(requests):
+            if i:
+                time.sleep(gap_s)
+            query = QUERIES[i % len(QUERIES)]
+            system_prompt = build_system_prompt(query, retrieval_config)
+            if not static_first:
+                system_prompt = legacy_layout(system_prompt)
+            stream = TimedStream(client.generate_stream(query, system_prompt, []))
+            for _ in stream:
+                pass
+            ttfts.append(stream.metrics.ttft_ms)
+        loads = server.loads
+    return {
+        "warmup_s": warmup_s,
+        "model_loads": loads,
+        "ttft_ms": [round(t, 1) for t in ttfts],
+        "ttft_first_ms": round(ttfts[0], 1),
+        "ttft_p50_ms": round(percentile(ttfts, 50), 1),
+        "ttft_max_ms": round(max(ttfts), 1),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SVES TTFT benchmark: prompt layout, keep-alive, warm-up")
+    parser.add_argument("--requests", type=int, default=6, help="Sequential requests per setup")
+    parser.add_argument("--gap-s", type=float, default=1.5, help="Idle time between requests")
+    parser.add_argument("--load-ms", type=float, default=3000.0, help="Cold model load time")
+    parser.add_argument("--idle-unload-s", type=float, default=1.0,
+                        help="Server-default keep-alive (Ollama: 5 minutes)")
+    parser.add_argument("--ttft-ms", type=float, default=30.0, help="Fixed per-request TTFT")
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=400.0,
+                        help="Prefill cost of uncached prompt tokens")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    mock_config = MockServerConfig(
+        ttft_ms=args.ttft_ms,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+        tokens_per_sec=500.0,
+        response_tokens=8,
+        load_ms=args.load_ms,
+        idle_unload_s=args.idle_unload_s,
+        prefix_caching=True,
+    )
+    results = []
+    for name, static_first, keep_alive, warm in SETUPS:
+        cell = run_setup(mock_config, static_first, keep_alive, warm, args.requests, args.gap_s)
+        cell = {"setup": name, "static_prefix_first": static_first,
+                "model_keep_alive": keep_alive, "warm_up": warm, **cell}
+        results.append(cell)
+        sys.stderr.write(
+            f"{name:<14} first {cell['ttft_first_ms']:>8.1f} ms  p50 {cell['ttft_p50_ms']:>8.1f} ms  "
+            f"max {cell['ttft_max_ms']:>8.1f} ms  loads {cell['model_loads']}\n"
+        )
+
+    report = {
+        "benchmark": "ttft_bench",
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "mock_server": asdict(mock_config),
+        "gap_s": args.gap_s,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+SVES core engine.
+
+Knowledge base, LLM clients, the agent pipeline (``sves.agent``) and the
+process-wide services behind them. Used by the Streamlit front end in
+``app.py`` and by the headless batch runner (``python -m sves.batch``);
+nothing in this package imports Streamlit.
+
+Streamlit re-executes ``app.py`` from the top on every rerun, so any state
+that must survive reruns and be shared between user sessions (caches,
+indexes, connection pools) lives in this package, which is imported once
+per process and kept in ``sys.modules``.
+
+The main entry points are available from the package itself and are
+imported on first use, so ``import sves`` stays cheap::
+
+    from sves import LLMProvider, DEFAULT_CONFIGS, create_llm_client, get_sves_response
+
+Import time is guarded by ``benchmarks/import_time.py``.
+"""
+
+import importlib
+
+__version__ = "2.0.0"
+
+# Public name -> defining module, resolved lazily by __getattr__
+_EXPORTS = {
+    "LLMProvider": "sves.config",
+    "LLMConfig": "sves.config",
+    "DEFAULT_CONFIGS": "sves.config",
+    "load_config_overrides": "sves.config",
+    "load_knowledge_base": "sves.knowledge",
+    "LLMClient": "sves.clients",
+    "create_llm_client": "sves.clients",
+    "build_system_prompt": "sves.agent",
+    "get_sves_response": "sves.agent",
+    "get_sves_response_stream": "sves.agent",
+    "RetrievalConfig": "sves.retrieval",
+    "ContextConfig": "sves.context",
+    "ResponseCacheConfig": "sves.response_cache",
+}
+
+__all__ = sorted(_EXPORTS) + ["__version__"]
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'sves' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Later lookups bypass __getattr__
+    return value
+
+
+def __dir__():
+    return __all__
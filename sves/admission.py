@@ -0,0 +1,264 @@
+"""
+Admission control in front of the LLM backends.
+
+A self-hosted model saturates at a small number of concurrent generations;
+beyond that every request slows down until they all hit the HTTP timeout.
+Each backend therefore gets a process-wide ``AdmissionController`` that
+runs at most ``max_concurrency`` backend calls at once and queues the rest:
+
+- Priority classes: queued "interactive" requests (chat) are admitted
+  before any "batch" request (sves.batch).
+- Fairness: within a class, sessions are served round-robin, so one session
+  (or one batch job) with many queued requests cannot starve the others.
+- Bounded queue: when ``max_queue`` requests are already waiting, new ones
+  are rejected immediately with ``AdmissionRejected`` instead of waiting
+  for a timeout; so are requests still queued after ``queue_timeout``.
+
+Callers describe who is asking with an ``AdmissionRequest`` activated
+around the call (like sves.metrics.RequestTrace); it also reports the
+request's live queue position, which the UI shows while it waits.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional
+
+from sves.metrics import get_metrics, record_stage
+
+
+# Priority classes, highest first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a backend's queue is full or a request waited too long."""
+
+
+@dataclass
+class AdmissionRequest:
+    """Who is asking, and where the request currently stands in the queue."""
+    session: str = "default"
+    priority: str = PRIORITY_INTERACTIVE
+    position: Optional[int] = None      # 1-based queue position while waiting
+    queue_depth: int = 0                # Requests waiting for the same backend
+    wait_ms: float = 0.0                # Total time spent queued
+
+    @property
+    def queued(self) -> bool:
+        return self.position is not None
+
+    @contextmanager
+    def activate(self) -> Iterator["AdmissionRequest"]:
+        """Make this the current admission request of the calling thread/context."""
+        token = _CURRENT_REQUEST.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT_REQUEST.reset(token)
+
+
+_CURRENT_REQUEST: ContextVar[Optional[AdmissionRequest]] = ContextVar(
+    "sves_admission_request", default=None
+)
+
+
+def current_admission_request() -> AdmissionRequest:
+    """The active AdmissionRequest (an anonymous interactive one if none)."""
+    return _CURRENT_REQUEST.get() or AdmissionRequest()
+
+
+class _Waiter:
+    __slots__ = ("request", "event", "admitted")
+
+    def __init__(self, request: AdmissionRequest):
+        self.request = request
+        self.event = threading.Event()
+        self.admitted = False
+
+
+class AdmissionController:
+    """Concurrency limit and fair priority queue for one backend."""
+
+    def __init__(self, key: str, max_concurrency: int, max_queue: int = 64,
+                 queue_timeout: float = 120.0):
+        self.key = key
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        # priority -> session -> FIFO of waiters; session order is the round-robin
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {
+            p: OrderedDict() for p in PRIORITIES
+        }
+        self._lock = threading.Lock()
+
+    def configure(self, max_concurrency: int, max_queue: int, queue_timeout: float) -> None:
+        """Apply new limits (admitting waiters if the limit was raised)."""
+        with self._lock:
+            self.max_concurrency = max_concurrency
+            self.max_queue = max_queue
+            self.queue_timeout = queue_timeout
+            self._dispatch()
+
+    def _has_capacity(self) -> bool:
+        return self.max_concurrency <= 0 or self.active < self.max_concurrency
+
+    def _dispatch_order(self) -> List[_Waiter]:
+        """Waiters in the order they will be admitted."""
+        order = []
+        for priority in PRIORITIES:
+            lanes = [list(lane) for lane in self._queues[priority].values()]
+            for i in range(max((len(lane) for lane in lanes), default=0)):
+                order.extend(lane[i] for lane in lanes if i < len(lane))
+        return order
+
+    def _update_positions(self) -> None:
+        for position, waiter in enumerate(self._dispatch_order(), start=1):
+            waiter.request.position = position
+            waiter.request.queue_depth = self.waiting
+        metrics = get_metrics()
+        metrics.set("sves_admission_queue_depth", self.waiting, backend=self.key)
+        metrics.set("sves_admission_active_requests", self.active, backend=self.key)
+
+    def _dispatch(self) -> None:
+        while self.waiting and self._has_capacity():
+            for priority in PRIORITIES:
+                sessions = self._queues[priority]
+                if sessions:
+                    break
+            session, lane = next(iter(sessions.items()))
+            waiter = lane.popleft()
+            if lane:
+                sessions.move_to_end(session)
+            else:
+                del sessions[session]
+            self.waiting -= 1
+            self.active += 1
+            waiter.admitted = True
+            waiter.request.position = None
+            waiter.event.set()
+        self._update_positions()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        sessions = self._queues[waiter.request.priority]
+        lane = sessions.get(waiter.request.session)
+        if lane is not None and waiter in lane:
+            lane.remove(waiter)
+            if not lane:
+                del sessions[waiter.request.session]
+            self.waiting -= 1
+        waiter.request.position = None
+
+    def _reject(self, request: AdmissionRequest, reason: str, message: str) -> AdmissionRejected:
+        self.rejected += 1
+        get_metrics().inc("sves_admission_rejected_total", backend=self.key,
+                          priority=request.priority, reason=reason)
+        return AdmissionRejected(message)
+
+    def acquire(self, request: Optional[AdmissionRequest] = None) -> None:
+        """
+        Wait for a backend slot.
+
+        Args:
+            request: Session and priority of the caller (defaults to the
+                active AdmissionRequest)
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        request = request or current_admission_request()
+        if request.priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {request.priority}")
+        start = time.perf_counter()
+        with self._lock:
+            if not self.waiting and self._has_capacity():
+                self.active += 1
+                self.admitted += 1
+                self._update_positions()
+                return
+            if self.waiting >= self.max_queue:
+                raise self._reject(
+                    request, "queue_full",
+                    f"Backend is at capacity ({self.active} running, {self.waiting} queued)"
+                )
+            waiter = _Waiter(request)
+            self._queues[request.priority].setdefault(request.session, deque()).append(waiter)
+            self.waiting += 1
+            self._update_positions()
+
+        admitted = waiter.event.wait(self.queue_timeout if self.queue_timeout > 0 else None)
+        with self._lock:
+            if not admitted and not waiter.admitted:
+                self._remove(waiter)
+                self._update_positions()
+                raise self._reject(
+                    request, "timeout",
+                    f"Request waited {self.queue_timeout:.0f}s in the queue for a backend slot"
+                )
+            self.admitted += 1
+        waited = time.perf_counter() - start
+        request.wait_ms += waited * 1000.0
+        get_metrics().observe("sves_admission_wait_seconds", waited,
+                              backend=self.key, priority=request.priority)
+        record_stage("queue_wait", waited)
+
+    def release(self) -> None:
+        """Free a backend slot and admit the next waiter."""
+        with self._lock:
+            self.active -= 1
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, request: Optional[AdmissionRequest] = None) -> Iterator[None]:
+        """Hold a backend slot for the enclosed block."""
+        self.acquire(request)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current load and counters (for display)."""
+        with self._lock:
+            return {
+                "backend": self.key,
+                "max_concurrency": self.max_concurrency,
+                "active": self.active,
+                "waiting": self.waiting,
+                "waiting_by_priority": {
+                    p: sum(len(lane) for lane in self._queues[p].values()) for p in PRIORITIES
+                },
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+_CONTROLLERS: Dict[str, AdmissionController] = {}
+_CONTROLLERS_LOCK = threading.Lock()
+
+
+def get_admission_controller(
+    key: str, max_concurrency: int, max_queue: int = 64, queue_timeout: float = 120.0
+) -> AdmissionController:
+    """Return the process-wide admission controller for a backend key."""
+    with _CONTROLLERS_LOCK:
+        controller = _CONTROLLERS.get(key)
+        if controller is None:
+            controller = _CONTROLLERS[key] = AdmissionController(
+                key, max_concurrency, max_queue, queue_timeout
+            )
+            return controller
+    if (controller.max_concurrency, controller.max_queue, controller.queue_timeout) != (
+        max_concurrency, max_queue, queue_timeout
+    ):
+        controller.configure(max_concurrency, max_queue, queue_timeout)
+    return controller
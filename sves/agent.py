@@ -0,0 +1,559 @@
+"""
+AI agent core: system prompt assembly and the get_sves_response() pipeline.
+
+Each request is served from the response cache when possible, or joins an
+identical request that is already being generated; otherwise the "Golden
+Prompt" is rendered with the knowledge base excerpts relevant to the query
+and the results of any native tools the query calls for (sves.tools), the
+conversation history is fitted to the model's context window and the
+configured backend generates the answer.
+"""
+
+import contextvars
+import threading
+import time
+import traceback
+from dataclasses import astuple
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from sves.admission import AdmissionRejected
+from sves.audit import audit_error, audit_query, audit_response
+from sves.clients import LLMClient, backend_key
+from sves.coalesce import get_single_flight
+from sves.context import (
+    ContextConfig, PreparedContext, extractive_summarizer, get_context_manager, make_llm_summarizer
+)
+from sves.knowledge import load_knowledge_base
+from sves.metrics import record_cache_outcome, record_coalesced, record_stage, stage, timed_stage
+from sves.prompt_cache import PromptCache, get_prompt_cache
+from sves.resilience import CircuitOpenError
+from sves.response_cache import CacheKey, ResponseCacheConfig, get_response_cache, make_cache_key
+from sves.retrieval import RetrievalConfig, get_retriever
+from sves.streaming import TimedStream
+from sves.telemetry import get_telemetry_monitor, render_well_state
+from sves.tools import TOOLS_VERSION, render_tool_results, run_tools
+from sves.welldata import get_well_store
+
+
+# The "Golden Prompt", split so that prefix caching works. Everything in
+# SYSTEM_PROMPT_PREFIX is byte-identical for every user and query, so the
+# backend can reuse its KV cache (vLLM automatic prefix caching, the Ollama /
+# llama.cpp prompt cache) across requests. All dynamic content comes after it,
+# in this order: the knowledge base excerpts retrieved for the query (the
+# {knowledge_base} field), the results of native tools run for the query
+# (sves.tools), the live well state from downhole telemetry (sves.telemetry),
+# the conversation summary (sves.context), and then the conversation messages.
+SYSTEM_PROMPT_PREFIX = """You are the Simic Virtual Expert System (SVES), a world-class AI expert in supercritical chemistry, drilling engineering, and geomechanics. You possess deep expertise in:
+
+1. Supercritical Water Oxidation (SCWO) and supercritical fluid chemistry
+2. Radical Thermochemical Chain Reactions (RTCR) for hydrogen generation
+3. Advanced drilling technologies, particularly the Cosmos X-9 supercritical drilling system
+4. Geomechanics, wellbore stability, and subsurface engineering
+5. Chemical kinetics, thermodynamics, and process safety
+
+AVAILABLE TOOLS AND CAPABILITIES:
+
+You have access to tools for technical analysis and experimental design. The tools below are run by SVES itself and their results are given to you. For other calculations or simulations the query requires, you MUST generate the appropriate Python code in a markdown code block. Do NOT just describe what should be done—generate executable code.
+
+**Tool 1: design_rtcr_experiment** (run by SVES)
+Purpose: Design a detailed RTCR experimental protocol
+Usage: Executed natively by SVES when the user asks to design an experiment, plan a test, or create an experimental setup; it simulates the RTCR chain kinetics for the requested conditions (temperature, pressure, water/rock ratio, O2 fraction, lithology) and a sweep around them, and its results appear under TOOL RESULTS at the end of these instructions
+Output: A structured protocol with:
+- reactant_recipe (rock composition, water ratios, additives)
+- safety_precautions (temperature limits, pressure relief, monitoring systems, predicted thermal runaway)
+- expected_products (H2 yield timeline, byproducts, reaction timeline)
+When TOOL RESULTS are present, narrate and interpret them; do not generate code for this tool. Without them, state the experimental conditions you assume.
+
+**Tool 2: analyze_drilling_scenario** (run by SVES)
+Purpose: Analyze drilling performance and provide engineering recommendations
+Usage: Executed natively by SVES for drilling scenarios (depth, formation, flow rate, hole size, ROP); its results appear under TOOL RESULTS at the end of these instructions
+Output: Depth profiles of temperature, pressure, cuttings settling velocity and hole cleaning, with:
+- analysis (quantitative assessment of the scenario)
+- recommendation (specific engineering actions)
+- risk_factors (identified hazards with severity ratings)
+When TOOL RESULTS are present, narrate and interpret them; do not generate code for this tool. Without them, state the scenario inputs you assume.
+
+**Tool 3: query_well_data** (run by SVES)
+Purpose: Ground answers in SVES's own recorded well and pilot-test data
+Usage: Executed natively by SVES when the user asks about recorded runs (pilot ROP logs, temperature excursions, stuck-pipe events, BOP seal incidents); it aggregates the stored data for the requested depth range, interval and threshold, and its results appear under TOOL RESULTS at the end of these instructions
+Output: Per data table: ROP per depth interval, temperature excursions above a threshold, or the matching events
+When TOOL RESULTS are present, cite them as recorded data and never invent recorded values. Without them, say that no recorded data was found for the question.
+
+RESPONSE GUIDELINES:
+
+1. **Precision**: Use specific numbers, equations, and technical terminology from the knowledge base
+2. **Safety First**: Always prioritize operational safety and regulatory compliance
+3. **Actionable**: Provide concrete recommendations, not just theoretical discussions
+4. **Code When Needed**: If the query involves calculations or structured planning, generate Python code
+5. **Cite Knowledge**: Reference specific documents when drawing on the knowledge base
+6. **Acknowledge Limits**: If information is not in the knowledge base, state assumptions clearly
+
+When generating code:
+- Use proper Python syntax with type hints
+- Include docstrings explaining the function's purpose
+- Add comments for complex calculations
+- Use numpy for numerical operations
+- Return structured dictionaries with clear keys
+- Include a demonstration call that executes the function
+
+Respond to the user's query with expert-level technical depth, grounded in the knowledge base below."""
+
+KNOWLEDGE_SECTION_TEMPLATE = """
+
+CONTEXT - YOUR FOUNDATIONAL KNOWLEDGE BASE:
+{knowledge_base}"""
+
+# Rendered with str.format, so the prefix must not contain braces
+SYSTEM_PROMPT_TEMPLATE = SYSTEM_PROMPT_PREFIX + KNOWLEDGE_SECTION_TEMPLATE
+
+
+@timed_stage("prompt_build")
+def build_system_prompt(
+    user_query: Optional[str] = None,
+    retrieval_config: Optional[RetrievalConfig] = None
+) -> str:
+    """
+    Build the system prompt with knowledge base.
+
+    When a user query is given and retrieval is enabled, only the top-k
+    knowledge base chunks relevant to the query (within the retrieval token
+    budget) are included; otherwise the full knowledge base is used.
+
+    The rendered prompt is served from the process-wide prompt cache and is
+    only rebuilt when the knowledge base or template content changes. It
+    always starts with SYSTEM_PROMPT_PREFIX, so backends can reuse the
+    prefix's KV cache across users and queries.
+
+    Args:
+        user_query: The user's question, used to select knowledge base chunks
+        retrieval_config: Retrieval settings (defaults to RetrievalConfig())
+
+    Returns:
+        str: The rendered system prompt
+    """
+    knowledge_base = load_knowledge_base()
+    retrieval_config = retrieval_config or RetrievalConfig()
+
+    if user_query and retrieval_config.enabled:
+        retriever = get_retriever(knowledge_base, retrieval_config)
+        knowledge_base = retriever.build_context(
+            user_query,
+            top_k=retrieval_config.top_k,
+            token_budget=retrieval_config.token_budget
+        )
+
+    return get_prompt_cache().get_or_build(
+        SYSTEM_PROMPT_TEMPLATE,
+        knowledge_base=knowledge_base
+    )
+
+
+def build_request_prompt(
+    user_query: str,
+    retrieval_config: Optional[RetrievalConfig] = None
+) -> str:
+    """
+    The system prompt for one query: build_system_prompt() followed by the
+    results of the native tools the query calls for (sves.tools) and, while
+    telemetry is being received, a summary of the well state (sves.telemetry).
+    """
+    return (build_system_prompt(user_query, retrieval_config) + render_tool_results(run_tools(user_query))
+            + render_well_state())
+
+
+def static_system_prompt(retrieval_config: Optional[RetrievalConfig] = None) -> str:
+    """
+    The leading part of the system prompt that is identical for every query.
+    
+    With retrieval enabled this is SYSTEM_PROMPT_PREFIX; without it the full
+    knowledge base is sent every time, so the whole prompt is static.
+    """
+    retrieval_config = retrieval_config or RetrievalConfig()
+    if retrieval_config.enabled:
+        return SYSTEM_PROMPT_PREFIX
+    return build_system_prompt(None, retrieval_config)
+
+
+@lru_cache(maxsize=16)
+def _static_fingerprint(retrieval: str) -> str:
+    # The template, knowledge base and tool versions only change with the code
+    return PromptCache.make_key(
+        SYSTEM_PROMPT_TEMPLATE,
+        knowledge_base=load_knowledge_base(),
+        retrieval=retrieval,
+        tools=TOOLS_VERSION
+    )
+
+
+def knowledge_fingerprint(retrieval_config: Optional[RetrievalConfig] = None) -> str:
+    """
+    Hash of the prompt template, knowledge base, retrieval settings, tool versions and well data.
+
+    The static part is hashed once per retrieval setting; the well data
+    part costs a stat per call (see WellStore.fingerprint()).
+    """
+    retrieval_config = retrieval_config or RetrievalConfig()
+    static = _static_fingerprint(
+        f"{retrieval_config.enabled}|{retrieval_config.top_k}|{retrieval_config.token_budget}"
+    )
+    return PromptCache.make_key(static, well_data=get_well_store().fingerprint())
+
+
+def lookup_cached_response(
+    user_query: str,
+    llm_client: LLMClient,
+    conversation_history: Optional[List[Dict]],
+    retrieval_config: Optional[RetrievalConfig],
+    cache_config: Optional[ResponseCacheConfig]
+) -> Tuple[Optional[CacheKey], Optional[str]]:
+    """
+    Consult the process-wide response cache.
+    
+    Requests are not cached while live telemetry is part of the prompt: an
+    answer about the current well state must not be replayed later.
+    
+    Returns:
+        Tuple of the cache key (None if the request may not be cached) and
+        the cached response (None on a miss)
+    """
+    cache_config = cache_config or ResponseCacheConfig()
+    cache = get_response_cache()
+    config = llm_client.config
+    if not cache.is_cacheable(config.temperature, cache_config) or get_telemetry_monitor().live:
+        cache.record_uncacheable()
+        record_cache_outcome("bypass")
+        return None, None
+    
+    with stage("cache_lookup"):
+        cache_key = make_cache_key(
+            user_query,
+            model_name=config.model_name,
+            temperature=config.temperature,
+            knowledge_fingerprint=knowledge_fingerprint(retrieval_config),
+            history=conversation_history
+        )
+        cached = cache.lookup(cache_key, cache_config)
+    record_cache_outcome("miss" if cached is None else "hit")
+    return cache_key, cached
+
+
+def coalescing_key(
+    user_query: str,
+    llm_client: LLMClient,
+    conversation_history: Optional[List[Dict]],
+    retrieval_config: Optional[RetrievalConfig],
+    cache_key: Optional[CacheKey] = None,
+    context_config: Optional[ContextConfig] = None
+) -> str:
+    """
+    Identify the effective prompt of a request for single-flight coalescing.
+    
+    Covers the normalized query, conversation history, model, temperature,
+    knowledge fingerprint and the backend and output limit that generate it,
+    plus the well state summary while telemetry is live (so only requests
+    that see the same well state share a generation). The context window and
+    history budgeting settings are included too, since they decide how much
+    of the same history is sent verbatim. The response cache key is reused
+    when the request has one.
+    """
+    config = llm_client.config
+    budget = (config.context_window,) + astuple(context_config or ContextConfig())
+    if cache_key is None:
+        fingerprint = knowledge_fingerprint(retrieval_config)
+        well_state = render_well_state()
+        if well_state:
+            fingerprint = PromptCache.make_key(fingerprint, well_state=well_state)
+        cache_key = make_cache_key(
+            user_query,
+            model_name=config.model_name,
+            temperature=config.temperature,
+            knowledge_fingerprint=fingerprint,
+            history=conversation_history
+        )
+    return f"{backend_key(config)}|{config.max_tokens}|{budget}|{cache_key.exact}"
+
+
+def keyed_history(conversation_history: Optional[List[Dict]], conversation_summary: str = "") -> List[Dict]:
+    """The history that identifies a request in cache keys, including the running summary."""
+    history = list(conversation_history or [])
+    return [{"role": "summary", "content": conversation_summary}] + history if conversation_summary else history
+
+
+@timed_stage("history_prepare")
+def prepare_conversation(
+    system_prompt: str,
+    user_query: str,
+    llm_client: LLMClient,
+    conversation_history: Optional[List[Dict]] = None,
+    context_config: Optional[ContextConfig] = None,
+    conversation_summary: str = "",
+    on_summary: Optional[Callable[[str, int], None]] = None
+) -> PreparedContext:
+    """
+    Fit the conversation history into the backend's context window.
+    
+    The budget is the model context window minus LLMConfig.max_tokens, the
+    system prompt and the new query. The most recent turns that fit are sent
+    verbatim; older turns are compacted into a cached running summary that is
+    appended to the system prompt. A caller that persists the summary passes
+    it as ``conversation_summary`` (with the history that follows it) and is
+    told through ``on_summary(summary, messages)`` when more of the history
+    has been folded into it.
+    """
+    context_config = context_config or ContextConfig()
+    config = llm_client.config
+    summarizer = (
+        make_llm_summarizer(llm_client.generate)
+        if context_config.llm_summaries else extractive_summarizer
+    )
+    context = get_context_manager().prepare(
+        system_prompt=system_prompt,
+        history=conversation_history or [],
+        user_query=user_query,
+        context_window=config.context_window,
+        max_output_tokens=config.max_tokens,
+        summarizer=summarizer,
+        config=context_config,
+        summary=conversation_summary
+    )
+    if on_summary is not None and context.summarized_messages:
+        on_summary(context.summary, context.summarized_messages)
+    return context
+
+
+def get_sves_response(
+    user_query: str, 
+    llm_client: LLMClient, 
+    conversation_history: List[Dict] = None,
+    retrieval_config: Optional[RetrievalConfig] = None,
+    context_config: Optional[ContextConfig] = None,
+    cache_config: Optional[ResponseCacheConfig] = None,
+    conversation_summary: str = "",
+    on_summary: Optional[Callable[[str, int], None]] = None
+) -> str:
+    """
+    Core AI reasoning engine. Calls the self-hosted LLM.
+    
+    Args:
+        user_query: The user's question or request
+        llm_client: The LLM client to use for generation
+        conversation_history: Previous messages in the conversation
+        retrieval_config: Knowledge base retrieval settings (top-k, token budget)
+        context_config: Conversation history budgeting and summarization settings
+        cache_config: Response cache policy (exact/semantic, cacheability)
+        conversation_summary: Running summary of the turns before
+            ``conversation_history`` (see sves.conversations)
+        on_summary: Called with the updated summary and the number of
+            leading history messages it now covers
+        
+    Returns:
+        str: LLM's expert response
+        
+    Raises:
+        Exception: If LLM call fails
+    """
+    
+    start = time.perf_counter()
+    request_id = audit_query(user_query, llm_client.config)
+    keyed = keyed_history(conversation_history, conversation_summary)
+    try:
+        # Serve repeated questions from the response cache
+        cache_key, cached = lookup_cached_response(
+            user_query, llm_client, keyed, retrieval_config, cache_config
+        )
+        if cached is not None:
+            audit_response(request_id, llm_client.config, cached, "cache", time.perf_counter() - start)
+            return cached
+        
+        # Share an identical request that is already being generated
+        flight, leader = get_single_flight().join(coalescing_key(
+            user_query, llm_client, keyed, retrieval_config, cache_key, context_config
+        ))
+        if not leader:
+            record_coalesced()
+            response = flight.result()
+            audit_response(request_id, llm_client.config, response, "coalesced", time.perf_counter() - start)
+            return response
+        
+        try:
+            # Build system prompt with the knowledge base excerpts and tool results for this query
+            system_prompt = build_request_prompt(user_query, retrieval_config)
+            
+            # Fit conversation history to the model's context window
+            context = prepare_conversation(
+                system_prompt, user_query, llm_client, conversation_history, context_config,
+                conversation_summary, on_summary
+            )
+            
+            # Generate response
+            response = llm_client.generate(
+                prompt=user_query,
+                system_prompt=context.system_prompt,
+                conversation_history=context.history
+            )
+            
+            # Cache before releasing followers so no new flight starts in between
+            if cache_key is not None:
+                get_response_cache().store(cache_key, response)
+        except BaseException as e:
+            flight.fail(e)
+            raise
+        flight.finish(response)
+        audit_response(request_id, llm_client.config, response, "backend", time.perf_counter() - start)
+        
+        return response
+        
+    except Exception as e:
+        audit_error(request_id, llm_client.config, e, time.perf_counter() - start)
+        raise translate_llm_error(e)
+    finally:
+        record_stage("request", time.perf_counter() - start)
+
+
+def get_sves_response_stream(
+    user_query: str,
+    llm_client: LLMClient,
+    conversation_history: List[Dict] = None,
+    retrieval_config: Optional[RetrievalConfig] = None,
+    context_config: Optional[ContextConfig] = None,
+    cache_config: Optional[ResponseCacheConfig] = None,
+    conversation_summary: str = "",
+    on_summary: Optional[Callable[[str, int], None]] = None,
+    on_wait: Optional[Callable[[], None]] = None
+) -> TimedStream:
+    """
+    Streaming variant of get_sves_response().
+    
+    Args:
+        user_query: The user's question or request
+        llm_client: The LLM client to use for generation
+        conversation_history: Previous messages in the conversation
+        retrieval_config: Knowledge base retrieval settings (top-k, token budget)
+        context_config: Conversation history budgeting and summarization settings
+        cache_config: Response cache policy (exact/semantic, cacheability)
+        conversation_summary: Running summary of the turns before
+            ``conversation_history`` (see sves.conversations)
+        on_summary: Called with the updated summary and the number of
+            leading history messages it now covers
+        on_wait: Called periodically on the iterating thread while it waits
+            for the next delta (e.g. to show the admission queue position)
+        
+    Returns:
+        TimedStream: Iterator of response deltas; its ``metrics`` record
+        time-to-first-token and total generation time
+        
+    Raises:
+        Exception: If LLM call fails (raised while iterating)
+    """
+    start = time.perf_counter()
+    request_id = audit_query(user_query, llm_client.config)
+    keyed = keyed_history(conversation_history, conversation_summary)
+    cache_key, cached = lookup_cached_response(
+        user_query, llm_client, keyed, retrieval_config, cache_config
+    )
+    if cached is not None:
+        record_stage("request", time.perf_counter() - start)
+        audit_response(request_id, llm_client.config, cached, "cache", time.perf_counter() - start)
+        stream = TimedStream([cached])
+        stream.metrics.cached = True
+        return stream
+    
+    flight, leader = get_single_flight().join(coalescing_key(
+        user_query, llm_client, keyed, retrieval_config, cache_key, context_config
+    ))
+    if leader:
+        try:
+            system_prompt = build_request_prompt(user_query, retrieval_config)
+            context = prepare_conversation(
+                system_prompt, user_query, llm_client, conversation_history, context_config,
+                conversation_summary, on_summary
+            )
+        except BaseException as e:
+            flight.fail(e)
+            audit_error(request_id, llm_client.config, e, time.perf_counter() - start)
+            raise
+        
+        def generate() -> None:
+            # Runs on its own thread so the generation outlives a leader that
+            # stops reading (e.g. a closed browser tab) while others follow it
+            parts = []
+            try:
+                for delta in llm_client.generate_stream(
+                    prompt=user_query,
+                    system_prompt=context.system_prompt,
+                    conversation_history=context.history
+                ):
+                    parts.append(delta)
+                    flight.publish(delta)
+                # Only complete responses are cached
+                if cache_key is not None:
+                    get_response_cache().store(cache_key, "".join(parts))
+            except BaseException as e:
+                flight.fail(e)
+                return
+            flight.finish()
+        
+        # The copied context carries the caller's RequestTrace to the backend call
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(generate,),
+            name="sves-generate", daemon=True
+        ).start()
+    else:
+        record_coalesced()
+    
+    source = "backend" if leader else "coalesced"
+    
+    def deltas() -> Iterator[str]:
+        parts = []
+        try:
+            # Subscribers attaching mid-flight replay the deltas so far first
+            for delta in flight.subscribe(on_idle=on_wait):
+                parts.append(delta)
+                yield delta
+            audit_response(request_id, llm_client.config, "".join(parts), source,
+                           time.perf_counter() - start)
+        except GeneratorExit:
+            # The reader stopped early; record what it was shown
+            audit_response(request_id, llm_client.config, "".join(parts), source,
+                           time.perf_counter() - start, complete=False)
+            raise
+        except Exception as e:
+            audit_error(request_id, llm_client.config, e, time.perf_counter() - start)
+            raise translate_llm_error(e)
+        finally:
+            # Includes time the consumer spends between deltas (e.g. UI render)
+            record_stage("request", time.perf_counter() - start)
+    
+    return TimedStream(deltas())
+
+
+def translate_llm_error(error: Exception) -> Exception:
+    """Convert a backend exception into a user-facing error with remediation hints."""
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return Exception(
+            "Cannot connect to LLM server. Please ensure your self-hosted model is running.\n\n"
+            "For Ollama: Run 'ollama serve' and 'ollama pull llama3.1:70b'\n"
+            "For vLLM: Run 'python -m vllm.entrypoints.openai.api_server --model meta-llama/Llama-3.1-70B-Instruct'"
+        )
+    if isinstance(error, requests.exceptions.Timeout):
+        return Exception(
+            "LLM request timed out. The model may be loading or the request is too complex.\n"
+            "Try a simpler query or increase the timeout setting."
+        )
+    if isinstance(error, requests.exceptions.HTTPError):
+        return Exception(f"LLM server error: {str(error)}")
+    if isinstance(error, AdmissionRejected):
+        return Exception(
+            f"The LLM backend is busy ({error}).\n"
+            "Please try again in a moment."
+        )
+    if isinstance(error, CircuitOpenError):
+        return Exception(
+            "All configured LLM backends are temporarily unavailable after repeated failures.\n"
+            "Requests will be retried automatically once a backend recovers."
+        )
+    return Exception(f"Error generating response: {str(error)}\n\n{traceback.format_exc()}")
+
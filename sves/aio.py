@@ -0,0 +1,360 @@
+"""
+Asyncio-native LLM clients and concurrent fan-out.
+
+Async counterparts of the synchronous clients in ``sves.clients`` for
+driving many requests from one process without a thread per request: batch
+runs, and the same prompt compared across several backends. Backend calls
+are instrumented with sves.metrics.llm_call like the synchronous clients.
+
+Requires the optional ``aiohttp`` package (``pip install aiohttp``).
+
+Example:
+    async def main():
+        async with create_async_llm_client(DEFAULT_CONFIGS[LLMProvider.VLLM]) as client:
+            answers = await agenerate_many(client, questions, system_prompt, concurrency=8)
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency; checked when a client is created
+    aiohttp = None
+
+from sves.config import LLMConfig, LLMProvider
+from sves.metrics import llm_call
+from sves.streaming import parse_ndjson_line, parse_sse_line
+
+
+T = TypeVar("T")
+
+
+class AsyncLLMClient(ABC):
+    """Abstract base class for asyncio LLM clients."""
+
+    def __init__(self, config: LLMConfig):
+        if aiohttp is None:
+            raise ImportError("The async client layer requires aiohttp: pip install aiohttp")
+        self.config = config
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    @property
+    def session(self) -> "aiohttp.ClientSession":
+        """Keep-alive session bounded by the configured per-host pool size."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.pool_maxsize,
+                limit_per_host=self.config.pool_maxsize,
+                force_close=not self.config.keep_alive
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            )
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _messages(self, prompt: str, system_prompt: str,
+                  conversation_history: Optional[List[Dict]]) -> List[Dict]:
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history or [])
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, system_prompt: str,
+                        conversation_history: Optional[List[Dict]] = None) -> str:
+        """Generate a response from the LLM."""
+        pass
+
+    @abstractmethod
+    def astream(self, prompt: str, system_prompt: str,
+                conversation_history: Optional[List[Dict]] = None) -> AsyncIterator[str]:
+        """Generate a response from the LLM, yielding content deltas as they arrive."""
+        pass
+
+    @abstractmethod
+    async def ahealth_check(self) -> bool:
+        """Check if the LLM backend is available."""
+        pass
+
+    async def _probe(self, url: str, headers: Optional[Dict] = None,
+                     ok_status: Tuple[int, ...] = (200,)) -> bool:
+        try:
+            async with self.session.get(url, headers=headers,
+                                        timeout=aiohttp.ClientTimeout(total=5)) as response:
+                return response.status in ok_status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _post_json(self, url: str, payload: Dict, headers: Optional[Dict]) -> Dict:
+        with llm_call(self.config, "generate") as call:
+            async with self.session.post(url, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+            call.usage.update_from_event(result)
+        return result
+
+    async def _iter_lines(self, url: str, payload: Dict, headers: Optional[Dict],
+                          parse_line: Callable) -> AsyncIterator[str]:
+        with llm_call(self.config, "stream") as call:
+            async with self.session.post(url, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                async for raw in response.content:
+                    content, done = parse_line(raw.rstrip(b"\r\n"), call.usage)
+                    if content:
+                        call.mark_token()
+                        yield content
+                    if done:
+                        return
+
+
+class AsyncOllamaClient(AsyncLLMClient):
+    """Async client for Ollama local LLM server."""
+
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        self.api_url = f"{config.base_url}/api/chat"
+        self.health_url = f"{config.base_url}/api/tags"
+
+    def _payload(self, messages: List[Dict], stream: bool) -> Dict:
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "stream": stream,
+            "options": {
+                "temperature": self.config.temperature,
+                "num_predict": self.config.max_tokens,
+                "num_ctx": self.config.context_window
+            }
+        }
+        if self.config.model_keep_alive is not None:
+            payload["keep_alive"] = self.config.model_keep_alive
+        return payload
+
+    async def ahealth_check(self) -> bool:
+        """Check if Ollama server is running."""
+        return await self._probe(self.health_url)
+
+    async def agenerate(self, prompt: str, system_prompt: str,
+                        conversation_history: Optional[List[Dict]] = None) -> str:
+        """Generate response using Ollama API."""
+        payload = self._payload(self._messages(prompt, system_prompt, conversation_history), False)
+        result = await self._post_json(self.api_url, payload, None)
+        return result["message"]["content"]
+
+    def astream(self, prompt: str, system_prompt: str,
+                conversation_history: Optional[List[Dict]] = None) -> AsyncIterator[str]:
+        """Stream response tokens using the Ollama NDJSON API."""
+        payload = self._payload(self._messages(prompt, system_prompt, conversation_history), True)
+        return self._iter_lines(self.api_url, payload, None, parse_ndjson_line)
+
+
+class AsyncOpenAICompatibleClient(AsyncLLMClient):
+    """Async client for OpenAI-compatible chat completion servers."""
+
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        self.api_url = f"{config.base_url}/v1/chat/completions"
+        self.health_url = f"{config.base_url}/v1/models"
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.config.api_key:
+            headers["Authorization"] = f"Bearer {self.config.api_key}"
+        return headers
+
+    def _payload(self, messages: List[Dict], stream: bool) -> Dict:
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def ahealth_check(self) -> bool:
+        """Check if the server is running."""
+        return await self._probe(self.health_url)
+
+    async def agenerate(self, prompt: str, system_prompt: str,
+                        conversation_history: Optional[List[Dict]] = None) -> str:
+        """Generate response using the OpenAI-compatible API."""
+        payload = self._payload(self._messages(prompt, system_prompt, conversation_history), False)
+        result = await self._post_json(self.api_url, payload, self._headers())
+        return result["choices"][0]["message"]["content"]
+
+    def astream(self, prompt: str, system_prompt: str,
+                conversation_history: Optional[List[Dict]] = None) -> AsyncIterator[str]:
+        """Stream response tokens using the OpenAI-compatible SSE API."""
+        payload = self._payload(self._messages(prompt, system_prompt, conversation_history), True)
+        return self._iter_lines(self.api_url, payload, self._headers(), parse_sse_line)
+
+
+class AsyncVLLMClient(AsyncOpenAICompatibleClient):
+    """Async client for vLLM OpenAI-compatible server."""
+
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        self.health_url = f"{config.base_url}/health"
+
+
+class AsyncLMStudioClient(AsyncOpenAICompatibleClient):
+    """Async client for LM Studio local server (OpenAI-compatible)."""
+
+    def _payload(self, messages: List[Dict], stream: bool) -> Dict:
+        payload = super()._payload(messages, stream)
+        if self.config.model_keep_alive and self.config.model_keep_alive > 0:
+            payload["ttl"] = self.config.model_keep_alive  # Applies to JIT-loaded models
+        return payload
+
+
+class AsyncAzureGovClient(AsyncOpenAICompatibleClient):
+    """Async client for Azure Government OpenAI service."""
+
+    api_version = "2024-02-15-preview"
+
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        self.api_url = (
+            f"{config.base_url}/openai/deployments/{config.model_name}"
+            f"/chat/completions?api-version={self.api_version}"
+        )
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/json", "api-key": self.config.api_key or ""}
+
+    def _payload(self, messages: List[Dict], stream: bool) -> Dict:
+        payload = super()._payload(messages, stream)
+        del payload["model"]  # The deployment in the URL selects the model
+        return payload
+
+    async def ahealth_check(self) -> bool:
+        """Check if Azure OpenAI endpoint is accessible."""
+        return await self._probe(self.config.base_url, headers=self._headers(),
+                                 ok_status=(200, 401, 403))
+
+
+ASYNC_PROVIDER_CLIENTS = {
+    LLMProvider.OLLAMA: AsyncOllamaClient,
+    LLMProvider.VLLM: AsyncVLLMClient,
+    LLMProvider.LM_STUDIO: AsyncLMStudioClient,
+    LLMProvider.AZURE_GOV: AsyncAzureGovClient,
+    LLMProvider.CUSTOM_API: AsyncVLLMClient,  # Use OpenAI-compatible client
+}
+
+
+def create_async_llm_client(config: LLMConfig) -> AsyncLLMClient:
+    """Factory function to create the appropriate async LLM client."""
+    client_class = ASYNC_PROVIDER_CLIENTS.get(config.provider)
+    if not client_class:
+        raise ValueError(f"Unsupported provider: {config.provider}")
+    return client_class(config)
+
+
+# ============================================================================
+# CONCURRENT FAN-OUT
+# ============================================================================
+
+async def gather_bounded(
+    factories: Iterable[Callable[[], Awaitable[T]]],
+    concurrency: int = 8,
+    return_exceptions: bool = True
+) -> List[Union[T, BaseException]]:
+    """
+    Await coroutines with at most ``concurrency`` running at once.
+
+    ``concurrency`` workers pull factories from the iterable one at a time,
+    so coroutines (and tasks) are only created when a worker is free and a
+    large or generated batch is never materialized up front.
+
+    Args:
+        factories: Zero-argument callables creating each coroutine
+        concurrency: Maximum number of coroutines in flight
+        return_exceptions: Return exceptions in place of results instead of
+            raising the first one (the other workers are then cancelled)
+
+    Returns:
+        Results in input order
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    pending = enumerate(factories)  # Shared by the workers; next() never awaits
+    results: Dict[int, Union[T, BaseException]] = {}
+
+    async def worker() -> None:
+        for index, factory in pending:
+            try:
+                results[index] = await factory()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results[index] = e
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+    return [results[index] for index in range(len(results))]
+
+
+async def agenerate_many(
+    client: AsyncLLMClient,
+    prompts: Iterable[str],
+    system_prompt: str,
+    conversation_history: Optional[List[Dict]] = None,
+    concurrency: int = 8
+) -> List[Union[str, BaseException]]:
+    """Run many prompts against one backend under a concurrency limit."""
+    return await gather_bounded(
+        [lambda p=p: client.agenerate(p, system_prompt, conversation_history) for p in prompts],
+        concurrency=concurrency
+    )
+
+
+async def afan_out(
+    clients: Dict[str, AsyncLLMClient],
+    prompt: str,
+    system_prompt: str,
+    conversation_history: Optional[List[Dict]] = None,
+    concurrency: int = 8
+) -> Dict[str, Dict[str, object]]:
+    """
+    Send the same prompt to several backends concurrently (for comparisons).
+
+    Returns:
+        Per backend name: ``{"response": str | None, "error": str | None,
+        "latency_ms": float}``
+    """
+    async def timed(client: AsyncLLMClient) -> Dict[str, object]:
+        start = time.perf_counter()
+        try:
+            response, error = await client.agenerate(prompt, system_prompt, conversation_history), None
+        except Exception as e:
+            response, error = None, str(e)
+        return {"response": response, "error": error,
+                "latency_ms": (time.perf_counter() - start) * 1000.0}
+
+    names = list(clients)
+    results = await gather_bounded(
+        [lambda c=clients[name]: timed(c) for name in names], concurrency=concurrency
+    )
+    return dict(zip(names, results))
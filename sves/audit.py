@@ -0,0 +1,510 @@
+"""
+Append-only audit log.
+
+Every query, response (or error), the backend and model that served it, and
+every configuration change is recorded for FedRAMP audit:
+
+- ``AuditLog``: the process-wide writer. ``record()`` only stamps the record
+  and puts it on an in-memory queue, so auditing adds no latency to
+  sves.agent.get_sves_response; a background thread writes queued records
+  in batches as compact JSON lines to the active segment file, fsyncs it at
+  the configured cadence, and seals the segment once it reaches the size
+  limit: the segment is gzip-compressed and its time range, users and event
+  types are appended to the directory's ``index.jsonl``.
+- ``AuditReader``: searches a log directory by time range, user and event.
+  Sealed segments whose index entry cannot match are skipped without being
+  opened; active (or orphaned, after a crash) segments are scanned.
+
+Records carry ``ts`` (epoch seconds), ``event``, ``user`` (set with
+``audit_user()`` around a request) and event-specific fields; a query and
+its response share a ``request_id``. API keys are never recorded.
+
+    python -m sves.audit --user alice --since 2026-10-01T00:00 --event query
+
+Settings (environment):
+    SVES_AUDIT_DIR          Log directory (default <cache root>/audit, "0" disables)
+    SVES_AUDIT_FSYNC        "always" (every batch), "never", or seconds between
+                            fsyncs (default 1)
+    SVES_AUDIT_SEGMENT_MB   Segment size that triggers rotation (default 64)
+    SVES_AUDIT_COMPRESS     "0" keeps rotated segments uncompressed (default 1)
+"""
+
+import argparse
+import atexit
+import dataclasses
+import gzip
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from sves.config import LLMConfig
+from sves.metrics import current_trace, get_metrics
+from sves.paths import get_cache_dir
+
+
+INDEX_FILE = "index.jsonl"
+SEGMENT_PREFIX = "audit-"
+
+# Event types
+EVENT_QUERY = "query"
+EVENT_RESPONSE = "response"
+EVENT_ERROR = "error"
+EVENT_CONFIG_CHANGE = "config_change"
+
+_FLUSH = object()  # Queue marker: sync what is written so far
+
+
+_CURRENT_USER: ContextVar[Optional[str]] = ContextVar("sves_audit_user", default=None)
+
+
+@contextmanager
+def audit_user(user: str) -> Iterator[None]:
+    """Attribute audit records written in the enclosed block to ``user``."""
+    token = _CURRENT_USER.set(user)
+    try:
+        yield
+    finally:
+        _CURRENT_USER.reset(token)
+
+
+def current_audit_user() -> str:
+    """The user audit records are attributed to ("anonymous" if none was set)."""
+    return _CURRENT_USER.get() or "anonymous"
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+@dataclass
+class SegmentInfo:
+    """Index entry of a segment: its file and what it contains."""
+    file: str
+    first_ts: float
+    last_ts: float
+    records: int = 0
+    users: Set[str] = field(default_factory=set)
+    events: Set[str] = field(default_factory=set)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.first_ts = min(self.first_ts, record["ts"])
+        self.last_ts = max(self.last_ts, record["ts"])
+        self.records += 1
+        self.users.add(record["user"])
+        self.events.add(record["event"])
+
+    def may_contain(self, start: Optional[float], end: Optional[float],
+                    user: Optional[str], event: Optional[str]) -> bool:
+        """Whether the segment can hold records matching a search."""
+        if start is not None and self.last_ts < start:
+            return False
+        if end is not None and self.first_ts > end:
+            return False
+        if user is not None and user not in self.users:
+            return False
+        return event is None or event in self.events
+
+    def to_json(self) -> Dict[str, Any]:
+        data = dataclasses.asdict(self)
+        data["users"] = sorted(self.users)
+        data["events"] = sorted(self.events)
+        return data
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "SegmentInfo":
+        return cls(data["file"], data["first_ts"], data["last_ts"], data["records"],
+                   set(data["users"]), set(data["events"]))
+
+
+class AuditLog:
+    """Queued, batching writer of an append-only audit log directory."""
+
+    def __init__(self, directory: str, fsync_interval: Optional[float] = 1.0,
+                 max_segment_bytes: int = 64 * 1024 * 1024, compress: bool = True,
+                 batch_size: int = 512):
+        """
+        Args:
+            directory: Log directory (created if missing)
+            fsync_interval: Seconds between fsyncs of the active segment
+                (0 = after every batch, None = leave it to the OS)
+            max_segment_bytes: Size at which the active segment is sealed
+            compress: Gzip sealed segments
+            batch_size: Maximum records written per batch
+        """
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.compress = compress
+        self.batch_size = batch_size
+        self.write_errors = 0
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._segment: Optional[SegmentInfo] = None
+        self._segment_bytes = 0
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._queue: "queue.Queue[Any]" = queue.Queue()  # Records, _FLUSH, or None to stop
+        self._writer = threading.Thread(target=self._write_loop, name="sves-audit-writer", daemon=True)
+        self._writer.start()
+
+    # -- producers -----------------------------------------------------------
+
+    def record(self, event: str, **fields: Any) -> None:
+        """Queue a record (never blocks on I/O)."""
+        record = {"ts": time.time(), "event": event, "user": current_audit_user()}
+        record.update(fields)
+        self._queue.put(record)
+
+    def flush(self) -> None:
+        """Block until every queued record is written and fsynced."""
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, seal the active segment and stop the writer."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    # -- writer thread -------------------------------------------------------
+
+    def _write_loop(self) -> None:
+        while True:
+            timeout = self.fsync_interval if self._unsynced and self.fsync_interval else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                try:
+                    self._sync()
+                except OSError:
+                    get_metrics().inc("sves_audit_write_errors_total")
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [r for r in batch if isinstance(r, dict)]
+            stop = None in batch
+            try:
+                self._write(records)
+                if len(records) < len(batch):  # flush() or close()
+                    self._sync()
+                    if stop:
+                        self._seal()
+            except OSError:
+                self.write_errors += len(records)
+                get_metrics().inc("sves_audit_write_errors_total", len(records))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        if self._file is None:
+            self._open_segment(records[0]["ts"])
+        data = b"".join(_encode(r) for r in records)
+        self._file.write(data)
+        self._file.flush()
+        self._segment_bytes += len(data)
+        for record in records:
+            self._segment.add(record)
+        self._unsynced = True
+        get_metrics().inc("sves_audit_records_total", len(records))
+        if self.fsync_interval is not None and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+        if self._segment_bytes >= self.max_segment_bytes:
+            self._seal()
+
+    def _open_segment(self, ts: float) -> None:
+        stamp = datetime.fromtimestamp(ts).strftime("%Y%m%dT%H%M%S")
+        name = f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._segment = SegmentInfo(name, ts, ts)
+        self._segment_bytes = 0
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+
+    def _seal(self) -> None:
+        """
+        Close the active segment, compress it and add it to the index.
+
+        The uncompressed segment is removed only once the index entry is
+        durable, so a crash at any step leaves every record findable (see
+        AuditReader._unindexed()).
+        """
+        if self._file is None:
+            return
+        self._sync()
+        self._file.close()
+        self._file = None
+        segment = self._segment
+        path = os.path.join(self.directory, segment.file)
+        if self.compress:
+            with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            segment.file += ".gz"
+        with open(os.path.join(self.directory, INDEX_FILE), "ab") as index:
+            index.write(_encode(segment.to_json()))
+            index.flush()
+            os.fsync(index.fileno())
+        if self.compress:
+            os.remove(path)
+
+
+class AuditReader:
+    """Searches an audit log directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segments(self) -> List[SegmentInfo]:
+        """Index entries of the sealed segments, oldest first."""
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            entries = [SegmentInfo.from_json(json.loads(line)) for line in f if line.strip()]
+        return sorted(entries, key=lambda s: s.first_ts)
+
+    def _unindexed(self, indexed: Set[str]) -> List[str]:
+        """
+        Active segments, and those a crashed process never sealed.
+
+        A crash while sealing can leave a segment both plain and compressed,
+        or only compressed but not indexed; each is read exactly once.
+        """
+        names = {name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX)}
+        return sorted(
+            name for name in names
+            if name not in indexed and (
+                (name.endswith(".jsonl") and name + ".gz" not in indexed)
+                or (name.endswith(".jsonl.gz") and name[:-3] not in names)
+            )
+        )
+
+    def _read(self, name: str) -> Iterator[Dict[str, Any]]:
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an active segment
+        except FileNotFoundError:
+            return  # Sealed (renamed) while listing
+
+    def search(self, start: Optional[float] = None, end: Optional[float] = None,
+               user: Optional[str] = None, event: Optional[str] = None,
+               limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching records, oldest segment first.
+
+        Args:
+            start: Earliest timestamp (epoch seconds, inclusive)
+            end: Latest timestamp (epoch seconds, inclusive)
+            user: Only records of this user
+            event: Only records of this event type
+            limit: Maximum number of records
+
+        Returns:
+            Iterator[Dict[str, Any]]: Matching audit records
+        """
+        indexed = self.segments()
+        names = [s.file for s in indexed if s.may_contain(start, end, user, event)]
+        names += self._unindexed({s.file for s in indexed})
+        found = 0
+        for name in names:
+            for record in self._read(name):
+                ts = record.get("ts", 0.0)
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts > end:
+                    continue
+                if user is not None and record.get("user") != user:
+                    continue
+                if event is not None and record.get("event") != event:
+                    continue
+                yield record
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+
+class _DisabledAuditLog:
+    """Stand-in when auditing is disabled with SVES_AUDIT_DIR=0."""
+    directory = None
+    write_errors = 0
+
+    def record(self, event: str, **fields: Any) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+_AUDIT_LOG = None
+_AUDIT_LOG_LOCK = threading.Lock()
+
+
+def _fsync_setting(value: str) -> Optional[float]:
+    if value == "always":
+        return 0.0
+    if value == "never":
+        return None
+    return float(value)
+
+
+def get_audit_log() -> AuditLog:
+    """Return the process-wide audit log."""
+    global _AUDIT_LOG
+    if _AUDIT_LOG is None:
+        with _AUDIT_LOG_LOCK:
+            if _AUDIT_LOG is None:
+                directory = os.environ.get("SVES_AUDIT_DIR", "")
+                if directory == "0":
+                    _AUDIT_LOG = _DisabledAuditLog()
+                else:
+                    _AUDIT_LOG = AuditLog(
+                        directory or get_cache_dir("audit"),
+                        fsync_interval=_fsync_setting(os.environ.get("SVES_AUDIT_FSYNC", "1")),
+                        max_segment_bytes=int(float(os.environ.get("SVES_AUDIT_SEGMENT_MB", "64")) * 1024 * 1024),
+                        compress=os.environ.get("SVES_AUDIT_COMPRESS", "1") != "0",
+                    )
+                    atexit.register(_AUDIT_LOG.close)
+    return _AUDIT_LOG
+
+
+# -- record helpers used by sves.agent, sves.batch and the UI -------------------
+
+def _backend(config: LLMConfig) -> Dict[str, Any]:
+    return {
+        "provider": config.provider.value,
+        "model": config.model_name,
+        "base_url": ",".join(config.replica_urls) if config.replica_urls else config.base_url,
+    }
+
+
+def audit_query(query: str, config: LLMConfig) -> str:
+    """Record a query and return the request id that links its outcome."""
+    request_id = uuid.uuid4().hex
+    get_audit_log().record(EVENT_QUERY, request_id=request_id, query=query, **_backend(config))
+    return request_id
+
+
+def audit_response(request_id: str, config: LLMConfig, response: str,
+                   source: str, seconds: float, complete: bool = True) -> None:
+    """
+    Record the response to a query.
+
+    Args:
+        request_id: Id returned by audit_query()
+        config: Configured backend
+        response: Full response text
+        source: "backend", "cache" or "coalesced"
+        seconds: Time from query to complete response
+        complete: False if the reader stopped a stream early (``response``
+            is then what it was shown)
+    """
+    trace = current_trace()
+    fields = _backend(config)
+    if trace is not None and trace.backend:
+        fields["served_by"] = trace.backend  # The backend that answered after any failover
+    if not complete:
+        fields["complete"] = False
+    get_audit_log().record(EVENT_RESPONSE, request_id=request_id, response=response,
+                           source=source, seconds=round(seconds, 3), **fields)
+
+
+def audit_error(request_id: str, config: LLMConfig, error: BaseException, seconds: float) -> None:
+    """Record a query that failed."""
+    get_audit_log().record(EVENT_ERROR, request_id=request_id, error=f"{type(error).__name__}: {error}",
+                           seconds=round(seconds, 3), **_backend(config))
+
+
+def _config_fields(config: Any) -> Dict[str, Any]:
+    data = {}
+    for f in dataclasses.fields(config):
+        value = getattr(config, f.name)
+        if f.name == "api_key":
+            data["api_key_set"] = bool(value)
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, list):
+            value = [v.value if isinstance(v, Enum) else v for v in value]
+        data[f.name] = value
+    return data
+
+
+def audit_config_change(scope: str, config: Any, previous: Optional[Any] = None) -> None:
+    """
+    Record a configuration change.
+
+    Args:
+        scope: What was configured, e.g. "llm" or "retrieval"
+        config: The new configuration (a dataclass; API keys are redacted)
+        previous: The configuration it replaces, to record only what changed
+    """
+    new = _config_fields(config)
+    if previous is None:
+        get_audit_log().record(EVENT_CONFIG_CHANGE, scope=scope, config=new)
+        return
+    old = _config_fields(previous)
+    changes = {k: [old.get(k), v] for k, v in new.items() if old.get(k) != v}
+    if changes:
+        get_audit_log().record(EVENT_CONFIG_CHANGE, scope=scope, changes=changes)
+
+
+# -- command line -----------------------------------------------------------------
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search the SVES audit log")
+    parser.add_argument("--dir", help="Log directory (default: SVES_AUDIT_DIR or <cache root>/audit)")
+    parser.add_argument("--since", type=_parse_time, help="Start time (ISO 8601 or epoch seconds)")
+    parser.add_argument("--until", type=_parse_time, help="End time (ISO 8601 or epoch seconds)")
+    parser.add_argument("--user", help="Only records of this user")
+    parser.add_argument("--event", choices=[EVENT_QUERY, EVENT_RESPONSE, EVENT_ERROR, EVENT_CONFIG_CHANGE])
+    parser.add_argument("--limit", type=int, help="Maximum number of records")
+    args = parser.parse_args(argv)
+
+    directory = args.dir or os.environ.get("SVES_AUDIT_DIR") or get_cache_dir("audit")
+    reader = AuditReader(directory)
+    for record in reader.search(args.since, args.until, args.user, args.event, args.limit):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Load balancing across multiple backend replicas.
+
+Routing state (outstanding requests, latency EWMA, ejection) is kept per
+replica URL in a process-wide registry, so every session routing to the same
+replicas sees the same load picture. Each session's pooled client still owns
+its own per-replica clients (they carry session-specific settings such as
+temperature).
+
+Strategies:
+    least_outstanding  Fewest in-flight requests; ties broken by EWMA latency
+    ewma               Lowest EWMA latency weighted by (outstanding + 1)
+
+A replica is ejected after ``eject_after`` consecutive failures or a failed
+health probe. Once it has been out for ``readmit_after`` seconds it is
+re-admitted on probation, either by a successful health probe or by the next
+routing decision (so headless runs without probes recover too); a single
+further failure ejects it again, and a success clears the probation.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+ROUTING_STRATEGIES = ("least_outstanding", "ewma")
+
+
+@dataclass
+class ReplicaState:
+    """Shared routing state of one replica."""
+    key: str
+    outstanding: int = 0
+    ewma_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    ejected_at: Optional[float] = None
+    requests: int = 0
+    failures: int = 0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_at is not None
+
+
+_STATES: Dict[str, ReplicaState] = {}
+_STATES_LOCK = threading.Lock()
+
+
+def get_replica_state(key: str) -> ReplicaState:
+    """Return the process-wide routing state of a replica."""
+    with _STATES_LOCK:
+        state = _STATES.get(key)
+        if state is None:
+            state = _STATES[key] = ReplicaState(key=key)
+        return state
+
+
+class NoReplicaAvailable(RuntimeError):
+    """Raised when every replica has been excluded for a request."""
+
+
+class LoadBalancer:
+    """Chooses a replica per request and tracks its outcome."""
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        strategy: str = "least_outstanding",
+        eject_after: int = 3,
+        readmit_after: float = 30.0,
+        ewma_alpha: float = 0.3
+    ):
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unsupported routing strategy: {strategy}")
+        self.keys = list(dict.fromkeys(keys))
+        if not self.keys:
+            raise ValueError("LoadBalancer requires at least one replica")
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.readmit_after = readmit_after
+        self.ewma_alpha = ewma_alpha
+        self._states = [get_replica_state(key) for key in self.keys]
+
+    def _score(self, state: ReplicaState) -> tuple:
+        ewma = state.ewma_ms or 0.0  # Unmeasured replicas are tried early
+        if self.strategy == "ewma":
+            return (ewma * (state.outstanding + 1), state.outstanding)
+        return (state.outstanding, ewma)
+
+    def _readmit_expired(self, now: float) -> None:
+        """Put replicas whose cooldown has elapsed back on probation (lock held)."""
+        for state in self._states:
+            if state.ejected and now - state.ejected_at >= self.readmit_after:
+                state.ejected_at = None
+                state.consecutive_failures = max(self.eject_after - 1, 0)
+
+    def _pick(self, exclude: Iterable[str]) -> ReplicaState:
+        """Choose a replica; the caller must hold ``_STATES_LOCK``."""
+        excluded = set(exclude)
+        self._readmit_expired(time.monotonic())
+        candidates = [s for s in self._states if s.key not in excluded]
+        if not candidates:
+            raise NoReplicaAvailable("All replicas failed for this request")
+        admitted = [s for s in candidates if not s.ejected]
+        if admitted:
+            return min(admitted, key=self._score)
+        return min(candidates, key=lambda s: s.ejected_at)
+
+    def choose(self, exclude: Iterable[str] = ()) -> ReplicaState:
+        """
+        Pick the best replica not in ``exclude``.
+
+        Ejected replicas are only used when every candidate is ejected (fail
+        open), in which case the one ejected longest ago is chosen. Replicas
+        ejected for at least ``readmit_after`` seconds are re-admitted first.
+        """
+        with _STATES_LOCK:
+            return self._pick(exclude)
+
+    @contextmanager
+    def lease(self, exclude: Iterable[str] = ()) -> Iterator[ReplicaState]:
+        """Choose a replica and count the request as outstanding while held."""
+        # Choosing and counting in one critical section, so a concurrent burst
+        # sees each other's leases and spreads across replicas
+        with _STATES_LOCK:
+            state = self._pick(exclude)
+            state.outstanding += 1
+            state.requests += 1
+        try:
+            yield state
+        finally:
+            with _STATES_LOCK:
+                state.outstanding -= 1
+
+    def report_success(self, state: ReplicaState, latency_ms: float) -> None:
+        """Record a successful request, re-admit the replica and update the EWMA."""
+        with _STATES_LOCK:
+            state.consecutive_failures = 0
+            state.ejected_at = None
+            if state.ewma_ms is None:
+                state.ewma_ms = latency_ms
+            else:
+                state.ewma_ms += self.ewma_alpha * (latency_ms - state.ewma_ms)
+
+    def report_failure(self, state: ReplicaState) -> None:
+        """Record a failed request; eject after repeated failures."""
+        with _STATES_LOCK:
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= self.eject_after and not state.ejected:
+                state.ejected_at = time.monotonic()
+
+    def report_health(self, key: str, healthy: bool) -> None:
+        """Apply a health probe result: eject on failure, re-admit after cooldown."""
+        state = get_replica_state(key)
+        with _STATES_LOCK:
+            if not healthy:
+                if not state.ejected:
+                    state.ejected_at = time.monotonic()
+            elif state.ejected and time.monotonic() - state.ejected_at >= self.readmit_after:
+                state.ejected_at = None
+                state.consecutive_failures = 0
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Return routing state of every replica for display."""
+        with _STATES_LOCK:
+            return [
+                {
+                    "replica": s.key,
+                    "outstanding": s.outstanding,
+                    "ewma_ms": round(s.ewma_ms, 1) if s.ewma_ms is not None else None,
+                    "ejected": s.ejected,
+                    "requests": s.requests,
+                    "failures": s.failures,
+                }
+                for s in self._states
+            ]
@@ -0,0 +1,414 @@
+"""
+Headless batch runner: answer a file of queries without the Streamlit UI.
+
+Reads queries as a stream (JSONL, CSV or stdin), calls get_sves_response()
+on a bounded worker pool and appends one JSON result per line as each query
+completes, so memory stays flat for arbitrarily large regression sets.
+
+The output file doubles as the checkpoint: on restart, queries whose latest
+result line succeeded are skipped and failed ones are retried. A line cut
+short by an interruption is trimmed before appending. When a query id
+appears more than once in the output, the last line wins.
+
+Input rows:
+    JSONL  {"id": "q1", "query": "...", "history": [...]} or a bare JSON string
+    CSV    header row with ``id`` and ``query`` columns
+Rows without an id are identified by their 1-based row number.
+
+Output rows:
+    {"id", "row", "query", "response", "error", "latency_ms",
+     "query_tokens", "response_tokens", "prompt_tokens", "completion_tokens",
+     "tokens_per_sec", "cached", "coalesced", "stages_ms", "completed_at"}
+``query_tokens``/``response_tokens`` use sves.tokens.count_tokens (an
+estimate unless a tokenizer has been installed with set_token_counter);
+``prompt_tokens``/``completion_tokens`` are the counts reported by the
+backend (null if it reports none or the answer came from the cache).
+
+Set SVES_METRICS_FILE or SVES_METRICS_PORT to export aggregate metrics
+(see sves.metrics); the file is written once more when the run ends.
+Queries, responses and the backend configuration are recorded in the audit
+log (sves.audit) as user ``batch:<login name>``.
+
+Usage:
+    python -m sves.batch queries.jsonl -o results.jsonl --concurrency 8
+    cat queries.csv | python -m sves.batch - --format csv -o results.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+from sves.admission import PRIORITY_BATCH, AdmissionRequest
+from sves.agent import get_sves_response
+from sves.audit import audit_config_change, audit_user
+from sves.clients import LLMClient, create_llm_client
+from sves.config import DEFAULT_CONFIGS, LLMConfig, LLMProvider, load_config_overrides
+from sves.context import ContextConfig
+from sves.metrics import RequestTrace, start_metrics_exporter
+from sves.response_cache import ResponseCacheConfig
+from sves.retrieval import RetrievalConfig
+from sves.tokens import count_tokens
+from sves.warmup import warm_up
+from sves.water import preload_water_properties
+
+
+BATCH_AUDIT_USER = "batch:" + (os.environ.get("USER") or os.environ.get("USERNAME") or "unknown")
+
+
+@dataclass
+class BatchItem:
+    """One query of a batch run."""
+    id: str
+    row: int
+    query: str
+    history: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class BatchSummary:
+    """Counters of a batch run."""
+    submitted: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0        # Already answered according to the checkpoint
+    elapsed_s: float = 0.0
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _item_from_record(record, row: int, query_field: str, id_field: str) -> BatchItem:
+    if isinstance(record, str):
+        return BatchItem(id=str(row), row=row, query=record)
+    query = record.get(query_field)
+    if not query:
+        raise ValueError(f"Row {row}: missing '{query_field}' field")
+    history = record.get("history") or []
+    if isinstance(history, str):
+        history = json.loads(history)  # CSV cells carry the history as JSON text
+    item_id = record.get(id_field)
+    return BatchItem(
+        id=str(item_id) if item_id not in (None, "") else str(row),
+        row=row,
+        query=query,
+        history=history
+    )
+
+
+def iter_queries(
+    source: TextIO,
+    fmt: str = "jsonl",
+    query_field: str = "query",
+    id_field: str = "id"
+) -> Iterator[BatchItem]:
+    """
+    Stream batch items from an open JSONL or CSV text file.
+
+    Args:
+        source: Text file object (e.g. ``open(path)`` or ``sys.stdin``)
+        fmt: "jsonl" or "csv"
+        query_field: Name of the field holding the question
+        id_field: Name of the field holding the query id
+
+    Yields:
+        BatchItem: One item per non-empty row, in file order
+    """
+    if fmt == "csv":
+        for row, record in enumerate(csv.DictReader(source), start=1):
+            yield _item_from_record(record, row, query_field, id_field)
+    elif fmt == "jsonl":
+        row = 0
+        for line in source:
+            if not line.strip():
+                continue
+            row += 1
+            yield _item_from_record(json.loads(line), row, query_field, id_field)
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+
+def _trim_partial_line(path: str) -> None:
+    """Drop a trailing line left incomplete by an interrupted write."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan backwards for the last complete line
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Return the ids already answered successfully in an output file.
+
+    Also trims an incomplete final line so new results can be appended.
+    """
+    if not os.path.exists(path):
+        return set()
+    _trim_partial_line(path)
+    latest: Dict[str, bool] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            latest[str(result["id"])] = result.get("error") is None
+    return {item_id for item_id, ok in latest.items() if ok}
+
+
+def run_item(
+    item: BatchItem,
+    llm_client: LLMClient,
+    retrieval_config: Optional[RetrievalConfig] = None,
+    context_config: Optional[ContextConfig] = None,
+    cache_config: Optional[ResponseCacheConfig] = None
+) -> Dict[str, object]:
+    """Answer one item and return its result row (errors are captured, not raised)."""
+    start = time.perf_counter()
+    response, error = None, None
+    trace = RequestTrace()
+    # Batch rows queue behind interactive chat when the backend is busy
+    admission = AdmissionRequest(session="batch", priority=PRIORITY_BATCH)
+    with trace.activate(), admission.activate(), audit_user(BATCH_AUDIT_USER):
+        try:
+            response = get_sves_response(
+                user_query=item.query,
+                llm_client=llm_client,
+                conversation_history=item.history,
+                retrieval_config=retrieval_config,
+                context_config=context_config,
+                cache_config=cache_config
+            )
+        except Exception as e:
+            error = str(e)
+    tokens_per_sec = trace.tokens_per_sec
+    return {
+        "id": item.id,
+        "row": item.row,
+        "query": item.query,
+        "response": response,
+        "error": error,
+        "latency_ms": round((time.perf_counter() - start) * 1000.0, 1),
+        "query_tokens": count_tokens(item.query),
+        "response_tokens": count_tokens(response) if response else 0,
+        "prompt_tokens": trace.prompt_tokens or None,
+        "completion_tokens": trace.completion_tokens or None,
+        "tokens_per_sec": round(tokens_per_sec, 1) if tokens_per_sec else None,
+        "cached": trace.cached,
+        "coalesced": trace.coalesced,
+        "stages_ms": {name: round(ms, 1) for name, ms in trace.stages_ms.items()},
+        "completed_at": time.time(),
+    }
+
+
+def run_batch(
+    items: Iterable[BatchItem],
+    llm_client: LLMClient,
+    output: TextIO,
+    concurrency: int = 4,
+    completed: Optional[Set[str]] = None,
+    retrieval_config: Optional[RetrievalConfig] = None,
+    context_config: Optional[ContextConfig] = None,
+    cache_config: Optional[ResponseCacheConfig] = None,
+    progress: Optional[TextIO] = None
+) -> BatchSummary:
+    """
+    Answer items on a worker pool, writing each result as soon as it completes.
+
+    At most ``2 * concurrency`` items are read ahead of the workers, so the
+    input is consumed as a stream. Results are written in completion order.
+
+    Args:
+        items: Batch items (consumed lazily)
+        llm_client: Client shared by all workers
+        output: Text file receiving one JSON result per line
+        concurrency: Number of concurrent get_sves_response() calls
+        completed: Ids to skip (from load_checkpoint)
+        retrieval_config: Knowledge base retrieval settings
+        context_config: Conversation history budgeting settings
+        cache_config: Response cache policy
+        progress: Optional stream for one-line progress updates (e.g. stderr)
+
+    Returns:
+        BatchSummary: Counters of the run
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    completed = completed or set()
+    summary = BatchSummary()
+    start = time.perf_counter()
+
+    def drain(futures: Iterable[Future]) -> None:
+        for future in futures:
+            result = future.result()
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            if result["error"] is None:
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+            if progress is not None:
+                status = "ok" if result["error"] is None else "error"
+                progress.write(
+                    f"[{summary.succeeded + summary.failed}/{summary.submitted}] "
+                    f"{result['id']} {status} {result['latency_ms'] / 1000:.1f}s\n"
+                )
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="sves-batch")
+    pending: Set[Future] = set()
+    try:
+        for item in items:
+            if item.id in completed:
+                summary.skipped += 1
+                continue
+            pending.add(pool.submit(
+                run_item, item, llm_client, retrieval_config, context_config, cache_config
+            ))
+            summary.submitted += 1
+            if len(pending) >= 2 * concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                drain(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            drain(done)
+    finally:
+        # On interruption, drop queued items; finished rows are already written
+        pool.shutdown(wait=False, cancel_futures=True)
+        summary.elapsed_s = time.perf_counter() - start
+    return summary
+
+
+def build_config(args: argparse.Namespace) -> LLMConfig:
+    """Deployment configuration (SVES_* overrides) with command-line flags applied."""
+    config = load_config_overrides(DEFAULT_CONFIGS[LLMProvider.OLLAMA])
+    if args.provider and LLMProvider(args.provider) != config.provider:
+        config = DEFAULT_CONFIGS[LLMProvider(args.provider)]
+    flags = {
+        "base_url": args.base_url,
+        "model_name": args.model,
+        "temperature": args.temperature,
+        "max_tokens": args.max_tokens,
+        "timeout": args.timeout,
+        "context_window": args.context_window,
+    }
+    return replace(config, **{name: value for name, value in flags.items() if value is not None})
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m sves.batch",
+        description="Answer a file of SVES queries without the Streamlit UI."
+    )
+    parser.add_argument("input", help="JSONL or CSV file of queries, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSONL results file, also used as the resume checkpoint (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format (default: from the file extension, jsonl for stdin)")
+    parser.add_argument("--query-field", default="query", help="Field holding the question")
+    parser.add_argument("--id-field", default="id", help="Field holding the query id")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="Concurrent requests (default: 4)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Overwrite the output file instead of resuming from it")
+    parser.add_argument("--provider", choices=[p.value for p in DEFAULT_CONFIGS],
+                        help="LLM provider (default: SVES_PROVIDER or ollama)")
+    parser.add_argument("--base-url", help="LLM server URL")
+    parser.add_argument("--model", help="Model name")
+    parser.add_argument("--temperature", type=float,
+                        help="Sampling temperature; use 0 for reproducible regression runs")
+    parser.add_argument("--max-tokens", type=int, help="Maximum output tokens")
+    parser.add_argument("--timeout", type=int, help="Request timeout in seconds")
+    parser.add_argument("--context-window", type=int, help="Model context length in tokens")
+    parser.add_argument("--full-knowledge-base", action="store_true",
+                        help="Send the whole knowledge base instead of retrieved sections")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Skip loading the model and priming the prompt prefix before the first row")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No progress output on stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    args = parse_args(argv)
+    exporter = start_metrics_exporter()
+    config = build_config(args)
+    with audit_user(BATCH_AUDIT_USER):
+        audit_config_change("llm", config)
+    llm_client = create_llm_client(config)
+    retrieval_config = RetrievalConfig(enabled=not args.full_knowledge_base)
+    if not args.no_warmup:
+        preload_water_properties()
+        for result in warm_up(config, retrieval_config):
+            if not args.quiet:
+                status = "ok" if result.ok else f"failed: {result.error}"
+                sys.stderr.write(f"Warm-up {result.url}: {status} ({result.seconds:.1f}s)\n")
+    cache_config = ResponseCacheConfig(enabled=not args.no_cache)
+    fmt = _detect_format(args.input, args.format)
+
+    completed: Set[str] = set()
+    if args.output == "-":
+        output = sys.stdout
+    else:
+        if not args.no_resume:
+            completed = load_checkpoint(args.output)
+        output = open(args.output, "w" if args.no_resume else "a", encoding="utf-8")
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+
+    summary = BatchSummary()
+    interrupted = False
+    try:
+        summary = run_batch(
+            iter_queries(source, fmt, args.query_field, args.id_field),
+            llm_client,
+            output,
+            concurrency=args.concurrency,
+            completed=completed,
+            retrieval_config=retrieval_config,
+            cache_config=cache_config,
+            progress=None if args.quiet else sys.stderr
+        )
+    except KeyboardInterrupt:
+        interrupted = True
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        if exporter is not None:
+            exporter.flush()
+
+    if interrupted:
+        sys.stderr.write("Interrupted; rerun the same command to resume.\n")
+        return 130
+    sys.stderr.write(
+        f"Done: {summary.succeeded} succeeded, {summary.failed} failed, "
+        f"{summary.skipped} skipped in {summary.elapsed_s:.1f}s\n"
+    )
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,684 @@
+"""
+Synchronous LLM backend clients.
+
+One client per supported provider (Ollama, vLLM, LM Studio, Azure Government),
+plus the load-balanced replica pool, the admission-controlled gate and the
+retry/failover chain that wrap them. create_llm_client() builds the right
+stack for an LLMConfig.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from dataclasses import replace
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from sves.admission import AdmissionRejected, get_admission_controller
+from sves.balancer import LoadBalancer, NoReplicaAvailable
+from sves.config import LLMConfig, LLMProvider, build_fallback_config
+from sves.health import HealthStatus, get_health_monitor
+from sves.http import get_http_session
+from sves.metrics import llm_call
+from sves.resilience import CircuitOpenError, RetryPolicy, get_circuit_breaker
+from sves.streaming import iter_ndjson_deltas, iter_sse_deltas
+
+
+class LLMClient(ABC):
+    """Abstract base class for LLM clients."""
+    
+    @abstractmethod
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate a response from the LLM."""
+        pass
+    
+    @abstractmethod
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Generate a response from the LLM, yielding content deltas as they arrive."""
+        pass
+    
+    @abstractmethod
+    def health_check(self) -> bool:
+        """Check if the LLM backend is available."""
+        pass
+
+
+def create_http_session(config: LLMConfig) -> requests.Session:
+    """Return the shared, pooled HTTP session for the configured backend."""
+    return get_http_session(
+        config.base_url,
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+        keep_alive=config.keep_alive
+    )
+
+
+class OllamaClient(LLMClient):
+    """Client for Ollama local LLM server."""
+    
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        self.session = create_http_session(config)
+        self.api_url = f"{config.base_url}/api/chat"
+        self.health_url = f"{config.base_url}/api/tags"
+    
+    def health_check(self) -> bool:
+        """Check if Ollama server is running."""
+        try:
+            response = self.session.get(self.health_url, timeout=5)
+            return response.status_code == 200
+        except:
+            return False
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate response using Ollama API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "stream": False,
+            "options": {
+                "temperature": self.config.temperature,
+                "num_predict": self.config.max_tokens,
+                "num_ctx": self.config.context_window
+            }
+        }
+        if self.config.model_keep_alive is not None:
+            payload["keep_alive"] = self.config.model_keep_alive
+        
+        with llm_call(self.config, "generate") as call:
+            response = self.session.post(
+                self.api_url,
+                json=payload,
+                timeout=self.config.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+            call.usage.update_from_event(result)
+        return result["message"]["content"]
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream response tokens using the Ollama NDJSON API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "stream": True,
+            "options": {
+                "temperature": self.config.temperature,
+                "num_predict": self.config.max_tokens,
+                "num_ctx": self.config.context_window
+            }
+        }
+        if self.config.model_keep_alive is not None:
+            payload["keep_alive"] = self.config.model_keep_alive
+        
+        with llm_call(self.config, "stream") as call, self.session.post(
+            self.api_url,
+            json=payload,
+            stream=True,
+            timeout=self.config.timeout
+        ) as response:
+            response.raise_for_status()
+            for delta in iter_ndjson_deltas(response.iter_lines(), call.usage):
+                call.mark_token()
+                yield delta
+
+
+class VLLMClient(LLMClient):
+    """Client for vLLM OpenAI-compatible server."""
+    
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        self.session = create_http_session(config)
+        self.api_url = f"{config.base_url}/v1/chat/completions"
+        self.health_url = f"{config.base_url}/health"
+    
+    def health_check(self) -> bool:
+        """Check if vLLM server is running."""
+        try:
+            response = self.session.get(self.health_url, timeout=5)
+            return response.status_code == 200
+        except:
+            return False
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate response using vLLM OpenAI-compatible API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        headers = {"Content-Type": "application/json"}
+        if self.config.api_key:
+            headers["Authorization"] = f"Bearer {self.config.api_key}"
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature
+        }
+        
+        with llm_call(self.config, "generate") as call:
+            response = self.session.post(
+                self.api_url,
+                json=payload,
+                headers=headers,
+                timeout=self.config.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+            call.usage.update_from_event(result)
+        return result["choices"][0]["message"]["content"]
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream response tokens using the vLLM OpenAI-compatible SSE API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        headers = {"Content-Type": "application/json"}
+        if self.config.api_key:
+            headers["Authorization"] = f"Bearer {self.config.api_key}"
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True}  # Token counts in the last chunk
+        }
+        
+        with llm_call(self.config, "stream") as call, self.session.post(
+            self.api_url,
+            json=payload,
+            headers=headers,
+            stream=True,
+            timeout=self.config.timeout
+        ) as response:
+            response.raise_for_status()
+            for delta in iter_sse_deltas(response.iter_lines(), call.usage):
+                call.mark_token()
+                yield delta
+
+
+class LMStudioClient(LLMClient):
+    """Client for LM Studio local server (OpenAI-compatible)."""
+    
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        self.session = create_http_session(config)
+        self.api_url = f"{config.base_url}/v1/chat/completions"
+    
+    def health_check(self) -> bool:
+        """Check if LM Studio server is running."""
+        try:
+            response = self.session.get(f"{self.config.base_url}/v1/models", timeout=5)
+            return response.status_code == 200
+        except:
+            return False
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate response using LM Studio OpenAI-compatible API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature
+        }
+        if self.config.model_keep_alive and self.config.model_keep_alive > 0:
+            payload["ttl"] = self.config.model_keep_alive  # Applies to JIT-loaded models
+        
+        with llm_call(self.config, "generate") as call:
+            response = self.session.post(
+                self.api_url,
+                json=payload,
+                timeout=self.config.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+            call.usage.update_from_event(result)
+        return result["choices"][0]["message"]["content"]
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream response tokens using the LM Studio OpenAI-compatible SSE API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        payload = {
+            "model": self.config.model_name,
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "stream": True
+        }
+        if self.config.model_keep_alive and self.config.model_keep_alive > 0:
+            payload["ttl"] = self.config.model_keep_alive
+        
+        with llm_call(self.config, "stream") as call, self.session.post(
+            self.api_url,
+            json=payload,
+            stream=True,
+            timeout=self.config.timeout
+        ) as response:
+            response.raise_for_status()
+            for delta in iter_sse_deltas(response.iter_lines(), call.usage):
+                call.mark_token()
+                yield delta
+
+
+class AzureGovClient(LLMClient):
+    """Client for Azure Government OpenAI service."""
+    
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        self.session = create_http_session(config)
+        self.api_version = "2024-02-15-preview"
+        self.api_url = f"{config.base_url}/openai/deployments/{config.model_name}/chat/completions?api-version={self.api_version}"
+    
+    def health_check(self) -> bool:
+        """Check if Azure OpenAI endpoint is accessible."""
+        try:
+            # Simple connectivity check
+            response = self.session.get(
+                self.config.base_url,
+                headers={"api-key": self.config.api_key or ""},
+                timeout=5
+            )
+            return response.status_code in [200, 401, 403]  # Endpoint exists
+        except:
+            return False
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate response using Azure Government OpenAI API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        headers = {
+            "Content-Type": "application/json",
+            "api-key": self.config.api_key
+        }
+        
+        payload = {
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature
+        }
+        
+        with llm_call(self.config, "generate") as call:
+            response = self.session.post(
+                self.api_url,
+                json=payload,
+                headers=headers,
+                timeout=self.config.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+            call.usage.update_from_event(result)
+        return result["choices"][0]["message"]["content"]
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream response tokens using the Azure Government OpenAI SSE API."""
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": prompt})
+        
+        headers = {
+            "Content-Type": "application/json",
+            "api-key": self.config.api_key
+        }
+        
+        payload = {
+            "messages": messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "stream": True
+        }
+        
+        with llm_call(self.config, "stream") as call, self.session.post(
+            self.api_url,
+            json=payload,
+            headers=headers,
+            stream=True,
+            timeout=self.config.timeout
+        ) as response:
+            response.raise_for_status()
+            for delta in iter_sse_deltas(response.iter_lines(), call.usage):
+                call.mark_token()
+                yield delta
+
+
+def backend_key(config: LLMConfig) -> str:
+    """Identify a configured backend for health monitoring."""
+    urls = ",".join(config.replica_urls) if config.replica_urls else config.base_url
+    return f"{config.provider.value}|{urls}|{config.model_name}"
+
+
+def get_backend_status(llm_client: LLMClient) -> HealthStatus:
+    """
+    Return the cached health of a client's backend without blocking.
+    
+    The backend is registered with the process-wide health monitor on first
+    use and probed on its background thread from then on.
+    """
+    monitor = get_health_monitor()
+    key = backend_key(llm_client.config)
+    monitor.register(key, llm_client.health_check)
+    return monitor.get_status(key)
+
+
+class PooledLLMClient(LLMClient):
+    """
+    Load-balanced client over several replicas of the same backend.
+    
+    Requests are routed by least outstanding requests or latency EWMA (see
+    sves.balancer). Connection failures, timeouts and 5xx responses are
+    retried on another replica; streams are only retried before their first
+    token. Health probes eject failing replicas and re-admit recovered ones.
+    """
+    
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        client_class = PROVIDER_CLIENTS.get(config.provider)
+        if not client_class:
+            raise ValueError(f"Unsupported provider: {config.provider}")
+        self.replicas = {
+            url: client_class(replace(config, base_url=url, replica_urls=None))
+            for url in config.replica_urls
+        }
+        self.balancer = LoadBalancer(self.replicas, strategy=config.routing)
+    
+    @staticmethod
+    def _is_replica_failure(error: Exception) -> bool:
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code >= 500
+        return False
+    
+    def health_check(self) -> bool:
+        """Probe every replica, updating ejection state; healthy if any replica is."""
+        any_healthy = False
+        for url, client in self.replicas.items():
+            healthy = client.health_check()
+            self.balancer.report_health(url, healthy)
+            any_healthy = any_healthy or healthy
+        return any_healthy
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate a response on the best available replica."""
+        tried = []
+        while True:
+            with self.balancer.lease(exclude=tried) as replica:
+                start = time.perf_counter()
+                try:
+                    response = self.replicas[replica.key].generate(
+                        prompt, system_prompt, conversation_history
+                    )
+                except Exception as e:
+                    if not self._is_replica_failure(e):
+                        raise
+                    self.balancer.report_failure(replica)
+                    tried.append(replica.key)
+                    if len(tried) == len(self.replicas):
+                        raise
+                    continue
+                self.balancer.report_success(replica, (time.perf_counter() - start) * 1000.0)
+                return response
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream a response from the best available replica."""
+        tried = []
+        while True:
+            with self.balancer.lease(exclude=tried) as replica:
+                start = time.perf_counter()
+                started = False
+                try:
+                    for delta in self.replicas[replica.key].generate_stream(
+                        prompt, system_prompt, conversation_history
+                    ):
+                        started = True
+                        yield delta
+                except Exception as e:
+                    if not self._is_replica_failure(e):
+                        raise
+                    self.balancer.report_failure(replica)
+                    tried.append(replica.key)
+                    if started or len(tried) == len(self.replicas):
+                        raise
+                    continue
+                self.balancer.report_success(replica, (time.perf_counter() - start) * 1000.0)
+                return
+
+
+class AdmissionControlledClient(LLMClient):
+    """
+    Bounded concurrency in front of one backend.
+    
+    Every call first takes a slot from the backend's process-wide
+    AdmissionController (see sves.admission), queueing by priority class and
+    session when the backend is busy; streams hold their slot until the last
+    token. A pooled backend gets ``max_concurrency`` slots per replica.
+    """
+    
+    def __init__(self, config: LLMConfig, client: LLMClient):
+        self.config = config
+        self.client = client
+        replicas = len(config.replica_urls) if config.replica_urls else 1
+        self.controller = get_admission_controller(
+            backend_key(config),
+            max_concurrency=config.max_concurrency * replicas,
+            max_queue=config.max_queue,
+            queue_timeout=config.queue_timeout
+        )
+    
+    def health_check(self) -> bool:
+        """Check the wrapped backend (probes are not admission controlled)."""
+        return self.client.health_check()
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate a response once the backend has a free slot."""
+        with self.controller.admit():
+            return self.client.generate(prompt, system_prompt, conversation_history)
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream a response once the backend has a free slot."""
+        with self.controller.admit():
+            yield from self.client.generate_stream(prompt, system_prompt, conversation_history)
+
+
+class ResilientLLMClient(LLMClient):
+    """
+    Failover chain with retries and per-backend circuit breakers.
+    
+    Backends are tried in order (primary first, then the fallback providers).
+    Idempotent failures (connection errors, 429/502/503/504) are retried on
+    the same backend with jittered backoff; other backend failures (read
+    timeouts, 5xx) move straight to the next backend. A backend whose circuit
+    is open is skipped without sending anything. Streams only fail over
+    before their first token.
+    """
+    
+    RETRYABLE_STATUS = (429, 502, 503, 504)
+    
+    def __init__(self, config: LLMConfig, backends: List[Tuple[str, LLMClient]],
+                 retry_policy: Optional[RetryPolicy] = None):
+        self.config = config
+        self.backends = backends
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=config.max_retries)
+    
+    @classmethod
+    def _is_retryable(cls, error: Exception) -> bool:
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return True  # Includes ConnectTimeout: the request never reached the model
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code in cls.RETRYABLE_STATUS
+        return False
+    
+    @classmethod
+    def _is_backend_failure(cls, error: Exception) -> bool:
+        if cls._is_retryable(error) or isinstance(error, (requests.exceptions.Timeout, NoReplicaAvailable)):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code >= 500
+        return False
+    
+    def breaker_states(self) -> List[Tuple[str, Dict]]:
+        """Circuit breaker state of every backend in the chain."""
+        return [(key, get_circuit_breaker(key).snapshot()) for key, _ in self.backends]
+    
+    def health_check(self) -> bool:
+        """Healthy if any backend in the failover chain is reachable."""
+        return any(client.health_check() for _, client in self.backends)
+    
+    def generate(self, prompt: str, system_prompt: str, conversation_history: List[Dict]) -> str:
+        """Generate a response from the first backend that succeeds."""
+        last_error: Optional[Exception] = None
+        for key, client in self.backends:
+            breaker = get_circuit_breaker(key)
+            if not breaker.allow():
+                continue
+            delays = self.retry_policy.delays()
+            while True:
+                try:
+                    response = client.generate(prompt, system_prompt, conversation_history)
+                except AdmissionRejected as e:
+                    breaker.release()  # Overloaded, not failing: nothing was sent
+                    last_error = e
+                    break
+                except Exception as e:
+                    if not self._is_backend_failure(e):
+                        breaker.record_success()  # Backend answered; the request was bad
+                        raise
+                    last_error = e
+                    delay = next(delays, None) if self._is_retryable(e) else None
+                    if delay is not None:
+                        time.sleep(delay)
+                        continue
+                    breaker.record_failure()
+                    break
+                breaker.record_success()
+                return response
+        raise last_error or CircuitOpenError("All configured LLM backends are temporarily unavailable")
+    
+    def generate_stream(
+        self, prompt: str, system_prompt: str, conversation_history: List[Dict]
+    ) -> Iterator[str]:
+        """Stream a response from the first backend that succeeds."""
+        last_error: Optional[Exception] = None
+        for key, client in self.backends:
+            breaker = get_circuit_breaker(key)
+            if not breaker.allow():
+                continue
+            delays = self.retry_policy.delays()
+            while True:
+                started = False
+                try:
+                    for delta in client.generate_stream(prompt, system_prompt, conversation_history):
+                        started = True
+                        yield delta
+                except GeneratorExit:
+                    # Closed by the consumer (stop button, disconnect) at a yield, so
+                    # the backend was answering; settle the breaker so a half-open
+                    # trial slot is not left taken
+                    breaker.record_success()
+                    raise
+                except AdmissionRejected as e:
+                    breaker.release()  # Overloaded, not failing: nothing was sent
+                    last_error = e
+                    break
+                except Exception as e:
+                    if not self._is_backend_failure(e):
+                        breaker.record_success()
+                        raise
+                    if started:
+                        breaker.record_failure()
+                        raise
+                    last_error = e
+                    delay = next(delays, None) if self._is_retryable(e) else None
+                    if delay is not None:
+                        time.sleep(delay)
+                        continue
+                    breaker.record_failure()
+                    break
+                breaker.record_success()
+                return
+        raise last_error or CircuitOpenError("All configured LLM backends are temporarily unavailable")
+
+
+PROVIDER_CLIENTS = {
+    LLMProvider.OLLAMA: OllamaClient,
+    LLMProvider.VLLM: VLLMClient,
+    LLMProvider.LM_STUDIO: LMStudioClient,
+    LLMProvider.AZURE_GOV: AzureGovClient,
+    LLMProvider.CUSTOM_API: VLLMClient,  # Use OpenAI-compatible client
+}
+
+
+def create_llm_client(config: LLMConfig) -> LLMClient:
+    """
+    Factory function to create the appropriate LLM client.
+    
+    With retries or fallback providers configured, the backend client is
+    wrapped in a ResilientLLMClient failover chain.
+    """
+    fallbacks = [p for p in (config.fallback_providers or []) if p != config.provider]
+    primary = create_backend_client(config)
+    if config.max_retries <= 0 and not fallbacks:
+        return primary
+    
+    backends = [(backend_key(config), primary)]
+    for provider in fallbacks:
+        fallback_config = build_fallback_config(provider, config)
+        backends.append((backend_key(fallback_config), create_backend_client(fallback_config)))
+    return ResilientLLMClient(config, backends)
+
+
+def create_backend_client(config: LLMConfig) -> LLMClient:
+    """
+    Create the client for a single backend (pooled when it has replicas).
+    
+    The client is admission controlled unless ``config.max_concurrency`` is 0.
+    """
+    if config.replica_urls and len(config.replica_urls) > 1:
+        client = PooledLLMClient(config)
+    else:
+        if config.replica_urls:
+            config = replace(config, base_url=config.replica_urls[0], replica_urls=None)
+        client_class = PROVIDER_CLIENTS.get(config.provider)
+        if not client_class:
+            raise ValueError(f"Unsupported provider: {config.provider}")
+        client = client_class(config)
+    
+    if config.max_concurrency > 0:
+        client = AdmissionControlledClient(config, client)
+    return client
+
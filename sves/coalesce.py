@@ -0,0 +1,159 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+When several sessions ask the same question at the same time (e.g. a sidebar
+example query at the start of a shift briefing), only the first request (the
+leader) calls the backend; the others subscribe to its ``Flight`` and receive
+the same answer. Streaming subscribers that attach mid-flight first replay
+the deltas generated so far and then follow the live stream.
+
+A flight is keyed on the effective prompt (see sves.agent.coalescing_key)
+and is removed as soon as it completes; completed answers are served by the
+response cache instead.
+
+Settings (environment):
+    SVES_COALESCE  "0" disables coalescing (default enabled)
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Flight:
+    """One in-flight generation that any number of subscribers can follow."""
+
+    def __init__(self, key: str, on_done: Optional[Callable[["Flight"], None]] = None):
+        self.key = key
+        self.subscribers = 1
+        self._parts: List[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._on_done = on_done
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def publish(self, delta: str) -> None:
+        """Append a content delta and wake waiting subscribers."""
+        with self._cond:
+            self._parts.append(delta)
+            self._cond.notify_all()
+
+    def finish(self, response: Optional[str] = None) -> None:
+        """Complete the flight (``response`` for non-streaming leaders)."""
+        self._complete(response, None)
+
+    def fail(self, error: BaseException) -> None:
+        """Complete the flight with an error raised to every subscriber."""
+        self._complete(None, error)
+
+    def _complete(self, response: Optional[str], error: Optional[BaseException]) -> None:
+        with self._cond:
+            if self._done:
+                return
+            if response is not None:
+                self._parts.append(response)
+            self._error = error
+            self._done = True
+            self._cond.notify_all()
+        if self._on_done is not None:
+            self._on_done(self)
+
+    def subscribe(
+        self, on_idle: Optional[Callable[[], None]] = None, idle_interval: float = 0.25
+    ) -> Iterator[str]:
+        """
+        Yield every delta from the start, then live ones until completion.
+
+        Args:
+            on_idle: Called on the subscriber's thread every ``idle_interval``
+                seconds while no new delta is available
+            idle_interval: Seconds between ``on_idle`` calls
+        """
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self._parts) and not self._done:
+                    self._cond.wait(idle_interval if on_idle is not None else None)
+                idle = index >= len(self._parts) and not self._done
+                new_parts = self._parts[index:]
+                index += len(new_parts)
+                finished = self._done and index >= len(self._parts)
+                error = self._error
+            if idle:
+                if on_idle is not None:
+                    on_idle()
+                continue
+            yield from new_parts
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+    def result(self) -> str:
+        """Block until completion and return the full response."""
+        with self._cond:
+            while not self._done:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            return "".join(self._parts)
+
+
+class SingleFlight:
+    """Registry of in-flight generations by key."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """
+        Join the flight for ``key``, starting one if none is in progress.
+
+        Returns:
+            Tuple of the flight and whether the caller is its leader (and so
+            must run the generation and finish or fail the flight)
+        """
+        with self._lock:
+            flight = self._flights.get(key) if self.enabled else None
+            if flight is not None and not flight.done:
+                flight.subscribers += 1
+                self._counters["coalesced"] += 1
+                return flight, False
+            flight = Flight(key, on_done=self._remove)
+            if self.enabled:
+                self._flights[key] = flight
+            self._counters["leaders"] += 1
+            return flight, True
+
+    def _remove(self, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, int]:
+        """Leader/coalesced counts and current in-flight generations."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+
+_SINGLE_FLIGHT: Optional[SingleFlight] = None
+_SINGLE_FLIGHT_LOCK = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight registry."""
+    global _SINGLE_FLIGHT
+    if _SINGLE_FLIGHT is None:
+        with _SINGLE_FLIGHT_LOCK:
+            if _SINGLE_FLIGHT is None:
+                _SINGLE_FLIGHT = SingleFlight(enabled=os.environ.get("SVES_COALESCE", "1") != "0")
+    return _SINGLE_FLIGHT
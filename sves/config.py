@@ -0,0 +1,185 @@
+"""
+LLM backend configuration.
+
+Provider enum, backend configuration dataclass, per-provider defaults, and
+deployment overrides from a JSON config file or ``SVES_*`` environment
+variables.
+"""
+
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from enum import Enum
+from typing import List, Optional
+
+
+class LLMProvider(Enum):
+    """Supported LLM providers for self-hosted deployment."""
+    OLLAMA = "ollama"
+    VLLM = "vllm"
+    LM_STUDIO = "lm_studio"
+    CUSTOM_API = "custom_api"
+    AZURE_GOV = "azure_gov"
+
+
+@dataclass
+class LLMConfig:
+    """Configuration for LLM backend."""
+    provider: LLMProvider
+    base_url: str
+    model_name: str
+    api_key: Optional[str] = None
+    max_tokens: int = 4096
+    temperature: float = 0.7
+    timeout: int = 120
+    context_window: int = 8192     # Model context length in tokens (prompt + output)
+    # Multi-replica deployments: when set, requests are load balanced across
+    # these base URLs (base_url is ignored) using the routing strategy
+    replica_urls: Optional[List[str]] = None
+    routing: str = "least_outstanding"   # "least_outstanding" or "ewma"
+    # Resilience: bounded retries per backend, then the fallback providers in order
+    max_retries: int = 2
+    fallback_providers: Optional[List[LLMProvider]] = None
+    # HTTP connection pooling (shared per backend origin, per process)
+    pool_connections: int = 4      # Host pools kept by each session
+    pool_maxsize: int = 16         # Max open connections per host
+    pool_block: bool = True        # Wait for a free connection instead of exceeding pool_maxsize
+    keep_alive: bool = True        # Reuse connections between requests
+    # Seconds the server keeps the model loaded after a request (negative =
+    # indefinitely, None = server default). Sent as Ollama "keep_alive" and
+    # LM Studio "ttl"; vLLM and Azure keep their model loaded regardless
+    model_keep_alive: Optional[int] = None
+    # Admission control (per backend, per process; see sves.admission)
+    max_concurrency: int = 8       # Concurrent backend calls per replica (0 = unlimited)
+    max_queue: int = 64            # Requests allowed to wait; more are rejected at once
+    queue_timeout: float = 120.0   # Seconds a request may wait for a slot
+
+
+# Default configurations for different providers
+DEFAULT_CONFIGS = {
+    LLMProvider.OLLAMA: LLMConfig(
+        provider=LLMProvider.OLLAMA,
+        base_url="http://localhost:11434",
+        model_name="llama3.1:70b",
+        max_tokens=4096,
+        temperature=0.7,
+        max_concurrency=4,  # Ollama's default OLLAMA_NUM_PARALLEL
+        model_keep_alive=-1  # Ollama unloads idle models after 5 minutes by default
+    ),
+    LLMProvider.VLLM: LLMConfig(
+        provider=LLMProvider.VLLM,
+        base_url="http://localhost:8000",
+        model_name="meta-llama/Llama-3.1-70B-Instruct",
+        max_tokens=4096,
+        temperature=0.7
+    ),
+    LLMProvider.LM_STUDIO: LLMConfig(
+        provider=LLMProvider.LM_STUDIO,
+        base_url="http://localhost:1234",
+        model_name="local-model",
+        max_tokens=4096,
+        temperature=0.7
+    ),
+    LLMProvider.AZURE_GOV: LLMConfig(
+        provider=LLMProvider.AZURE_GOV,
+        base_url="https://your-resource.openai.azure.us",
+        model_name="gpt-4",
+        api_key=None,  # Set via environment or UI
+        max_tokens=4096,
+        temperature=0.7
+    ),
+}
+
+
+def load_config_overrides(config: LLMConfig) -> LLMConfig:
+    """
+    Apply deployment overrides to a configuration.
+    
+    Sources, in increasing precedence:
+    1. JSON file named by SVES_CONFIG_FILE, with LLMConfig field names as keys
+       (e.g. {"provider": "vllm", "replica_urls": ["http://gpu1:8000", ...]})
+    2. Environment variables SVES_PROVIDER, SVES_BASE_URL, SVES_MODEL,
+       SVES_API_KEY, SVES_REPLICA_URLS (comma-separated), SVES_ROUTING,
+       SVES_FALLBACK_PROVIDERS (comma-separated LLMProvider values),
+       SVES_MAX_CONCURRENCY, SVES_MAX_QUEUE, SVES_QUEUE_TIMEOUT and
+       SVES_MODEL_KEEP_ALIVE (seconds)
+    
+    Returns:
+        LLMConfig: A new configuration with the overrides applied
+    """
+    overrides = {}
+    config_file = os.environ.get("SVES_CONFIG_FILE")
+    if config_file:
+        with open(config_file, "r", encoding="utf-8") as f:
+            overrides.update(json.load(f))
+    
+    env_fields = {
+        "SVES_PROVIDER": "provider",
+        "SVES_BASE_URL": "base_url",
+        "SVES_MODEL": "model_name",
+        "SVES_API_KEY": "api_key",
+        "SVES_REPLICA_URLS": "replica_urls",
+        "SVES_ROUTING": "routing",
+        "SVES_FALLBACK_PROVIDERS": "fallback_providers",
+        "SVES_MAX_CONCURRENCY": "max_concurrency",
+        "SVES_MAX_QUEUE": "max_queue",
+        "SVES_QUEUE_TIMEOUT": "queue_timeout",
+        "SVES_MODEL_KEEP_ALIVE": "model_keep_alive",
+    }
+    for env_name, field_name in env_fields.items():
+        if os.environ.get(env_name):
+            overrides[field_name] = os.environ[env_name]
+    
+    if "provider" in overrides:
+        provider = LLMProvider(overrides.pop("provider"))
+        if provider != config.provider:
+            config = DEFAULT_CONFIGS.get(provider, replace(config, provider=provider))
+    for field_name, convert in (("max_concurrency", int), ("max_queue", int),
+                                ("queue_timeout", float), ("model_keep_alive", int)):
+        if isinstance(overrides.get(field_name), str):
+            overrides[field_name] = convert(overrides[field_name])
+    if isinstance(overrides.get("replica_urls"), str):
+        overrides["replica_urls"] = parse_replica_urls(overrides["replica_urls"])
+    if isinstance(overrides.get("fallback_providers"), str):
+        overrides["fallback_providers"] = overrides["fallback_providers"].split(",")
+    if overrides.get("fallback_providers"):
+        overrides["fallback_providers"] = [
+            LLMProvider(p.strip()) for p in overrides["fallback_providers"] if p.strip()
+        ]
+    
+    known_fields = {f.name for f in fields(LLMConfig)}
+    unknown = set(overrides) - known_fields
+    if unknown:
+        raise ValueError(f"Unknown configuration keys: {', '.join(sorted(unknown))}")
+    return replace(config, **overrides)
+
+
+def build_fallback_config(provider: LLMProvider, primary: LLMConfig) -> LLMConfig:
+    """
+    Configuration for a fallback provider in the primary's failover chain.
+    
+    Starts from DEFAULT_CONFIGS, takes the endpoint from SVES_<PROVIDER>_BASE_URL,
+    SVES_<PROVIDER>_MODEL, SVES_<PROVIDER>_API_KEY and SVES_<PROVIDER>_REPLICA_URLS
+    and the model keep-alive from SVES_<PROVIDER>_MODEL_KEEP_ALIVE when set
+    (e.g. SVES_AZURE_GOV_BASE_URL), and carries over the primary's generation
+    and connection settings.
+    """
+    base = DEFAULT_CONFIGS.get(provider) or replace(primary, provider=provider)
+    prefix = f"SVES_{provider.name}_"
+    keep_alive = os.environ.get(prefix + "MODEL_KEEP_ALIVE")
+    return replace(
+        primary,
+        provider=provider,
+        base_url=os.environ.get(prefix + "BASE_URL", base.base_url),
+        model_name=os.environ.get(prefix + "MODEL", base.model_name),
+        api_key=os.environ.get(prefix + "API_KEY", base.api_key),
+        replica_urls=parse_replica_urls(os.environ.get(prefix + "REPLICA_URLS", "")),
+        model_keep_alive=int(keep_alive) if keep_alive else base.model_keep_alive,
+        fallback_providers=None
+    )
+
+
+def parse_replica_urls(text: str) -> Optional[List[str]]:
+    """Parse a comma- or newline-separated list of replica base URLs."""
+    urls = [u.strip().rstrip("/") for u in text.replace(",", "\n").splitlines() if u.strip()]
+    return urls or None
@@ -0,0 +1,269 @@
+"""
+Context-window management for conversation history.
+
+Sending the whole conversation on every turn makes prompt size (and prefill
+latency) grow without bound until the backend rejects the request. The
+``ContextWindowManager`` keeps the most recent turns that fit in the token
+budget left over by the model window, the reserved output tokens, the system
+prompt and the new query. Older turns are compacted into a running summary
+that is appended to the end of the system prompt.
+
+Summaries are regenerated incrementally: each prefix of the conversation is
+identified by a hash chain over its messages, and the summary of the longest
+already-summarized prefix is extended with only the newly evicted turns.
+A caller that keeps the running summary itself (sves.conversations persists
+it per conversation) passes it as ``summary`` together with the history that
+follows it; the chain then starts after the summarized turns, so prefixes
+stay stable as the conversation grows.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sves.tokens import MESSAGE_OVERHEAD_TOKENS, count_message_tokens, count_tokens
+
+
+# (previous_summary, newly_evicted_messages, max_tokens) -> updated summary
+Summarizer = Callable[[str, List[Dict], int], str]
+
+SUMMARY_HEADER = "SUMMARY OF EARLIER CONVERSATION (older turns compacted to fit the context window):"
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a technical conversation between an engineer "
+    "and the Simic Virtual Expert System. Merge the new turns into the existing summary. "
+    "Preserve every number, unit, material, operating condition, decision and open question. "
+    "Write compact bullet points. Output only the updated summary."
+)
+
+
+@dataclass
+class ContextConfig:
+    """Configuration for conversation history budgeting."""
+    enabled: bool = True
+    safety_margin_tokens: int = 128     # Slack for tokenizer estimation error
+    summary_max_tokens: int = 400       # Cap on the running summary
+    min_recent_messages: int = 2        # Always keep at least the last exchange
+    llm_summaries: bool = True          # Summarize with the LLM (else extractive)
+
+
+@dataclass
+class PreparedContext:
+    """History and system prompt fitted to the context window."""
+    system_prompt: str
+    history: List[Dict]
+    summary: str = ""
+    summarized_messages: int = 0
+    history_tokens: int = 0
+    budget_tokens: int = 0
+
+
+def extractive_summarizer(previous_summary: str, messages: List[Dict], max_tokens: int) -> str:
+    """
+    Deterministic, model-free summarizer.
+
+    Keeps the opening sentence of each evicted turn and trims the oldest
+    material first when the summary exceeds ``max_tokens``.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        text = " ".join((message.get("content") or "").split())
+        sentence = text.split(". ")[0][:240]
+        speaker = "User asked" if message.get("role") == "user" else "SVES answered"
+        lines.append(f"- {speaker}: {sentence}")
+    return truncate_summary("\n".join(lines), max_tokens)
+
+
+def make_llm_summarizer(generate: Callable[..., str]) -> Summarizer:
+    """
+    Build a summarizer that asks the LLM to merge evicted turns into the summary.
+
+    Args:
+        generate: An ``LLMClient.generate`` bound method
+
+    Returns:
+        Summarizer: Falls back to extractive_summarizer if the call fails
+    """
+    def summarize(previous_summary: str, messages: List[Dict], max_tokens: int) -> str:
+        transcript = "\n\n".join(
+            f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages
+        )
+        prompt = (
+            f"EXISTING SUMMARY:\n{previous_summary or '(none)'}\n\n"
+            f"NEW TURNS:\n{transcript}\n\n"
+            f"Return the updated summary in at most {max_tokens} tokens."
+        )
+        try:
+            summary = generate(
+                prompt=prompt,
+                system_prompt=SUMMARY_SYSTEM_PROMPT,
+                conversation_history=[]
+            ).strip()
+        except Exception:
+            return extractive_summarizer(previous_summary, messages, max_tokens)
+        return truncate_summary(summary, max_tokens)
+
+    return summarize
+
+
+def truncate_summary(summary: str, max_tokens: int) -> str:
+    """Drop the oldest summary lines (then trailing text) until it fits ``max_tokens``."""
+    lines = [line for line in summary.splitlines() if line.strip()]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    text = "\n".join(lines)
+    while text and count_tokens(text) > max_tokens:
+        text = text[:int(len(text) * 0.9)]
+    return text
+
+
+def _chain_hashes(messages: List[Dict], summary: str = "") -> List[str]:
+    """Return h[i] identifying messages[:i] after ``summary`` (h[0] is the empty prefix)."""
+    hashes = [""]
+    digest = hashlib.sha256(summary.encode("utf-8") + b"\x02")
+    for message in messages:
+        digest.update(message.get("role", "").encode("utf-8") + b"\x00")
+        digest.update((message.get("content") or "").encode("utf-8") + b"\x01")
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+
+def _with_summary(system_prompt: str, summary: str) -> str:
+    return f"{system_prompt}\n\n{SUMMARY_HEADER}\n{summary}" if summary else system_prompt
+
+
+class ContextWindowManager:
+    """Fits conversation history to the model window; caches running summaries."""
+
+    def __init__(self, max_cached_summaries: int = 512):
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.summaries_built = 0
+        self.summaries_reused = 0
+
+    def prepare(
+        self,
+        system_prompt: str,
+        history: List[Dict],
+        user_query: str,
+        context_window: int,
+        max_output_tokens: int,
+        summarizer: Optional[Summarizer] = None,
+        config: Optional[ContextConfig] = None,
+        summary: str = ""
+    ) -> PreparedContext:
+        """
+        Fit ``history`` into the token budget of the model window.
+
+        Args:
+            system_prompt: Rendered system prompt
+            history: Conversation history (oldest first): the full
+                conversation, or the turns that follow ``summary``
+            user_query: The new user message
+            context_window: Model context window in tokens
+            max_output_tokens: Tokens reserved for the response
+            summarizer: Summarizer for evicted turns (default: extractive)
+            config: Budgeting options
+            summary: Running summary of the turns before ``history``
+
+        Returns:
+            PreparedContext: Possibly trimmed history and the system prompt
+            with the running summary appended; ``summarized_messages``
+            counts the turns of ``history`` folded into ``summary``
+        """
+        config = config or ContextConfig()
+        summarizer = summarizer or extractive_summarizer
+
+        # System prompt and new user message, each with its template overhead
+        fixed = (count_tokens(system_prompt) + count_tokens(user_query)
+                 + 2 * MESSAGE_OVERHEAD_TOKENS + config.safety_margin_tokens)
+        budget = max(0, context_window - max_output_tokens - fixed)
+
+        carried = count_tokens(summary) if summary else 0
+        if not config.enabled or not history:
+            return PreparedContext(_with_summary(system_prompt, summary), list(history),
+                                   summary=summary, history_tokens=carried, budget_tokens=budget)
+
+        costs = [count_message_tokens(m) for m in history]
+        total = sum(costs)
+        if total + carried <= budget:
+            return PreparedContext(_with_summary(system_prompt, summary), list(history), summary=summary,
+                                   history_tokens=total + carried, budget_tokens=budget)
+
+        # Older turns will be replaced by a summary; reserve room for it
+        recent_budget = max(0, budget - config.summary_max_tokens)
+        keep_from = len(history)
+        used = 0
+        while keep_from > 0 and used + costs[keep_from - 1] <= recent_budget:
+            keep_from -= 1
+            used += costs[keep_from]
+        keep_from = min(keep_from, max(0, len(history) - config.min_recent_messages))
+        # Chat templates expect the retained history to open with a user turn
+        while keep_from < len(history) and history[keep_from].get("role") != "user":
+            keep_from += 1
+
+        summary = self._summary_for(history, keep_from, summarizer, config.summary_max_tokens, summary)
+        kept = list(history[keep_from:])
+        return PreparedContext(
+            system_prompt=_with_summary(system_prompt, summary),
+            history=kept,
+            summary=summary,
+            summarized_messages=keep_from,
+            history_tokens=sum(costs[keep_from:]) + count_tokens(summary),
+            budget_tokens=budget,
+        )
+
+    def _summary_for(self, history: List[Dict], upto: int, summarizer: Summarizer,
+                     max_tokens: int, carried: str = "") -> str:
+        if upto <= 0:
+            return carried
+        hashes = _chain_hashes(history[:upto], carried)
+
+        with self._lock:
+            cached = self._summaries.get(hashes[upto])
+            if cached is not None:
+                self._summaries.move_to_end(hashes[upto])
+                self.summaries_reused += 1
+                return cached
+            # Longest previously summarized prefix to extend incrementally
+            base, previous = 0, carried
+            for i in range(upto - 1, 0, -1):
+                if hashes[i] in self._summaries:
+                    base, previous = i, self._summaries[hashes[i]]
+                    break
+
+        summary = summarizer(previous, history[base:upto], max_tokens)
+
+        with self._lock:
+            self._summaries[hashes[upto]] = summary
+            self._summaries.move_to_end(hashes[upto])
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+            self.summaries_built += 1
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        """Return summary cache statistics."""
+        with self._lock:
+            return {
+                "cached_summaries": len(self._summaries),
+                "summaries_built": self.summaries_built,
+                "summaries_reused": self.summaries_reused,
+            }
+
+
+_MANAGER: Optional[ContextWindowManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_context_manager() -> ContextWindowManager:
+    """Return the process-wide context window manager."""
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = ContextWindowManager()
+    return _MANAGER
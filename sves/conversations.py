@@ -0,0 +1,418 @@
+"""
+Persistent conversation store.
+
+Chat messages are persisted to SQLite instead of living only in Streamlit
+session state, so they survive restarts and a session only keeps a bounded
+window of them in memory:
+
+- ``ConversationStore``: the process-wide store. Writes are queued and
+  committed in batches by a background writer thread, so recording a
+  message never blocks a response; reads page backwards through a
+  conversation by message sequence number. Messages and summaries still
+  queued are kept in a per-conversation overlay that reads merge in, so a
+  read sees its own session's writes without waiting for the writer (and
+  so for every other session's).
+- ``Conversation``: a session's handle on one conversation. It keeps the
+  ``memory_messages`` most recent messages plus any older pages the user
+  asked to see, at most ``max_loaded`` of them, and tracks how many messages
+  the UI renders so a rerun does not re-render the whole conversation.
+  It also carries the conversation's running summary (sves.context), which
+  is persisted with it: the history sent to the model is the summary plus
+  every message after the turns it covers, so nothing is dropped when the
+  in-memory window slides and summaries are only ever extended.
+
+Message contents of COMPRESS_MIN_BYTES or more are stored zlib-compressed.
+Failed writes are counted in ConversationStore.write_errors and the
+sves_conversation_write_errors_total metric.
+
+Settings (environment):
+    SVES_CONVERSATION_DB      SQLite path (default <cache root>/conversations.sqlite,
+                              "0" keeps conversations in memory only)
+    SVES_CONVERSATION_MEMORY  Recent messages kept in memory per session (default 40)
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sves.metrics import get_metrics
+from sves.paths import get_cache_dir
+
+
+COMPRESS_MIN_BYTES = 512
+
+CODEC_TEXT = 0
+CODEC_ZLIB = 1
+
+
+def _encode(content: str) -> Tuple[bytes, int]:
+    data = content.encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return compressed, CODEC_ZLIB
+    return data, CODEC_TEXT
+
+
+def _decode(data: bytes, codec: int) -> str:
+    if codec == CODEC_ZLIB:
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+@dataclass
+class ConversationInfo:
+    """Summary of a stored conversation."""
+    id: str
+    title: str
+    created_at: float
+    updated_at: float
+    message_count: int
+
+
+class ConversationStore:
+    """SQLite conversation store with a batching background writer."""
+
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self.write_errors = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            " id TEXT PRIMARY KEY, title TEXT NOT NULL, created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL, message_count INTEGER NOT NULL,"
+            " summary TEXT NOT NULL DEFAULT '', summary_seq INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+        if "summary" not in columns:  # Databases created before summaries were persisted
+            self._conn.execute("ALTER TABLE conversations ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            self._conn.execute("ALTER TABLE conversations ADD COLUMN summary_seq INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " conversation_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL,"
+            " content BLOB NOT NULL, codec INTEGER NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (conversation_id, seq)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated_at)"
+        )
+        self._lock = threading.Lock()  # Serializes use of the connection
+        # Queued (sql, params, settle) writes; settle() runs once the write is committed or lost
+        self._queue: "queue.Queue[Optional[Tuple[str, tuple, Optional[Callable[[], None]]]]]" = queue.Queue()
+        self._pending_lock = threading.Lock()  # Guards the overlay and write_errors
+        self._pending_messages: Dict[str, Dict[int, Dict[str, str]]] = {}
+        self._pending_summaries: Dict[str, Tuple[str, int]] = {}
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sves-conversation-writer", daemon=True
+        )
+        self._writer.start()
+
+    # -- writes (queued) ---------------------------------------------------
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            operations = [op for op in batch if op is not None]
+            try:
+                with self._lock:
+                    self._conn.execute("BEGIN")
+                    for sql, params, _ in operations:
+                        self._conn.execute(sql, params)
+                    self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                with self._lock:
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                with self._pending_lock:
+                    self.write_errors += len(operations)
+                get_metrics().inc("sves_conversation_write_errors_total", len(operations))
+            finally:
+                for _, _, settle in operations:
+                    if settle is not None:
+                        settle()
+                for _ in batch:
+                    self._queue.task_done()
+            if len(operations) < len(batch):
+                return  # close() was called
+
+    def create_conversation(self, title: str = "") -> str:
+        """Start a conversation and return its id."""
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        self._queue.put((
+            "INSERT INTO conversations (id, title, created_at, updated_at, message_count)"
+            " VALUES (?, ?, ?, ?, 0)",
+            (conversation_id, title, now, now),
+            None
+        ))
+        return conversation_id
+
+    def append_message(self, conversation_id: str, seq: int, role: str, content: str) -> None:
+        """Queue a message for writing (the first user message titles the conversation)."""
+        now = time.time()
+        data, codec = _encode(content)
+        message = {"role": role, "content": content}
+        with self._pending_lock:
+            self._pending_messages.setdefault(conversation_id, {})[seq] = message
+
+        def settle() -> None:
+            with self._pending_lock:
+                pending = self._pending_messages.get(conversation_id, {})
+                if pending.get(seq) is message:
+                    del pending[seq]
+                    if not pending:
+                        del self._pending_messages[conversation_id]
+
+        self._queue.put((
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+            (conversation_id, seq, role, data, codec, now),
+            None
+        ))
+        self._queue.put((
+            "UPDATE conversations SET updated_at = ?, message_count = MAX(message_count, ?),"
+            " title = CASE WHEN title = '' AND ? = 'user' THEN ? ELSE title END WHERE id = ?",
+            (now, seq + 1, role, content[:80], conversation_id),
+            settle
+        ))
+
+    def save_summary(self, conversation_id: str, summary: str, summary_seq: int) -> None:
+        """Queue the running summary of a conversation's first ``summary_seq`` messages."""
+        entry = (summary, summary_seq)
+        with self._pending_lock:
+            self._pending_summaries[conversation_id] = entry
+
+        def settle() -> None:
+            with self._pending_lock:
+                if self._pending_summaries.get(conversation_id) is entry:
+                    del self._pending_summaries[conversation_id]
+
+        self._queue.put((
+            "UPDATE conversations SET summary = ?, summary_seq = ? WHERE id = ?",
+            (summary, summary_seq, conversation_id),
+            settle
+        ))
+
+    def flush(self) -> None:
+        """Block until every queued write has been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, stop the writer and close the database."""
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    # -- reads ---------------------------------------------------------------
+
+    def _pending(self, conversation_id: str) -> Dict[int, Dict[str, str]]:
+        # Taken before reading the database: a write committed in between is
+        # then seen twice (and merged by seq) rather than not at all
+        with self._pending_lock:
+            return dict(self._pending_messages.get(conversation_id, {}))
+
+    def load_messages(
+        self, conversation_id: str, before_seq: Optional[int] = None, limit: int = 20
+    ) -> List[Dict[str, str]]:
+        """
+        Load a page of messages, oldest first.
+
+        Args:
+            conversation_id: Conversation to read
+            before_seq: Only messages with a lower sequence number (None = latest)
+            limit: Maximum number of messages
+
+        Returns:
+            List[Dict[str, str]]: ``{"role", "content"}`` messages
+        """
+        before_seq = before_seq if before_seq is not None else 2 ** 62
+        pending = self._pending(conversation_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content, codec FROM messages WHERE conversation_id = ? AND seq < ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (conversation_id, before_seq, limit)
+            ).fetchall()
+        messages = {seq: {"role": role, "content": _decode(data, codec)} for seq, role, data, codec in rows}
+        messages.update((seq, dict(message)) for seq, message in pending.items() if seq < before_seq)
+        return [messages[seq] for seq in sorted(messages)[-limit:]] if limit > 0 else []
+
+    def count_messages(self, conversation_id: str) -> int:
+        """Number of stored (or queued) messages of a conversation."""
+        pending = self._pending(conversation_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return max(row[0] if row else 0, max(pending, default=-1) + 1)
+
+    def load_summary(self, conversation_id: str) -> Tuple[str, int]:
+        """The running summary of a conversation and the number of messages it covers."""
+        with self._pending_lock:
+            pending = self._pending_summaries.get(conversation_id)
+        if pending is not None:
+            return pending
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, summary_seq FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def list_conversations(self, limit: int = 20) -> List[ConversationInfo]:
+        """
+        Most recently updated conversations that have messages.
+
+        Reads the database as committed (it does not wait for queued writes),
+        so a conversation's latest messages may show up a batch later.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title, created_at, updated_at, message_count FROM conversations"
+                " WHERE message_count > 0 ORDER BY updated_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [ConversationInfo(*row) for row in rows]
+
+
+class Conversation:
+    """A session's bounded in-memory window onto a stored conversation."""
+
+    def __init__(self, store: ConversationStore, conversation_id: Optional[str] = None,
+                 memory_messages: int = 40, max_loaded: int = 400, render_window: int = 20):
+        self.store = store
+        self.max_loaded = max_loaded
+        self.render_window = render_window
+        self.visible = render_window
+        self.summary = ""      # Running summary of the first summary_seq messages
+        self.summary_seq = 0
+        if conversation_id is None:
+            self.id = store.create_conversation()
+            self.total = 0
+            latest: List[Dict[str, str]] = []
+        else:
+            self.id = conversation_id
+            self.total = store.count_messages(conversation_id)
+            latest = store.load_messages(conversation_id, limit=memory_messages)
+            self.summary, self.summary_seq = store.load_summary(conversation_id)
+        self.recent: Deque[Dict[str, str]] = deque(latest, maxlen=memory_messages)
+        self.older: List[Dict[str, str]] = []  # Pages loaded on request, just before recent
+
+    @property
+    def first_loaded_seq(self) -> int:
+        return self.total - len(self.recent) - len(self.older)
+
+    def append(self, role: str, content: str) -> None:
+        """Add a message (persisted by the store's background writer)."""
+        self.store.append_message(self.id, self.total, role, content)
+        if self.older and len(self.recent) == self.recent.maxlen:
+            # Keep the loaded messages contiguous
+            self.older.append(self.recent[0])
+            del self.older[:max(0, len(self.older) - self.max_loaded)]
+        self.recent.append({"role": role, "content": content})
+        self.total += 1
+
+    def history(self) -> List[Dict[str, str]]:
+        """
+        The messages after the running summary, as conversation history for the model.
+
+        Starts at a fixed message (``summary_seq``) rather than at the sliding
+        in-memory window; messages older than the window are read back from
+        the store. sves.context folds the oldest of them into the summary once
+        they no longer fit the model window (see record_summary()), which
+        keeps this bounded.
+        """
+        window_start = self.total - len(self.recent)
+        if self.summary_seq >= window_start:
+            return list(self.recent)[self.summary_seq - window_start:]
+        gap = self.store.load_messages(self.id, before_seq=window_start, limit=window_start - self.summary_seq)
+        return gap + list(self.recent)
+
+    def record_summary(self, summary: str, summarized_messages: int) -> None:
+        """
+        Advance the running summary over the first ``summarized_messages`` of history().
+
+        Args:
+            summary: Summary of everything up to and including those messages
+            summarized_messages: Messages of the last history() now covered
+        """
+        if summarized_messages <= 0:
+            return
+        self.summary = summary
+        self.summary_seq = min(self.summary_seq + summarized_messages, self.total)
+        self.store.save_summary(self.id, summary, self.summary_seq)
+
+    def loaded_messages(self) -> List[Dict[str, str]]:
+        return self.older + list(self.recent)
+
+    def visible_messages(self) -> List[Dict[str, str]]:
+        """The messages the UI should render (the latest ``visible`` ones)."""
+        loaded = self.loaded_messages()
+        return loaded[-self.visible:] if self.visible else []
+
+    @property
+    def has_hidden(self) -> bool:
+        """Whether older messages exist beyond those rendered."""
+        loaded = len(self.older) + len(self.recent)
+        if self.visible < loaded:
+            return True
+        return self.first_loaded_seq > 0 and len(self.older) < self.max_loaded
+
+    def show_older(self, count: Optional[int] = None) -> None:
+        """Render ``count`` more messages, loading them from the store if needed."""
+        self.visible += count or self.render_window
+        missing = self.visible - len(self.older) - len(self.recent)
+        room = self.max_loaded - len(self.older)
+        if missing > 0 and room > 0 and self.first_loaded_seq > 0:
+            page = self.store.load_messages(
+                self.id, before_seq=self.first_loaded_seq, limit=min(missing, room)
+            )
+            self.older[:0] = page
+        self.visible = min(self.visible, len(self.older) + len(self.recent))
+
+    def reset_view(self) -> None:
+        """Back to rendering the latest messages only, releasing loaded pages."""
+        self.visible = self.render_window
+        self.older = []
+
+
+_STORE: Optional[ConversationStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide conversation store."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                setting = os.environ.get("SVES_CONVERSATION_DB", "")
+                if setting == "0":
+                    path = ":memory:"
+                else:
+                    path = setting or os.path.join(get_cache_dir(), "conversations.sqlite")
+                _STORE = ConversationStore(path)
+    return _STORE
+
+
+def open_conversation(conversation_id: Optional[str] = None) -> Conversation:
+    """Open (or start) a conversation on the process-wide store."""
+    return Conversation(
+        get_conversation_store(),
+        conversation_id,
+        memory_messages=int(os.environ.get("SVES_CONVERSATION_MEMORY", "40"))
+    )
@@ -0,0 +1,352 @@
+"""
+Cosmos X-9 drilling scenario analysis (the analyze_drilling_scenario tool).
+
+A NumPy-vectorized engine that evaluates a supercritical water (SCW)
+drilling scenario over the whole depth profile in one call, using the
+Cosmos X-9 parameters of the knowledge base (sves.knowledge, document 3):
+
+- Temperature vs. depth: the linear geotherm and the circulating
+  temperature of SCW injected at 400-450 °C and relaxing towards it down the
+  drill string (Ramey's solution for a linear geotherm; the thermal
+  relaxation length models the ceramic-insulated string). Its bottom value
+  is the BHCT, checked against the 350-550 °C design range.
+- Pressure vs. depth: surface backpressure plus the hydrostatic head of the
+  SCW column, checked against the 22.1 MPa supercritical floor. SCW density
+  and viscosity follow the circulating temperature and pressure (IAPWS
+  tables, sves.water), iterated with the head they produce.
+- Cuttings transport: annular velocity (>1.5 m/s required), cuttings
+  settling velocity from the spherical-particle drag curve (solved by
+  fixed-point iteration for every depth at once), transport ratio and the
+  annular cuttings concentration at the expected ROP.
+- Rate of penetration, drilling time and bit runs from the granite and
+  basalt figures (conventional 2-8 m/hr, SCW 15-30 m/hr, 22 m/hr field
+  test; bit life 400-600 m).
+
+analyze_drilling_scenario() returns a DrillingAnalysis with the profiles
+and the analysis / recommendation / risk_factors the system prompt
+promises; sves.tools runs it for drilling queries and hands the formatted
+results to the LLM to narrate.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sves.lazy import lazy_import
+from sves.water import get_water_properties
+
+np = lazy_import("numpy")  # Loaded on the first analysis
+
+
+GRAVITY = 9.81                       # m/s²
+SCW_CRITICAL_TEMPERATURE_C = 373.95
+SCW_CRITICAL_PRESSURE_MPA = 22.064
+
+# Cosmos X-9 design envelope (knowledge base, document 3)
+SCW_VISCOSITY_CP = (0.05, 0.08)      # vs. 30-80 cP for conventional mud
+MIN_ANNULAR_VELOCITY_M_S = 1.5
+BHCT_RANGE_C = (350.0, 550.0)
+SURFACE_INJECTION_C = (400.0, 450.0)
+MIN_SYSTEM_PRESSURE_MPA = 22.1
+BACKPRESSURE_TOLERANCE_MPA = 0.5
+PUMP_MAX_PRESSURE_MPA = 30.0
+PUMP_MAX_FLOW_LPM = 2000.0
+BOP_SEAL_RATING_C = 350.0
+BIT_LIFE_M = (400.0, 600.0)
+STANDARD_TOOL_RATING_C = 175.0       # Typical elastomer/MWD rating (assumption)
+
+# Rules of thumb for hole cleaning (assumptions stated in the results)
+MIN_TRANSPORT_RATIO = 0.5
+MAX_CUTTINGS_CONCENTRATION = 0.05
+
+
+@dataclass(frozen=True)
+class Formation:
+    """Rock properties and penetration rates of a formation."""
+    name: str
+    rock_density: float                          # kg/m³ (cuttings density)
+    geothermal_gradient: float                   # °C/km
+    rop_conventional: Tuple[float, float]        # m/hr, conventional drilling
+    rop_scw: Tuple[float, float]                 # m/hr, with SCW thermal spalling
+
+
+FORMATIONS: Dict[str, Formation] = {
+    "granite": Formation("granite", 2650.0, 30.0, (2.0, 8.0), (15.0, 30.0)),
+    # Iceland pilot: 22 m/hr average vs. 6 m/hr conventional baseline
+    "basalt": Formation("basalt", 2900.0, 80.0, (6.0, 6.0), (22.0, 22.0)),
+}
+
+
+@dataclass
+class DrillingScenario:
+    """Inputs of a drilling analysis (SI units unless noted)."""
+    depth_m: float = 3000.0
+    formation: str = "granite"
+    hole_diameter_m: float = 0.2159            # 8 1/2 in
+    pipe_diameter_m: float = 0.127             # 5 in drill pipe OD
+    flow_rate_lpm: float = PUMP_MAX_FLOW_LPM
+    injection_temperature_c: float = 425.0
+    surface_temperature_c: float = 15.0
+    geothermal_gradient_c_per_km: Optional[float] = None   # None = formation default
+    surface_pressure_mpa: float = 25.0
+    fluid_density_kg_m3: Optional[float] = None   # None = IAPWS-95 at the circulating T and P
+    fluid_viscosity_cp: Optional[float] = None    # None = IAPWS 2008 at the circulating T and P
+    cuttings_diameter_m: float = 0.003
+    rop_m_per_hr: Optional[float] = None       # None = formation SCW midpoint
+    thermal_relaxation_m: float = 20000.0      # Ceramic-insulated string; ~2000 m bare
+    n_points: int = 61
+
+
+@dataclass
+class DrillingAnalysis:
+    """Result of analyze_drilling_scenario()."""
+    scenario: DrillingScenario
+    profile: Dict[str, "np.ndarray"]
+    analysis: Dict[str, float]
+    risk_factors: List[Tuple[str, str]] = field(default_factory=list)   # (severity, description)
+    recommendations: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        """The tool output as plain Python values."""
+        return {
+            "analysis": dict(self.analysis),
+            "recommendation": list(self.recommendations),
+            "risk_factors": [{"severity": s, "risk": r} for s, r in self.risk_factors],
+            "profile": {name: values.tolist() for name, values in self.profile.items()},
+        }
+
+
+def circulating_temperature(depth, injection_c: float, surface_c: float,
+                            gradient_c_per_m: float, relaxation_m: float):
+    """
+    Temperature of fluid flowing down the drill string (Ramey, linear geotherm).
+
+    Args:
+        depth: Depths (m), any array shape
+        injection_c: Surface injection temperature (°C)
+        surface_c: Surface formation temperature (°C)
+        gradient_c_per_m: Geothermal gradient (°C/m)
+        relaxation_m: Thermal relaxation length of the string (m)
+    """
+    depth = np.asarray(depth, dtype=np.float64)
+    lag = gradient_c_per_m * relaxation_m
+    return (surface_c + gradient_c_per_m * depth - lag
+            + (injection_c - surface_c + lag) * np.exp(-depth / relaxation_m))
+
+
+def settling_velocity(particle_diameter_m, particle_density, fluid_density, viscosity_pa_s,
+                      iterations: int = 60, tol: float = 1e-9):
+    """
+    Terminal settling velocity of spheres, vectorized over all inputs.
+
+    Uses the Schiller-Naumann drag curve with the Newton-regime correction
+    (Clift & Gauvin), solved by damped fixed-point iteration on the velocity.
+
+    Returns:
+        np.ndarray: Settling velocity (m/s), broadcast shape of the inputs
+    """
+    d, rho_p, rho_f, mu = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in
+          (particle_diameter_m, particle_density, fluid_density, viscosity_pa_s))
+    )
+    buoyancy = 4.0 * GRAVITY * d * np.maximum(rho_p - rho_f, 0.0) / (3.0 * rho_f)
+    velocity = np.sqrt(buoyancy / 0.44)  # Newton-regime first guess
+    for _ in range(iterations):
+        re = np.maximum(rho_f * velocity * d / mu, 1e-12)
+        cd = 24.0 / re * (1.0 + 0.15 * re ** 0.687) + 0.42 / (1.0 + 42500.0 * re ** -1.16)
+        updated = 0.5 * (velocity + np.sqrt(buoyancy / cd))
+        if np.max(np.abs(updated - velocity)) < tol:
+            return updated
+        velocity = updated
+    return velocity
+
+
+def analyze_drilling_scenario(scenario: Optional[DrillingScenario] = None) -> DrillingAnalysis:
+    """
+    Analyze a Cosmos X-9 drilling scenario over its whole depth profile.
+
+    Args:
+        scenario: Scenario inputs (defaults to DrillingScenario())
+
+    Returns:
+        DrillingAnalysis: Depth profiles, summary analysis, risk factors and
+        recommendations
+
+    Raises:
+        ValueError: If the geometry or inputs are not physical
+    """
+    s = scenario or DrillingScenario()
+    formation = FORMATIONS.get(s.formation, FORMATIONS["granite"])
+    if s.depth_m <= 0 or s.hole_diameter_m <= s.pipe_diameter_m or s.flow_rate_lpm <= 0:
+        raise ValueError("Depth and flow rate must be positive and the hole wider than the pipe")
+    gradient = (s.geothermal_gradient_c_per_km
+                if s.geothermal_gradient_c_per_km is not None else formation.geothermal_gradient) / 1000.0
+
+    depth = np.linspace(0.0, s.depth_m, max(s.n_points, 2))
+    formation_t = s.surface_temperature_c + gradient * depth
+    fluid_t = circulating_temperature(depth, s.injection_temperature_c, s.surface_temperature_c,
+                                      gradient, s.thermal_relaxation_m)
+    if s.fluid_density_kg_m3 is not None:
+        density = np.full_like(depth, s.fluid_density_kg_m3)
+        pressure = s.surface_pressure_mpa + s.fluid_density_kg_m3 * GRAVITY * depth / 1e6
+    else:
+        # Density depends on the pressure its own head produces; a few passes converge
+        water = get_water_properties()
+        pressure = np.full_like(depth, s.surface_pressure_mpa)
+        for _ in range(4):
+            density = water.density(fluid_t, pressure)
+            head = np.concatenate([[0.0], np.cumsum(0.5 * (density[1:] + density[:-1]) * np.diff(depth))])
+            pressure = s.surface_pressure_mpa + GRAVITY * head / 1e6
+        density = water.density(fluid_t, pressure)
+    if s.fluid_viscosity_cp is not None:
+        viscosity_cp = np.full_like(depth, s.fluid_viscosity_cp)
+    else:
+        viscosity_cp = get_water_properties().viscosity_cp(fluid_t, pressure)
+    if np.isnan(density).any() or np.isnan(viscosity_cp).any():
+        raise ValueError("Circulating temperature or pressure is outside the water property tables "
+                         "(100-1000 °C, 0.5-100 MPa)")
+
+    annulus_area = np.pi / 4.0 * (s.hole_diameter_m ** 2 - s.pipe_diameter_m ** 2)
+    hole_area = np.pi / 4.0 * s.hole_diameter_m ** 2
+    flow_m3_s = s.flow_rate_lpm / 60000.0
+    annular_velocity = np.full_like(depth, flow_m3_s / annulus_area)
+    slip = settling_velocity(s.cuttings_diameter_m, formation.rock_density, density, viscosity_cp * 1e-3)
+    transport_velocity = annular_velocity - slip
+    transport_ratio = transport_velocity / annular_velocity
+
+    rop = s.rop_m_per_hr if s.rop_m_per_hr is not None else sum(formation.rop_scw) / 2.0
+    cuttings_rate = rop / 3600.0 * hole_area
+    # Cuttings stop rising where the transport velocity is not positive
+    concentration = np.where(
+        transport_velocity > 0,
+        cuttings_rate / (cuttings_rate + flow_m3_s * np.clip(transport_ratio, 1e-9, None)),
+        1.0
+    )
+    conventional_rop = sum(formation.rop_conventional) / 2.0
+
+    bhct = float(fluid_t[-1])
+    analysis = {
+        "formation_temperature_at_td_c": float(formation_t[-1]),
+        "bhct_c": bhct,
+        "max_circulating_temperature_c": float(fluid_t.max()),
+        "subcritical_interval_m": float(np.sum(np.diff(depth)[fluid_t[1:] < SCW_CRITICAL_TEMPERATURE_C])),
+        "min_pressure_mpa": float(pressure.min()),
+        "bottomhole_pressure_mpa": float(pressure[-1]),
+        "min_fluid_density_kg_m3": float(density.min()),
+        "max_fluid_density_kg_m3": float(density.max()),
+        "min_viscosity_cp": float(viscosity_cp.min()),
+        "max_viscosity_cp": float(viscosity_cp.max()),
+        "annular_velocity_m_s": float(annular_velocity[0]),
+        "max_settling_velocity_m_s": float(slip.max()),
+        "min_transport_ratio": float(transport_ratio.min()),
+        "max_cuttings_concentration": float(concentration.max()),
+        "rop_m_per_hr": rop,
+        "rop_conventional_m_per_hr": conventional_rop,
+        "drilling_days": s.depth_m / rop / 24.0,
+        "drilling_days_conventional": s.depth_m / conventional_rop / 24.0,
+        "bit_runs": float(np.ceil(s.depth_m / BIT_LIFE_M[0])),
+        "min_flow_for_cleaning_lpm": MIN_ANNULAR_VELOCITY_M_S * annulus_area * 60000.0,
+    }
+
+    risks: List[Tuple[str, str]] = []
+    recommendations: List[str] = []
+    if analysis["annular_velocity_m_s"] < MIN_ANNULAR_VELOCITY_M_S:
+        risks.append(("HIGH", f"Annular velocity {analysis['annular_velocity_m_s']:.2f} m/s is below the "
+                              f"{MIN_ANNULAR_VELOCITY_M_S} m/s needed to lift cuttings in SCW"))
+        needed = analysis["min_flow_for_cleaning_lpm"]
+        if needed > PUMP_MAX_FLOW_LPM:
+            recommendations.append(
+                f"Reach {MIN_ANNULAR_VELOCITY_M_S} m/s with {needed:.0f} L/min: beyond one {PUMP_MAX_FLOW_LPM:.0f} L/min "
+                "pump, so run a second pump, a smaller hole section or a larger pipe OD"
+            )
+        else:
+            recommendations.append(f"Raise the flow rate to at least {needed:.0f} L/min")
+    if analysis["min_transport_ratio"] < MIN_TRANSPORT_RATIO:
+        severity = "HIGH" if analysis["min_transport_ratio"] <= 0 else "MEDIUM"
+        risks.append((severity, f"Transport ratio {analysis['min_transport_ratio']:.2f} (< {MIN_TRANSPORT_RATIO}): "
+                                "cuttings bed accumulation and stuck pipe risk"))
+        recommendations.append("Use a pulsed flow regime and hydraulic jetting at the bit to sweep cuttings")
+    if analysis["max_cuttings_concentration"] > MAX_CUTTINGS_CONCENTRATION:
+        risks.append(("MEDIUM", f"Annular cuttings concentration up to {analysis['max_cuttings_concentration']:.1%} "
+                                f"at {rop:.0f} m/hr"))
+        recommendations.append("Control ROP or circulate bottoms up before connections")
+    if bhct < BHCT_RANGE_C[0] or analysis["subcritical_interval_m"] > 0:
+        risks.append(("MEDIUM", f"Fluid drops below {SCW_CRITICAL_TEMPERATURE_C} °C over "
+                                f"{analysis['subcritical_interval_m']:.0f} m (BHCT {bhct:.0f} °C): "
+                                "thermal spalling assistance is lost there"))
+        recommendations.append("Raise the injection temperature towards 450 °C or improve the string insulation")
+    if bhct > BHCT_RANGE_C[1]:
+        risks.append(("HIGH", f"BHCT {bhct:.0f} °C exceeds the {BHCT_RANGE_C[1]:.0f} °C design limit"))
+        recommendations.append("Lower the injection temperature and enable the emergency quench system")
+    if bhct > BOP_SEAL_RATING_C:
+        risks.append(("HIGH", f"Returns near {bhct:.0f} °C can exceed the {BOP_SEAL_RATING_C:.0f} °C BOP seal "
+                              "rating (the pilot's seal failure was a thermal runaway)"))
+        recommendations.append("Cool returns through the heat exchanger before the BOP stack; monitor seal temperature")
+    if analysis["max_circulating_temperature_c"] > STANDARD_TOOL_RATING_C:
+        risks.append(("HIGH", "Circulating temperature exceeds standard elastomer and MWD ratings over the whole well"))
+        recommendations.append("Run SiC-based high-temperature electronics and a ceramic-insulated drill string")
+    if analysis["min_pressure_mpa"] < MIN_SYSTEM_PRESSURE_MPA + BACKPRESSURE_TOLERANCE_MPA:
+        risks.append(("HIGH", f"Pressure falls to {analysis['min_pressure_mpa']:.1f} MPa, within "
+                              f"{BACKPRESSURE_TOLERANCE_MPA} MPa of the {MIN_SYSTEM_PRESSURE_MPA} MPa floor: "
+                              "two-phase flow and pump cavitation"))
+        recommendations.append("Raise the surface backpressure with the automated choke")
+    if s.surface_pressure_mpa > PUMP_MAX_PRESSURE_MPA:
+        risks.append(("HIGH", f"Surface pressure {s.surface_pressure_mpa:.1f} MPa exceeds the "
+                              f"{PUMP_MAX_PRESSURE_MPA:.0f} MPa pump rating"))
+    risks.append(("MEDIUM", "Thermal cycling on trips induces tensile hoop stress and spalling"))
+    recommendations.append("Limit heating and cooling rates to below 50 °C/hr during trips")
+    recommendations.append(f"Plan {analysis['bit_runs']:.0f} bit runs (SCW bit life {BIT_LIFE_M[0]:.0f}-"
+                           f"{BIT_LIFE_M[1]:.0f} m)")
+
+    profile = {
+        "depth_m": depth,
+        "formation_temperature_c": formation_t,
+        "circulating_temperature_c": fluid_t,
+        "pressure_mpa": pressure,
+        "density_kg_m3": density,
+        "viscosity_cp": viscosity_cp,
+        "settling_velocity_m_s": slip,
+        "transport_ratio": transport_ratio,
+        "cuttings_concentration": concentration,
+    }
+    return DrillingAnalysis(s, profile, analysis, risks, recommendations)
+
+
+def format_drilling_analysis(result: DrillingAnalysis, rows: int = 7) -> str:
+    """Render an analysis as compact text for the LLM (``rows`` profile rows)."""
+    s = result.scenario
+    a = result.analysis
+    lines = [
+        f"Inputs: depth {s.depth_m:.0f} m, {s.formation}, hole {s.hole_diameter_m / 0.0254:.2f} in, "
+        f"pipe OD {s.pipe_diameter_m / 0.0254:.2f} in, flow {s.flow_rate_lpm:.0f} L/min, "
+        f"injection {s.injection_temperature_c:.0f} °C, surface pressure {s.surface_pressure_mpa:.1f} MPa, "
+        f"cuttings {s.cuttings_diameter_m * 1000:.1f} mm",
+        "Analysis:",
+        f"- Formation temperature at TD {a['formation_temperature_at_td_c']:.0f} °C; BHCT {a['bhct_c']:.0f} °C "
+        f"(design {BHCT_RANGE_C[0]:.0f}-{BHCT_RANGE_C[1]:.0f} °C); subcritical interval "
+        f"{a['subcritical_interval_m']:.0f} m",
+        f"- Pressure {a['min_pressure_mpa']:.1f} MPa (min) to {a['bottomhole_pressure_mpa']:.1f} MPa at TD",
+        f"- SCW density {a['min_fluid_density_kg_m3']:.0f}-{a['max_fluid_density_kg_m3']:.0f} kg/m³, viscosity "
+        f"{a['min_viscosity_cp']:.3f}-{a['max_viscosity_cp']:.3f} cP (knowledge base {SCW_VISCOSITY_CP[0]}-"
+        f"{SCW_VISCOSITY_CP[1]} cP)",
+        f"- Annular velocity {a['annular_velocity_m_s']:.2f} m/s (>= {MIN_ANNULAR_VELOCITY_M_S} needs "
+        f"{a['min_flow_for_cleaning_lpm']:.0f} L/min); cuttings settling velocity up to "
+        f"{a['max_settling_velocity_m_s']:.2f} m/s; transport ratio >= {a['min_transport_ratio']:.2f}; "
+        f"cuttings concentration <= {a['max_cuttings_concentration']:.1%}",
+        f"- ROP {a['rop_m_per_hr']:.0f} m/hr: {a['drilling_days']:.1f} days on bottom "
+        f"(conventional {a['rop_conventional_m_per_hr']:.0f} m/hr: {a['drilling_days_conventional']:.1f} days); "
+        f"{a['bit_runs']:.0f} bit runs",
+        "Depth profile:",
+        "depth_m | formation_T_C | circulating_T_C | pressure_MPa | density_kg_m3 | settling_m_s | transport_ratio",
+    ]
+    p = result.profile
+    for i in np.unique(np.linspace(0, len(p["depth_m"]) - 1, rows).round().astype(int)):
+        lines.append(
+            f"{p['depth_m'][i]:.0f} | {p['formation_temperature_c'][i]:.0f} | "
+            f"{p['circulating_temperature_c'][i]:.0f} | {p['pressure_mpa'][i]:.1f} | {p['density_kg_m3'][i]:.0f} | "
+            f"{p['settling_velocity_m_s'][i]:.2f} | {p['transport_ratio'][i]:.2f}"
+        )
+    lines.append("Risk factors:")
+    lines.extend(f"- [{severity}] {risk}" for severity, risk in result.risk_factors)
+    lines.append("Recommendations:")
+    lines.extend(f"- {rec}" for rec in result.recommendations)
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+"""
+Background health monitoring for LLM backends.
+
+A blocking ``health_check()`` on every Streamlit rerun stalls the UI for up
+to the probe timeout whenever a backend is slow. Instead, each configured
+backend is registered with a process-wide ``HealthMonitor`` that probes it on
+a background thread at a fixed interval. The UI and request path only read
+the cached ``HealthStatus``, which never blocks.
+
+Settings (environment):
+    SVES_HEALTH_INTERVAL  Seconds between probes of a backend (default 15)
+    SVES_HEALTH_TTL       Seconds a probe result stays valid (default 45)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class HealthStatus:
+    """Cached result of the most recent probe of a backend."""
+    healthy: Optional[bool] = None   # None until the first probe completes
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+    consecutive_failures: int = 0
+    stale: bool = False              # Result older than the monitor TTL
+
+    @property
+    def known(self) -> bool:
+        """Whether a fresh probe result is available."""
+        return self.healthy is not None and not self.stale
+
+
+@dataclass
+class _Target:
+    probe: Callable[[], bool]
+    status: HealthStatus
+    next_probe_at: float
+    last_read_at: float
+
+
+class HealthMonitor:
+    """
+    Probes registered backends on a daemon thread and caches their status.
+
+    Targets that have not been read for ``idle_expiry`` seconds (e.g. from
+    abandoned browser sessions) are dropped automatically.
+    """
+
+    def __init__(
+        self,
+        interval: float = 15.0,
+        ttl: float = 45.0,
+        idle_expiry: float = 600.0,
+        max_parallel_probes: int = 4
+    ):
+        self.interval = interval
+        self.ttl = ttl
+        self.idle_expiry = idle_expiry
+        self._targets: Dict[str, _Target] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_parallel_probes, thread_name_prefix="sves-health-probe"
+        )
+        self._thread = threading.Thread(target=self._run, name="sves-health-monitor", daemon=True)
+        self._thread.start()
+
+    def register(self, key: str, probe: Callable[[], bool]) -> None:
+        """
+        Register (or refresh) a backend probe.
+
+        A newly registered backend is probed immediately in the background.
+        Re-registering an existing key only replaces its probe callable.
+        """
+        now = time.monotonic()
+        with self._lock:
+            target = self._targets.get(key)
+            if target is not None:
+                target.probe = probe
+                target.last_read_at = now
+                return
+            self._targets[key] = _Target(
+                probe=probe, status=HealthStatus(), next_probe_at=now, last_read_at=now
+            )
+        self._wake.set()
+
+    def unregister(self, key: str) -> None:
+        """Stop probing a backend."""
+        with self._lock:
+            self._targets.pop(key, None)
+
+    def get_status(self, key: str) -> HealthStatus:
+        """Return a copy of the cached status of a backend without blocking."""
+        now = time.monotonic()
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                return HealthStatus()
+            target.last_read_at = now
+            status = HealthStatus(**vars(target.status))
+        if status.checked_at is not None:
+            status.stale = (time.time() - status.checked_at) > self.ttl
+        return status
+
+    def probe_now(self, key: str) -> None:
+        """Schedule an immediate background probe of a backend."""
+        with self._lock:
+            target = self._targets.get(key)
+            if target is not None:
+                target.next_probe_at = time.monotonic()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                for key, target in list(self._targets.items()):
+                    if now - target.last_read_at > self.idle_expiry:
+                        del self._targets[key]
+                    elif target.next_probe_at <= now:
+                        # Push the next probe out before running this one so a
+                        # slow probe is never scheduled twice concurrently
+                        target.next_probe_at = now + self.interval
+                        due.append((key, target.probe))
+            for key, probe in due:
+                self._executor.submit(self._probe, key, probe)
+
+    def _probe(self, key: str, probe: Callable[[], bool]) -> None:
+        start = time.perf_counter()
+        error = None
+        try:
+            healthy = bool(probe())
+        except Exception as e:  # Probes must never kill the monitor
+            healthy, error = False, str(e)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+
+        with self._lock:
+            target = self._targets.get(key)
+            if target is None:
+                return
+            status = target.status
+            status.healthy = healthy
+            status.latency_ms = latency_ms
+            status.checked_at = time.time()
+            status.error = error
+            status.consecutive_failures = 0 if healthy else status.consecutive_failures + 1
+
+
+_MONITOR: Optional[HealthMonitor] = None
+_MONITOR_LOCK = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Return the process-wide health monitor, starting it on first use."""
+    global _MONITOR
+    if _MONITOR is None:
+        with _MONITOR_LOCK:
+            if _MONITOR is None:
+                _MONITOR = HealthMonitor(
+                    interval=float(os.environ.get("SVES_HEALTH_INTERVAL", "15")),
+                    ttl=float(os.environ.get("SVES_HEALTH_TTL", "45")),
+                )
+    return _MONITOR
@@ -0,0 +1,82 @@
+"""
+Shared, pooled HTTP sessions for LLM backends.
+
+Module-level ``requests.post``/``requests.get`` open a new TCP (and TLS)
+connection for every call. Instead, each backend origin gets one
+``requests.Session`` per process with a bounded urllib3 connection pool, so
+connections are kept alive and reused across client instances, Streamlit
+reruns and user sessions.
+"""
+
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+_SessionKey = Tuple[str, int, int, bool, bool]
+
+_SESSIONS: Dict[_SessionKey, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def origin_of(base_url: str) -> str:
+    """Return the ``scheme://host[:port]`` origin of a URL."""
+    parts = urlsplit(base_url)
+    if not parts.scheme or not parts.netloc:
+        return base_url.rstrip("/")
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def get_http_session(
+    base_url: str,
+    pool_connections: int = 4,
+    pool_maxsize: int = 16,
+    pool_block: bool = True,
+    keep_alive: bool = True
+) -> requests.Session:
+    """
+    Return the process-wide pooled session for a backend origin.
+
+    Args:
+        base_url: Backend base URL; sessions are shared per origin
+        pool_connections: Number of per-host pools the adapter keeps
+        pool_maxsize: Maximum connections kept open to each host
+        pool_block: Block when a host's pool is exhausted instead of
+            opening extra, non-pooled connections (keeps the pool bounded)
+        keep_alive: Reuse connections between requests; when False every
+            request sends ``Connection: close``
+
+    Returns:
+        requests.Session: Shared session (safe to use from multiple threads)
+    """
+    key = (origin_of(base_url), pool_connections, pool_maxsize, pool_block, keep_alive)
+    session = _SESSIONS.get(key)
+    if session is not None:
+        return session
+
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if not keep_alive:
+                session.headers["Connection"] = "close"
+            _SESSIONS[key] = session
+    return session
+
+
+def close_all_sessions() -> None:
+    """Close every pooled session (e.g. at process shutdown)."""
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
@@ -0,0 +1,40 @@
+"""
+Deferred imports for heavy optional-path dependencies.
+
+The core engine is imported by the Streamlit UI, the batch runner and worker
+processes; most of them never touch code paths that need NumPy (BM25 index
+builds, semantic cache vectors). ``lazy_import`` returns a module whose real
+import happens on first attribute access, so those paths pay for NumPy and
+the others do not.
+"""
+
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stand-in that imports the real module on first attribute access."""
+
+    def __getattr__(self, attr: str):
+        # Only reached for attributes not yet copied from the real module.
+        # importlib's per-module lock makes concurrent first use safe.
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return ``name`` as a module that is loaded on first attribute access.
+
+    If the module is already imported it is returned as is. Raises
+    ImportError immediately if the module is not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'")
+    return LazyModule(name)
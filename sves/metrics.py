@@ -0,0 +1,499 @@
+"""
+Request metrics: stage timings, token usage and Prometheus text export.
+
+Two views of the same measurements:
+
+- A process-wide ``MetricsRegistry`` of counters and histograms (all
+  sessions, since start-up), rendered in the Prometheus text exposition
+  format for scraping or for a node_exporter textfile collector.
+- A per-request ``RequestTrace`` that the caller activates around one
+  question (the UI does this for each chat turn, the batch runner for each
+  row) to get that request's stage breakdown and token counts.
+
+Instrumented stages:
+    cache_lookup      Response cache lookup
+    queue_wait        Waiting for a backend slot (sves.admission)
+    prompt_build      build_system_prompt() including retrieval
+    tools             Native tools run for the query (sves.tools)
+    history_prepare   Context window budgeting and summarization
+    llm               Backend call(s), from request to last token
+    ui_render         Streamlit re-renders while streaming
+    request           End to end get_sves_response()/stream
+
+Backend calls are wrapped in ``llm_call()``, which records latency, TTFT and
+the prompt/completion token counts reported by the server (Ollama
+``prompt_eval_count``/``eval_count``, OpenAI ``usage``). Ollama also reports
+its own prefill and decode durations, which are used when present.
+
+Settings (environment):
+    SVES_METRICS_PORT      Serve ``/metrics`` on this port
+    SVES_METRICS_FILE      Write the text exposition to this path periodically
+    SVES_METRICS_INTERVAL  Seconds between file writes (default 15)
+    SVES_METRICS_HOST      Interface for the HTTP endpoint (default 127.0.0.1)
+"""
+
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+
+_METRIC_HELP = {
+    "sves_requests_total": ("counter", "Questions answered, by response cache outcome"),
+    "sves_coalesced_requests_total": ("counter", "Questions that joined an identical in-flight generation"),
+    "sves_stage_duration_seconds": ("histogram", "Duration of each request stage"),
+    "sves_llm_requests_total": ("counter", "Backend calls by outcome"),
+    "sves_llm_request_duration_seconds": ("histogram", "Backend call duration to the last token"),
+    "sves_llm_time_to_first_token_seconds": ("histogram", "Backend time to first streamed token"),
+    "sves_llm_prefill_duration_seconds": ("histogram", "Backend-reported prompt processing time"),
+    "sves_llm_prompt_tokens_total": ("counter", "Prompt tokens reported by the backend"),
+    "sves_llm_completion_tokens_total": ("counter", "Completion tokens reported by the backend"),
+    "sves_llm_tokens_per_second": ("histogram", "Decode rate of completed backend calls"),
+    "sves_warmup_duration_seconds": ("histogram", "Model load and prompt prefix warm-up time"),
+    "sves_audit_records_total": ("counter", "Audit records written"),
+    "sves_audit_write_errors_total": ("counter", "Audit records (or fsyncs) that failed to write"),
+    "sves_conversation_write_errors_total": ("counter", "Conversation store writes that failed to commit"),
+    "sves_sweep_points_total": ("counter", "Parameter sweep points, computed or served from the point cache"),
+    "sves_telemetry_samples_total": ("counter", "Telemetry samples ingested or dropped as out of order"),
+    "sves_telemetry_alerts_total": ("counter", "Telemetry alerts raised, by kind and severity"),
+    "sves_telemetry_alert_latency_seconds": ("histogram", "Time from the offending sample to its alert"),
+    "sves_telemetry_active_alerts": ("gauge", "Telemetry alerts currently active"),
+    "sves_admission_queue_depth": ("gauge", "Requests waiting for a backend slot"),
+    "sves_admission_active_requests": ("gauge", "Backend calls currently admitted"),
+    "sves_admission_wait_seconds": ("histogram", "Time queued requests waited for a backend slot"),
+    "sves_admission_rejected_total": ("counter", "Requests rejected by admission control"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class TokenUsage:
+    """Token counts and server-side timings reported by a backend."""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    prefill_seconds: Optional[float] = None   # Ollama prompt_eval_duration
+    decode_seconds: Optional[float] = None    # Ollama eval_duration
+
+    def update_from_event(self, event: Dict) -> None:
+        """Take the counts from an Ollama or OpenAI-compatible response object."""
+        if "eval_count" in event or "prompt_eval_count" in event:
+            self.prompt_tokens = event.get("prompt_eval_count", self.prompt_tokens)
+            self.completion_tokens = event.get("eval_count", self.completion_tokens)
+            if event.get("prompt_eval_duration"):
+                self.prefill_seconds = event["prompt_eval_duration"] / 1e9
+            if event.get("eval_duration"):
+                self.decode_seconds = event["eval_duration"] / 1e9
+        usage = event.get("usage")
+        if usage:
+            self.prompt_tokens = usage.get("prompt_tokens", self.prompt_tokens)
+            self.completion_tokens = usage.get("completion_tokens", self.completion_tokens)
+
+
+@dataclass
+class RequestTrace:
+    """Stage timings and token usage of one question."""
+    stages_ms: Dict[str, float] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    ttft_ms: Optional[float] = None
+    decode_ms: float = 0.0          # Time spent generating tokens after the first
+    cached: bool = False
+    coalesced: bool = False         # Shared another request's in-flight generation
+    backend: Optional[str] = None
+
+    def add_stage(self, name: str, ms: float) -> None:
+        """Accumulate time into a stage (a stage may run more than once)."""
+        self.stages_ms[name] = self.stages_ms.get(name, 0.0) + ms
+
+    @property
+    def tokens_per_sec(self) -> Optional[float]:
+        """Decode rate of the request's backend calls."""
+        if not self.completion_tokens or self.decode_ms <= 0:
+            return None
+        return self.completion_tokens / (self.decode_ms / 1000.0)
+
+    @contextmanager
+    def activate(self) -> Iterator["RequestTrace"]:
+        """Make this the current trace of the calling thread/context."""
+        token = _CURRENT_TRACE.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT_TRACE.reset(token)
+
+
+_CURRENT_TRACE: ContextVar[Optional[RequestTrace]] = ContextVar("sves_request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The active RequestTrace, if a caller activated one."""
+    return _CURRENT_TRACE.get()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """Thread-safe labelled counters, gauges and histograms."""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """Add ``amount`` to a counter."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Set a gauge."""
+        key = _labels(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float,
+                buckets: Tuple[float, ...] = DURATION_BUCKETS, **labels) -> None:
+        """Record a histogram observation."""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def summary(self) -> Dict[str, List[Dict[str, object]]]:
+        """Counter/gauge values and histogram count/sum/mean per series (for display)."""
+        with self._lock:
+            result: Dict[str, List[Dict[str, object]]] = {}
+            for values in (self._counters, self._gauges):
+                for name, series in values.items():
+                    result[name] = [{"labels": dict(k), "value": v} for k, v in series.items()]
+            for name, series in self._histograms.items():
+                result[name] = [
+                    {"labels": dict(k), "count": h.count, "sum": h.sum,
+                     "mean": h.sum / h.count if h.count else None}
+                    for k, h in series.items()
+                ]
+            return result
+
+    def render_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        inf_label = 'le="+Inf"'
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._gauges) | set(self._histograms))
+            for name in names:
+                kind, help_text = _METRIC_HELP.get(
+                    name, ("histogram" if name in self._histograms else "counter", name)
+                )
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                values = self._counters.get(name) or self._gauges.get(name) or {}
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                for key, histogram in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        le = 'le="{}"'.format(_format_value(bound))
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, inf_label)} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all series."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _REGISTRY
+
+
+# ============================================================================
+# INSTRUMENTATION HOOKS
+# ============================================================================
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a stage duration in the registry and the active trace."""
+    _REGISTRY.observe("sves_stage_duration_seconds", seconds, stage=name)
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.add_stage(name, seconds * 1000.0)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a request stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def timed_stage(name: str) -> Callable:
+    """Decorator recording each call of a function as a request stage."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache_outcome(outcome: str) -> None:
+    """Count a question by response cache outcome ("hit", "miss" or "bypass")."""
+    _REGISTRY.inc("sves_requests_total", cache=outcome)
+    trace = _CURRENT_TRACE.get()
+    if trace is not None and outcome == "hit":
+        trace.cached = True
+
+
+def record_coalesced() -> None:
+    """Count a question answered by joining an identical in-flight generation."""
+    _REGISTRY.inc("sves_coalesced_requests_total")
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.coalesced = True
+
+
+class LLMCall:
+    """Measurements of one backend call, filled in by the client."""
+
+    def __init__(self, provider: str, model: str, mode: str):
+        self.provider = provider
+        self.model = model
+        self.mode = mode
+        self.usage = TokenUsage()
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+
+    def mark_token(self) -> None:
+        """Note that a content delta arrived (the first one sets TTFT)."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self, outcome: str) -> None:
+        finished_at = time.perf_counter()
+        labels = {"provider": self.provider, "model": self.model}
+        _REGISTRY.inc("sves_llm_requests_total", mode=self.mode, outcome=outcome, **labels)
+        duration = finished_at - self.started_at
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            trace.add_stage("llm", duration * 1000.0)
+            trace.backend = f"{self.provider}/{self.model}"
+        if outcome != "ok":
+            return
+
+        _REGISTRY.observe("sves_llm_request_duration_seconds", duration, mode=self.mode, **labels)
+        ttft = None
+        if self.first_token_at is not None:
+            ttft = self.first_token_at - self.started_at
+            _REGISTRY.observe("sves_llm_time_to_first_token_seconds", ttft, **labels)
+        usage = self.usage
+        if usage.prefill_seconds is not None:
+            _REGISTRY.observe("sves_llm_prefill_duration_seconds", usage.prefill_seconds, **labels)
+        if usage.prompt_tokens:
+            _REGISTRY.inc("sves_llm_prompt_tokens_total", usage.prompt_tokens, **labels)
+        if usage.completion_tokens:
+            _REGISTRY.inc("sves_llm_completion_tokens_total", usage.completion_tokens, **labels)
+
+        # Decode time: server-reported if available, else first token to end
+        # (streams) or the whole call (non-streaming, includes prefill)
+        if usage.decode_seconds is not None:
+            decode = usage.decode_seconds
+        elif ttft is not None:
+            decode = finished_at - self.first_token_at
+        else:
+            decode = duration
+        if usage.completion_tokens and decode > 0:
+            _REGISTRY.observe("sves_llm_tokens_per_second", usage.completion_tokens / decode,
+                              buckets=RATE_BUCKETS, **labels)
+
+        if trace is not None:
+            trace.prompt_tokens += usage.prompt_tokens or 0
+            trace.completion_tokens += usage.completion_tokens or 0
+            trace.decode_ms += decode * 1000.0
+            if ttft is not None and trace.ttft_ms is None:
+                trace.ttft_ms = ttft * 1000.0
+
+
+@contextmanager
+def llm_call(config, mode: str) -> Iterator[LLMCall]:
+    """
+    Instrument one backend call of an LLMClient.
+
+    Args:
+        config: The client's LLMConfig (provider and model labels)
+        mode: "generate" or "stream"
+
+    Yields:
+        LLMCall: Call the client fills with ``usage`` and ``mark_token()``
+    """
+    call = LLMCall(config.provider.value, config.model_name, mode)
+    try:
+        yield call
+    except GeneratorExit:
+        call.finish("cancelled")  # Stream abandoned by its consumer
+        raise
+    except BaseException:
+        call.finish("error")
+        raise
+    call.finish("ok")
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def write_textfile(path: str, registry: Optional[MetricsRegistry] = None) -> None:
+    """Atomically write the text exposition to ``path``."""
+    registry = registry or _REGISTRY
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".prom")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(registry.render_prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = _REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """Serves ``/metrics`` over HTTP and/or writes a textfile periodically."""
+
+    def __init__(self, port: Optional[int] = None, path: Optional[str] = None,
+                 interval: float = 15.0, host: str = "127.0.0.1"):
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+
+    def start(self) -> "MetricsExporter":
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever,
+                             name="sves-metrics-http", daemon=True).start()
+        if self.path:
+            threading.Thread(target=self._write_loop, name="sves-metrics-file", daemon=True).start()
+        return self
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the textfile now (no-op without a file sink)."""
+        if self.path:
+            write_textfile(self.path)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.flush()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+_EXPORTER: Optional[MetricsExporter] = None
+_EXPORTER_LOCK = threading.Lock()
+
+
+def start_metrics_exporter() -> Optional[MetricsExporter]:
+    """
+    Start the process-wide exporter configured by SVES_METRICS_PORT and/or
+    SVES_METRICS_FILE; returns None when neither is set. Idempotent.
+    """
+    global _EXPORTER
+    if _EXPORTER is None:
+        with _EXPORTER_LOCK:
+            if _EXPORTER is None:
+                port = os.environ.get("SVES_METRICS_PORT")
+                path = os.environ.get("SVES_METRICS_FILE")
+                if not port and not path:
+                    return None
+                _EXPORTER = MetricsExporter(
+                    port=int(port) if port else None,
+                    path=path or None,
+                    interval=float(os.environ.get("SVES_METRICS_INTERVAL", "15")),
+                    host=os.environ.get("SVES_METRICS_HOST", "127.0.0.1"),
+                ).start()
+    return _EXPORTER
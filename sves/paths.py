@@ -0,0 +1,27 @@
+"""
+On-disk locations for SVES caches and indexes.
+
+Everything persisted by the process-wide services lives under a single cache
+root so it can be relocated (e.g. to an encrypted volume) with one setting:
+the ``SVES_CACHE_DIR`` environment variable. The default is ``~/.cache/sves``.
+"""
+
+import os
+
+
+def get_cache_dir(*parts: str) -> str:
+    """
+    Return (and create) a directory under the SVES cache root.
+
+    Args:
+        *parts: Optional sub-directory components, e.g. ``("index",)``
+
+    Returns:
+        str: Absolute path of the directory
+    """
+    root = os.environ.get("SVES_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "sves"
+    )
+    path = os.path.abspath(os.path.join(root, *parts))
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,129 @@
+"""
+Process-wide system prompt cache.
+
+The SVES system prompt is a large f-string built from the prompt template and
+the knowledge base. Its content only changes when one of those inputs changes,
+so it is built once, keyed by a SHA-256 content hash of the inputs, and shared
+by every Streamlit session in the process.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sves.tokens import estimate_tokens
+
+
+@dataclass
+class PromptBuildStats:
+    """Statistics for the most recent prompt build and cache usage."""
+    key: str = ""
+    build_time_ms: float = 0.0
+    prompt_chars: int = 0
+    prompt_bytes: int = 0
+    approx_tokens: int = 0
+    builds: int = 0
+    hits: int = 0
+
+
+class PromptCache:
+    """
+    Thread-safe, content-hash keyed cache of rendered system prompts.
+
+    Entries are keyed by the SHA-256 of the template and every substituted
+    value, so an edited knowledge base or template produces a new key and the
+    prompt is rebuilt transparently. A small LRU bound keeps memory flat when
+    the substituted content varies between requests.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = PromptBuildStats()
+
+    @staticmethod
+    def make_key(template: str, **fields: str) -> str:
+        """Compute the content hash for a template and its field values."""
+        digest = hashlib.sha256()
+        digest.update(template.encode("utf-8"))
+        for name in sorted(fields):
+            digest.update(b"\x00" + name.encode("utf-8") + b"\x00")
+            digest.update(fields[name].encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_or_build(self, template: str, **fields: str) -> str:
+        """
+        Return the rendered prompt, building it only on a cache miss.
+
+        Args:
+            template: ``str.format`` template of the system prompt
+            **fields: Values substituted into the template
+
+        Returns:
+            str: The rendered system prompt
+        """
+        key = self.make_key(template, **fields)
+
+        with self._lock:
+            prompt = self._entries.get(key)
+            if prompt is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return prompt
+
+        start = time.perf_counter()
+        prompt = template.format(**fields)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        with self._lock:
+            self._entries[key] = prompt
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            encoded_size = len(prompt.encode("utf-8"))
+            self._stats.key = key
+            self._stats.build_time_ms = elapsed_ms
+            self._stats.prompt_chars = len(prompt)
+            self._stats.prompt_bytes = encoded_size
+            self._stats.approx_tokens = estimate_tokens(prompt)
+            self._stats.builds += 1
+
+        return prompt
+
+    def stats(self) -> Dict[str, object]:
+        """Return a snapshot of build statistics for display or logging."""
+        with self._lock:
+            return {
+                "key": self._stats.key[:12],
+                "build_time_ms": round(self._stats.build_time_ms, 3),
+                "prompt_chars": self._stats.prompt_chars,
+                "prompt_bytes": self._stats.prompt_bytes,
+                "approx_tokens": self._stats.approx_tokens,
+                "builds": self._stats.builds,
+                "hits": self._stats.hits,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        """Drop all cached prompts (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+
+_PROMPT_CACHE: Optional[PromptCache] = None
+_PROMPT_CACHE_LOCK = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """Return the process-wide prompt cache, creating it on first use."""
+    global _PROMPT_CACHE
+    if _PROMPT_CACHE is None:
+        with _PROMPT_CACHE_LOCK:
+            if _PROMPT_CACHE is None:
+                _PROMPT_CACHE = PromptCache()
+    return _PROMPT_CACHE
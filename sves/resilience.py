@@ -0,0 +1,112 @@
+"""
+Retry, backoff and circuit breaking for LLM backends.
+
+- ``RetryPolicy`` yields bounded, fully jittered exponential backoff delays
+  ("full jitter": a uniform draw in [0, min(cap, base * 2**attempt)]), so
+  many sessions retrying a recovering backend do not arrive in lockstep.
+- ``CircuitBreaker`` tracks consecutive failures per backend. Once open, a
+  dead backend is skipped immediately instead of costing a full request
+  timeout; after ``reset_timeout`` one trial request is let through
+  (half-open) and its outcome closes or re-opens the circuit.
+
+Breakers are process-wide (one per backend key) so every session benefits
+from what any session has learned about a backend.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is refused because the backend's circuit is open."""
+
+
+@dataclass
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delays(self) -> Iterator[float]:
+        """Yield the sleep before each retry (``max_retries`` values)."""
+        for attempt in range(self.max_retries):
+            yield random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open trial → closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (reserves the half-open trial)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failure; open the circuit at the threshold or on a failed trial."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a half-open trial that was never sent (no outcome to record)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return breaker state for display."""
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {"state": self.state, "failures": self.failures, "retry_in_s": retry_in}
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(
+    key: str, failure_threshold: int = 3, reset_timeout: float = 30.0
+) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a backend key."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = _BREAKERS[key] = CircuitBreaker(failure_threshold, reset_timeout)
+        return breaker
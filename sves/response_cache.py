@@ -0,0 +1,354 @@
+"""
+Response cache in front of get_sves_response.
+
+Engineers ask the same handful of questions repeatedly (including the sidebar
+example queries), and each one would otherwise cost a full generation.
+
+Tiers:
+
+1. Exact match: in-memory LRU keyed on the normalized query, model name,
+   temperature, knowledge base/prompt fingerprint and conversation history.
+2. Disk (optional): SQLite file under the SVES cache root, shared across
+   restarts; memory misses fall through to it and hits are promoted. Each
+   insert evicts rows older than the age limit and the oldest rows over the
+   row cap, so the file stays bounded.
+3. Semantic (opt-in): near-duplicate questions within the same
+   model/temperature/knowledge/history partition that name the same numbers
+   are served when the cosine similarity of their query vectors exceeds a
+   threshold. The number check keeps "... at 3000 m" and "... at 5000 m"
+   (similarity ~0.9) from sharing tool-dependent answers. Vectors come from a
+   pluggable embedding function; the default is a hashed word/bigram vector
+   that needs no model. Vectors are computed on the first semantic lookup,
+   so exact-only caching never loads NumPy.
+
+Only deterministic generations (temperature 0) are cached unless the caller
+opts in to caching sampled responses.
+
+Settings (environment):
+    SVES_RESPONSE_CACHE_SIZE  In-memory entry cap (default 256)
+    SVES_RESPONSE_CACHE_DISK  "1" for <cache root>/responses.sqlite, or a path
+    SVES_RESPONSE_CACHE_DISK_ROWS  Disk tier row cap (default 10000)
+    SVES_RESPONSE_CACHE_DISK_DAYS  Disk tier entry lifetime in days (default 30)
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sves.lazy import lazy_import
+from sves.paths import get_cache_dir
+
+np = lazy_import("numpy")  # Only the semantic tier needs vectors
+
+
+EmbeddingFunction = Callable[[str], "np.ndarray"]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_QUERY_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Per-request response cache policy."""
+    enabled: bool = True
+    cache_nondeterministic: bool = False  # Also cache temperature > 0 responses
+    semantic: bool = False                # Serve near-duplicate questions
+    semantic_threshold: float = 0.92      # Minimum cosine similarity for a semantic hit
+
+
+@dataclass
+class CacheKey:
+    """Identity of a cacheable request."""
+    exact: str        # Hash of all request components
+    partition: str    # Hash of everything except the query (semantic scope)
+    query: str        # Normalized query text
+    numbers: Tuple[str, ...] = ()  # Numbers in the query; semantic hits must match them
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace/trailing punctuation."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = " ".join(text.split())
+    return text.rstrip(" ?!.")
+
+
+def history_fingerprint(history: List[Dict]) -> str:
+    """Hash a conversation history (roles and contents)."""
+    digest = hashlib.sha256()
+    for message in history:
+        digest.update(message.get("role", "").encode("utf-8") + b"\x00")
+        digest.update((message.get("content") or "").encode("utf-8") + b"\x01")
+    return digest.hexdigest()
+
+
+def make_cache_key(
+    query: str,
+    model_name: str,
+    temperature: float,
+    knowledge_fingerprint: str,
+    history: Optional[List[Dict]] = None
+) -> CacheKey:
+    """
+    Build the cache key of a request.
+
+    Args:
+        query: User query (normalized here)
+        model_name: Backend model name
+        temperature: Sampling temperature
+        knowledge_fingerprint: Hash of the prompt template, knowledge base
+            and retrieval settings
+        history: Conversation history sent with the query
+    """
+    partition = hashlib.sha256("\x00".join([
+        model_name,
+        f"{temperature:.3f}",
+        knowledge_fingerprint,
+        history_fingerprint(history or []),
+    ]).encode("utf-8")).hexdigest()
+    normalized = normalize_query(query)
+    exact = hashlib.sha256(f"{partition}\x00{normalized}".encode("utf-8")).hexdigest()
+    return CacheKey(exact=exact, partition=partition, query=normalized, numbers=query_numbers(normalized))
+
+
+def query_numbers(query: str) -> Tuple[str, ...]:
+    """The numbers in a query, canonicalized ("3,000" and "3000.0" -> "3000"), in order."""
+    return tuple(f"{float(n.replace(',', '')):.12g}" for n in _QUERY_NUMBER.findall(query))
+
+
+def hashed_embedding(text: str, dim: int = 2048) -> "np.ndarray":
+    """
+    Model-free query vector: signed feature hashing of words and word bigrams.
+
+    Good at catching rephrasings that share most of their vocabulary
+    ("salt precipitation challenges in SCWO" vs "SCWO salt precipitation
+    challenges"); a real embedding model can be plugged in instead.
+    """
+    words = _WORD.findall(normalize_query(text))
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class _DiskTier:
+    """SQLite-backed persistent tier, bounded by a row cap and an entry lifetime."""
+
+    def __init__(self, path: str, max_rows: int = 10000, max_age_s: float = 30 * 86400.0):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age_s = max_age_s
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, partition TEXT NOT NULL, query TEXT NOT NULL,"
+            " response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT partition, query, response FROM responses WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.max_age_s)
+            ).fetchone()
+        return row
+
+    def put(self, key: CacheKey, response: str) -> None:
+        """Store a response, evicting expired rows and the oldest rows over the cap."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key.exact, key.partition, key.query, response, now)
+                )
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_s,))
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses"
+                    " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """Thread-safe exact + semantic response cache with an optional disk tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        disk_path: Optional[str] = None,
+        embed: EmbeddingFunction = hashed_embedding,
+        disk_max_rows: int = 10000,
+        disk_max_age_s: float = 30 * 86400.0
+    ):
+        self.max_entries = max_entries
+        self.embed = embed
+        self._entries: "OrderedDict[str, Tuple[CacheKey, str]]" = OrderedDict()
+        self._vectors: Dict[str, "np.ndarray"] = {}
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path, disk_max_rows, disk_max_age_s) if disk_path else None
+        self._counters = {"hits": 0, "semantic_hits": 0, "disk_hits": 0, "misses": 0,
+                          "stores": 0, "uncacheable": 0}
+
+    @staticmethod
+    def is_cacheable(temperature: float, config: ResponseCacheConfig) -> bool:
+        """Whether a request with this temperature may be cached."""
+        return config.enabled and (temperature == 0 or config.cache_nondeterministic)
+
+    def lookup(self, key: CacheKey, config: ResponseCacheConfig) -> Optional[str]:
+        """
+        Return a cached response for ``key`` or None.
+
+        Tries the memory tier, then the disk tier, then (if enabled) the
+        semantic tier within the key's partition.
+        """
+        with self._lock:
+            entry = self._entries.get(key.exact)
+            if entry is not None:
+                self._entries.move_to_end(key.exact)
+                self._counters["hits"] += 1
+                return entry[1]
+
+        if self._disk is not None:
+            row = self._disk.get(key.exact)
+            if row is not None:
+                self._insert(key, row[2])
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                return row[2]
+
+        if config.semantic:
+            response = self._semantic_lookup(key, config.semantic_threshold)
+            if response is not None:
+                return response
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def _semantic_lookup(self, key: CacheKey, threshold: float) -> Optional[str]:
+        with self._lock:
+            candidates = [(k, ck.query) for k, (ck, _) in self._entries.items()
+                          if ck.partition == key.partition and ck.numbers == key.numbers]
+            if not candidates:
+                return None
+            vectors = [self._vectors.get(k) for k, _ in candidates]
+        # Vectors are computed on first semantic use, outside the lock
+        for i, (k, query) in enumerate(candidates):
+            if vectors[i] is None:
+                vectors[i] = self._vector_for(query)
+                with self._lock:
+                    if k in self._entries:
+                        self._vectors[k] = vectors[i]
+        matrix = np.stack(vectors)
+        query_vector = self._vector_for(key.query)
+        similarities = matrix @ query_vector
+        best = int(np.argmax(similarities))
+        if float(similarities[best]) < threshold:
+            return None
+        best_key = candidates[best][0]
+        with self._lock:
+            entry = self._entries.get(best_key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self._counters["semantic_hits"] += 1
+            return entry[1]
+
+    def _vector_for(self, query: str) -> "np.ndarray":
+        vector = np.asarray(self.embed(query), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def store(self, key: CacheKey, response: str) -> None:
+        """Store a response in the memory (and disk) tiers."""
+        if not response:
+            return
+        self._insert(key, response)
+        if self._disk is not None:
+            self._disk.put(key, response)
+        with self._lock:
+            self._counters["stores"] += 1
+
+    def _insert(self, key: CacheKey, response: str) -> None:
+        with self._lock:
+            self._entries[key.exact] = (key, response)
+            self._entries.move_to_end(key.exact)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._vectors.pop(evicted, None)
+
+    def record_uncacheable(self) -> None:
+        """Count a request that bypassed the cache by policy."""
+        with self._lock:
+            self._counters["uncacheable"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and rates."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        hits = stats["hits"] + stats["semantic_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["disk_entries"] = self._disk.count() if self._disk is not None else 0
+        return stats
+
+    def clear(self) -> None:
+        """Drop all cached responses from every tier."""
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                disk_setting = os.environ.get("SVES_RESPONSE_CACHE_DISK", "")
+                disk_path = None
+                if disk_setting == "1":
+                    disk_path = os.path.join(get_cache_dir(), "responses.sqlite")
+                elif disk_setting and disk_setting != "0":
+                    disk_path = disk_setting
+                _CACHE = ResponseCache(
+                    max_entries=int(os.environ.get("SVES_RESPONSE_CACHE_SIZE", "256")),
+                    disk_path=disk_path,
+                    disk_max_rows=int(os.environ.get("SVES_RESPONSE_CACHE_DISK_ROWS", "10000")),
+                    disk_max_age_s=float(os.environ.get("SVES_RESPONSE_CACHE_DISK_DAYS", "30")) * 86400.0,
+                )
+    return _CACHE
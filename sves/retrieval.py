@@ -0,0 +1,401 @@
+"""
+Knowledge base retrieval engine.
+
+Replaces "stuff every document into the system prompt" with a local,
+in-process BM25 index over section-level chunks of the knowledge base.
+Only the chunks most relevant to the user's query are placed in the prompt,
+so prefill cost stays bounded as the corpus grows.
+
+Chunking follows the structure of the knowledge base text:
+
+- ``=== DOCUMENT n: name ===`` headers start a new document
+- Headings (``OPERATIONAL CHALLENGES:``) and numbered sections
+  (``3. CUTTINGS TRANSPORT (CRITICAL FAILURE MODE)``) start a new chunk
+
+The index is stored in CSR (per-term postings) form as NumPy arrays and is
+persisted to disk keyed by the corpus content hash, so a restart loads the
+existing index instead of re-indexing.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import textwrap
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sves.lazy import lazy_import
+from sves.paths import get_cache_dir
+from sves.tokens import estimate_tokens
+
+np = lazy_import("numpy")  # Loaded on first index build or load
+
+
+INDEX_FORMAT_VERSION = 1
+
+_DOCUMENT_HEADER = re.compile(r"^\s*===\s*DOCUMENT\s+(\d+)\s*:\s*(.+?)\s*===\s*$")
+_NUMBERED_SECTION = re.compile(r"^\s*(\d+)\.\s+[A-Z][A-Z0-9 &()\-/,.'’²₂₄]+$")
+_HEADING = re.compile(r"^\s*[A-Z][A-Za-z0-9 &()\-/,'’]{2,60}:\s*$")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Map subscript/superscript digits so "H2" matches "H₂" and "Fe2+" matches "Fe²⁺"
+_DIGIT_MAP = str.maketrans("₀₁₂₃₄₅₆₇₈₉⁰¹²³⁴⁵⁶⁷⁸⁹", "01234567890123456789")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its
+me my of on or should that the their then there these this to was what when
+which will with you your we our
+""".split())
+
+
+@dataclass
+class RetrievalConfig:
+    """Configuration for knowledge base retrieval."""
+    enabled: bool = True
+    top_k: int = 4
+    token_budget: int = 1500
+    k1: float = 1.5
+    b: float = 0.75
+    index_dir: Optional[str] = None  # Defaults to <cache root>/index
+
+
+@dataclass
+class Chunk:
+    """A section-level slice of one knowledge base document."""
+    chunk_id: int
+    doc_id: int
+    doc_title: str
+    section: str
+    text: str
+    tokens: int = field(default=0)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokenizer used for both indexing and queries."""
+    text = text.translate(_DIGIT_MAP).lower()
+    return [tok for tok in _TOKEN.findall(text) if tok not in _STOPWORDS]
+
+
+def chunk_knowledge_base(knowledge_base: str) -> List[Chunk]:
+    """
+    Split knowledge base text into section-level chunks.
+
+    Args:
+        knowledge_base: Concatenated documents as produced by load_knowledge_base()
+
+    Returns:
+        List[Chunk]: Chunks in document order
+    """
+    chunks: List[Chunk] = []
+    doc_id, doc_title = 0, ""
+    parent, section = "", ""
+    body: List[str] = []
+
+    def flush() -> None:
+        text = textwrap.dedent("\n".join(body)).strip()
+        body.clear()
+        if doc_id == 0 or not text:
+            return
+        # A heading immediately followed by numbered sections carries no text
+        # of its own; it is kept as the parent label of those sections instead.
+        if text == section or text.rstrip(":") == section:
+            return
+        chunks.append(Chunk(
+            chunk_id=len(chunks),
+            doc_id=doc_id,
+            doc_title=doc_title,
+            section=section,
+            text=text,
+            tokens=estimate_tokens(text),
+        ))
+
+    for line in knowledge_base.splitlines():
+        header = _DOCUMENT_HEADER.match(line)
+        if header:
+            flush()
+            doc_id, doc_title = int(header.group(1)), header.group(2)
+            parent, section = "", "Overview"
+            continue
+        if doc_id == 0:
+            continue
+        if line.strip().startswith("====") or line.strip() == "END OF KNOWLEDGE BASE":
+            flush()
+            doc_id = 0
+            continue
+
+        if _NUMBERED_SECTION.match(line):
+            flush()
+            section = f"{parent} > {line.strip()}" if parent else line.strip()
+        elif _HEADING.match(line):
+            flush()
+            parent = line.strip().rstrip(":")
+            section = parent
+        body.append(line)
+
+    flush()
+    return chunks
+
+
+class BM25Index:
+    """
+    Okapi BM25 index stored as CSR postings in NumPy arrays.
+
+    ``indptr[t]:indptr[t + 1]`` slices ``indices`` (chunk ids) and ``data``
+    (term frequencies) for term ``t``; scoring a query touches only the
+    postings of its terms.
+    """
+
+    def __init__(
+        self,
+        chunks: List[Chunk],
+        vocab: Dict[str, int],
+        indptr: "np.ndarray",
+        indices: "np.ndarray",
+        data: "np.ndarray",
+        doc_len: "np.ndarray",
+        k1: float = 1.5,
+        b: float = 0.75,
+        corpus_hash: str = ""
+    ):
+        self.chunks = chunks
+        self.vocab = vocab
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.corpus_hash = corpus_hash
+
+        n_docs = len(chunks)
+        df = np.diff(indptr).astype(np.float64)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        avg_len = float(doc_len.mean()) if n_docs else 1.0
+        self._len_norm = k1 * (1.0 - b + b * doc_len / max(avg_len, 1e-9))
+
+    @classmethod
+    def build(cls, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75,
+              corpus_hash: str = "") -> "BM25Index":
+        """Build an index from chunks."""
+        vocab: Dict[str, int] = {}
+        postings: List[Dict[int, int]] = []
+        doc_len = np.zeros(len(chunks), dtype=np.float32)
+
+        for chunk in chunks:
+            terms = tokenize(f"{chunk.doc_title} {chunk.section}\n{chunk.text}")
+            doc_len[chunk.chunk_id] = len(terms)
+            for term in terms:
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(postings):
+                    postings.append({})
+                counts = postings[term_id]
+                counts[chunk.chunk_id] = counts.get(chunk.chunk_id, 0) + 1
+
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        indices = np.empty(int(indptr[-1]), dtype=np.int32)
+        data = np.empty(int(indptr[-1]), dtype=np.float32)
+        for term_id, counts in enumerate(postings):
+            start = indptr[term_id]
+            ids = sorted(counts)
+            indices[start:start + len(ids)] = ids
+            data[start:start + len(ids)] = [counts[i] for i in ids]
+
+        return cls(chunks, vocab, indptr, indices, data, doc_len, k1, b, corpus_hash)
+
+    def score(self, query: str) -> "np.ndarray":
+        """Return the BM25 score of every chunk for ``query``."""
+        scores = np.zeros(len(self.chunks), dtype=np.float64)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows = self.indices[start:end]
+            tf = self.data[start:end]
+            scores[rows] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + self._len_norm[rows])
+        return scores
+
+    def search(self, query: str, top_k: int = 4) -> List[Tuple[Chunk, float]]:
+        """Return up to ``top_k`` chunks with a positive score, best first."""
+        scores = self.score(query)
+        if top_k <= 0 or not len(scores):
+            return []
+        top_k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.chunks[i], float(scores[i])) for i in ranked if scores[i] > 0]
+
+    def save(self, path: str) -> None:
+        """Persist the index atomically to ``path`` (.npz)."""
+        meta = {
+            "version": INDEX_FORMAT_VERSION,
+            "corpus_hash": self.corpus_hash,
+            "k1": self.k1,
+            "b": self.b,
+            "vocab": sorted(self.vocab, key=self.vocab.get),
+            "chunks": [asdict(chunk) for chunk in self.chunks],
+        }
+        directory = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez(
+                    handle,
+                    meta=np.array(json.dumps(meta)),
+                    indptr=self.indptr,
+                    indices=self.indices,
+                    data=self.data,
+                    doc_len=self.doc_len,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index written by save()."""
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if meta.get("version") != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported index format version: {meta.get('version')}")
+            return cls(
+                chunks=[Chunk(**c) for c in meta["chunks"]],
+                vocab={term: i for i, term in enumerate(meta["vocab"])},
+                indptr=archive["indptr"],
+                indices=archive["indices"],
+                data=archive["data"],
+                doc_len=archive["doc_len"],
+                k1=meta["k1"],
+                b=meta["b"],
+                corpus_hash=meta["corpus_hash"],
+            )
+
+
+class KnowledgeRetriever:
+    """Chunks, indexes and searches the knowledge base."""
+
+    def __init__(self, index: BM25Index):
+        self.index = index
+
+    @staticmethod
+    def corpus_hash(knowledge_base: str, config: RetrievalConfig) -> str:
+        """Content hash identifying a corpus and its index parameters."""
+        digest = hashlib.sha256(knowledge_base.encode("utf-8"))
+        digest.update(f"|v{INDEX_FORMAT_VERSION}|k1={config.k1}|b={config.b}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def from_knowledge_base(cls, knowledge_base: str,
+                            config: Optional[RetrievalConfig] = None) -> "KnowledgeRetriever":
+        """
+        Load the persisted index for this corpus, or build and persist it.
+
+        Args:
+            knowledge_base: Full knowledge base text
+            config: Retrieval configuration (index location, BM25 parameters)
+
+        Returns:
+            KnowledgeRetriever: Ready-to-query retriever
+        """
+        config = config or RetrievalConfig()
+        corpus_hash = cls.corpus_hash(knowledge_base, config)
+        index_dir = config.index_dir or get_cache_dir("index")
+        path = os.path.join(index_dir, f"kb_bm25_{corpus_hash[:16]}.npz")
+
+        if os.path.exists(path):
+            try:
+                index = BM25Index.load(path)
+                if index.corpus_hash == corpus_hash:
+                    return cls(index)
+            except (OSError, ValueError, KeyError):
+                pass  # Corrupt or stale index file; rebuild below
+
+        chunks = chunk_knowledge_base(knowledge_base)
+        index = BM25Index.build(chunks, k1=config.k1, b=config.b, corpus_hash=corpus_hash)
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            index.save(path)
+        except OSError:
+            pass  # Read-only deployments still work with the in-memory index
+        return cls(index)
+
+    def retrieve(self, query: str, top_k: int = 4,
+                 token_budget: int = 1500) -> List[Tuple[Chunk, float]]:
+        """
+        Return the best-ranked chunks that fit within ``token_budget``.
+
+        Chunks that would overflow the budget are skipped so a smaller,
+        lower-ranked chunk can still be included. When nothing in the corpus
+        matches the query, the overview chunk of each document is used.
+        """
+        hits = self.index.search(query, top_k=top_k)
+        if not hits:
+            seen = set()
+            for chunk in self.index.chunks:
+                if chunk.doc_id not in seen:
+                    seen.add(chunk.doc_id)
+                    hits.append((chunk, 0.0))
+
+        selected: List[Tuple[Chunk, float]] = []
+        used = 0
+        for chunk, score in hits:
+            if used + chunk.tokens > token_budget:
+                continue
+            selected.append((chunk, score))
+            used += chunk.tokens
+        return selected
+
+    def build_context(self, query: str, top_k: int = 4, token_budget: int = 1500) -> str:
+        """Format retrieved chunks as a knowledge base excerpt for the system prompt."""
+        selected = self.retrieve(query, top_k=top_k, token_budget=token_budget)
+        # Present excerpts in document order so related sections read naturally
+        selected.sort(key=lambda item: item[0].chunk_id)
+
+        parts = []
+        for chunk, _ in selected:
+            parts.append(
+                f"--- [DOCUMENT {chunk.doc_id}: {chunk.doc_title}] {chunk.section} ---\n"
+                f"{chunk.text}"
+            )
+
+        return f"""
+{'='*80}
+SIMIC VIRTUAL EXPERT SYSTEM - RETRIEVED KNOWLEDGE BASE EXCERPTS
+{'='*80}
+
+The following excerpts were retrieved from the core technical knowledge base
+for RTCR and Cosmos X-9 technologies as the most relevant to the user's query.
+Cite the document names when drawing on them.
+
+{chr(10).join(parts) if parts else '(No relevant excerpts found.)'}
+
+{'='*80}
+END OF RETRIEVED EXCERPTS
+{'='*80}
+"""
+
+
+_RETRIEVERS: Dict[str, KnowledgeRetriever] = {}
+_RETRIEVERS_LOCK = threading.Lock()
+
+
+def get_retriever(knowledge_base: str,
+                  config: Optional[RetrievalConfig] = None) -> KnowledgeRetriever:
+    """Return the process-wide retriever for this corpus, loading it once."""
+    config = config or RetrievalConfig()
+    key = KnowledgeRetriever.corpus_hash(knowledge_base, config)
+    retriever = _RETRIEVERS.get(key)
+    if retriever is None:
+        with _RETRIEVERS_LOCK:
+            retriever = _RETRIEVERS.get(key)
+            if retriever is None:
+                retriever = KnowledgeRetriever.from_knowledge_base(knowledge_base, config)
+                _RETRIEVERS.clear()  # Only the current corpus is kept resident
+                _RETRIEVERS[key] = retriever
+    return retriever
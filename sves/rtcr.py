@@ -0,0 +1,495 @@
+"""
+RTCR chain kinetics (the design_rtcr_experiment tool).
+
+Integrates the radical thermochemical chain reactions of the knowledge base
+(sves.knowledge, document 2) as a stiff ODE system for a whole batch of
+experimental conditions at once (sves.ode):
+
+    R1   H2O -> OH + H                         initiation (P > 25 MPa enhanced)
+    R2   Fe2+ + OH -> Fe3+ + OH- + e-          iron oxidation
+    R3   H + e- -> 1/2 H2                      (2H + 2e- -> H2)
+    R4   OH + CH4 -> CH3 + H2O                 propagation
+    R5   CH3 + H2O -> CH3OH + H                propagation
+    R6   H + O2 -> OH + O                      chain branching
+    R7   O + H2O -> 2 OH                       chain branching
+    R8   OH + H -> H2O                         termination
+    R9   OH, O, CH3 -> mineral surface        termination (first order);
+         H -> 1/2 H2 at the surface            (surface recombination)
+    R10  OH + H2 -> H2O + H                    propagation on the product H2
+
+R8-R10 are not in the document but bound the radical pool; R10 is what
+lets an oxygen-rich mixture burn the hydrogen it has produced. Hydrogen
+outside water (2 H2 + H - OH) changes only through O2 (R6/R7, down) and
+the rock and methane (R2, R4, R5, OH surface loss, up), so without O2 the
+H2 yield cannot decrease: radicals from water splitting recycle to H2 or
+water rather than destroying it.
+
+Rate constants are Arrhenius expressions. The rate parameters are
+illustrative: they reproduce the document's qualitative behaviour
+(initiation above ~400 °C, autocatalytic branching with O2) and should be
+calibrated against laboratory data. The reaction heat of the oxidation
+chain is booked on O2 consumption (R6) and balanced by heat loss to the
+rock with time constant ``cooling_time_s``; a row whose temperature climbs
+RUNAWAY_RISE_C within RUNAWAY_WINDOW_S (450 -> 800 °C in < 10 s) or
+passes RUNAWAY_TEMPERATURE_C is flagged as a thermal runaway. The chain
+needs fuel to run away: with trace methane the oxidation stops when the
+rock's iron and the radicals' H2 are spent; a methane co-feed and excess
+O2 make it explosive.
+
+Water density (hence concentration) and heat capacity at the reactor
+temperature and pressure come from the IAPWS tables (sves.water).
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence
+
+from sves.lazy import lazy_import
+from sves.ode import integrate_batch
+from sves.water import get_water_properties
+
+np = lazy_import("numpy")  # Loaded on the first simulation
+
+
+GAS_CONSTANT = 8.314e-3            # kJ/(mol K)
+KELVIN = 273.15
+WATER_MOLAR_MASS = 18.015          # g/mol
+INITIATION_MIN_C = 400.0           # Step 1 regime: T > 400 °C, P > 25 MPa
+INITIATION_MIN_MPA = 25.0
+RUNAWAY_RISE_C = 350.0             # 450 -> 800 °C ...
+RUNAWAY_WINDOW_S = 10.0            # ... in under 10 seconds
+RUNAWAY_TEMPERATURE_C = 800.0
+
+# Rock iron content, mol Fe2+ per kg rock
+LITHOLOGY_FE2 = {
+    "olivine": 1.34,        # Fo90 (Mg,Fe)2SiO4, ~7.5 wt% Fe
+    "serpentinite": 0.50,   # Mostly Mg; residual Fe2+ in brucite and magnetite
+    "chromite": 4.47,       # FeCr2O4
+}
+
+# State vector layout
+SPECIES = ("OH", "H", "O", "Fe2+", "e-", "CH4", "CH3", "CH3OH", "O2", "H2")
+OH, H, O, FE2, E, CH4, CH3, CH3OH, O2, H2, TEMP = range(11)
+RADICALS = (OH, H, O, CH3, E)
+
+# Per-row parameters
+P_WATER, P_PRESSURE, P_ROCK_T, P_HEAT_CAPACITY = range(4)
+
+
+@dataclass
+class RTCRMechanism:
+    """Arrhenius parameters (A, Ea in kJ/mol) and thermal settings."""
+    initiation: tuple = (2.0e9, 200.0)          # 1/s, per mol/L water
+    pressure_exponent: float = 2.0              # Initiation rate scales as (P/25 MPa)^n
+    iron_oxidation: tuple = (1.0e9, 10.0)       # L/(mol s)
+    h2_formation: tuple = (1.0e10, 5.0)
+    methane_propagation: tuple = (1.0e10, 20.0)
+    methyl_propagation: tuple = (1.0e7, 60.0)
+    branching_o2: tuple = (1.2e11, 69.0)
+    branching_o: tuple = (1.0e10, 70.0)
+    recombination: tuple = (1.0e10, 0.0)
+    h2_propagation: tuple = (2.0e10, 21.0)
+    surface_loss: float = 1.0                   # 1/s
+    chain_heat: float = 480.0                   # kJ released per mol O2 consumed
+    heat_capacity: Optional[float] = None       # kJ/(kg K); None = IAPWS-95 cp at the start
+    cooling_time_s: float = 60.0                # Heat loss to the rock
+    methane_fraction: float = 1e-4              # CH4 (trace or co-feed), mol per mol water
+
+
+@dataclass
+class RTCRConditions:
+    """A batch of experimental conditions (equal-length sequences)."""
+    temperature_c: Sequence[float]
+    pressure_mpa: Sequence[float]
+    water_rock_ratio: Sequence[float]           # kg water per kg rock
+    o2_fraction: Sequence[float]                # mol O2 per mol water
+    methane_fraction: Optional[Sequence[float]] = None   # mol CH4 per mol water (default: mechanism's)
+
+    def __len__(self) -> int:
+        return len(self.temperature_c)
+
+
+@dataclass
+class RTCRResult:
+    """Timelines and summary of a batch simulation (one row per condition)."""
+    conditions: RTCRConditions
+    lithology: str
+    t: "np.ndarray"                             # (n_times,) seconds
+    concentrations: Dict[str, "np.ndarray"]     # species -> (n_rows, n_times) mol/L
+    temperature_c: "np.ndarray"                 # (n_rows, n_times)
+    h2_yield: "np.ndarray"                      # (n_rows, n_times) mol H2 per kg rock
+    runaway: "np.ndarray"                       # (n_rows,) bool
+    peak_temperature_c: "np.ndarray"
+    runaway_time_s: "np.ndarray"                # First time above the runaway threshold (NaN if none)
+    success: "np.ndarray"
+    warnings: List[List[str]] = field(default_factory=list)
+
+
+def water_concentration(temperature_c, pressure_mpa):
+    """Molar concentration of water (mol/L) from the IAPWS-95 density; NaN outside the tables."""
+    return get_water_properties().density(temperature_c, pressure_mpa) / WATER_MOLAR_MASS  # kg/m³ = g/L
+
+
+# Mass-action reactions: (RTCRMechanism rate attribute, reactants, times water,
+# stoichiometry). Surface loss (R9) is first order at mech.surface_loss.
+REACTIONS = (
+    ("initiation", (), True, {OH: 1, H: 1}),
+    ("iron_oxidation", (FE2, OH), False, {FE2: -1, OH: -1, E: 1}),
+    ("h2_formation", (H, E), False, {H: -1, E: -1, H2: 0.5}),
+    ("methane_propagation", (OH, CH4), False, {OH: -1, CH4: -1, CH3: 1}),
+    ("methyl_propagation", (CH3,), True, {CH3: -1, CH3OH: 1, H: 1}),
+    ("branching_o2", (H, O2), False, {H: -1, O2: -1, OH: 1, O: 1}),
+    ("branching_o", (O,), True, {O: -1, OH: 2}),
+    ("recombination", (OH, H), False, {OH: -1, H: -1}),
+    ("h2_propagation", (OH, H2), False, {OH: -1, H2: -1, H: 1}),
+    ("surface_loss", (H,), False, {H: -1, H2: 0.5}),       # Surface recombination 2H -> H2
+) + tuple(("surface_loss", (i,), False, {i: -1}) for i in (OH, O, CH3))
+
+_STOICHIOMETRY = [[0.0] * (TEMP + 1) for _ in REACTIONS]
+for _j, (_, _, _, _changes) in enumerate(REACTIONS):
+    for _i, _coeff in _changes.items():
+        _STOICHIOMETRY[_j][_i] = float(_coeff)
+
+
+class _Kinetics:
+    """Right-hand side and analytic Jacobian of the mechanism for sves.ode."""
+
+    def __init__(self, mech: RTCRMechanism):
+        self.mech = mech
+        self.stoichiometry = np.array(_STOICHIOMETRY)           # (reactions, state)
+        # Heat of the oxidation chain, booked on O2 consumption
+        self.heat = np.array([mech.chain_heat if name == "branching_o2" else 0.0
+                              for name, _, _, _ in REACTIONS])
+
+    def _constants(self, y, p):
+        """Rate constants (incl. water and pressure factors) and their d/dT factors."""
+        temp = y[:, TEMP]
+        inv_rt = 1.0 / (GAS_CONSTANT * temp)
+        k = np.empty((len(y), len(REACTIONS)))
+        dlnk_dt = np.zeros_like(k)
+        for j, (name, _, water, _) in enumerate(REACTIONS):
+            value = getattr(self.mech, name)
+            if isinstance(value, tuple):
+                k[:, j] = value[0] * np.exp(-value[1] * inv_rt)
+                dlnk_dt[:, j] = value[1] * inv_rt / temp
+            else:
+                k[:, j] = value
+            if water:
+                k[:, j] *= p[:, P_WATER]
+            if name == "initiation":
+                k[:, j] *= p[:, P_PRESSURE]
+        return k, dlnk_dt
+
+    def _rates(self, y, k):
+        r = k.copy()
+        for j, (_, reactants, _, _) in enumerate(REACTIONS):
+            for i in reactants:
+                r[:, j] *= y[:, i]
+        return r
+
+    def _dtemp(self, y, p, r):
+        return (r @ self.heat) / p[:, P_HEAT_CAPACITY] - (y[:, TEMP] - p[:, P_ROCK_T]) / self.mech.cooling_time_s
+
+    def rhs(self, t, y, p):
+        k, _ = self._constants(y, p)
+        r = self._rates(y, k)
+        dy = r @ self.stoichiometry
+        dy[:, TEMP] = self._dtemp(y, p, r)
+        return dy
+
+    def jac(self, t, y, p):
+        k, dlnk_dt = self._constants(y, p)
+        m, n = y.shape
+        dr = np.zeros((m, len(REACTIONS), n))                  # d rate_j / d y_i
+        for j, (_, reactants, _, _) in enumerate(REACTIONS):
+            for a, i in enumerate(reactants):
+                partial = k[:, j].copy()
+                for b, other in enumerate(reactants):
+                    if b != a:
+                        partial *= y[:, other]
+                dr[:, j, i] += partial
+        r = self._rates(y, k)
+        dr[:, :, TEMP] = r * dlnk_dt
+        jac = np.einsum("ji,mjk->mik", self.stoichiometry, dr)
+        jac[:, TEMP, :] = np.einsum("j,mjk->mk", self.heat, dr) / p[:, P_HEAT_CAPACITY, None]
+        jac[:, TEMP, TEMP] -= 1.0 / self.mech.cooling_time_s
+        return jac
+
+
+def time_grid(duration_s: float, points: int = 121):
+    """Output times: 0, then log-spaced from 1 ms, so second-scale runaways are resolved."""
+    return np.concatenate([[0.0], np.geomspace(1e-3, duration_s, points - 1)])
+
+
+def simulate_rtcr(
+    conditions: RTCRConditions,
+    duration_s: float = 3600.0,
+    lithology: str = "olivine",
+    mechanism: Optional[RTCRMechanism] = None,
+    points: int = 121,
+    rtol: float = 1e-3,
+) -> RTCRResult:
+    """
+    Integrate the RTCR mechanism for every condition of a batch at once.
+
+    Args:
+        conditions: Temperatures, pressures, water/rock ratios, O2 (and CH4) fractions
+        duration_s: Simulated time
+        lithology: Rock type (iron content, see LITHOLOGY_FE2)
+        mechanism: Rate parameters (defaults to RTCRMechanism())
+        points: Output times (log-spaced, see time_grid)
+        rtol: Relative tolerance of the integrator
+
+    Returns:
+        RTCRResult: Species, temperature and H2 yield timelines per condition
+
+    Raises:
+        ValueError: If the lithology is unknown, an input is not positive or
+            the conditions are outside the water property tables
+    """
+    mech = mechanism or RTCRMechanism()
+    if lithology not in LITHOLOGY_FE2:
+        raise ValueError(f"Unknown lithology {lithology!r} (one of {', '.join(LITHOLOGY_FE2)})")
+    temperature_c = np.asarray(conditions.temperature_c, dtype=np.float64)
+    pressure = np.asarray(conditions.pressure_mpa, dtype=np.float64)
+    water_rock = np.asarray(conditions.water_rock_ratio, dtype=np.float64)
+    o2_fraction = np.asarray(conditions.o2_fraction, dtype=np.float64)
+    if (temperature_c + KELVIN <= 0).any() or (pressure <= 0).any() or (water_rock <= 0).any() \
+            or (o2_fraction < 0).any():
+        raise ValueError("Temperatures, pressures and water/rock ratios must be positive")
+
+    water = water_concentration(temperature_c, pressure)
+    if np.isnan(water).any():
+        raise ValueError("Temperature or pressure is outside the water property tables (100-1000 °C, 0.5-100 MPa)")
+    heat_capacity = (get_water_properties().heat_capacity(temperature_c, pressure)
+                     if mech.heat_capacity is None else np.full(len(water), mech.heat_capacity))
+    water_kg_per_l = water * WATER_MOLAR_MASS / 1000.0
+    rock_kg_per_l = water_kg_per_l / water_rock
+
+    n_rows = len(temperature_c)
+    y0 = np.zeros((n_rows, TEMP + 1))
+    y0[:, FE2] = rock_kg_per_l * LITHOLOGY_FE2[lithology]
+    methane = mech.methane_fraction if conditions.methane_fraction is None else \
+        np.asarray(conditions.methane_fraction, dtype=np.float64)
+    if np.any(np.asarray(methane) < 0):
+        raise ValueError("Gas fractions must not be negative")
+    y0[:, CH4] = methane * water
+    y0[:, O2] = o2_fraction * water
+    y0[:, TEMP] = temperature_c + KELVIN
+    params = np.stack([
+        water,
+        (pressure / INITIATION_MIN_MPA) ** mech.pressure_exponent,
+        temperature_c + KELVIN,
+        water_kg_per_l * heat_capacity,
+    ], axis=1)
+
+    atol = np.full(TEMP + 1, 1e-10)
+    atol[list(RADICALS)] = 1e-14
+    atol[TEMP] = 1e-3
+    nonnegative = np.ones(TEMP + 1, dtype=bool)
+    nonnegative[TEMP] = False
+
+    kinetics = _Kinetics(mech)
+    solution = integrate_batch(
+        kinetics.rhs, y0, time_grid(duration_s, points), params=params, jac=kinetics.jac,
+        rtol=rtol, atol=atol, first_step=1e-9, nonnegative=nonnegative
+    )
+    y = solution.y
+    temperature = y[:, :, TEMP] - KELVIN
+    concentrations = {name: y[:, :, i] for i, name in enumerate(SPECIES)}
+    h2_yield = y[:, :, H2] / rock_kg_per_l[:, None]
+
+    runaway, runaway_time = _detect_runaway(solution.t, temperature)
+    warnings = []
+    for i in range(n_rows):
+        row = []
+        if temperature_c[i] < INITIATION_MIN_C or pressure[i] < INITIATION_MIN_MPA:
+            row.append(f"Below the initiation regime (T > {INITIATION_MIN_C:.0f} °C, "
+                       f"P > {INITIATION_MIN_MPA:.0f} MPa): negligible radical production")
+        if not solution.success[i]:
+            row.append("Integration did not reach the end time (step limit)")
+        warnings.append(row)
+
+    return RTCRResult(
+        conditions=conditions,
+        lithology=lithology,
+        t=solution.t,
+        concentrations=concentrations,
+        temperature_c=temperature,
+        h2_yield=h2_yield,
+        runaway=runaway,
+        peak_temperature_c=np.nanmax(temperature, axis=1),
+        runaway_time_s=runaway_time,
+        success=solution.success,
+        warnings=warnings,
+    )
+
+
+def _detect_runaway(t, temperature_c):
+    """
+    Flag rows that heat by RUNAWAY_RISE_C within any RUNAWAY_WINDOW_S or
+    pass RUNAWAY_TEMPERATURE_C, and the first time they do.
+    """
+    temperature = np.nan_to_num(temperature_c, nan=-np.inf)
+    # Temperature RUNAWAY_WINDOW_S before every output time (shared time grid)
+    before = np.maximum(t - RUNAWAY_WINDOW_S, t[0])
+    idx = np.clip(np.searchsorted(t, before, side="right") - 1, 0, len(t) - 2)
+    frac = (before - t[idx]) / (t[idx + 1] - t[idx])
+    earlier = temperature[:, idx] + frac * (temperature[:, idx + 1] - temperature[:, idx])
+    hot = (temperature - earlier >= RUNAWAY_RISE_C) | (temperature >= RUNAWAY_TEMPERATURE_C)
+    runaway = hot.any(axis=1)
+    return runaway, np.where(runaway, t[np.argmax(hot, axis=1)], np.nan)
+
+
+def condition_batch(temperature_c: float, pressure_mpa: float, water_rock_ratio: float,
+                    o2_fraction: float) -> RTCRConditions:
+    """The requested condition plus a sensitivity sweep around it (temperature and O2)."""
+    temperatures = [temperature_c - 25.0, temperature_c, temperature_c + 25.0]
+    o2_levels = sorted({0.0, o2_fraction, max(o2_fraction * 3.0, 0.05)})
+    rows = [(temperature_c, o2_fraction)]
+    rows += [(t, o2_fraction) for t in temperatures if t != temperature_c]
+    rows += [(temperature_c, o2) for o2 in o2_levels if o2 != o2_fraction]
+    return RTCRConditions(
+        temperature_c=[r[0] for r in rows],
+        pressure_mpa=[pressure_mpa] * len(rows),
+        water_rock_ratio=[water_rock_ratio] * len(rows),
+        o2_fraction=[r[1] for r in rows],
+    )
+
+
+# Yields below this (mol/kg, mol/L) are integration noise and reported as 0
+SIGNIFICANCE_FLOOR = 1e-9
+
+
+def _significant(value: float) -> float:
+    return 0.0 if abs(value) < SIGNIFICANCE_FLOOR else value
+
+
+def _at(t, values, seconds: float) -> float:
+    return float(np.interp(seconds, t, values))
+
+
+def _peak(t, values) -> tuple:
+    """(peak value, time of peak), NaN for a failed row."""
+    if np.isnan(values).all():
+        return float("nan"), float("nan")
+    i = int(np.nanargmax(values))
+    return float(values[i]), float(t[i])
+
+
+def design_rtcr_experiment(temperature_c: float = 450.0, pressure_mpa: float = 28.0,
+                           water_rock_ratio: float = 1.0, o2_fraction: float = 0.001,
+                           lithology: str = "olivine", duration_s: float = 3600.0,
+                           methane_fraction: Optional[float] = None) -> Dict[str, object]:
+    """
+    Design an RTCR experiment from a simulated condition batch.
+
+    The first row of the batch is the requested condition; the others vary
+    temperature and O2 fraction around it.
+
+    Args:
+        temperature_c: Reactor temperature
+        pressure_mpa: Reactor pressure
+        water_rock_ratio: kg water per kg rock
+        o2_fraction: mol O2 per mol water
+        lithology: Rock type (see LITHOLOGY_FE2)
+        duration_s: Simulated time
+        methane_fraction: CH4 co-feed, mol per mol water (default: trace)
+
+    Returns:
+        Dict with ``reactant_recipe``, ``safety_precautions``,
+        ``expected_products`` and the ``simulation`` result
+
+    Raises:
+        ValueError: If the lithology is unknown or an input is not positive
+    """
+    mech = RTCRMechanism()
+    if methane_fraction is not None:
+        mech = replace(mech, methane_fraction=methane_fraction)
+    conditions = condition_batch(temperature_c, pressure_mpa, water_rock_ratio, o2_fraction)
+    result = simulate_rtcr(conditions, duration_s=duration_s, lithology=lithology, mechanism=mech)
+    water = float(water_concentration(temperature_c, pressure_mpa))
+    water_kg_per_l = water * WATER_MOLAR_MASS / 1000.0
+
+    recipe = {
+        "rock": f"{lithology}, {water_kg_per_l / water_rock_ratio * 1000:.0f} g per litre of reactor volume",
+        "water": f"{water_kg_per_l * 1000:.0f} g per litre (W/R {water_rock_ratio:g} by mass)",
+        "o2": f"{o2_fraction:.3g} mol O2 per mol H2O ({o2_fraction * water:.3g} mol/L)",
+        "ch4": f"{mech.methane_fraction:.3g} mol CH4 per mol H2O ({mech.methane_fraction * water:.3g} mol/L)",
+        "conditions": f"{temperature_c:.0f} °C, {pressure_mpa:.1f} MPa",
+        "duration": f"{duration_s / 3600:.2g} h",
+    }
+    safety = [
+        "Real-time temperature and pressure monitoring (fiber optic sensors)",
+        "Emergency shut-off valves; pressure relief rated above the test pressure",
+        "H2S detection (OSHA PEL 10 ppm TWA, 15 ppm STEL)",
+    ]
+    if result.runaway[0]:
+        safety.insert(0, f"THERMAL RUNAWAY predicted at {result.runaway_time_s[0]:.1f} s "
+                         f"(peak {result.peak_temperature_c[0]:.0f} °C): reduce O2, dilute with N2/Ar, "
+                         "use pulsed SCW coolant injection and an active quench zone")
+    elif result.runaway.any():
+        safety.insert(0, "Runaway occurs in the sweep at higher temperature or O2: keep the O2/fuel "
+                         "ratio below the simulated threshold and arm the quench system")
+    t = result.t
+    h2 = result.h2_yield[0]
+    h2_peak, h2_peak_time = _peak(t, h2)
+    o2 = result.concentrations["O2"][0]
+    expected = {
+        "h2_mol_per_kg_rock": {f"{s:g} s": _at(t, h2, s) for s in (10, 60, 600, duration_s)},
+        # Late H2 is burnt by propagation once Fe2+ is spent, so the end value
+        # can be ~0 after a large peak
+        "h2_peak_mol_per_kg_rock": h2_peak,
+        "h2_peak_time_s": h2_peak_time,
+        "methanol_mol_per_l": _at(t, result.concentrations["CH3OH"][0], duration_s),
+        "o2_consumed_fraction": 1.0 - _at(t, o2, duration_s) / o2[0] if o2[0] > 0 else 0.0,
+        "peak_temperature_c": float(result.peak_temperature_c[0]),
+    }
+    return {
+        "reactant_recipe": recipe,
+        "safety_precautions": safety,
+        "expected_products": expected,
+        "simulation": result,
+    }
+
+
+def format_rtcr_design(design: Dict[str, object]) -> str:
+    """Render a design_rtcr_experiment() result as compact text for the LLM."""
+    result: RTCRResult = design["simulation"]
+    c = result.conditions
+    t = result.t
+    duration = t[-1]
+    lines = ["Reactant recipe:"]
+    lines.extend(f"- {k}: {v}" for k, v in design["reactant_recipe"].items())
+    lines.append("Simulated condition batch (row 1 = requested):")
+    lines.append("T_C | P_MPa | W/R | O2_frac | H2_mol/kg @60s | @600s | @end | peak (at s) | "
+                 "peak_T_C | runaway")
+    for i in range(len(c)):
+        h2 = result.h2_yield[i]
+        h2_peak, h2_peak_time = _peak(t, h2)
+        lines.append(
+            f"{c.temperature_c[i]:.0f} | {c.pressure_mpa[i]:.1f} | {c.water_rock_ratio[i]:g} | "
+            f"{c.o2_fraction[i]:.3g} | {_significant(_at(t, h2, 60)):.3g} | "
+            f"{_significant(_at(t, h2, 600)):.3g} | {_significant(_at(t, h2, duration)):.3g} | "
+            f"{_significant(h2_peak):.3g} ({h2_peak_time:.3g}) | "
+            f"{result.peak_temperature_c[i]:.0f} | "
+            + (f"YES at {result.runaway_time_s[i]:.1f} s" if result.runaway[i] else "no")
+        )
+        for warning in result.warnings[i]:
+            lines.append(f"  ! {warning}")
+    lines.append("Expected products (requested condition):")
+    for k, v in design["expected_products"].items():
+        if isinstance(v, dict):
+            v = ", ".join(f"{kk}: {_significant(vv):.3g}" for kk, vv in v.items())
+        elif isinstance(v, float):
+            v = f"{_significant(v):.3g}"
+        lines.append(f"- {k}: {v}")
+    expected = design["expected_products"]
+    if result.h2_yield[0][-1] < 0.1 * expected["h2_peak_mol_per_kg_rock"]:
+        lines.append(f"- note: H2 peaks at {expected['h2_peak_time_s']:.3g} s and is then burnt by the "
+                     "O2-fed radical chain (OH + H2 -> H2O + H) once the rock's Fe2+ no longer makes "
+                     "more, so sample or quench near the peak rather than at the end")
+    lines.append("Safety precautions:")
+    lines.extend(f"- {s}" for s in design["safety_precautions"])
+    lines.append("Model: illustrative Arrhenius parameters (document 2 mechanism plus termination "
+                 "and H2 propagation steps); calibrate against laboratory data.")
+    return "\n".join(lines)
@@ -0,0 +1,184 @@
+"""
+Token streaming helpers.
+
+Parsers for the two wire formats used by the supported backends, plus a
+timing wrapper that measures time-to-first-token (TTFT), which is the
+latency users actually perceive once responses are streamed.
+
+- Ollama ``/api/chat`` with ``"stream": true`` returns NDJSON: one JSON
+  object per line, ``{"message": {"content": "..."}, "done": false}``.
+- OpenAI-compatible ``/v1/chat/completions`` with ``"stream": true`` returns
+  Server-Sent Events: ``data: {"choices": [{"delta": {"content": "..."}}]}``
+  lines terminated by ``data: [DONE]``.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from sves.metrics import TokenUsage
+
+
+def parse_ndjson_line(
+    raw: Union[bytes, str], usage: Optional[TokenUsage] = None
+) -> Tuple[Optional[str], bool]:
+    """
+    Parse one line of an Ollama NDJSON chat stream.
+
+    Args:
+        raw: One response line
+        usage: Updated with the token counts of the final ("done") event
+
+    Returns:
+        Tuple of the content delta (None if empty) and whether the stream is done
+    """
+    if not raw:
+        return None, False
+    event = json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+    if event.get("error"):
+        raise RuntimeError(f"Ollama stream error: {event['error']}")
+    content = event.get("message", {}).get("content")
+    done = bool(event.get("done"))
+    if done and usage is not None:
+        usage.update_from_event(event)
+    return content or None, done
+
+
+def parse_sse_line(
+    raw: Union[bytes, str], usage: Optional[TokenUsage] = None
+) -> Tuple[Optional[str], bool]:
+    """
+    Parse one line of an OpenAI-compatible SSE chat stream.
+
+    Args:
+        raw: One response line
+        usage: Updated from the ``usage`` field some servers send in the
+            last chunk (``stream_options.include_usage``)
+
+    Returns:
+        Tuple of the content delta (None if empty) and whether the stream is done
+    """
+    if not raw:
+        return None, False
+    line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+    if not line.startswith("data:"):
+        return None, False  # SSE comments, "event:" and "id:" fields
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None, True
+    event = json.loads(data)
+    if event.get("error"):
+        raise RuntimeError(f"Stream error: {event['error']}")
+    if usage is not None and event.get("usage"):
+        usage.update_from_event(event)
+    # Azure sends prompt filter results with an empty choices list first
+    content = "".join(
+        (choice.get("delta") or {}).get("content") or ""
+        for choice in event.get("choices") or []
+    )
+    return content or None, False
+
+
+def iter_ndjson_deltas(
+    lines: Iterable[bytes], usage: Optional[TokenUsage] = None
+) -> Iterator[str]:
+    """
+    Yield content deltas from an Ollama NDJSON chat stream.
+
+    Args:
+        lines: Raw response lines (e.g. ``response.iter_lines()``)
+        usage: Filled with the token counts reported by the server
+
+    Yields:
+        str: Non-empty content fragments in arrival order
+    """
+    for raw in lines:
+        content, done = parse_ndjson_line(raw, usage)
+        if content:
+            yield content
+        if done:
+            return
+
+
+def iter_sse_deltas(
+    lines: Iterable[bytes], usage: Optional[TokenUsage] = None
+) -> Iterator[str]:
+    """
+    Yield content deltas from an OpenAI-compatible SSE chat stream.
+
+    Args:
+        lines: Raw response lines (e.g. ``response.iter_lines()``)
+        usage: Filled with the token counts reported by the server
+
+    Yields:
+        str: Non-empty content fragments in arrival order
+    """
+    for raw in lines:
+        content, done = parse_sse_line(raw, usage)
+        if content:
+            yield content
+        if done:
+            return
+
+
+@dataclass
+class StreamMetrics:
+    """Timing of a single streamed response."""
+    started_at: float = 0.0
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunks: int = 0
+    chars: int = 0
+    cached: bool = False    # Served from the response cache, not the backend
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Time to first token in milliseconds."""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000.0
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        """Total response time in milliseconds."""
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000.0
+
+    @property
+    def chunks_per_sec(self) -> Optional[float]:
+        """Streaming rate after the first token (chunks are ~1 token each)."""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return self.chunks / elapsed if elapsed > 0 else None
+
+
+class TimedStream:
+    """
+    Iterator wrapper that records TTFT and total time of a delta stream.
+
+    The clock starts when the wrapper is created, so wrap the stream before
+    the request is sent to include connection and prefill time in TTFT.
+    """
+
+    def __init__(self, deltas: Iterable[str]):
+        self.metrics = StreamMetrics(started_at=time.perf_counter())
+        self._deltas = iter(deltas)
+
+    def __iter__(self) -> "TimedStream":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            delta = next(self._deltas)
+        except StopIteration:
+            if self.metrics.finished_at is None:
+                self.metrics.finished_at = time.perf_counter()
+            raise
+        if self.metrics.first_token_at is None:
+            self.metrics.first_token_at = time.perf_counter()
+        self.metrics.chunks += 1
+        self.metrics.chars += len(delta)
+        return delta
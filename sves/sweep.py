@@ -0,0 +1,544 @@
+"""
+Parameter sweeps over the native tools (test campaign design).
+
+A test campaign asks the same question at dozens of operating points. Instead
+of one chat turn per point, run_sweep() evaluates a whole grid or Latin
+hypercube over the numeric inputs of a tool:
+
+    rtcr       sves.rtcr.simulate_rtcr (design_rtcr_experiment); points are
+               simulated in vectorized batches of RTCR_CHUNK rows
+    drilling   sves.drilling.analyze_drilling_scenario
+
+Constant tool arguments (SweepSpec.fixed, e.g. the lithology or formation)
+are checked against the tool before anything runs; points the tool still
+rejects get NaN outputs, and the tool's reasons are collected in
+SweepResult.errors.
+
+Points are split into chunks and evaluated on a process pool (all cores by
+default; the kinetics are CPU bound and hold the GIL). Every point's outputs
+are cached on disk, keyed on the tool, TOOLS_VERSION, the fixed inputs and
+the point, so a repeated or extended sweep only computes the new points.
+Chunks are cached as they complete, so an interrupted sweep keeps its
+progress.
+
+The result is columnar: one NumPy array per swept input and output
+(SweepResult.columns(), or the structured array SweepResult.data), which the
+UI charts directly and save_sweep() writes as an uncompressed ``.npz``.
+
+The pool uses the "spawn" start method, which is safe from the threaded
+Streamlit server; scripts calling run_sweep() must guard their entry point
+with ``if __name__ == "__main__":``.
+
+Settings (environment):
+    SVES_SWEEP_WORKERS  Worker processes (default: CPU count)
+    SVES_SWEEP_CACHE    "0" disables the point cache, or a path
+                        (default <cache root>/sweeps.sqlite)
+
+Usage:
+    python -m sves.sweep rtcr -p temperature_c=400:500:11 -p o2_fraction=0,0.01,0.05 -o sweep.npz
+    python -m sves.sweep drilling --lhs 64 -p depth_m=2000:6000 -p flow_rate_lpm=1000:2000 \\
+        --fixed formation=basalt
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sves.drilling import FORMATIONS, DrillingScenario, analyze_drilling_scenario
+from sves.lazy import lazy_import
+from sves.metrics import get_metrics
+from sves.paths import get_cache_dir
+from sves.rtcr import LITHOLOGY_FE2, RTCRConditions, simulate_rtcr
+from sves.tools import TOOLS_VERSION
+from sves.water import get_water_properties
+
+np = lazy_import("numpy")  # Loaded on the first sweep
+
+
+RTCR_CHUNK = 8          # Rows per vectorized simulate_rtcr() call
+DRILLING_CHUNK = 32     # Analyses per task (each takes ~2 ms)
+METHODS = ("grid", "lhs")
+POINT_FORMAT = 2        # Part of the point cache key; bump when the stored rows change
+
+
+@dataclass
+class SweepTool:
+    """A tool that can be swept: its numeric inputs and output columns."""
+    name: str
+    inputs: Dict[str, float]                    # Sweepable input -> default
+    outputs: Tuple[str, ...]                    # Float output columns (NaN when invalid)
+    flags: Tuple[str, ...]                      # Boolean output columns
+    chunk_size: int
+    # Rows per point; an invalid point's row is {"success": False, "error": the tool's message}
+    evaluate: Callable[[List[Dict[str, float]], Dict[str, object]], List[Dict[str, object]]]
+    constants: Dict[str, type] = field(default_factory=dict)            # Fixable argument -> type
+    choices: Dict[str, Tuple[str, ...]] = field(default_factory=dict)   # Allowed str constants
+
+
+def _invalid(error: ValueError) -> Dict[str, object]:
+    return {"success": False, "error": str(error)}
+
+
+def _rtcr_rows(points: List[Dict[str, float]], fixed: Dict[str, object]) -> List[Dict[str, object]]:
+    """Simulate a chunk of RTCR conditions in one batch."""
+    defaults = SWEEP_TOOLS["rtcr"].inputs
+    rows = [dict(defaults, **point) for point in points]
+    conditions = RTCRConditions(**{name: [row[name] for row in rows] for name in defaults})
+    try:
+        result = simulate_rtcr(conditions, **fixed)
+    except ValueError as e:
+        if len(points) == 1:
+            return [_invalid(e)]
+        return [value for point in points for value in _rtcr_rows([point], fixed)]
+    t = result.t
+    outputs = []
+    for i, row in enumerate(rows):
+        h2 = result.h2_yield[i]
+        o2_start = result.concentrations["O2"][i, 0]
+        outputs.append({
+            "h2_60s_mol_per_kg": float(np.interp(60.0, t, h2)),
+            "h2_600s_mol_per_kg": float(np.interp(600.0, t, h2)),
+            "h2_end_mol_per_kg": float(h2[-1]),
+            "h2_peak_mol_per_kg": float(np.nanmax(h2)),
+            "methanol_mol_per_l": float(result.concentrations["CH3OH"][i, -1]),
+            "o2_consumed_fraction": float(1.0 - result.concentrations["O2"][i, -1] / o2_start)
+            if o2_start > 0 else 0.0,
+            "peak_temperature_c": float(result.peak_temperature_c[i]),
+            "runaway_time_s": float(result.runaway_time_s[i]),
+            "runaway": bool(result.runaway[i]),
+            "success": bool(result.success[i]),
+        })
+    return outputs
+
+
+def _drilling_rows(points: List[Dict[str, float]], fixed: Dict[str, object]) -> List[Dict[str, object]]:
+    """Analyze a chunk of drilling scenarios."""
+    outputs = []
+    for point in points:
+        try:
+            result = analyze_drilling_scenario(DrillingScenario(**dict(fixed, **point)))
+        except ValueError as e:
+            outputs.append(_invalid(e))
+            continue
+        row = {name: float(result.analysis[name]) for name in SWEEP_TOOLS["drilling"].outputs
+               if name in result.analysis}
+        row["high_risks"] = float(sum(1 for severity, _ in result.risk_factors if severity == "HIGH"))
+        row["success"] = True
+        outputs.append(row)
+    return outputs
+
+
+SWEEP_TOOLS: Dict[str, SweepTool] = {
+    "rtcr": SweepTool(
+        name="rtcr",
+        inputs={
+            "temperature_c": 450.0,
+            "pressure_mpa": 28.0,
+            "water_rock_ratio": 1.0,
+            "o2_fraction": 0.001,
+            "methane_fraction": 1e-4,
+        },
+        outputs=(
+            "h2_60s_mol_per_kg", "h2_600s_mol_per_kg", "h2_end_mol_per_kg", "h2_peak_mol_per_kg",
+            "methanol_mol_per_l", "o2_consumed_fraction", "peak_temperature_c", "runaway_time_s",
+        ),
+        flags=("runaway", "success"),
+        chunk_size=RTCR_CHUNK,
+        evaluate=_rtcr_rows,
+        constants={"duration_s": float, "lithology": str, "points": int, "rtol": float},
+        choices={"lithology": tuple(LITHOLOGY_FE2)},
+    ),
+    "drilling": SweepTool(
+        name="drilling",
+        inputs={
+            f.name: f.default for f in fields(DrillingScenario)
+            if f.name not in ("formation", "n_points") and isinstance(f.default, float)
+        },
+        outputs=(
+            "formation_temperature_at_td_c", "bhct_c", "max_circulating_temperature_c",
+            "subcritical_interval_m", "min_pressure_mpa", "bottomhole_pressure_mpa",
+            "annular_velocity_m_s", "max_settling_velocity_m_s", "min_transport_ratio",
+            "max_cuttings_concentration", "rop_m_per_hr", "drilling_days", "bit_runs", "high_risks",
+        ),
+        flags=("success",),
+        chunk_size=DRILLING_CHUNK,
+        evaluate=_drilling_rows,
+        constants={f.name: float if f.default is None else type(f.default) for f in fields(DrillingScenario)},
+        choices={"formation": tuple(FORMATIONS)},
+    ),
+}
+# Optional drilling inputs (None = formation default) can be swept as well
+SWEEP_TOOLS["drilling"].inputs.update(geothermal_gradient_c_per_km=30.0, rop_m_per_hr=15.0)
+
+
+@dataclass
+class SweepSpec:
+    """What to sweep."""
+    tool: str                                   # Key of SWEEP_TOOLS
+    parameters: Dict[str, Sequence[float]]      # grid: values per input; lhs: (low, high)
+    method: str = "grid"                        # "grid" or "lhs" (Latin hypercube)
+    samples: int = 32                           # Points of a Latin hypercube
+    seed: int = 0                               # Latin hypercube seed (same seed, same points)
+    fixed: Dict[str, object] = field(default_factory=dict)   # Constant tool arguments
+
+    def validate(self) -> SweepTool:
+        """
+        Return the tool, or raise ValueError for an unusable spec.
+
+        Numeric ``fixed`` values are converted to the argument's type (a
+        whole-number float to an int where the tool counts something).
+        """
+        tool = SWEEP_TOOLS.get(self.tool)
+        if tool is None:
+            raise ValueError(f"Unknown sweep tool {self.tool!r} (one of {', '.join(SWEEP_TOOLS)})")
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown sweep method {self.method!r} (one of {', '.join(METHODS)})")
+        if not self.parameters:
+            raise ValueError("A sweep needs at least one parameter")
+        for name, values in self.parameters.items():
+            if name not in tool.inputs:
+                raise ValueError(f"{self.tool} has no sweepable input {name!r} "
+                                 f"(one of {', '.join(tool.inputs)})")
+            if not len(values) or (self.method == "lhs" and len(values) != 2):
+                raise ValueError(f"{name}: give values for a grid or (low, high) for a Latin hypercube")
+        for name, value in self.fixed.items():
+            kind = tool.constants.get(name)
+            if kind is None:
+                raise ValueError(f"{self.tool} has no constant argument {name!r} "
+                                 f"(one of {', '.join(tool.constants)})")
+            if name in self.parameters:
+                raise ValueError(f"{name} is both swept and fixed")
+            if kind is str:
+                choices = tool.choices.get(name, ())
+                if not isinstance(value, str) or (choices and value not in choices):
+                    raise ValueError(f"Unknown {name} {value!r} (one of {', '.join(choices)})")
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or (
+                    kind is int and value != int(value)):
+                raise ValueError(f"{name} must be {'a whole number' if kind is int else 'a number'}, "
+                                 f"not {value!r}")
+            else:
+                self.fixed[name] = kind(value)
+        return tool
+
+
+@dataclass
+class SweepResult:
+    """Outputs of a sweep, one row per point."""
+    spec: SweepSpec
+    data: "np.ndarray"                          # Structured array: swept inputs, outputs, flags
+    computed: int                               # Points evaluated by this call
+    cached: int                                 # Points served from the disk cache
+    seconds: float
+    errors: Dict[str, int] = field(default_factory=dict)   # Tool message -> invalid points
+
+    def columns(self) -> Dict[str, "np.ndarray"]:
+        """The result as a column name -> 1-D array mapping."""
+        return {name: self.data[name] for name in self.data.dtype.names}
+
+
+def sweep_points(spec: SweepSpec) -> List[Dict[str, float]]:
+    """
+    Expand a spec into its points (dicts of swept input -> value).
+
+    Grids are the Cartesian product of the given values, in the order the
+    parameters are listed. A Latin hypercube places ``samples`` points so
+    that every parameter's range is divided into ``samples`` equal strata
+    with exactly one point in each; values are rounded to 6 significant
+    digits so that repeated sweeps hit the point cache.
+    """
+    spec.validate()
+    names = list(spec.parameters)
+    if spec.method == "grid":
+        grid = itertools.product(*(spec.parameters[name] for name in names))
+        return [{name: float(value) for name, value in zip(names, values)} for values in grid]
+    rng = np.random.default_rng(spec.seed)
+    n = spec.samples
+    columns = []
+    for name in names:
+        low, high = (float(v) for v in spec.parameters[name])
+        strata = (rng.permutation(n) + rng.random(n)) / n
+        columns.append(low + strata * (high - low))
+    return [
+        {name: float(f"{column[i]:.6g}") for name, column in zip(names, columns)}
+        for i in range(n)
+    ]
+
+
+class SweepCache:
+    """Per-point sweep outputs in SQLite (one writer: the sweeping process)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points (key TEXT PRIMARY KEY, tool TEXT, outputs TEXT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(tool: str, fixed: Dict[str, object], point: Dict[str, float]) -> str:
+        """Cache key of one point; changes with TOOLS_VERSION."""
+        identity = json.dumps([tool, TOOLS_VERSION, POINT_FORMAT, fixed, point], sort_keys=True, default=str)
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, object]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, outputs FROM points WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, json.loads(outputs)) for key, outputs in rows)
+        return found
+
+    def put_many(self, tool: str, items: List[Tuple[str, Dict[str, object]]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points (key, tool, outputs) VALUES (?, ?, ?)",
+                [(key, tool, json.dumps(outputs)) for key, outputs in items]
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM points")
+            self._conn.commit()
+
+
+_SWEEP_CACHE: Optional[SweepCache] = None
+_SWEEP_CACHE_LOCK = threading.Lock()
+
+
+def get_sweep_cache() -> Optional[SweepCache]:
+    """Return the process-wide point cache (None if disabled with SVES_SWEEP_CACHE=0)."""
+    global _SWEEP_CACHE
+    setting = os.environ.get("SVES_SWEEP_CACHE", "")
+    if setting == "0":
+        return None
+    if _SWEEP_CACHE is None:
+        with _SWEEP_CACHE_LOCK:
+            if _SWEEP_CACHE is None:
+                _SWEEP_CACHE = SweepCache(setting or os.path.join(get_cache_dir(), "sweeps.sqlite"))
+    return _SWEEP_CACHE
+
+
+def default_workers() -> int:
+    """Worker processes for sweeps (SVES_SWEEP_WORKERS, default CPU count)."""
+    setting = os.environ.get("SVES_SWEEP_WORKERS")
+    return max(1, int(setting) if setting else os.cpu_count() or 1)
+
+
+def _evaluate_chunk(tool_name: str, fixed: Dict[str, object],
+                    points: List[Dict[str, float]]) -> List[Dict[str, object]]:
+    """Worker entry point (module level so it pickles)."""
+    return SWEEP_TOOLS[tool_name].evaluate(points, fixed)
+
+
+def run_sweep(
+    spec: SweepSpec,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> SweepResult:
+    """
+    Evaluate every point of a sweep, reusing cached points.
+
+    Args:
+        spec: Tool, parameters and method
+        workers: Worker processes (default: default_workers()); with one
+            worker, or a single chunk to compute, points are evaluated in
+            this process
+        use_cache: Read and write the disk point cache (if enabled)
+        progress: Called with (points done, total points) as chunks complete
+
+    Returns:
+        SweepResult: Columns for the swept inputs, outputs and flags; rows
+        whose inputs the tool rejects have NaN outputs and ``success`` False,
+        and the tool's messages are counted in ``errors``
+
+    Raises:
+        ValueError: If the spec names an unknown tool, method, input or
+            constant argument, or a constant the tool cannot take
+    """
+    tool = spec.validate()
+    started = time.perf_counter()
+    points = sweep_points(spec)
+    cache = get_sweep_cache() if use_cache else None
+    keys = [SweepCache.key(tool.name, spec.fixed, point) for point in points]
+    outputs: Dict[str, Dict[str, object]] = cache.get_many(keys) if cache is not None else {}
+
+    multiplicity = Counter(keys)                # A grid may repeat a point
+    pending = [key for key in multiplicity if key not in outputs]
+    cached = len(points) - sum(multiplicity[key] for key in pending)
+    by_key = dict(zip(keys, points))
+    chunks = [pending[i:i + tool.chunk_size] for i in range(0, len(pending), tool.chunk_size)]
+    done = cached
+    if progress is not None:
+        progress(done, len(points))
+
+    def collect(chunk: List[str], results: List[Dict[str, object]]) -> None:
+        nonlocal done
+        items = list(zip(chunk, results))
+        outputs.update(items)
+        if cache is not None:
+            cache.put_many(tool.name, items)
+        done += sum(multiplicity[key] for key in chunk)
+        if progress is not None:
+            progress(done, len(points))
+
+    workers = min(workers or default_workers(), len(chunks))
+    if chunks:
+        get_water_properties()  # Build the shared tables once, before the workers map them
+    if workers <= 1:
+        for chunk in chunks:
+            collect(chunk, _evaluate_chunk(tool.name, spec.fixed, [by_key[key] for key in chunk]))
+    elif chunks:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(_evaluate_chunk, tool.name, spec.fixed, [by_key[key] for key in chunk]): chunk
+                for chunk in chunks
+            }
+            remaining = set(futures)
+            while remaining:
+                finished, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(futures[future], future.result())
+
+    computed = len(points) - cached
+    metrics = get_metrics()
+    metrics.inc("sves_sweep_points_total", computed, source="computed")
+    metrics.inc("sves_sweep_points_total", cached, source="cached")
+    rows = [outputs[key] for key in keys]
+    errors = Counter(row["error"] for row in rows if row.get("error"))
+    return SweepResult(spec, _to_array(tool, spec, points, rows),
+                       computed, cached, time.perf_counter() - started, dict(errors))
+
+
+def _to_array(tool: SweepTool, spec: SweepSpec, points: List[Dict[str, float]],
+              rows: List[Dict[str, object]]) -> "np.ndarray":
+    """Assemble the structured result array."""
+    dtype = [(name, np.float64) for name in spec.parameters]
+    dtype += [(name, np.float64) for name in tool.outputs]
+    dtype += [(name, np.bool_) for name in tool.flags]
+    data = np.zeros(len(points), dtype=dtype)
+    for name in tool.outputs:
+        data[name] = np.nan
+    for i, (point, row) in enumerate(zip(points, rows)):
+        for name in spec.parameters:
+            data[name][i] = point[name]
+        for name in tool.outputs + tool.flags:
+            if name in row:
+                data[name][i] = row[name]
+    return data
+
+
+def save_sweep(file, result: SweepResult) -> None:
+    """Write a sweep as ``.npz`` (path or binary file): one array per column plus the spec (JSON)."""
+    spec = json.dumps(vars(result.spec), default=list)
+    np.savez(file, __spec__=np.array(spec), **result.columns())
+
+
+def load_sweep(path: str) -> Tuple[Dict[str, "np.ndarray"], Dict[str, object]]:
+    """Read a save_sweep() file: (columns, spec as a dict)."""
+    with np.load(path) as archive:
+        columns = {name: archive[name] for name in archive.files if name != "__spec__"}
+        spec = json.loads(str(archive["__spec__"]))
+    return columns, spec
+
+
+def _parse_parameter(text: str, method: str) -> Tuple[str, List[float]]:
+    """``name=v1,v2,...``, ``name=low:high:count`` (grid) or ``name=low:high`` (lhs)."""
+    name, sep, values = text.partition("=")
+    if not sep:
+        raise ValueError(f"Parameter {text!r} is not name=values")
+    if ":" in values:
+        parts = [float(v) for v in values.split(":")]
+        if method == "lhs" and len(parts) == 2:
+            return name, parts
+        if method == "grid" and len(parts) == 3:
+            return name, np.linspace(parts[0], parts[1], int(parts[2])).tolist()
+        raise ValueError(f"Parameter {text!r}: use low:high:count for a grid, low:high for --lhs")
+    return name, [float(v) for v in values.split(",")]
+
+
+def _parse_fixed(text: str) -> Tuple[str, object]:
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sves.sweep", description="Sweep a native SVES tool over a parameter grid."
+    )
+    parser.add_argument("tool", choices=list(SWEEP_TOOLS))
+    parser.add_argument("-p", "--param", action="append", default=[], required=True,
+                        help="name=v1,v2,... or name=low:high:count (grid); name=low:high (--lhs)")
+    parser.add_argument("--lhs", type=int, metavar="N", help="Latin hypercube of N points instead of a grid")
+    parser.add_argument("--seed", type=int, default=0, help="Latin hypercube seed")
+    parser.add_argument("--fixed", action="append", default=[],
+                        help="Constant tool argument, e.g. lithology=serpentinite or formation=basalt")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: SVES_SWEEP_WORKERS or CPUs)")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the point cache")
+    parser.add_argument("-o", "--output", help="Write the result columns to this .npz file")
+    args = parser.parse_args(argv)
+
+    method = "lhs" if args.lhs else "grid"
+    try:
+        spec = SweepSpec(
+            tool=args.tool,
+            parameters=dict(_parse_parameter(p, method) for p in args.param),
+            method=method,
+            samples=args.lhs or 0,
+            seed=args.seed,
+            fixed=dict(_parse_fixed(f) for f in args.fixed),
+        )
+        spec.validate()
+    except ValueError as e:
+        parser.error(str(e))
+
+    def report(done: int, total: int) -> None:
+        sys.stderr.write(f"\r{done}/{total} points")
+        sys.stderr.flush()
+
+    result = run_sweep(spec, workers=args.workers, use_cache=not args.no_cache, progress=report)
+    sys.stderr.write(
+        f"\nDone: {len(result.data)} points ({result.computed} computed, {result.cached} cached) "
+        f"in {result.seconds:.1f}s\n"
+    )
+    for message, count in result.errors.items():
+        sys.stderr.write(f"{count} point(s) not evaluated: {message}\n")
+    if args.output:
+        save_sweep(args.output, result)
+    else:
+        names = result.data.dtype.names
+        sys.stdout.write("\t".join(names) + "\n")
+        for row in result.data:
+            sys.stdout.write("\t".join(f"{value:.4g}" if isinstance(value, float) else str(value)
+                                       for value in row.tolist()) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
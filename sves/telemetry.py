@@ -0,0 +1,684 @@
+"""
+Streaming downhole telemetry: ingestion, thermal-runaway alerts and a well
+state summary for the prompt.
+
+Sources (background threads, configured with SVES_TELEMETRY) feed samples
+of ``(timestamp, sensor, depth_m, temperature_c, pressure_mpa)`` into the
+process-wide ``TelemetryMonitor``:
+
+- ``csv:<path>``     Tail a CSV file. A header row names the columns
+                     (``timestamp`` plus any of ``sensor``, ``depth_m``,
+                     ``temperature_c``, ``pressure_mpa``); without one that
+                     order is assumed. Timestamps are epoch seconds or ISO 8601.
+- ``bin:<path>``     Tail a file of packed little-endian records
+                     (record_dtype(), 22 bytes: float64 epoch seconds, uint16
+                     sensor id, float32 depth, temperature, pressure).
+- ``udp:<host>:<port>``     Datagrams of CSV lines in the default column order.
+- ``udpbin:<host>:<port>``  Datagrams of packed records.
+
+Tailed files are followed across truncation and rotation; on start only
+the last SVES_TELEMETRY_BACKFILL_KB of an existing file are read.
+
+Each sensor keeps its last SVES_TELEMETRY_CAPACITY samples in a fixed-size
+NumPy ring buffer (``RingBuffer``), so memory stays bounded however long
+the well is drilled. Every ingested batch is checked in one vectorized pass
+against a trailing time window, and alerts are raised synchronously, before
+``ingest()`` returns (milliseconds after the batch is read):
+
+    thermal_runaway     CRITICAL  RUNAWAY_RISE_C within RUNAWAY_WINDOW_S, or
+                                  RUNAWAY_TEMPERATURE_C (sves.rtcr criterion)
+    heating_rate        WARNING   dT/dt over RATE_WINDOW_S at the runaway pace
+    temperature_limit   WARNING   above the BHCT design limit (sves.drilling)
+    pressure_floor      CRITICAL  below the 22.1 MPa supercritical floor
+    pressure_margin     WARNING   within the back-pressure tolerance of the floor
+    pressure_excursion  WARNING   more than the choke tolerance off the
+                                  PRESSURE_WINDOW_S rolling mean
+
+An alert stays active (and is not raised again) until its condition has
+been clear for CLEAR_AFTER_S. ``add_listener()`` registers callbacks for
+new alerts; they run on the ingesting thread and must return quickly.
+
+sves.agent adds ``summary_text()`` to the system prompt: per sensor the
+latest readings, heating rate and trend, pressure margin and data age, plus
+active alerts, never raw samples.
+
+Settings (environment):
+    SVES_TELEMETRY               Comma-separated sources (default: none)
+    SVES_TELEMETRY_CAPACITY      Samples kept per sensor (default 16384)
+    SVES_TELEMETRY_BACKFILL_KB   Tail of an existing file read on start (default 1024)
+    SVES_TELEMETRY_STALE_S       Data age reported as stale (default 60)
+"""
+
+import csv
+import math
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from sves.drilling import BACKPRESSURE_TOLERANCE_MPA, BHCT_RANGE_C, MIN_SYSTEM_PRESSURE_MPA
+from sves.lazy import lazy_import
+from sves.metrics import get_metrics
+from sves.rtcr import RUNAWAY_RISE_C, RUNAWAY_TEMPERATURE_C, RUNAWAY_WINDOW_S
+
+np = lazy_import("numpy")  # Loaded with the first sample
+
+
+CSV_COLUMNS = ("timestamp", "sensor", "depth_m", "temperature_c", "pressure_mpa")
+RECORD_FIELDS = [
+    ("timestamp", "<f8"), ("sensor", "<u2"),
+    ("depth_m", "<f4"), ("temperature_c", "<f4"), ("pressure_mpa", "<f4"),
+]
+RECORD_SIZE = 22
+
+RATE_WINDOW_S = 1.0
+TREND_WINDOW_S = 60.0
+PRESSURE_WINDOW_S = 60.0
+PRESSURE_MIN_WINDOW_S = 300.0
+CLEAR_AFTER_S = 5.0
+RUNAWAY_RATE_C_S = RUNAWAY_RISE_C / RUNAWAY_WINDOW_S
+SUMMARY_SENSORS = 6
+
+CRITICAL = "CRITICAL"
+WARNING = "WARNING"
+
+WELL_STATE_HEADER = (
+    "\n\nLIVE WELL STATE (downhole telemetry summarized by SVES at {as_of} UTC; use it for "
+    "questions about current conditions, put active alerts first, and say so if the data is stale):"
+)
+
+
+def record_dtype() -> "np.dtype":
+    """The packed binary telemetry record (RECORD_SIZE bytes)."""
+    return np.dtype(RECORD_FIELDS)
+
+
+@dataclass
+class Alert:
+    """A threshold crossing on one sensor."""
+    kind: str
+    severity: str
+    sensor: str
+    depth_m: float
+    sample_time: float      # Timestamp of the first offending sample
+    detected_at: float      # Wall clock when the alert was raised
+    value: float
+    message: str
+    cleared_at: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.cleared_at is None
+
+    def describe(self) -> str:
+        where = f"sensor {self.sensor}" + (f" ({self.depth_m:.0f} m)" if math.isfinite(self.depth_m) else "")
+        return f"{self.severity} {self.kind}, {where} since {_clock(self.sample_time)}: {self.message}"
+
+
+def _clock(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%H:%M:%S")
+
+
+class RingBuffer:
+    """
+    The last ``capacity`` samples of one sensor in fixed-size arrays.
+
+    Every sample is written twice, at ``i`` and ``i + capacity`` of arrays
+    twice the capacity, so the most recent samples are always one contiguous
+    slice and windows are views rather than copies.
+    """
+
+    COLUMNS = ("timestamp", "temperature_c", "pressure_mpa")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0          # Samples written since start
+        self.depth_m = float("nan")
+        self._data = np.full((len(self.COLUMNS), 2 * capacity), np.nan)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def extend(self, values: "np.ndarray") -> None:
+        """Append samples, ``(len(COLUMNS), m)`` in time order."""
+        values = values[:, -self.capacity:]
+        positions = (self.count + np.arange(values.shape[1])) % self.capacity
+        self._data[:, positions] = values
+        self._data[:, positions + self.capacity] = values
+        self.count += values.shape[1]
+
+    def view(self) -> "np.ndarray":
+        """All retained samples, oldest first: ``(len(COLUMNS), len(self))`` view."""
+        end = self.count % self.capacity + self.capacity
+        return self._data[:, end - len(self):end]
+
+    @property
+    def last_time(self) -> float:
+        return self._data[0, self.count % self.capacity + self.capacity - 1] if self.count else float("-inf")
+
+
+def _at(t: "np.ndarray", values: "np.ndarray", when: "np.ndarray") -> "np.ndarray":
+    """
+    ``values`` interpolated at times ``when`` over its measured (finite)
+    samples, clamped to their span; NaN if there are none.
+    """
+    measured = np.isfinite(values)
+    if measured.all():
+        return np.interp(when, t, values)
+    if not measured.any():
+        return np.full(np.shape(when), np.nan)
+    return np.interp(when, t[measured], values[measured])
+
+
+class TelemetryMonitor:
+    """Per-sensor ring buffers, vectorized threshold checks and alert state."""
+
+    def __init__(self, capacity: int = 16384, stale_after_s: float = 60.0):
+        self.capacity = capacity
+        self.stale_after_s = stale_after_s
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._active: Dict[Tuple[str, str], Alert] = {}
+        self._last_true: Dict[Tuple[str, str], float] = {}
+        self._history: deque = deque(maxlen=200)
+        self._listeners: List[Callable[[Alert], None]] = []
+        self._sources: List["_Source"] = []
+        self._lock = threading.Lock()
+
+    # -- ingestion ----------------------------------------------------------------
+
+    def ingest(
+        self,
+        sensor: Union[str, Sequence[str]],
+        timestamp: Sequence[float],
+        temperature_c: Optional[Sequence[float]] = None,
+        pressure_mpa: Optional[Sequence[float]] = None,
+        depth_m: Optional[Sequence[float]] = None,
+    ) -> List[Alert]:
+        """
+        Add a batch of samples and check it against the alert thresholds.
+
+        Args:
+            sensor: Sensor name, for the whole batch or per sample
+            timestamp: Epoch seconds per sample
+            temperature_c: Temperatures (NaN or None when not measured)
+            pressure_mpa: Pressures (NaN or None when not measured)
+            depth_m: Sensor depths
+
+        Returns:
+            List[Alert]: Alerts raised by this batch
+        """
+        t = np.asarray(timestamp, dtype=np.float64).ravel()
+        n = t.size
+        if not n:
+            return []
+        columns = np.full((3, n), np.nan)
+        columns[0] = t
+        if temperature_c is not None:
+            columns[1] = np.asarray(temperature_c, dtype=np.float64)
+        if pressure_mpa is not None:
+            columns[2] = np.asarray(pressure_mpa, dtype=np.float64)
+        depth = np.full(n, np.nan) if depth_m is None else np.broadcast_to(np.asarray(depth_m, dtype=np.float64), (n,))
+        if isinstance(sensor, str):
+            groups = [(sensor, slice(None))]
+        else:
+            names, inverse = np.unique(np.asarray(sensor, dtype=str), return_inverse=True)
+            groups = [(str(name), inverse == i) for i, name in enumerate(names)]
+
+        raised: List[Alert] = []
+        accepted = 0
+        with self._lock:
+            for name, rows in groups:
+                values, depths = columns[:, rows], depth[rows]
+                order = np.argsort(values[0], kind="stable")
+                values, depths = values[:, order], depths[order]
+                buffer = self._buffers.get(name)
+                if buffer is None:
+                    buffer = self._buffers[name] = RingBuffer(self.capacity)
+                # Out-of-order samples (older than the latest kept) are dropped
+                values = values[:, np.isfinite(values[0]) & (values[0] >= buffer.last_time)]
+                if not values.shape[1]:
+                    continue
+                finite_depth = depths[np.isfinite(depths)]
+                if finite_depth.size:
+                    buffer.depth_m = float(finite_depth[-1])
+                buffer.extend(values)
+                accepted += min(values.shape[1], self.capacity)
+                raised.extend(self._check(name, buffer, min(values.shape[1], self.capacity)))
+            active = len(self._active)
+        metrics = get_metrics()
+        metrics.inc("sves_telemetry_samples_total", accepted, outcome="accepted")
+        if n > accepted:
+            metrics.inc("sves_telemetry_samples_total", n - accepted, outcome="dropped")
+        for alert in raised:
+            metrics.inc("sves_telemetry_alerts_total", kind=alert.kind, severity=alert.severity)
+            metrics.observe("sves_telemetry_alert_latency_seconds", max(alert.detected_at - alert.sample_time, 0.0))
+            for listener in list(self._listeners):
+                try:
+                    listener(alert)
+                except Exception:
+                    pass  # A failing listener must not stop ingestion
+        metrics.set("sves_telemetry_active_alerts", active)
+        return raised
+
+    def _check(self, sensor: str, buffer: RingBuffer, new: int) -> List[Alert]:
+        """Vectorized threshold checks of the ``new`` latest samples of one sensor."""
+        t, temperature, pressure = buffer.view()
+        n = t.size
+        tn, tempn, presn = t[n - new:], temperature[n - new:], pressure[n - new:]
+
+        # Heating rate over RATE_WINDOW_S (over the retained span while it is shorter)
+        start = np.maximum(tn - RATE_WINDOW_S, t[0])
+        span = tn - start
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = np.where(span > 0, (tempn - _at(t, temperature, start)) / span, 0.0)
+        rise = tempn - _at(t, temperature, tn - RUNAWAY_WINDOW_S)
+
+        # Rolling mean pressure over PRESSURE_WINDOW_S from cumulative sums (NaN-safe)
+        measured = np.isfinite(pressure)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(measured, pressure, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(measured)))
+        first = np.searchsorted(t, tn - PRESSURE_WINDOW_S, side="left")
+        last = np.arange(n - new, n) + 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            deviation = presn - (sums[last] - sums[first]) / (counts[last] - counts[first])
+
+        floor = MIN_SYSTEM_PRESSURE_MPA
+        with np.errstate(invalid="ignore"):
+            checks = (
+                ("thermal_runaway", CRITICAL, (rise >= RUNAWAY_RISE_C) | (tempn >= RUNAWAY_TEMPERATURE_C), rise,
+                 lambda i: f"+{rise[i]:.0f} °C in {RUNAWAY_WINDOW_S:.0f} s, now {tempn[i]:.0f} °C (thermal runaway)"),
+                ("heating_rate", WARNING, rate >= RUNAWAY_RATE_C_S, rate,
+                 lambda i: f"heating at {rate[i]:.1f} °C/s, runaway pace is {RUNAWAY_RATE_C_S:.0f} °C/s"),
+                ("temperature_limit", WARNING, tempn > BHCT_RANGE_C[1], tempn,
+                 lambda i: f"{tempn[i]:.0f} °C exceeds the {BHCT_RANGE_C[1]:.0f} °C design limit"),
+                ("pressure_floor", CRITICAL, presn < floor, presn,
+                 lambda i: f"{presn[i]:.2f} MPa is below the {floor} MPa supercritical floor"),
+                ("pressure_margin", WARNING, (presn >= floor) & (presn < floor + BACKPRESSURE_TOLERANCE_MPA), presn,
+                 lambda i: f"{presn[i]:.2f} MPa is within {BACKPRESSURE_TOLERANCE_MPA} MPa of the {floor} MPa floor"),
+                ("pressure_excursion", WARNING, np.abs(deviation) > BACKPRESSURE_TOLERANCE_MPA, deviation,
+                 lambda i: f"{deviation[i]:+.2f} MPa off the {PRESSURE_WINDOW_S:.0f} s mean "
+                           f"(choke tolerance ±{BACKPRESSURE_TOLERANCE_MPA} MPa)"),
+            )
+
+        raised = []
+        now = time.time()
+        for kind, severity, mask, values, message in checks:
+            key = (sensor, kind)
+            hits = np.flatnonzero(mask)
+            if hits.size:
+                self._last_true[key] = float(tn[hits[-1]])
+                if key not in self._active:
+                    i = int(hits[0])
+                    alert = Alert(kind, severity, sensor, buffer.depth_m, float(tn[i]), now,
+                                  float(values[i]), message(i))
+                    self._active[key] = alert
+                    self._history.append(alert)
+                    raised.append(alert)
+            elif key in self._active and tn[-1] - self._last_true.get(key, tn[-1]) >= CLEAR_AFTER_S:
+                self._active.pop(key).cleared_at = float(tn[-1])
+        return raised
+
+    # -- alerts -------------------------------------------------------------------
+
+    def add_listener(self, listener: Callable[[Alert], None]) -> None:
+        """Call ``listener(alert)`` for every new alert (on the ingesting thread)."""
+        self._listeners.append(listener)
+
+    def active_alerts(self) -> List[Alert]:
+        """Active alerts, critical first, then newest first."""
+        with self._lock:
+            alerts = list(self._active.values())
+        return sorted(alerts, key=lambda a: (a.severity != CRITICAL, -a.sample_time))
+
+    def recent_alerts(self, limit: int = 20) -> List[Alert]:
+        """The most recently raised alerts (active or cleared), newest first."""
+        with self._lock:
+            return list(self._history)[-limit:][::-1]
+
+    # -- state --------------------------------------------------------------------
+
+    @property
+    def live(self) -> bool:
+        """Whether any telemetry has been received (the prompt then has a well state)."""
+        return any(buffer.count for buffer in self._buffers.values())
+
+    def sensor_states(self) -> List[Dict[str, float]]:
+        """
+        Latest readings and windowed statistics of every sensor.
+
+        Rows may carry only one quantity, so each reading is the latest
+        measured (finite) one, and the heating rate and trend end at the
+        latest temperature sample.
+        """
+        states = []
+        with self._lock:
+            for name, buffer in self._buffers.items():
+                if not len(buffer):
+                    continue
+                t, temperature, pressure = buffer.view()
+                now_t = t[-1]
+                state = {"sensor": name, "depth_m": buffer.depth_m, "timestamp": float(now_t),
+                         "samples": buffer.count}
+                latest = {}
+                for key, values in (("temperature_c", temperature), ("pressure_mpa", pressure)):
+                    measured = np.flatnonzero(np.isfinite(values))
+                    latest[key] = int(measured[-1]) if measured.size else len(t) - 1
+                    state[key] = float(values[latest[key]])
+                temperature_t = t[latest["temperature_c"]]
+                for key, window in (("rate_c_s", RATE_WINDOW_S), ("trend_c_min", TREND_WINDOW_S)):
+                    start = max(temperature_t - window, t[0])
+                    change = state["temperature_c"] - _at(t, temperature, start)
+                    per = 1.0 if key == "rate_c_s" else 60.0
+                    state[key] = float(change / (temperature_t - start) * per) if temperature_t > start else 0.0
+                state["trend_span_s"] = float(min(now_t - t[0], TREND_WINDOW_S))
+                recent = pressure[np.searchsorted(t, now_t - PRESSURE_MIN_WINDOW_S):]
+                recent = recent[np.isfinite(recent)]
+                state["min_pressure_mpa"] = float(recent.min()) if recent.size else float("nan")
+                states.append(state)
+        return states
+
+    def summary_text(self, max_sensors: int = SUMMARY_SENSORS) -> str:
+        """
+        The system prompt section describing the current well state.
+
+        Returns:
+            str: Active alerts and a compact line per sensor, or "" when no
+            telemetry has been received
+        """
+        if not self._buffers:
+            return ""
+        states = self.sensor_states()
+        if not states:
+            return ""
+        alerts = self.active_alerts()
+        now = time.time()
+        lines = [WELL_STATE_HEADER.format(as_of=_clock(now))]
+        if alerts:
+            lines.append("ACTIVE ALERTS:")
+            lines.extend(f"- {alert.describe()}" for alert in alerts)
+        else:
+            lines.append("No active alerts.")
+
+        alerting = {alert.sensor for alert in alerts}
+        states.sort(key=lambda s: (s["sensor"] not in alerting,
+                                   -(s["temperature_c"] if np.isfinite(s["temperature_c"]) else -np.inf)))
+        shown = states[:max_sensors]
+        lines.append(f"Sensors ({len(states)} reporting" + (f", {len(shown)} hottest or alerting shown):"
+                                                              if len(shown) < len(states) else "):"))
+        for s in shown:
+            where = s["sensor"] + (f" ({s['depth_m']:.0f} m)" if np.isfinite(s["depth_m"]) else "")
+            parts = []
+            if np.isfinite(s["temperature_c"]):
+                parts.append(f"{s['temperature_c']:.0f} °C, {s['rate_c_s']:+.1f} °C/s now, "
+                             f"{s['trend_c_min']:+.1f} °C/min over {s['trend_span_s']:.0f} s")
+            if np.isfinite(s["pressure_mpa"]):
+                parts.append(f"{s['pressure_mpa']:.2f} MPa, margin {s['pressure_mpa'] - MIN_SYSTEM_PRESSURE_MPA:+.2f} MPa "
+                             f"to the {MIN_SYSTEM_PRESSURE_MPA} MPa floor, min {s['min_pressure_mpa']:.2f} MPa "
+                             f"in {PRESSURE_MIN_WINDOW_S / 60:.0f} min")
+            age = now - s["timestamp"]
+            freshness = f"STALE, last sample {age:.0f} s ago" if age > self.stale_after_s else f"last sample {max(age, 0):.1f} s ago"
+            lines.append(f"- {where}: " + "; ".join(parts + [freshness]))
+        if len(shown) < len(states):
+            pressures = [s for s in states if np.isfinite(s["min_pressure_mpa"])]
+            if pressures:
+                lowest = min(pressures, key=lambda s: s["min_pressure_mpa"])
+                lines.append(f"- Lowest pressure of all sensors: {lowest['min_pressure_mpa']:.2f} MPa at {lowest['sensor']}")
+        return "\n".join(lines)
+
+    # -- sources ------------------------------------------------------------------
+
+    def start_sources(self, spec: str, backfill_bytes: int = 1024 * 1024) -> None:
+        """Start the sources of a SVES_TELEMETRY specification."""
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            scheme, _, target = item.partition(":")
+            if scheme == "csv":
+                source = _CsvTail(self, target, backfill_bytes)
+            elif scheme == "bin":
+                source = _BinaryTail(self, target, backfill_bytes)
+            elif scheme in ("udp", "udpbin"):
+                host, _, port = target.rpartition(":")
+                source = _UdpSource(self, host or "127.0.0.1", int(port), binary=scheme == "udpbin")
+            else:
+                raise ValueError(f"Unknown telemetry source {item!r} (expected csv:, bin:, udp: or udpbin:)")
+            source.start()
+            self._sources.append(source)
+
+    def stop(self) -> None:
+        """Stop all sources."""
+        for source in self._sources:
+            source.stop()
+        for source in self._sources:
+            source.join(timeout=2.0)
+        self._sources.clear()
+
+
+# -- sources ------------------------------------------------------------------------
+
+class _Source(threading.Thread):
+    """A daemon thread feeding one source into the monitor."""
+
+    def __init__(self, monitor: TelemetryMonitor, name: str):
+        super().__init__(name=f"sves-telemetry-{name}", daemon=True)
+        self.monitor = monitor
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def ingest_records(self, records: "np.ndarray") -> None:
+        if records.size:
+            self.monitor.ingest(records["sensor"].astype(str), records["timestamp"], records["temperature_c"],
+                                records["pressure_mpa"], records["depth_m"])
+
+    def ingest_rows(self, rows: List[List[str]], columns: Sequence[str]) -> None:
+        rows = [row for row in rows if len(row) == len(columns)]
+        if not rows:
+            return
+        values = dict(zip(columns, map(list, zip(*rows))))
+        self.monitor.ingest(
+            values.get("sensor", "default"),
+            parse_timestamps(values["timestamp"]),
+            parse_numbers(values.get("temperature_c")),
+            parse_numbers(values.get("pressure_mpa")),
+            parse_numbers(values.get("depth_m")),
+        )
+
+
+def parse_numbers(column: Optional[List[str]]) -> Optional["np.ndarray"]:
+    """Parse a column of numbers; blank or malformed cells become NaN."""
+    if column is None:
+        return None
+    try:
+        return np.array(column, dtype=np.float64)
+    except ValueError:
+        parsed = np.full(len(column), np.nan)
+        for i, cell in enumerate(column):
+            try:
+                parsed[i] = float(cell)
+            except ValueError:
+                pass
+        return parsed
+
+
+def parse_timestamps(column: List[str]) -> "np.ndarray":
+    """Epoch seconds, or ISO 8601 (UTC unless an offset is given)."""
+    parsed = parse_numbers(column)
+    for i in np.flatnonzero(np.isnan(parsed)):
+        try:
+            stamp = datetime.fromisoformat(column[i].strip())
+        except ValueError:
+            continue
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        parsed[i] = stamp.timestamp()
+    return parsed
+
+
+class _FileTail(_Source, ABC):
+    """Follow a growing file across truncation and rotation."""
+
+    poll_interval = 0.05
+
+    def __init__(self, monitor: TelemetryMonitor, path: str, backfill_bytes: int):
+        super().__init__(monitor, os.path.basename(path))
+        self.path = path
+        self.backfill_bytes = backfill_bytes
+
+    def run(self) -> None:
+        handle, inode, first_open = None, None, True
+        while not self._stop_event.is_set():
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                stat = None
+            if stat is not None and (handle is None or stat.st_ino != inode or stat.st_size < handle.tell()):
+                # New, rotated or truncated file: rotated and new files are read from the start
+                if handle is not None:
+                    self.drain(handle)
+                    handle.close()
+                try:
+                    handle, inode = open(self.path, "rb"), stat.st_ino
+                except OSError:
+                    handle = None
+                else:
+                    self.opened(handle, stat.st_size if first_open else 0)
+                    first_open = False
+            if handle is None or not self.drain(handle):
+                self._stop_event.wait(self.poll_interval)
+        if handle is not None:
+            handle.close()
+
+    @abstractmethod
+    def opened(self, handle, size: int) -> None:
+        """Position a newly opened file (``size``: bytes present at start-up, else 0)."""
+        pass
+
+    @abstractmethod
+    def drain(self, handle) -> bool:
+        """Ingest the complete records appended since the last read; False if none."""
+        pass
+
+
+def _csv_header(line: str) -> Optional[Tuple[str, ...]]:
+    """The column names if ``line`` is a header (does not start with a number), else None."""
+    if line.strip()[:1].isdigit():
+        return None
+    return tuple(c.strip().lower() for c in next(csv.reader([line])))
+
+
+class _CsvTail(_FileTail):
+    def opened(self, handle, size: int) -> None:
+        # Columns stay None until the first complete line shows whether there is a
+        # header: a logger may create the file empty and write its header later
+        self.columns, self.pending = None, b""
+        first = handle.readline()
+        if first.endswith(b"\n") and first.strip():
+            self.columns = _csv_header(first.decode("utf-8", "replace"))
+            if self.columns is None:
+                self.columns = CSV_COLUMNS
+                handle.seek(0)
+        else:
+            handle.seek(0)
+        if self.columns is not None and size > handle.tell() + self.backfill_bytes:
+            handle.seek(size - self.backfill_bytes)
+            handle.readline()  # Skip the partial line
+
+    def drain(self, handle) -> bool:
+        data = handle.read()
+        if not data:
+            return False
+        data = self.pending + data
+        complete, _, self.pending = data.rpartition(b"\n")
+        lines = [line for line in complete.decode("utf-8", "replace").splitlines() if line.strip()]
+        if lines and self.columns is None:
+            self.columns = _csv_header(lines[0])
+            if self.columns is None:
+                self.columns = CSV_COLUMNS
+            else:
+                lines = lines[1:]
+        if lines:
+            self.ingest_rows(list(csv.reader(lines)), self.columns)
+        return True
+
+
+class _BinaryTail(_FileTail):
+    def opened(self, handle, size: int) -> None:
+        self.pending = b""
+        start = max(size - self.backfill_bytes, 0)
+        handle.seek(start - start % RECORD_SIZE)
+
+    def drain(self, handle) -> bool:
+        data = handle.read()
+        if not data:
+            return False
+        data = self.pending + data
+        usable = len(data) - len(data) % RECORD_SIZE
+        self.pending = data[usable:]
+        self.ingest_records(np.frombuffer(data[:usable], dtype=record_dtype()))
+        return True
+
+
+class _UdpSource(_Source):
+    """Receive datagrams on a local socket, batching whatever has arrived."""
+
+    def __init__(self, monitor: TelemetryMonitor, host: str, port: int, binary: bool):
+        super().__init__(monitor, f"udp-{port}")
+        self.binary = binary
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+
+    def run(self) -> None:
+        with self.sock:
+            while not self._stop_event.is_set():
+                try:
+                    datagrams = [self.sock.recv(65536)]
+                except socket.timeout:
+                    continue
+                self.sock.setblocking(False)
+                try:
+                    while len(datagrams) < 1024:
+                        datagrams.append(self.sock.recv(65536))
+                except BlockingIOError:
+                    pass
+                finally:
+                    self.sock.settimeout(0.2)
+                if self.binary:
+                    data = b"".join(d[:len(d) - len(d) % RECORD_SIZE] for d in datagrams)
+                    self.ingest_records(np.frombuffer(data, dtype=record_dtype()))
+                else:
+                    lines = b"\n".join(datagrams).decode("utf-8", "replace").splitlines()
+                    self.ingest_rows(list(csv.reader(line for line in lines if line.strip())), CSV_COLUMNS)
+
+
+_MONITOR: Optional[TelemetryMonitor] = None
+_MONITOR_LOCK = threading.Lock()
+
+
+def get_telemetry_monitor() -> TelemetryMonitor:
+    """Return the process-wide monitor, starting the SVES_TELEMETRY sources on first use."""
+    global _MONITOR
+    if _MONITOR is None:
+        with _MONITOR_LOCK:
+            if _MONITOR is None:
+                monitor = TelemetryMonitor(
+                    capacity=int(os.environ.get("SVES_TELEMETRY_CAPACITY", "16384")),
+                    stale_after_s=float(os.environ.get("SVES_TELEMETRY_STALE_S", "60")),
+                )
+                spec = os.environ.get("SVES_TELEMETRY", "")
+                if spec:
+                    monitor.start_sources(
+                        spec, backfill_bytes=int(float(os.environ.get("SVES_TELEMETRY_BACKFILL_KB", "1024")) * 1024)
+                    )
+                _MONITOR = monitor
+    return _MONITOR
+
+
+def render_well_state() -> str:
+    """The system prompt section for live telemetry ("" when there is none)."""
+    return get_telemetry_monitor().summary_text()
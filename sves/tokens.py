@@ -0,0 +1,80 @@
+"""
+Token counting helpers.
+
+Exact token counts depend on the backend model's tokenizer, which is not
+available in-process for every provider. The default counter is a fast
+character-based estimate (Llama-family and GPT tokenizers average roughly
+four characters of English technical prose per token). A real tokenizer can
+be plugged in with ``set_token_counter``; ``load_tiktoken_counter`` provides
+one when the optional ``tiktoken`` package is installed.
+"""
+
+import threading
+from functools import lru_cache
+from typing import Callable, Optional
+
+CHARS_PER_TOKEN = 4
+
+# Per-message framing overhead of chat templates (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """Return a fast approximate token count for ``text``."""
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+_counter: TokenCounter = estimate_tokens
+_counter_lock = threading.Lock()
+
+
+def set_token_counter(counter: Optional[TokenCounter]) -> None:
+    """
+    Install the process-wide token counter.
+
+    Args:
+        counter: Callable returning the token count of a string, or None to
+            restore the approximate default
+    """
+    global _counter
+    with _counter_lock:
+        _counter = counter or estimate_tokens
+        _cached_count.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _cached_count(text: str) -> int:
+    return _counter(text)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with the installed counter.
+
+    Results are memoized so re-counting an unchanged conversation history on
+    every turn is cheap even with a slow, exact tokenizer.
+    """
+    if not text:
+        return 0
+    if _counter is estimate_tokens:
+        return estimate_tokens(text)
+    return _cached_count(text)
+
+
+def count_message_tokens(message: dict) -> int:
+    """Count tokens of a chat message including template overhead."""
+    return count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def load_tiktoken_counter(encoding_name: str = "cl100k_base") -> Optional[TokenCounter]:
+    """Return a tiktoken-based counter, or None if tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
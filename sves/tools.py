@@ -0,0 +1,339 @@
+"""
+Native tools run by the agent before generation.
+
+The system prompt advertises technical tools; those implemented natively
+are run by SVES itself rather than by asking the LLM to write and "run"
+Python. run_tools() picks the tools a query calls for and extracts their
+inputs from the query text; render_tool_results() formats the results for
+the dynamic part of the system prompt, where the LLM narrates them.
+
+Tools:
+    design_rtcr_experiment      sves.rtcr (experiment design and RTCR
+                                kinetics queries)
+    analyze_drilling_scenario   sves.drilling (drilling, ROP, hole cleaning,
+                                wellbore temperature queries)
+    query_well_data             sves.welldata (questions about recorded runs:
+                                pilot ROP logs, temperature excursions,
+                                stuck-pipe and BOP seal incidents)
+
+TOOLS_VERSION is part of the response cache's knowledge fingerprint; bump
+it when a tool's results change for the same query.
+
+RTCR designs take about a second of ODE integration (more with a methane
+co-feed) on the request path, so they are memoized per process on their
+inputs rounded to DESIGN_SIGNIFICANT_DIGITS (the rounded inputs are what is
+simulated, so a memoized design is exactly what a fresh run would give).
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sves.drilling import FORMATIONS, DrillingScenario, analyze_drilling_scenario, format_drilling_analysis
+from sves.metrics import stage
+from sves.rtcr import LITHOLOGY_FE2, design_rtcr_experiment, format_rtcr_design
+from sves.welldata import format_well_data, get_well_store, query_well_data
+
+
+TOOLS_VERSION = "9"
+
+TOOL_RESULTS_HEADER = (
+    "\n\nTOOL RESULTS (computed by SVES for this query; base your answer on these numbers, "
+    "explain them and add engineering judgement; do not write code to recompute them):"
+)
+
+_DRILLING_TERMS = re.compile(
+    r"\b(drill\w*|rop|rate of penetration|wellbore|hole cleaning|cuttings|bhct|annular)\b", re.I
+)
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_LENGTH = _NUMBER + r"\s*(km|kilomet\w*|m|met(?:er|re)s?|ft|feet)\b(?!\s*/)"  # Not "m/s", "m/hr"
+_DEPTH = re.compile(_LENGTH, re.I)
+_DEPTH_KEYED = re.compile(
+    r"(?:\b(?:to|at|reach\w*|depth of|td of|td)\s+(?:a\s+(?:depth|td)\s+of\s+)?" + _LENGTH + r")|"
+    r"(?:" + _LENGTH + r"\s*(?:deep|depth|tvd|md)\b)", re.I
+)
+_NOT_DEPTH_BEFORE = re.compile(r"\b(?:per|every|each|between|from)\s*$", re.I)
+_GRADIENT = re.compile(_NUMBER + r"\s*°?\s*c\s*/\s*km", re.I)
+_FLOW = re.compile(_NUMBER + r"\s*(lpm|l/min|liters? per minute|litres? per minute|gpm)\b", re.I)
+_HOLE = re.compile(_NUMBER + r"\s*(?:-?\s*(?:in|inch|inches)\b|\")\s*(?:hole|bit|wellbore)?", re.I)
+_ROP = re.compile(_NUMBER + r"\s*m\s*/\s*h(?:r|our)?\b", re.I)
+_INJECTION = re.compile(_NUMBER + r"\s*°\s*c\b", re.I)
+
+_EXPERIMENT_TERMS = re.compile(
+    r"\b(experiment\w*|protocol|test plan|plan an? \w*\s*test|(?:lab\w*|reactor|bench) tests?)\b", re.I
+)
+_RTCR_TERMS = re.compile(r"\b(rtcr|radical|chain reaction\w*|h2 yield|hydrogen yield|thermal runaway)\b", re.I)
+_TEMPERATURE = re.compile(_NUMBER + r"\s*°?\s*c\b(?!\s*/)", re.I)
+_PRESSURE = re.compile(_NUMBER + r"\s*mpa\b", re.I)
+_WATER_ROCK = re.compile(r"(?:w/r|water[- /]to[- /]rock|water/rock)(?:\s*ratio)?\s*(?:of|=|:)?\s*" + _NUMBER, re.I)
+_O2 = re.compile(_NUMBER + r"\s*%\s*(?:o2|oxygen)\b|(?:o2|oxygen)(?:\s*fraction)?\s*(?:of|=|:)?\s*" + _NUMBER + r"\s*%", re.I)
+_WELL_DATA_TERMS = re.compile(
+    r"\b(pilot|historical|recorded|logged|field data|run data|our (?:data|logs?|runs?|wells?|tests?)|"
+    r"rop logs?|stuck[- ]pipe|bop seals?|incidents?|excursions?)\b", re.I
+)
+_EVENT_KINDS = (("stuck", re.compile(r"\bstuck\b", re.I)), ("bop", re.compile(r"\bbop\b", re.I)),
+                ("seal", re.compile(r"\bseals?\b", re.I)))
+_DEPTH_RANGE = re.compile(r"(?:between|from)\s+" + _NUMBER + r"\s*(?:m\b)?\s*(?:and|to|-)\s*" + _NUMBER + r"\s*m\b", re.I)
+_INTERVAL = re.compile(r"(?:per|every|each)\s+" + _NUMBER + r"\s*m\b", re.I)
+_ABOVE = re.compile(r"(?:above|over|exceed\w*)\s+" + _NUMBER + r"\s*°?\s*c\b", re.I)
+_NAME_STOPWORDS = {"data", "log", "logs", "events", "event", "run", "runs", "well", "test", "tests"}
+MAX_WELL_DATA_TABLES = 3
+DESIGN_SIGNIFICANT_DIGITS = 4
+MAX_MEMOIZED_DESIGNS = 128
+_CH4 = re.compile(_NUMBER + r"\s*%\s*(?:ch4|methane)\b|(?:ch4|methane)(?:\s*fraction)?\s*(?:of|=|:)?\s*" + _NUMBER + r"\s*%", re.I)
+
+
+@dataclass
+class ToolResult:
+    """Output of one native tool run."""
+    name: str
+    inputs: Dict[str, object]
+    text: str                                   # Formatted for the LLM
+    data: Dict[str, object] = field(default_factory=dict)
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _length_m(value: str, unit: str) -> float:
+    unit = unit.lower()
+    return _number(value) * (1000 if unit.startswith("k") else 0.3048 if unit in ("ft", "feet") else 1)
+
+
+def _parse_depth(query: str) -> Optional[float]:
+    """
+    The well depth named in a query in metres, or None.
+
+    A depth-keyed phrase ("to 3 km", "at 3000 m", "3000 m deep") wins;
+    otherwise the first length that is not a rate or velocity ("22 m/hr",
+    "1.5 m/s") or an interval ("per 50 m", "between 2000 and ...") is used.
+    """
+    match = _DEPTH_KEYED.search(query)
+    if match:
+        groups = match.groups()
+        value, unit = groups[:2] if groups[0] is not None else groups[2:]
+        return _length_m(value, unit)
+    for match in _DEPTH.finditer(query):
+        if not _NOT_DEPTH_BEFORE.search(query, 0, match.start()):
+            return _length_m(match.group(1), match.group(2))
+    return None
+
+
+def parse_drilling_query(query: str) -> Optional[DrillingScenario]:
+    """
+    Extract a drilling scenario from a query, or None if it is not one.
+
+    A query is a drilling scenario when it mentions drilling terms and
+    either a depth or "scenario"; unspecified inputs keep their defaults.
+    Queries about recorded well data are left to query_well_data (see
+    run_tools()).
+    """
+    if not _DRILLING_TERMS.search(query):
+        return None
+    scenario = DrillingScenario()
+    depth = _parse_depth(query)
+    if depth is None and "scenario" not in query.lower():
+        return None
+    if depth is not None:
+        scenario.depth_m = depth
+    lowered = query.lower()
+    for name in FORMATIONS:
+        if name in lowered:
+            scenario.formation = name
+            break
+    match = _GRADIENT.search(query)
+    if match:
+        scenario.geothermal_gradient_c_per_km = _number(match.group(1))
+    match = _FLOW.search(query)
+    if match:
+        value = _number(match.group(1))
+        scenario.flow_rate_lpm = value * 3.785 if match.group(2).lower() == "gpm" else value
+    match = _HOLE.search(query)
+    if match:
+        scenario.hole_diameter_m = _number(match.group(1)) * 0.0254
+    match = _ROP.search(query)
+    if match:
+        scenario.rop_m_per_hr = _number(match.group(1))
+    for match in _INJECTION.finditer(query):
+        if not _GRADIENT.match(query, match.start()):
+            scenario.injection_temperature_c = _number(match.group(1))
+            break
+    return scenario
+
+
+def _percent(match) -> float:
+    return _number(match.group(1) or match.group(2)) / 100.0
+
+
+def parse_rtcr_query(query: str) -> Optional[Dict[str, object]]:
+    """
+    Extract design_rtcr_experiment() arguments from a query, or None.
+
+    A query calls for the tool when it asks for an experiment on a lithology
+    or RTCR, or names RTCR kinetics with at least one condition (so "what is
+    RTCR?" is left to the knowledge base); unspecified inputs keep the tool's
+    defaults. Gas fractions are read as mol% of the water.
+    """
+    lowered = query.lower()
+    lithology = None
+    for name in LITHOLOGY_FE2:
+        if name in lowered:
+            lithology = name
+            break
+    experiment = _EXPERIMENT_TERMS.search(query) is not None
+    rtcr = _RTCR_TERMS.search(query) is not None
+    if not (experiment and (rtcr or lithology is not None)) and not rtcr:
+        return None
+    inputs: Dict[str, object] = {}
+    if lithology is not None:
+        inputs["lithology"] = lithology
+    match = _TEMPERATURE.search(query)
+    if match:
+        inputs["temperature_c"] = _number(match.group(1))
+    match = _PRESSURE.search(query)
+    if match:
+        inputs["pressure_mpa"] = _number(match.group(1))
+    match = _WATER_ROCK.search(query)
+    if match:
+        inputs["water_rock_ratio"] = _number(match.group(1))
+    match = _O2.search(query)
+    if match:
+        inputs["o2_fraction"] = _percent(match)
+    match = _CH4.search(query)
+    if match:
+        inputs["methane_fraction"] = _percent(match)
+    if not experiment and set(inputs) <= {"lithology"}:
+        return None
+    return inputs
+
+
+def parse_well_data_query(query: str, tables: List[str]) -> Optional[Dict[str, object]]:
+    """
+    Extract query_well_data() arguments from a query, or None.
+
+    A query calls for the tool when it names a table (any distinctive word of
+    its name, e.g. "iceland" for iceland-pilot-events) or asks about
+    recorded data in general, which then covers every table (up to
+    MAX_WELL_DATA_TABLES). Depth ranges ("between 2000 and 2500 m"),
+    intervals ("per 50 m"), thresholds ("above 500 °C") and event kinds
+    (stuck pipe, BOP, seal) narrow the query.
+    """
+    if not tables:
+        return None
+    lowered = query.lower()
+    words = set(re.findall(r"[a-z0-9]+", lowered))
+    named = [name for name in tables
+             if (set(re.split(r"[._-]", name)) - _NAME_STOPWORDS) & words]
+    if not named and not _WELL_DATA_TERMS.search(query):
+        return None
+    inputs: Dict[str, object] = {"tables": (named or tables)[:MAX_WELL_DATA_TABLES]}
+    match = _DEPTH_RANGE.search(query)
+    if match:
+        top, bottom = sorted((_number(match.group(1)), _number(match.group(2))))
+        inputs["depth_range"] = (top, bottom)
+    match = _INTERVAL.search(query)
+    if match:
+        inputs["interval_m"] = _number(match.group(1))
+    match = _ABOVE.search(query)
+    if match:
+        inputs["threshold_c"] = _number(match.group(1))
+    kinds = [kind for kind, pattern in _EVENT_KINDS if pattern.search(query)]
+    if kinds:
+        inputs["event_kinds"] = kinds
+    return inputs
+
+
+_DESIGNS: "OrderedDict[tuple, Tuple[str, Dict[str, object]]]" = OrderedDict()
+_DESIGNS_LOCK = threading.Lock()
+
+
+def _round_inputs(inputs: Dict[str, object]) -> Dict[str, object]:
+    return {k: float(f"{v:.{DESIGN_SIGNIFICANT_DIGITS}g}") if isinstance(v, float) else v
+            for k, v in inputs.items()}
+
+
+def run_rtcr_design(inputs: Dict[str, object]) -> Tuple[str, Dict[str, object]]:
+    """
+    Formatted design_rtcr_experiment() result and its summary data, memoized.
+
+    Raises:
+        ValueError: As design_rtcr_experiment()
+    """
+    inputs = _round_inputs(inputs)
+    key = tuple(sorted(inputs.items()))
+    with _DESIGNS_LOCK:
+        if key in _DESIGNS:
+            _DESIGNS.move_to_end(key)
+            return _DESIGNS[key]
+    design = design_rtcr_experiment(**inputs)
+    entry = format_rtcr_design(design), {
+        "runaway": design["simulation"].runaway.tolist(),
+        "expected_products": design["expected_products"],
+    }
+    with _DESIGNS_LOCK:
+        _DESIGNS[key] = entry
+        while len(_DESIGNS) > MAX_MEMOIZED_DESIGNS:
+            _DESIGNS.popitem(last=False)
+    return entry
+
+
+def run_tools(user_query: str) -> List[ToolResult]:
+    """
+    Run the native tools a query calls for.
+
+    Tool failures on unphysical inputs are reported to the LLM as results
+    rather than raised, so the answer can explain them. A query about
+    recorded well data is not also run as a hypothetical drilling scenario.
+    """
+    results = []
+    store = get_well_store()
+    request = parse_well_data_query(user_query, store.tables())
+    experiment = parse_rtcr_query(user_query)
+    if experiment is not None:
+        with stage("tools"):
+            try:
+                text, data = run_rtcr_design(experiment)
+            except ValueError as e:
+                results.append(ToolResult("design_rtcr_experiment", experiment, f"Not evaluated: {e}"))
+            else:
+                results.append(ToolResult("design_rtcr_experiment", experiment, text, data))
+    scenario = parse_drilling_query(user_query) if request is None else None
+    if scenario is not None:
+        with stage("tools"):
+            inputs = dict(vars(scenario))
+            try:
+                analysis = analyze_drilling_scenario(scenario)
+            except ValueError as e:
+                results.append(ToolResult("analyze_drilling_scenario", inputs, f"Not evaluated: {e}"))
+            else:
+                results.append(ToolResult(
+                    "analyze_drilling_scenario", inputs,
+                    format_drilling_analysis(analysis), analysis.to_dict()
+                ))
+    if request is not None:
+        with stage("tools"):
+            options = {k: v for k, v in request.items() if k != "tables"}
+            sections, reports = [], []
+            for name in request["tables"]:
+                try:
+                    report = query_well_data(store.open(name), **options)
+                except (KeyError, ValueError, OSError) as e:
+                    sections.append(f"Table {name}: not evaluated: {e}")
+                else:
+                    reports.append(report)
+                    sections.append(format_well_data(report))
+            results.append(ToolResult("query_well_data", request, "\n\n".join(sections), {"reports": reports}))
+    return results
+
+
+def render_tool_results(results: List[ToolResult]) -> str:
+    """The system prompt section for tool results ("" when there are none)."""
+    if not results:
+        return ""
+    sections = [TOOL_RESULTS_HEADER]
+    for result in results:
+        sections.append(f"\n[{result.name}]\n{result.text}")
+    return "\n".join(sections)
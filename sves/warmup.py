@@ -0,0 +1,138 @@
+"""
+Model warm-up at process start.
+
+The first request to a cold backend pays for loading the model (tens of
+seconds for a 70B model on Ollama) plus prefilling the whole system prompt.
+warm_up() sends one minimal generation (a single output token) with the
+static part of the system prompt (sves.agent.static_system_prompt) to every
+replica of the configured backend, so the model is loaded, and kept loaded
+per LLMConfig.model_keep_alive, and the shared prefix is in the server's
+prompt/KV cache before the first user asks.
+
+start_warm_up() runs it once per backend per process on a daemon thread;
+the UI calls it on start-up and the batch runner before its first row.
+
+Settings (environment):
+    SVES_WARMUP  "0" disables warm-up (default enabled)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+
+from sves.agent import static_system_prompt
+from sves.clients import PROVIDER_CLIENTS, backend_key
+from sves.config import LLMConfig
+from sves.metrics import get_metrics
+from sves.retrieval import RetrievalConfig
+
+
+WARMUP_QUERY = "Reply with OK."
+
+
+@dataclass
+class WarmupResult:
+    """Outcome of warming one replica."""
+    url: str
+    ok: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class Warmup:
+    """Progress of the warm-up of one backend."""
+    backend: str
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    results: List[WarmupResult] = field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def ok(self) -> bool:
+        return self.done and bool(self.results) and all(r.ok for r in self.results)
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+
+def _warm_replica(config: LLMConfig, system_prompt: str) -> WarmupResult:
+    client = PROVIDER_CLIENTS[config.provider](config)
+    start = time.perf_counter()
+    try:
+        client.generate(WARMUP_QUERY, system_prompt, [])
+    except Exception as e:
+        return WarmupResult(config.base_url, False, time.perf_counter() - start, str(e))
+    seconds = time.perf_counter() - start
+    get_metrics().observe("sves_warmup_duration_seconds", seconds, provider=config.provider.value)
+    return WarmupResult(config.base_url, True, seconds)
+
+
+def warm_up(config: LLMConfig, retrieval_config: Optional[RetrievalConfig] = None) -> List[WarmupResult]:
+    """
+    Load the model and prime the static prompt prefix on every replica.
+
+    Replicas are warmed in parallel and directly (not through admission
+    control or the failover chain); failures are reported, not raised.
+
+    Args:
+        config: Backend configuration (all replica_urls are warmed)
+        retrieval_config: Retrieval settings that determine the static prefix
+
+    Returns:
+        List[WarmupResult]: One result per replica
+    """
+    system_prompt = static_system_prompt(retrieval_config)
+    urls = config.replica_urls or [config.base_url]
+    replica_configs = [
+        replace(config, base_url=url, replica_urls=None, max_tokens=1, max_retries=0)
+        for url in urls
+    ]
+    with ThreadPoolExecutor(max_workers=len(replica_configs), thread_name_prefix="sves-warmup") as pool:
+        return list(pool.map(lambda c: _warm_replica(c, system_prompt), replica_configs))
+
+
+_WARMUPS: Dict[str, Warmup] = {}
+_WARMUPS_LOCK = threading.Lock()
+
+
+def start_warm_up(
+    config: LLMConfig, retrieval_config: Optional[RetrievalConfig] = None
+) -> Optional[Warmup]:
+    """
+    Warm a backend on a background thread, once per process.
+
+    Returns:
+        Warmup: Progress of the (possibly earlier) warm-up of this backend,
+        or None when disabled with SVES_WARMUP=0
+    """
+    if os.environ.get("SVES_WARMUP", "1") == "0":
+        return None
+    key = backend_key(config)
+    with _WARMUPS_LOCK:
+        warmup = _WARMUPS.get(key)
+        if warmup is not None:
+            return warmup
+        warmup = _WARMUPS[key] = Warmup(backend=key)
+
+    def run() -> None:
+        try:
+            warmup.results = warm_up(config, retrieval_config)
+        finally:
+            warmup.finished_at = time.time()
+
+    threading.Thread(target=run, name="sves-warmup", daemon=True).start()
+    return warmup
+
+
+def get_warmup(config: LLMConfig) -> Optional[Warmup]:
+    """Progress of a backend's warm-up, if one was started."""
+    with _WARMUPS_LOCK:
+        return _WARMUPS.get(backend_key(config))
@@ -0,0 +1,604 @@
+"""
+Thermophysical properties of water near and above the critical point.
+
+The drilling and RTCR tools (sves.drilling, sves.rtcr) need supercritical
+water (SCW) density, viscosity, heat capacity and ion product at arbitrary
+(T, P). Evaluating the reference equation of state means solving for the
+density at every point, so the properties are precomputed once on a dense
+(T, P) grid and served by vectorized interpolation:
+
+- density       IAPWS-95 (Wagner & Pruss 2002), solved for density at
+                (T, P); vapour below the saturation pressure, liquid above
+- heat capacity isobaric cp from IAPWS-95
+- viscosity     IAPWS 2008 (Huber et al. 2009) without the critical
+                enhancement, which matters only within ~0.1 K / 0.3 % of
+                the critical point
+- ion product   IAPWS R11-24 (Bandura & Lvov 2006), stored as pKw
+
+Grid: 100-1000 °C in 1 K steps by 0.5-100 MPa in 0.5 MPa steps, covering
+the 647.096 K / 22.064 MPa critical point, the Cosmos X-9 envelope and the
+RTCR reactor conditions. Density, cp and viscosity are tabulated as
+logarithms (they span orders of magnitude between vapour and liquid).
+Lookups are phase-aware: points whose interpolation stencil spans the
+saturation curve, points in the near-critical region (NEAR_CRITICAL_K /
+NEAR_CRITICAL_MPA, which covers the start of the pseudo-critical line) and
+points below 1 MPa are evaluated directly instead of interpolated.
+
+The tables are built on first use (about ten seconds) into the SVES cache root
+and memory-mapped from there by every process, including sweep workers;
+``python -m sves.water`` builds them ahead of time. TABLE_VERSION is part of
+the file name, so a changed grid or formulation rebuilds.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from sves.lazy import lazy_import
+from sves.paths import get_cache_dir
+
+np = lazy_import("numpy")  # Loaded on the first lookup
+
+
+CRITICAL_TEMPERATURE_K = 647.096
+CRITICAL_DENSITY = 322.0                     # kg/m³
+CRITICAL_PRESSURE_MPA = 22.064
+GAS_CONSTANT = 0.46151805                    # kJ/(kg K), IAPWS-95 specific gas constant
+MOLAR_MASS = 18.015268                       # g/mol
+KELVIN = 273.15
+
+TABLE_VERSION = "2"
+T_MIN_C, T_MAX_C, T_STEP_C = 100.0, 1000.0, 1.0
+P_MIN_MPA, P_MAX_MPA, P_STEP_MPA = 0.5, 100.0, 0.5
+PROPERTIES = ("density", "viscosity", "heat_capacity", "pkw")
+_LOG_PROPERTIES = ("density", "viscosity", "heat_capacity")
+# Region around the critical point (and the pseudo-critical line just above
+# it) where lookups evaluate the formulations directly: below/above Tc and Pc
+NEAR_CRITICAL_K = (10.0, 25.0)
+NEAR_CRITICAL_MPA = (3.0, 8.0)
+
+# --- IAPWS-95 -----------------------------------------------------------------
+
+_IDEAL_N = (-8.3204464837497, 6.6832105275932, 3.00632)
+_IDEAL_EXP_N = (0.012436, 0.97315, 1.27950, 0.96956, 0.24873)
+_IDEAL_EXP_GAMMA = (1.28728967, 3.53734222, 7.74073708, 9.24437796, 27.5075105)
+
+# Terms 1-51: n, d, t, c (c = 0 for the polynomial terms 1-7)
+_RESIDUAL = (
+    (0.12533547935523e-1, 1, -0.5, 0), (0.78957634722828e1, 1, 0.875, 0),
+    (-0.87803203303561e1, 1, 1.0, 0), (0.31802509345418, 2, 0.5, 0),
+    (-0.26145533859358, 2, 0.75, 0), (-0.78199751687981e-2, 3, 0.375, 0),
+    (0.88089493102134e-2, 4, 1.0, 0),
+    (-0.66856572307965, 1, 4, 1), (0.20433810950965, 1, 6, 1),
+    (-0.66212605039687e-4, 1, 12, 1), (-0.19232721156002, 2, 1, 1),
+    (-0.25709043003438, 2, 5, 1), (0.16074868486251, 3, 4, 1),
+    (-0.40092828925807e-1, 4, 2, 1), (0.39343422603254e-6, 4, 13, 1),
+    (-0.75941377088144e-5, 5, 9, 1), (0.56250979351888e-3, 7, 3, 1),
+    (-0.15608652257135e-4, 9, 4, 1), (0.11537996422951e-8, 10, 11, 1),
+    (0.36582165144204e-6, 11, 4, 1), (-0.13251180074668e-11, 13, 13, 1),
+    (-0.62639586912454e-9, 15, 1, 1),
+    (-0.10793600908932, 1, 7, 2), (0.17611491008752e-1, 2, 1, 2),
+    (0.22132295167546, 2, 9, 2), (-0.40247669763528, 2, 10, 2),
+    (0.58083399985759, 3, 10, 2), (0.49969146990806e-2, 4, 3, 2),
+    (-0.31358700712549e-1, 4, 7, 2), (-0.74315929710341, 4, 10, 2),
+    (0.47807329915480, 5, 10, 2), (0.20527940895948e-1, 6, 6, 2),
+    (-0.13636435110343, 6, 10, 2), (0.14180634400617e-1, 7, 10, 2),
+    (0.83326504880713e-2, 9, 1, 2), (-0.29052336009585e-1, 9, 2, 2),
+    (0.38615085574206e-1, 9, 3, 2), (-0.20393486513704e-1, 9, 4, 2),
+    (-0.16554050063734e-2, 9, 8, 2), (0.19955571979541e-2, 10, 6, 2),
+    (0.15870308324157e-3, 10, 9, 2), (-0.16388568342530e-4, 12, 8, 2),
+    (0.43613615723811e-1, 3, 16, 3), (0.34994005463765e-1, 4, 22, 3),
+    (-0.76788197844621e-1, 4, 23, 3), (0.22446277332006e-1, 5, 23, 3),
+    (-0.62689710414685e-4, 14, 10, 4),
+    (-0.55711118565645e-9, 3, 50, 6), (-0.19905718354408, 6, 44, 6),
+    (0.31777497330738, 6, 46, 6), (-0.11841182425981, 6, 50, 6),
+)
+# Terms 52-54: n, d, t, alpha, beta, gamma, epsilon
+_GAUSSIAN = (
+    (-0.31306260323435e2, 3, 0, 20, 150, 1.21, 1),
+    (0.31546140237781e2, 3, 1, 20, 150, 1.21, 1),
+    (-0.25213154341695e4, 3, 4, 20, 250, 1.25, 1),
+)
+# Terms 55-56: n, a, b, B, C, D, A, beta
+_NONANALYTIC = (
+    (-0.14874640856724, 3.5, 0.85, 0.2, 28, 700, 0.32, 0.3),
+    (0.31806110878444, 3.5, 0.95, 0.2, 32, 800, 0.32, 0.3),
+)
+
+# Saturation line (Wagner & Pruss auxiliary equations), used to pick the phase
+_PSAT_A = (-7.85951783, 1.84408259, -11.7866497, 22.6807411, -15.9618719, 1.80122502)
+_RHO_LIQ_B = (1.99274064, 1.09965342, -0.510839303, -1.75493479, -45.5170352, -6.74694450e5)
+_RHO_VAP_C = (-2.03150240, -2.68302940, -5.38626492, -17.2991605, -44.7586581, -63.9201063)
+
+# --- IAPWS 2008 viscosity -----------------------------------------------------
+
+_VISCOSITY_H0 = (1.67752, 2.20462, 0.6366564, -0.241605)
+_VISCOSITY_H1 = (   # H1[i][j], i = 0..5 (temperature), j = 0..6 (density)
+    (5.20094e-1, 2.22531e-1, -2.81378e-1, 1.61913e-1, -3.25372e-2, 0.0, 0.0),
+    (8.50895e-2, 9.99115e-1, -9.06851e-1, 2.57399e-1, 0.0, 0.0, 0.0),
+    (-1.08374, 1.88797, -7.72479e-1, 0.0, 0.0, 0.0, 0.0),
+    (-2.89555e-1, 1.26613, -4.89837e-1, 0.0, 6.98452e-2, 0.0, -4.35673e-3),
+    (0.0, 0.0, -2.57040e-1, 0.0, 0.0, 8.72102e-3, 0.0),
+    (0.0, 1.20573e-1, 0.0, 0.0, 0.0, 0.0, -5.93264e-4),
+)
+
+# --- IAPWS R11-24 ion product -------------------------------------------------
+
+_KW_N = 6
+_KW_ALPHA = (-0.864671, 8659.19, -22786.2)
+_KW_BETA = (0.642044, -56.8534, -0.375754)
+_KW_GAMMA = (0.61415, 48251.33, -67707.93, 10102100.0)
+
+
+def _residual_terms(delta, tau):
+    """
+    Residual Helmholtz energy and its derivatives (IAPWS-95 terms 1-54).
+
+    Returns phi, phi_d, phi_dd, phi_t, phi_tt, phi_dt (arrays shaped like delta).
+    """
+    n, d, t, c = (np.array(column, dtype=np.float64)[:, None] for column in zip(*_RESIDUAL))
+    delta = delta[None, :]
+    tau = tau[None, :]
+    dc = np.where(c > 0, delta ** c, 0.0)
+    e = np.where(c > 0, np.exp(-dc), 1.0)
+    base = n * delta ** d * tau ** t * e
+    # Derivatives of ln(term) w.r.t. delta: (d - c delta^c) / delta
+    g = (d - c * dc) / delta
+    g_d = (-d - c * (c - 1.0) * dc) / delta ** 2
+    phi = base.sum(axis=0)
+    phi_d = (base * g).sum(axis=0)
+    phi_dd = (base * (g * g + g_d)).sum(axis=0)
+    phi_t = (base * t / tau).sum(axis=0)
+    phi_tt = (base * t * (t - 1.0) / tau ** 2).sum(axis=0)
+    phi_dt = (base * g * t / tau).sum(axis=0)
+
+    n, d, t, alpha, beta, gamma, eps = (np.array(column, dtype=np.float64)[:, None] for column in zip(*_GAUSSIAN))
+    base = n * delta ** d * tau ** t * np.exp(-alpha * (delta - eps) ** 2 - beta * (tau - gamma) ** 2)
+    g = d / delta - 2.0 * alpha * (delta - eps)
+    g_d = -d / delta ** 2 - 2.0 * alpha
+    h = t / tau - 2.0 * beta * (tau - gamma)
+    h_t = -t / tau ** 2 - 2.0 * beta
+    phi = phi + base.sum(axis=0)
+    phi_d = phi_d + (base * g).sum(axis=0)
+    phi_dd = phi_dd + (base * (g * g + g_d)).sum(axis=0)
+    phi_t = phi_t + (base * h).sum(axis=0)
+    phi_tt = phi_tt + (base * (h * h + h_t)).sum(axis=0)
+    phi_dt = phi_dt + (base * g * h).sum(axis=0)
+    return phi, phi_d, phi_dd, phi_t, phi_tt, phi_dt
+
+
+def _nonanalytic(delta, tau):
+    """IAPWS-95 terms 55-56 (complex-safe, for complex-step differentiation)."""
+    total = 0.0
+    for n, a, b, big_b, c, d, big_a, beta in _NONANALYTIC:
+        sq = (delta - 1.0) ** 2
+        theta = (1.0 - tau) + big_a * sq ** (1.0 / (2.0 * beta))
+        dist = theta ** 2 + big_b * sq ** a
+        psi = np.exp(-c * sq - d * (tau - 1.0) ** 2)
+        total = total + n * dist ** b * delta * psi
+    return total
+
+
+def _nonanalytic_terms(delta, tau, step: float = 1e-20, fd: float = 1e-5):
+    """
+    Terms 55-56 and their derivatives.
+
+    First derivatives by complex step (exact to rounding), second
+    derivatives by central differences of those. The terms only matter
+    near the critical point and are singular exactly at delta = 1, which is
+    nudged off.
+    """
+    delta = np.where(np.abs(delta - 1.0) < 1e-9, 1.0 + 1e-9, delta).astype(np.complex128)
+    tau = tau.astype(np.complex128)
+
+    def d_delta(dl, tu):
+        return np.imag(_nonanalytic(dl + 1j * step, tu)) / step
+
+    def d_tau(dl, tu):
+        return np.imag(_nonanalytic(dl, tu + 1j * step)) / step
+
+    phi = np.real(_nonanalytic(delta, tau))
+    phi_d = d_delta(delta, tau)
+    phi_t = d_tau(delta, tau)
+    phi_dd = (d_delta(delta + fd, tau) - d_delta(delta - fd, tau)) / (2.0 * fd)
+    phi_tt = (d_tau(delta, tau + fd) - d_tau(delta, tau - fd)) / (2.0 * fd)
+    phi_dt = (d_delta(delta, tau + fd) - d_delta(delta, tau - fd)) / (2.0 * fd)
+    return phi, phi_d, phi_dd, phi_t, phi_tt, phi_dt
+
+
+def _residual(delta, tau):
+    """All IAPWS-95 residual derivatives: (phi, phi_d, phi_dd, phi_t, phi_tt, phi_dt)."""
+    regular = _residual_terms(delta, tau)
+    singular = _nonanalytic_terms(delta, tau)
+    return tuple(a + b for a, b in zip(regular, singular))
+
+
+def _ideal_tt(tau):
+    """Second tau derivative of the ideal-gas Helmholtz energy."""
+    total = -_IDEAL_N[2] / tau ** 2
+    for n, gamma in zip(_IDEAL_EXP_N, _IDEAL_EXP_GAMMA):
+        e = np.exp(-gamma * tau)
+        total = total - n * gamma ** 2 * e / (1.0 - e) ** 2
+    return total
+
+
+def pressure_mpa(density, temperature_k):
+    """IAPWS-95 pressure (MPa) from density (kg/m³) and temperature (K)."""
+    density = np.asarray(density, dtype=np.float64)
+    temperature_k = np.asarray(temperature_k, dtype=np.float64)
+    delta, tau = np.broadcast_arrays(density / CRITICAL_DENSITY, CRITICAL_TEMPERATURE_K / temperature_k)
+    shape = delta.shape
+    _, phi_d, _, _, _, _ = _residual(delta.ravel(), tau.ravel())
+    return (density * GAS_CONSTANT * temperature_k * (1.0 + delta * phi_d.reshape(shape))) / 1000.0
+
+
+def isobaric_heat_capacity(density, temperature_k):
+    """IAPWS-95 cp (kJ/(kg K)) from density (kg/m³) and temperature (K)."""
+    delta, tau = np.broadcast_arrays(np.asarray(density, dtype=np.float64) / CRITICAL_DENSITY,
+                                     CRITICAL_TEMPERATURE_K / np.asarray(temperature_k, dtype=np.float64))
+    shape = delta.shape
+    delta, tau = delta.ravel(), tau.ravel()
+    _, phi_d, phi_dd, _, phi_tt, phi_dt = _residual(delta, tau)
+    cv = -tau ** 2 * (_ideal_tt(tau) + phi_tt)
+    numerator = (1.0 + delta * phi_d - delta * tau * phi_dt) ** 2
+    cp = cv + numerator / (1.0 + 2.0 * delta * phi_d + delta ** 2 * phi_dd)
+    return (GAS_CONSTANT * cp).reshape(shape)
+
+
+def saturation_pressure_mpa(temperature_k):
+    """Vapour pressure (Wagner & Pruss auxiliary equation); NaN above the critical point."""
+    t = np.asarray(temperature_k, dtype=np.float64)
+    theta = 1.0 - t / CRITICAL_TEMPERATURE_K
+    theta_safe = np.maximum(theta, 0.0)
+    a = _PSAT_A
+    series = (a[0] * theta_safe + a[1] * theta_safe ** 1.5 + a[2] * theta_safe ** 3
+              + a[3] * theta_safe ** 3.5 + a[4] * theta_safe ** 4 + a[5] * theta_safe ** 7.5)
+    return np.where(theta > 0, CRITICAL_PRESSURE_MPA * np.exp(CRITICAL_TEMPERATURE_K / t * series), np.nan)
+
+
+def _saturated_densities(temperature_k):
+    """Approximate saturated liquid and vapour densities (auxiliary equations)."""
+    theta = np.maximum(1.0 - np.asarray(temperature_k, dtype=np.float64) / CRITICAL_TEMPERATURE_K, 0.0)
+    b, c = _RHO_LIQ_B, _RHO_VAP_C
+    liquid = CRITICAL_DENSITY * (1.0 + b[0] * theta ** (1 / 3) + b[1] * theta ** (2 / 3) + b[2] * theta ** (5 / 3)
+                                 + b[3] * theta ** (16 / 3) + b[4] * theta ** (43 / 3) + b[5] * theta ** (110 / 3))
+    vapour = CRITICAL_DENSITY * np.exp(c[0] * theta ** (2 / 6) + c[1] * theta ** (4 / 6) + c[2] * theta ** (8 / 6)
+                                       + c[3] * theta ** (18 / 6) + c[4] * theta ** (37 / 6)
+                                       + c[5] * theta ** (71 / 6))
+    return liquid, vapour
+
+
+def solve_density(temperature_k, pressure, iterations: int = 200, tol: float = 1e-10):
+    """
+    IAPWS-95 density (kg/m³) at temperature (K) and pressure (MPa), vectorized.
+
+    Safeguarded Newton iteration on a bracket that contains a single root:
+    above the critical temperature the isotherm is monotonic; below it the
+    liquid branch is searched above the saturation pressure and the vapour
+    branch below it.
+    """
+    t, p = np.broadcast_arrays(np.asarray(temperature_k, dtype=np.float64),
+                               np.asarray(pressure, dtype=np.float64))
+    shape = t.shape
+    t, p = t.ravel().copy(), p.ravel().copy()
+    liquid_sat, vapour_sat = _saturated_densities(t)
+    subcritical = t < CRITICAL_TEMPERATURE_K
+    liquid = subcritical & (p >= saturation_pressure_mpa(np.minimum(t, CRITICAL_TEMPERATURE_K - 1e-9)))
+    low = np.where(liquid, liquid_sat * 0.999, 1e-6)
+    high = np.where(subcritical & ~liquid, vapour_sat * 1.001, 1400.0)
+    # Start: ideal gas for vapour and supercritical gas-like states, the bracket top otherwise
+    rho = np.where(liquid, high, np.clip(p * 1000.0 / (GAS_CONSTANT * t), low, high))
+
+    active = np.ones(t.shape, dtype=bool)
+    for _ in range(iterations):
+        idx = np.nonzero(active)[0]
+        if not idx.size:
+            break
+        r, tt, pp = rho[idx], t[idx], p[idx]
+        delta, tau = r / CRITICAL_DENSITY, CRITICAL_TEMPERATURE_K / tt
+        _, phi_d, phi_dd, _, _, _ = _residual(delta, tau)
+        rt = GAS_CONSTANT * tt / 1000.0
+        f = r * rt * (1.0 + delta * phi_d) - pp
+        dfdr = rt * (1.0 + 2.0 * delta * phi_d + delta ** 2 * phi_dd)
+        # Keep the bracket around the root (pressure increases with density on the branch)
+        lo, hi = low[idx], high[idx]
+        lo = np.where(f < 0, r, lo)
+        hi = np.where(f > 0, r, hi)
+        step = np.where(dfdr > 0, f / np.where(dfdr > 0, dfdr, 1.0), np.inf)
+        candidate = r - step
+        bisect = ~np.isfinite(candidate) | (candidate <= lo) | (candidate >= hi)
+        new = np.where(bisect, 0.5 * (lo + hi), candidate)
+        # A converged point keeps its density: at the root the Newton step is
+        # below rounding, lands on the bracket edge and would otherwise bisect
+        converged = np.abs(f) <= tol * pp
+        new = np.where(converged, r, new)
+        low[idx], high[idx], rho[idx] = lo, hi, new
+        done = converged | (np.abs(new - r) <= tol * new)
+        active[idx[done]] = False
+    return rho.reshape(shape)
+
+
+def viscosity_pa_s(density, temperature_k):
+    """IAPWS 2008 viscosity (Pa s) without the critical enhancement."""
+    t_bar = np.asarray(temperature_k, dtype=np.float64) / CRITICAL_TEMPERATURE_K
+    rho_bar = np.asarray(density, dtype=np.float64) / CRITICAL_DENSITY
+    mu0 = 100.0 * np.sqrt(t_bar) / sum(h / t_bar ** i for i, h in enumerate(_VISCOSITY_H0))
+    total = 0.0
+    for i, row in enumerate(_VISCOSITY_H1):
+        for j, h in enumerate(row):
+            if h:
+                total = total + h * (1.0 / t_bar - 1.0) ** i * (rho_bar - 1.0) ** j
+    mu1 = np.exp(rho_bar * total)
+    return mu0 * mu1 * 1e-6
+
+
+def ion_product_pkw(density, temperature_k):
+    """IAPWS R11-24 ionization constant of water, pKw = -log10(Kw / (mol/kg)²)."""
+    t = np.asarray(temperature_k, dtype=np.float64)
+    rho = np.asarray(density, dtype=np.float64) / 1000.0   # g/cm³
+    a, b, g = _KW_ALPHA, _KW_BETA, _KW_GAMMA
+    q = rho * np.exp(a[0] + a[1] / t + a[2] / t ** 2 * rho ** (2.0 / 3.0))
+    pkw_gas = g[0] + g[1] / t + g[2] / t ** 2 + g[3] / t ** 3
+    return (-2.0 * _KW_N * (np.log10(1.0 + q) - q / (q + 1.0) * rho * (b[0] + b[1] / t + b[2] * rho))
+            + pkw_gas + 2.0 * np.log10(MOLAR_MASS / 1000.0))
+
+
+# --- Tables -------------------------------------------------------------------
+
+def grid_axes():
+    """Temperature (°C) and pressure (MPa) axes of the property tables."""
+    temperature = T_MIN_C + T_STEP_C * np.arange(int(round((T_MAX_C - T_MIN_C) / T_STEP_C)) + 1)
+    pressure = P_MIN_MPA + P_STEP_MPA * np.arange(int(round((P_MAX_MPA - P_MIN_MPA) / P_STEP_MPA)) + 1)
+    return temperature, pressure
+
+
+def compute_properties(temperature_c, pressure_mpa) -> Dict[str, "np.ndarray"]:
+    """
+    Evaluate the reference formulations directly (no tables), vectorized.
+
+    Slow (an iterative density solve per point); used to build the tables
+    and to check them.
+    """
+    t_k = np.asarray(temperature_c, dtype=np.float64) + KELVIN
+    density = solve_density(t_k, pressure_mpa)
+    return {
+        "density": density,
+        "viscosity": viscosity_pa_s(density, t_k),
+        "heat_capacity": isobaric_heat_capacity(density, t_k),
+        "pkw": ion_product_pkw(density, t_k),
+    }
+
+
+def build_tables(path: str, chunk_rows: int = 50) -> None:
+    """Compute the property grid and write it atomically to ``path`` (.npy)."""
+    temperature, pressure = grid_axes()
+    tables = np.empty((len(PROPERTIES), len(temperature), len(pressure)))
+    for start in range(0, len(temperature), chunk_rows):
+        t, p = np.meshgrid(temperature[start:start + chunk_rows], pressure, indexing="ij")
+        values = compute_properties(t, p)
+        for k, name in enumerate(PROPERTIES):
+            column = values[name]
+            tables[k, start:start + chunk_rows] = np.log(column) if name in _LOG_PROPERTIES else column
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npy.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, tables)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _phase(temperature_c, pressure_mpa):
+    """+1 for liquid, -1 for vapour and 0 for supercritical temperatures."""
+    t_k = np.asarray(temperature_c, dtype=np.float64) + KELVIN
+    subcritical = t_k < CRITICAL_TEMPERATURE_K
+    p_sat = saturation_pressure_mpa(np.minimum(t_k, CRITICAL_TEMPERATURE_K - 1e-9))
+    return np.where(subcritical, np.where(pressure_mpa >= p_sat, 1, -1), 0).astype(np.int8)
+
+
+def _mixed_phase_cells(phase, offsets):
+    """
+    Flag grid cells whose stencil (``offsets`` from the cell's lower node on
+    both axes, clamped at the edges) contains both liquid and vapour nodes.
+
+    A point can only differ in phase from all of its stencil if the
+    saturation curve crosses its own cell, which then has nodes of both
+    phases, so the flag covers the point too.
+    """
+    n_t, n_p = phase.shape
+    rows = np.clip(np.arange(n_t - 1)[:, None] + np.asarray(list(offsets))[None, :], 0, n_t - 1)
+    cols = np.clip(np.arange(n_p - 1)[:, None] + np.asarray(list(offsets))[None, :], 0, n_p - 1)
+    liquid = np.zeros((n_t - 1, n_p - 1), dtype=bool)
+    vapour = np.zeros((n_t - 1, n_p - 1), dtype=bool)
+    for i in range(rows.shape[1]):
+        for j in range(cols.shape[1]):
+            node = phase[rows[:, i][:, None], cols[:, j][None, :]]
+            liquid |= node > 0
+            vapour |= node < 0
+    return liquid & vapour
+
+
+def _near_critical(temperature_c, pressure_mpa):
+    """Points whose properties vary too steeply near the critical point for the grid."""
+    dt = np.asarray(temperature_c) + KELVIN - CRITICAL_TEMPERATURE_K
+    dp = np.asarray(pressure_mpa) - CRITICAL_PRESSURE_MPA
+    return ((dt >= -NEAR_CRITICAL_K[0]) & (dt <= NEAR_CRITICAL_K[1])
+            & (dp >= -NEAR_CRITICAL_MPA[0]) & (dp <= NEAR_CRITICAL_MPA[1]))
+
+
+def _keys_weights(x):
+    """Keys cubic convolution weights (a = -0.5) for fractional offsets x, shape (4, ...)."""
+    a = -0.5
+
+    def near(s):                     # |s| <= 1
+        return (a + 2.0) * s ** 3 - (a + 3.0) * s ** 2 + 1.0
+
+    def far(s):                      # 1 < |s| < 2
+        return a * s ** 3 - 5.0 * a * s ** 2 + 8.0 * a * s - 4.0 * a
+
+    return np.stack([far(1.0 + x), near(x), near(1.0 - x), far(2.0 - x)])
+
+
+class WaterProperties:
+    """Memory-mapped property tables with vectorized interpolation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temperature_c, self.pressure_mpa = grid_axes()
+        self._tables = np.load(path, mmap_mode="r")
+        expected = (len(PROPERTIES), len(self.temperature_c), len(self.pressure_mpa))
+        if self._tables.shape != expected:
+            raise ValueError(f"{path} has shape {self._tables.shape}, expected {expected}")
+        # Cells whose interpolation stencil mixes liquid and vapour nodes, per method
+        phase = _phase(self.temperature_c[:, None], self.pressure_mpa[None, :])
+        self._straddles = {"linear": _mixed_phase_cells(phase, range(2)),
+                           "cubic": _mixed_phase_cells(phase, range(-1, 3))}
+
+    def lookup(self, temperature_c, pressure_mpa, properties=PROPERTIES,
+               method: str = "cubic") -> Dict[str, "np.ndarray"]:
+        """
+        Interpolate properties at arrays of (T, P) points.
+
+        Args:
+            temperature_c: Temperatures (°C), any shape
+            pressure_mpa: Pressures (MPa), broadcastable against the temperatures
+            properties: Names from PROPERTIES
+            method: "linear" (bilinear) or "cubic" (bicubic convolution)
+
+        Returns:
+            Dict of property -> array in the broadcast shape: density kg/m³,
+            viscosity Pa s, heat_capacity kJ/(kg K), pkw. Points outside the
+            grid are NaN. Points where interpolation would cross the phase
+            boundary or the near-critical region are evaluated directly
+            (compute_properties()), which is slower but exact.
+        """
+        if method not in ("linear", "cubic"):
+            raise ValueError(f"Unknown interpolation method {method!r}")
+        t, p = np.broadcast_arrays(np.asarray(temperature_c, dtype=np.float64),
+                                   np.asarray(pressure_mpa, dtype=np.float64))
+        shape = t.shape
+        t, p = t.ravel(), p.ravel()
+        n_t, n_p = len(self.temperature_c), len(self.pressure_mpa)
+        inside = (t >= T_MIN_C) & (t <= T_MAX_C) & (p >= P_MIN_MPA) & (p <= P_MAX_MPA)
+        ft = np.clip((t - T_MIN_C) / T_STEP_C, 0.0, n_t - 1.0)
+        fp = np.clip((p - P_MIN_MPA) / P_STEP_MPA, 0.0, n_p - 1.0)
+        it = np.minimum(ft.astype(np.int64), n_t - 2)
+        ip = np.minimum(fp.astype(np.int64), n_p - 2)
+        xt, xp = ft - it, fp - ip
+        if method == "linear":
+            offsets = np.arange(2)
+            wt = np.stack([1.0 - xt, xt])
+            wp = np.stack([1.0 - xp, xp])
+        else:
+            offsets = np.arange(-1, 3)
+            wt, wp = _keys_weights(xt), _keys_weights(xp)
+        # Neighbour indices, clamped at the edges: (n_offsets, n_points)
+        rows = np.clip(it[None, :] + offsets[:, None], 0, n_t - 1)
+        cols = np.clip(ip[None, :] + offsets[:, None], 0, n_p - 1)
+
+        # Evaluated directly: stencils that mix liquid and vapour nodes, the
+        # near-critical region, and the lowest pressure cell, where vapour
+        # density scales with pressure too steeply for the grid
+        direct = inside & (self._straddles[method][it, ip] | _near_critical(t, p)
+                           | (p < P_MIN_MPA + P_STEP_MPA))
+        exact = compute_properties(t[direct], p[direct]) if direct.any() else None
+
+        result = {}
+        for name in properties:
+            table = self._tables[PROPERTIES.index(name)]
+            patch = table[rows[:, None, :], cols[None, :, :]]         # (n_off, n_off, n_points)
+            value = np.einsum("ik,jk,ijk->k", wt, wp, patch)
+            if name in _LOG_PROPERTIES:
+                value = np.exp(value)
+            if exact is not None:
+                value[direct] = exact[name]
+            result[name] = np.where(inside, value, np.nan).reshape(shape)
+        return result
+
+    def density(self, temperature_c, pressure_mpa):
+        """Density (kg/m³)."""
+        return self.lookup(temperature_c, pressure_mpa, ("density",))["density"]
+
+    def viscosity_cp(self, temperature_c, pressure_mpa):
+        """Dynamic viscosity (cP = mPa s)."""
+        return self.lookup(temperature_c, pressure_mpa, ("viscosity",))["viscosity"] * 1e3
+
+    def heat_capacity(self, temperature_c, pressure_mpa):
+        """Isobaric heat capacity (kJ/(kg K))."""
+        return self.lookup(temperature_c, pressure_mpa, ("heat_capacity",))["heat_capacity"]
+
+    def pkw(self, temperature_c, pressure_mpa):
+        """Ion product, -log10 Kw."""
+        return self.lookup(temperature_c, pressure_mpa, ("pkw",))["pkw"]
+
+
+_WATER: Optional[WaterProperties] = None
+_WATER_LOCK = threading.Lock()
+
+
+def table_path() -> str:
+    """Location of the property tables under the SVES cache root."""
+    return os.path.join(get_cache_dir("water"), f"iapws-v{TABLE_VERSION}.npy")
+
+
+def get_water_properties() -> WaterProperties:
+    """Return the process-wide property tables, building them on first use."""
+    global _WATER
+    if _WATER is None:
+        with _WATER_LOCK:
+            if _WATER is None:
+                path = table_path()
+                if not os.path.exists(path):
+                    build_tables(path)
+                _WATER = WaterProperties(path)
+    return _WATER
+
+
+_PRELOAD_STARTED = False
+
+
+def preload_water_properties() -> None:
+    """Load (building if needed) the tables in a background thread, once per process."""
+    global _PRELOAD_STARTED
+    with _WATER_LOCK:
+        if _PRELOAD_STARTED or _WATER is not None:
+            return
+        _PRELOAD_STARTED = True
+    threading.Thread(target=get_water_properties, name="sves-water-preload", daemon=True).start()
+
+
+def main(argv=None) -> int:
+    """Build the property tables (or rebuild them with --force) and spot-check them."""
+    parser = argparse.ArgumentParser(prog="python -m sves.water", description=main.__doc__)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the tables exist")
+    args = parser.parse_args(argv)
+    path = table_path()
+    if args.force or not os.path.exists(path):
+        started = time.perf_counter()
+        build_tables(path)
+        sys.stderr.write(f"Built {path} in {time.perf_counter() - started:.1f}s\n")
+    water = get_water_properties()
+    checks = {
+        "supercritical": ([380.3, 400.7, 425.4, 450.6, 500.2, 650.9],   # Off the grid nodes
+                          [30.2, 25.3, 25.1, 28.3, 30.4, 60.7]),
+        # Across the saturation curve and at the critical point
+        "near-critical": ([374.2, 200.0, 300.0, 370.4, 360.1, 380.6],
+                          [22.2, 1.7, 8.8, 21.3, 18.7, 24.3]),
+    }
+    for label, (t, p) in checks.items():
+        t, p = np.array(t), np.array(p)
+        exact = compute_properties(t, p)
+        table = water.lookup(t, p)
+        for name in PROPERTIES:
+            error = np.max(np.abs(table[name] / exact[name] - 1.0))
+            sys.stdout.write(f"{name:14s} max relative error {error:.2e} at the {label} check points\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,850 @@
+"""
+Columnar on-disk store for historical well and pilot-test data.
+
+Recorded runs (the Iceland pilot ROP logs, stuck-pipe events, BOP seal
+incidents) are kept as tables under the store root, one directory each:
+
+    meta.json      Schema, row count, block size, time and depth columns
+    <column>.col   Raw little-endian values of one column
+    index.npy      Per-block min/max of the time and depth columns,
+                   ``(n_blocks, 2, 2)`` float64
+
+Columns are memory-mapped when read, so a query only pages in the columns
+it uses, and only the blocks (BLOCK_ROWS rows) whose index range overlaps
+the requested time and depth ranges. Aggregates stream over the surviving
+blocks in chunks of SCAN_BLOCKS and never load a whole column. String
+columns are dictionary-encoded (uint16 codes; categories in meta.json).
+
+Rows are appended in time order. An append writes the column files and
+the index first and publishes the new rows by atomically replacing
+meta.json, so concurrent readers never see a partial append; one writer
+per table at a time is assumed.
+
+Queries (sves.tools runs them as the query_well_data tool):
+    summarize()          Count/min/max/mean of numeric columns
+    rop_by_interval()    Footage, drilling hours and ROP per depth interval
+    excursions()         Periods a column stayed above a threshold
+    events()             Rows of an event table, filtered by kind
+
+Settings (environment):
+    SVES_WELL_DATA   Store directory (default <cache root>/welldata)
+
+Usage:
+    python -m sves.welldata import iceland-pilot pilot_rop.csv --description "Iceland pilot, well IP-1"
+    python -m sves.welldata list
+    python -m sves.welldata rop iceland-pilot --interval 100 --depth 2000:3000
+    python -m sves.welldata excursions iceland-pilot --threshold 550
+    python -m sves.welldata events iceland-pilot-events --kind stuck
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sves.drilling import BHCT_RANGE_C
+from sves.lazy import lazy_import
+from sves.paths import get_cache_dir
+from sves.telemetry import parse_numbers, parse_timestamps
+
+np = lazy_import("numpy")  # Loaded when a table is opened
+
+
+FORMAT_VERSION = 1
+BLOCK_ROWS = 4096
+SCAN_BLOCKS = 64
+MAX_GAP_S = 3600.0          # Longer gaps between samples are not drilling time
+CATEGORY = "category"
+KINDS = ("log", "events")   # Time-series log (ROP, excursions) or event list
+INTERVALS_M = (10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+MAX_INTERVALS = 20
+VERSION_FILE = ".version"   # Touched by every create() and append() (see WellStore.fingerprint())
+RACY_NS = 1_000_000_000     # A version stamp this recent may hide a later change
+
+Range = Optional[Tuple[float, float]]
+
+_NAME = re.compile(r"^[a-z0-9][a-z0-9._-]*$")
+_NUMERIC = ("<f8", "<f4", "<i8", "<i4", "<u2")
+
+
+def _atomic_write(path: str, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+class WellTable:
+    """Read access to one table: memory-mapped columns and block pruning."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.name: str = self.meta["name"]
+        self.rows: int = self.meta["rows"]
+        self.block_rows: int = self.meta["block_rows"]
+        self.time_column: str = self.meta["time_column"]
+        self.depth_column: Optional[str] = self.meta.get("depth_column")
+        self.kind: str = self.meta.get("kind", "log")
+        n_blocks = -(-self.rows // self.block_rows)
+        index_path = os.path.join(path, "index.npy")
+        self.index = np.load(index_path)[:n_blocks] if n_blocks else np.empty((0, 2, 2))
+        self._maps: Dict[str, "np.ndarray"] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta["columns"])
+
+    def column_dtype(self, name: str) -> str:
+        return self.meta["columns"][name]["dtype"]
+
+    def unit(self, name: str) -> str:
+        return self.meta["columns"][name].get("unit", "")
+
+    def column(self, name: str) -> "np.ndarray":
+        """The whole column, memory-mapped (category columns as codes)."""
+        array = self._maps.get(name)
+        if array is None:
+            dtype = "<u2" if self.column_dtype(name) == CATEGORY else self.column_dtype(name)
+            if self.rows:
+                array = np.memmap(os.path.join(self.path, f"{name}.col"), dtype=dtype, mode="r", shape=(self.rows,))
+            else:
+                array = np.empty(0, dtype=dtype)
+            self._maps[name] = array
+        return array
+
+    def categories(self, name: str) -> List[str]:
+        return self.meta["columns"][name].get("categories", [])
+
+    def decode(self, name: str, codes: "np.ndarray") -> "np.ndarray":
+        """Strings of a category column's codes."""
+        return np.asarray(self.categories(name), dtype=object)[codes]
+
+    def extent(self, which: int) -> Tuple[float, float]:
+        """(min, max) of the time (0) or depth (1) column, from the block index."""
+        if not len(self.index):
+            return float("nan"), float("nan")
+        return float(np.nanmin(self.index[:, which, 0])), float(np.nanmax(self.index[:, which, 1]))
+
+    def candidate_blocks(self, time_range: Range = None, depth_range: Range = None) -> "np.ndarray":
+        """Indices of the blocks whose time and depth span overlaps the ranges."""
+        keep = np.ones(len(self.index), dtype=bool)
+        for which, bounds in ((0, time_range), (1, depth_range)):
+            if bounds is None:
+                continue
+            if which == 1 and self.depth_column is None:
+                raise ValueError(f"Table {self.name!r} has no depth column")
+            keep &= (self.index[:, which, 1] >= bounds[0]) & (self.index[:, which, 0] <= bounds[1])
+        return np.flatnonzero(keep)
+
+    def scan(
+        self,
+        columns: Sequence[str],
+        time_range: Range = None,
+        depth_range: Range = None,
+    ) -> Iterator[Tuple[int, Dict[str, "np.ndarray"], "np.ndarray"]]:
+        """
+        Stream the rows of the blocks that survive pruning, in time order.
+
+        Args:
+            columns: Columns to read
+            time_range: (start, end) epoch seconds, inclusive
+            depth_range: (top, bottom) metres, inclusive
+
+        Yields:
+            Tuple of the chunk's first row, its columns (memory-mapped
+            views) and a boolean mask of the rows inside both ranges
+        """
+        blocks = self.candidate_blocks(time_range, depth_range)
+        if not blocks.size:
+            return
+        # Contiguous runs of candidate blocks, split into chunks of SCAN_BLOCKS
+        breaks = np.flatnonzero((np.diff(blocks) != 1) | (np.arange(1, blocks.size) % SCAN_BLOCKS == 0)) + 1
+        for run in np.split(blocks, breaks):
+            start = int(run[0]) * self.block_rows
+            stop = min((int(run[-1]) + 1) * self.block_rows, self.rows)
+            chunk = {name: self.column(name)[start:stop] for name in columns}
+            mask = np.ones(stop - start, dtype=bool)
+            for column, bounds in ((self.time_column, time_range), (self.depth_column, depth_range)):
+                if bounds is not None:
+                    values = self.column(column)[start:stop]
+                    mask &= (values >= bounds[0]) & (values <= bounds[1])
+            yield start, chunk, mask
+
+
+class WellStore:
+    """A directory of tables; creates, appends to and opens them."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tables: Dict[str, Tuple[float, WellTable]] = {}
+        self._fingerprint: Optional[Tuple[Tuple[int, int], str]] = None   # (stamps, fingerprint)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _touch_version(self) -> None:
+        path = os.path.join(self.root, VERSION_FILE)
+        with open(path, "ab"):
+            pass
+        os.utime(path)
+
+    def tables(self) -> List[str]:
+        """Names of the tables in the store."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, "meta.json")))
+
+    def open(self, name: str) -> WellTable:
+        """
+        Open a table (reused until its next append).
+
+        Raises:
+            KeyError: If there is no such table
+        """
+        meta_path = os.path.join(self._path(name), "meta.json")
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except OSError:
+            raise KeyError(f"No well data table {name!r}") from None
+        with self._lock:
+            cached = self._tables.get(name)
+            if cached is None or cached[0] != mtime:
+                cached = self._tables[name] = (mtime, WellTable(self._path(name)))
+        return cached[1]
+
+    def fingerprint(self) -> str:
+        """
+        Hash of every table's name and row count (changes with each append).
+
+        Reused while the store directory and its VERSION_FILE keep their
+        modification times (tables added or removed by hand change the
+        former), so a call usually costs two stats. Timestamps are coarse, so
+        (as git does with its index) a stamp less than RACY_NS old is not
+        trusted and the tables are listed again.
+        """
+        try:
+            stamp = (os.stat(self.root).st_mtime_ns, os.stat(os.path.join(self.root, VERSION_FILE)).st_mtime_ns)
+        except OSError:
+            stamp = None  # No store, or written before the version file existed
+        cached = self._fingerprint
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        digest = hashlib.sha256()
+        for name in self.tables():
+            try:
+                digest.update(f"{name}\x00{self.open(name).rows}\x00".encode("utf-8"))
+            except (KeyError, OSError, ValueError):
+                continue
+        fingerprint = digest.hexdigest()
+        if stamp is not None and time.time_ns() - max(stamp) > RACY_NS:
+            self._fingerprint = (stamp, fingerprint)
+        return fingerprint
+
+    def create(
+        self,
+        name: str,
+        columns: Dict[str, str],
+        time_column: str = "timestamp",
+        depth_column: Optional[str] = "depth_m",
+        units: Optional[Dict[str, str]] = None,
+        description: str = "",
+        kind: str = "log",
+        block_rows: int = BLOCK_ROWS,
+    ) -> WellTable:
+        """
+        Create an empty table.
+
+        Args:
+            name: Table name (lower case letters, digits, ".", "_", "-")
+            columns: Column name to dtype ("<f8", "<f4", "<i8", "<i4", "<u2"
+                or "category" for strings)
+            time_column: Float column of epoch seconds rows are ordered by
+            depth_column: Float column of measured depth in metres, or None
+            units: Optional unit per column, shown in reports
+            description: What the table holds, shown in reports
+            kind: "log" (sampled time series) or "events" (incident list)
+            block_rows: Rows per block of the min/max index
+
+        Raises:
+            ValueError: On an invalid name or schema, or an existing table
+        """
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid table name {name!r}")
+        if kind not in KINDS:
+            raise ValueError(f"Unknown table kind {kind!r} (expected one of {KINDS})")
+        if os.path.exists(self._path(name)):
+            raise ValueError(f"Table {name!r} already exists")
+        for column, dtype in columns.items():
+            if dtype != CATEGORY and dtype not in _NUMERIC:
+                raise ValueError(f"Unsupported dtype {dtype!r} for column {column!r}")
+        for column in filter(None, (time_column, depth_column)):
+            if not columns.get(column, "").startswith("<f"):
+                raise ValueError(f"Column {column!r} must be a float column")
+        units = units or {}
+        meta = {
+            "version": FORMAT_VERSION, "name": name, "kind": kind, "description": description, "rows": 0,
+            "block_rows": block_rows, "time_column": time_column, "depth_column": depth_column,
+            "columns": {
+                column: {"dtype": dtype, "unit": units.get(column, ""),
+                         **({"categories": []} if dtype == CATEGORY else {})}
+                for column, dtype in columns.items()
+            },
+        }
+        os.makedirs(self._path(name))
+        for column in columns:
+            open(os.path.join(self._path(name), f"{column}.col"), "wb").close()
+        _atomic_write(os.path.join(self._path(name), "index.npy"), lambda f: np.save(f, np.empty((0, 2, 2))))
+        _atomic_write(os.path.join(self._path(name), "meta.json"),
+                      lambda f: f.write(json.dumps(meta, indent=1).encode("utf-8")))
+        self._touch_version()
+        return self.open(name)
+
+    def append(self, name: str, data: Dict[str, Sequence]) -> int:
+        """
+        Append rows to a table.
+
+        Missing float columns are filled with NaN and missing category
+        columns with "".
+
+        Args:
+            name: Table name
+            data: Column name to values, all of the same length, in time order
+
+        Returns:
+            int: Rows in the table after the append
+
+        Raises:
+            KeyError: If there is no such table
+            ValueError: On unknown or missing columns, or rows older than the
+                table's last row
+        """
+        table = self.open(name)
+        meta = json.loads(json.dumps(table.meta))
+        unknown = set(data) - set(meta["columns"])
+        if unknown:
+            raise ValueError(f"Unknown columns for {name!r}: {sorted(unknown)}")
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        n = lengths.pop()
+        if not n:
+            return table.rows
+        times = np.asarray(data.get(table.time_column, []), dtype=np.float64)
+        if times.size != n:
+            raise ValueError(f"Column {table.time_column!r} is required")
+        last_time = table.extent(0)[1]
+        if np.any(np.diff(times) < 0) or (table.rows and times[0] < last_time):
+            raise ValueError("Rows must be appended in time order")
+
+        encoded = {}
+        for column, spec in meta["columns"].items():
+            values = data.get(column)
+            if spec["dtype"] == CATEGORY:
+                lookup = {category: code for code, category in enumerate(spec["categories"])}
+                strings = [""] * n if values is None else ["" if v is None else str(v) for v in values]
+                for value in strings:
+                    if value not in lookup:
+                        lookup[value] = len(spec["categories"])
+                        spec["categories"].append(value)
+                if len(spec["categories"]) > 65535:
+                    raise ValueError(f"Column {column!r} has more than 65535 distinct values")
+                encoded[column] = np.array([lookup[value] for value in strings], dtype="<u2")
+            elif values is None:
+                if not spec["dtype"].startswith("<f"):
+                    raise ValueError(f"Column {column!r} is required")
+                encoded[column] = np.full(n, np.nan, dtype=spec["dtype"])
+            else:
+                encoded[column] = np.asarray(values, dtype=spec["dtype"])
+
+        with self._lock:
+            for column, values in encoded.items():
+                path = os.path.join(table.path, f"{column}.col")
+                with open(path, "r+b") as f:
+                    f.truncate(table.rows * values.itemsize)  # Drop the tail of an interrupted append
+                    f.seek(0, os.SEEK_END)
+                    f.write(values.tobytes())
+            # Re-index from the first block the new rows touch
+            first = table.rows // table.block_rows
+            tail = slice(first * table.block_rows, table.rows)
+            bounds = []
+            for column in (table.time_column, table.depth_column):
+                if column is None:
+                    values = np.full(n + tail.stop - tail.start, np.nan)
+                else:
+                    values = np.concatenate([table.column(column)[tail], encoded[column]]).astype(np.float64)
+                pad = -len(values) % table.block_rows
+                blocks = np.concatenate([values, np.full(pad, np.nan)]).reshape(-1, table.block_rows)
+                with np.errstate(invalid="ignore"):
+                    bounds.append(np.stack([np.fmin.reduce(blocks, axis=1), np.fmax.reduce(blocks, axis=1)], axis=1))
+            index = np.concatenate([table.index[:first], np.stack(bounds, axis=1)])
+            _atomic_write(os.path.join(table.path, "index.npy"), lambda f: np.save(f, index))
+            meta["rows"] = table.rows + n
+            _atomic_write(os.path.join(table.path, "meta.json"),
+                          lambda f: f.write(json.dumps(meta, indent=1).encode("utf-8")))
+        self._touch_version()
+        return meta["rows"]
+
+    def import_csv(
+        self,
+        name: str,
+        path: str,
+        time_column: str = "timestamp",
+        depth_column: Optional[str] = "depth_m",
+        description: str = "",
+        kind: str = "log",
+        chunk_rows: int = 65536,
+    ) -> int:
+        """
+        Import (or append) a CSV file with a header row, streaming it in chunks.
+
+        Timestamps may be epoch seconds or ISO 8601. A new table takes its
+        schema from the first chunk: the time and depth columns as float64,
+        other numeric columns as float32 and the rest as categories. Units
+        may be given in the header as ``name [unit]``.
+
+        Returns:
+            int: Rows in the table after the import
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            names, units = [], {}
+            for cell in header:
+                match = re.match(r"\s*([^\[]+?)\s*(?:\[(.*)\])?\s*$", cell)
+                names.append(match.group(1))
+                if match.group(2):
+                    units[match.group(1)] = match.group(2)
+            if time_column not in names:
+                raise ValueError(f"{path} has no {time_column!r} column")
+            if depth_column not in names:
+                depth_column = None
+            table_rows = 0
+            while True:
+                chunk = [row for _, row in zip(range(chunk_rows), reader)]
+                chunk = [row for row in chunk if len(row) == len(names)]
+                if not chunk:
+                    break
+                columns = dict(zip(names, map(list, zip(*chunk))))
+                if name not in self.tables():
+                    schema = {}
+                    for column, cells in columns.items():
+                        if column in (time_column, depth_column):
+                            schema[column] = "<f8"
+                        elif not np.any(np.isnan(parse_numbers(cells)) & np.array([bool(c.strip()) for c in cells])):
+                            schema[column] = "<f4"
+                        else:
+                            schema[column] = CATEGORY
+                    units.setdefault(time_column, "s")
+                    self.create(name, schema, time_column, depth_column, units, description, kind)
+                table = self.open(name)
+                data = {}
+                for column, cells in columns.items():
+                    if column == time_column:
+                        data[column] = parse_timestamps(cells)
+                    elif table.column_dtype(column) == CATEGORY:
+                        data[column] = [cell.strip() for cell in cells]
+                    else:
+                        data[column] = parse_numbers(cells)
+                table_rows = self.append(name, data)
+        return table_rows
+
+
+# -- queries --------------------------------------------------------------------------
+
+def summarize(table: WellTable, columns: Optional[Sequence[str]] = None,
+              time_range: Range = None, depth_range: Range = None) -> Dict[str, Dict[str, float]]:
+    """Count, min, max and mean of numeric columns over the rows in range."""
+    columns = [c for c in (columns or table.columns) if table.column_dtype(c) != CATEGORY]
+    count = dict.fromkeys(columns, 0)
+    total = dict.fromkeys(columns, 0.0)
+    low = dict.fromkeys(columns, np.inf)
+    high = dict.fromkeys(columns, -np.inf)
+    for _, chunk, mask in table.scan(columns, time_range, depth_range):
+        for column in columns:
+            values = np.asarray(chunk[column], dtype=np.float64)[mask]
+            values = values[np.isfinite(values)]
+            if values.size:
+                count[column] += values.size
+                total[column] += float(values.sum())
+                low[column] = min(low[column], float(values.min()))
+                high[column] = max(high[column], float(values.max()))
+    return {
+        column: {"count": count[column], "min": low[column], "max": high[column],
+                 "mean": total[column] / count[column]}
+        for column in columns if count[column]
+    }
+
+
+def _accumulate(totals: "np.ndarray", bins: "np.ndarray", weights: "np.ndarray") -> "np.ndarray":
+    """Add bincount(bins, weights) to ``totals``, growing it as needed."""
+    if not bins.size:
+        return totals
+    counts = np.bincount(bins, weights=weights)
+    if counts.size > totals.size:
+        totals = np.concatenate([totals, np.zeros(counts.size - totals.size)])
+    totals[:counts.size] += counts
+    return totals
+
+
+def default_interval(depth_span_m: float) -> float:
+    """The smallest of INTERVALS_M giving at most MAX_INTERVALS intervals."""
+    for interval in INTERVALS_M:
+        if depth_span_m / interval <= MAX_INTERVALS:
+            return interval
+    return INTERVALS_M[-1]
+
+
+def rop_by_interval(table: WellTable, interval_m: float = 100.0, time_range: Range = None,
+                    depth_range: Range = None, rop_column: str = "rop_m_h") -> List[Dict[str, float]]:
+    """
+    Footage, drilling hours and rate of penetration per depth interval.
+
+    New hole is the advance of the running maximum depth (so tripping back
+    to bottom is not counted); drilling time is the time between samples
+    while new hole is made, ignoring gaps over MAX_GAP_S. Intervals include
+    their bottom depth (a well drilled to 2500 m ends in 2400-2500 m), and an
+    advance across a boundary is split between the intervals. When the table
+    logs ROP (``rop_column``), its time-weighted mean while positive is
+    reported as well.
+
+    Returns:
+        List[Dict[str, float]]: Per interval with new hole: ``top_m``,
+        ``bottom_m``, ``footage_m``, ``drilling_hours``, ``rop_m_h`` and,
+        with logged ROP, ``logged_rop_m_h``
+    """
+    if table.depth_column is None:
+        raise ValueError(f"Table {table.name!r} has no depth column")
+    logged = rop_column in table.columns
+    columns = [table.time_column, table.depth_column] + ([rop_column] if logged else [])
+    footage = hours = rop_sum = rop_hours = np.zeros(0)
+    prev_stop, prev_t, prev_hole = -1, np.nan, np.nan
+    for start, chunk, mask in table.scan(columns, time_range, depth_range):
+        if start != prev_stop:  # Pruned blocks in between: do not bridge the gap
+            prev_t, prev_hole = np.nan, np.nan
+        t = np.asarray(chunk[table.time_column], dtype=np.float64)
+        hole = np.fmax.accumulate(np.concatenate(([prev_hole], np.asarray(chunk[table.depth_column], np.float64))))
+        dt = np.diff(np.concatenate(([prev_t], t)))
+        advance = np.diff(hole)
+        prev_stop, prev_t, prev_hole = start + t.size, t[-1], hole[-1]
+
+        with np.errstate(invalid="ignore"):
+            valid = mask & (dt > 0) & (dt <= MAX_GAP_S) & np.isfinite(hole[1:])
+            drilling = valid & (advance > 0)
+        top, bottom = hole[:-1], hole[1:]
+        bins = (np.ceil(np.where(np.isfinite(bottom), bottom, 0.0) / interval_m) - 1).clip(0).astype(np.int64)
+        first = np.minimum(np.floor(np.where(drilling, top, 0.0) / interval_m).clip(0).astype(np.int64), bins)
+        spans = np.where(drilling, bins - first + 1, 0)
+        sample = np.repeat(np.arange(spans.size), spans)  # One piece per interval an advance touches
+        piece = first[sample] + np.arange(sample.size) - np.repeat(np.cumsum(spans) - spans, spans)
+        part = np.minimum(bottom[sample], (piece + 1) * interval_m) - np.maximum(top[sample], piece * interval_m)
+        footage = _accumulate(footage, piece, part)
+        hours = _accumulate(hours, piece, dt[sample] * part / advance[sample] / 3600.0)
+        if logged:
+            rop = np.asarray(chunk[rop_column], dtype=np.float64)
+            with np.errstate(invalid="ignore"):
+                on_bottom = valid & (rop > 0)
+            rop_sum = _accumulate(rop_sum, bins[on_bottom], (rop * dt)[on_bottom])
+            rop_hours = _accumulate(rop_hours, bins[on_bottom], dt[on_bottom])
+
+    intervals = []
+    for i in range(max(footage.size, rop_hours.size)):
+        made = footage[i] if i < footage.size else 0.0
+        drilled = hours[i] if i < hours.size else 0.0
+        on = rop_hours[i] if i < rop_hours.size else 0.0
+        if made <= 0 and on <= 0:
+            continue
+        if depth_range is not None and (i + 1) * interval_m <= depth_range[0] or \
+                depth_range is not None and i * interval_m >= depth_range[1]:
+            continue  # Only touches the range at its boundary
+        row = {"top_m": i * interval_m, "bottom_m": (i + 1) * interval_m, "footage_m": float(made),
+               "drilling_hours": float(drilled), "rop_m_h": float(made / drilled) if drilled > 0 else float("nan")}
+        if logged:
+            row["logged_rop_m_h"] = float(rop_sum[i] / on) if on > 0 else float("nan")
+        intervals.append(row)
+    return intervals
+
+
+def excursions(table: WellTable, threshold: float, column: str = "temperature_c", time_range: Range = None,
+               depth_range: Range = None, min_duration_s: float = 0.0) -> List[Dict[str, float]]:
+    """
+    Periods during which ``column`` stayed above ``threshold``.
+
+    Returns:
+        List[Dict[str, float]]: ``start``, ``end`` (epoch seconds of the first
+        and last sample above), ``duration_s``, ``peak``, ``peak_time`` and
+        ``peak_depth_m`` per excursion, in time order
+    """
+    depth_column = table.depth_column
+    columns = [table.time_column, column] + ([depth_column] if depth_column else [])
+    found: List[Dict[str, float]] = []
+    current: Optional[Dict[str, float]] = None
+    prev_stop = -1
+
+    def close() -> None:
+        if current is not None and current["end"] - current["start"] >= min_duration_s:
+            current["duration_s"] = current["end"] - current["start"]
+            found.append(current)
+
+    for start, chunk, mask in table.scan(columns, time_range, depth_range):
+        if start != prev_stop:
+            close()
+            current = None
+        prev_stop = start + mask.size
+        t = np.asarray(chunk[table.time_column], dtype=np.float64)
+        values = np.where(mask, np.asarray(chunk[column], dtype=np.float64), np.nan)
+        depth = np.asarray(chunk[depth_column], dtype=np.float64) if depth_column else np.full(t.size, np.nan)
+        with np.errstate(invalid="ignore"):
+            above = values > threshold
+        edges = np.diff(np.concatenate(([current is not None], above)).astype(np.int8))
+        starts = list(np.flatnonzero(edges == 1))
+        ends = list(np.flatnonzero(edges == -1))
+        if current is not None:
+            starts.insert(0, 0)
+        if len(ends) < len(starts):
+            ends.append(t.size)
+        for s, e in zip(starts, ends):
+            if e > s:
+                peak = s + int(np.argmax(values[s:e]))
+                run = {"start": float(t[s]), "end": float(t[e - 1]), "peak": float(values[peak]),
+                       "peak_time": float(t[peak]), "peak_depth_m": float(depth[peak])}
+                if s == 0 and current is not None:  # Continues from the previous chunk
+                    current["end"] = run["end"]
+                    if run["peak"] > current["peak"]:
+                        current.update(peak=run["peak"], peak_time=run["peak_time"], peak_depth_m=run["peak_depth_m"])
+                else:
+                    current = run
+            if e < t.size:
+                close()
+                current = None
+    close()
+    return found
+
+
+def events(table: WellTable, kinds: Optional[Sequence[str]] = None, column: Optional[str] = None,
+           time_range: Range = None, depth_range: Range = None, limit: int = 50) -> List[Dict[str, object]]:
+    """
+    Rows of an event table, optionally only those whose ``column`` (default:
+    the first category column) contains one of ``kinds`` (case-insensitive).
+
+    Returns:
+        List[Dict[str, object]]: Up to ``limit`` rows with decoded strings, in time order
+    """
+    category_columns = [c for c in table.columns if table.column_dtype(c) == CATEGORY]
+    column = column or (category_columns[0] if category_columns else None)
+    allowed = None
+    if kinds and column is not None:
+        wanted = [kind.lower() for kind in kinds]
+        allowed = [code for code, value in enumerate(table.categories(column))
+                   if any(kind in value.lower() for kind in wanted)]
+    rows: List[Dict[str, object]] = []
+    for _, chunk, mask in table.scan(table.columns, time_range, depth_range):
+        if allowed is not None:
+            mask = mask & np.isin(chunk[column], allowed)
+        for i in np.flatnonzero(mask)[:limit - len(rows)]:
+            rows.append({
+                name: (table.categories(name)[int(chunk[name][i])] if name in category_columns
+                       else float(chunk[name][i]))
+                for name in table.columns
+            })
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def query_well_data(
+    table: WellTable,
+    time_range: Range = None,
+    depth_range: Range = None,
+    interval_m: Optional[float] = None,
+    threshold_c: Optional[float] = None,
+    event_kinds: Optional[Sequence[str]] = None,
+    max_events: int = 10,
+) -> Dict[str, object]:
+    """
+    The aggregates that apply to a table, for the query_well_data tool.
+
+    Logs get ROP per interval (with a depth column) and excursions (with a
+    ``temperature_c`` column; default threshold: the BHCT design limit);
+    event tables get their events, filtered by ``event_kinds``.
+
+    Returns:
+        Dict[str, object]: ``table``, ``description``, ``rows``, ``time_span``,
+        ``depth_span`` and, where they apply, ``rop``, ``interval_m``,
+        ``excursions``, ``threshold_c`` and ``events``
+    """
+    report: Dict[str, object] = {
+        "table": table.name, "description": table.meta.get("description", ""), "rows": table.rows,
+        "time_span": table.extent(0), "depth_span": table.extent(1) if table.depth_column else None,
+        "columns": {name: table.unit(name) for name in table.columns},
+        "time_column": table.time_column, "time_range": time_range, "depth_range": depth_range,
+    }
+    if table.kind == "events":
+        report["events"] = events(table, event_kinds, None, time_range, depth_range, limit=max_events + 1)
+        return report
+    if table.depth_column and table.rows:
+        top, bottom = depth_range or report["depth_span"]
+        report["interval_m"] = interval_m = interval_m or default_interval(bottom - top)
+        report["rop"] = rop_by_interval(table, interval_m, time_range, depth_range)
+    if "temperature_c" in table.columns:
+        report["threshold_c"] = threshold = BHCT_RANGE_C[1] if threshold_c is None else threshold_c
+        report["excursions"] = excursions(table, threshold, "temperature_c", time_range, depth_range)
+    return report
+
+
+def format_well_data(report: Dict[str, object]) -> str:
+    """Format a query_well_data() report for the LLM."""
+    start, end = report["time_span"]
+    lines = [f"Table {report['table']}" + (f" ({report['description']})" if report["description"] else "")
+             + f": {report['rows']:,} rows, {_iso(start)} to {_iso(end)} UTC"
+             + (f", depth {report['depth_span'][0]:.0f}-{report['depth_span'][1]:.0f} m" if report["depth_span"] else "")]
+    lines.append("Columns: " + ", ".join(f"{name} [{unit}]" if unit else name for name, unit in report["columns"].items()))
+    if report["depth_range"] or report["time_range"]:
+        parts = []
+        if report["depth_range"]:
+            parts.append(f"depth {report['depth_range'][0]:.0f}-{report['depth_range'][1]:.0f} m")
+        if report["time_range"]:
+            parts.append(f"{_iso(report['time_range'][0])} to {_iso(report['time_range'][1])} UTC")
+        lines.append("Restricted to " + " and ".join(parts))
+
+    if "rop" in report:
+        rop = report["rop"]
+        if rop:
+            footage = sum(row["footage_m"] for row in rop)
+            hours = sum(row["drilling_hours"] for row in rop)
+            lines.append(f"ROP per {report['interval_m']:.0f} m interval (new hole; {footage:.0f} m in "
+                         f"{hours:.1f} drilling hours, average {footage / hours if hours else float('nan'):.1f} m/h):")
+            for row in rop:
+                logged = f", logged {row['logged_rop_m_h']:.1f} m/h" if "logged_rop_m_h" in row else ""
+                lines.append(f"- {row['top_m']:.0f}-{row['bottom_m']:.0f} m: {row['footage_m']:.0f} m in "
+                             f"{row['drilling_hours']:.1f} h, {row['rop_m_h']:.1f} m/h{logged}")
+        else:
+            lines.append("ROP: no new hole in the selected range")
+    if "excursions" in report:
+        found = report["excursions"]
+        lines.append(f"Temperature excursions above {report['threshold_c']:.0f} °C: {len(found)}")
+        for row in found[:10]:
+            depth = f" at {row['peak_depth_m']:.0f} m" if row["peak_depth_m"] == row["peak_depth_m"] else ""
+            lines.append(f"- {_iso(row['start'])} UTC for {row['duration_s'] / 60:.1f} min, "
+                         f"peak {row['peak']:.0f} °C{depth}")
+        if len(found) > 10:
+            lines.append(f"- ... {len(found) - 10} more")
+    if "events" in report:
+        rows = report["events"]
+        lines.append(f"Events ({len(rows) if len(rows) <= 10 else 'more than 10'}):")
+        time_column = report["time_column"]
+        for row in rows[:10]:
+            details = ", ".join(f"{k}={v:g}" if isinstance(v, float) else f"{k}={v}"
+                                for k, v in row.items() if k != time_column and v not in ("",) and v == v)
+            lines.append(f"- {_iso(row[time_column])} UTC: {details}")
+        if not rows:
+            lines.append("- none matching")
+    return "\n".join(lines)
+
+
+_STORE: Optional[WellStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_well_store() -> WellStore:
+    """Return the process-wide store (SVES_WELL_DATA or <cache root>/welldata)."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = WellStore(os.environ.get("SVES_WELL_DATA") or get_cache_dir("welldata"))
+    return _STORE
+
+
+def _parse_range(text: str) -> Tuple[float, float]:
+    low, _, high = text.partition(":")
+    return float(low), float(high)
+
+
+def _parse_time_range(text: str) -> Tuple[float, float]:
+    low, _, high = text.partition("/")
+    return tuple(float(v) for v in parse_timestamps([low, high]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(prog="python -m sves.welldata",
+                                     description="Import and query SVES well and pilot-test data.")
+    parser.add_argument("--store", help="Store directory (default: SVES_WELL_DATA or <cache root>/welldata)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Import or append a CSV file")
+    load.add_argument("table")
+    load.add_argument("csv")
+    load.add_argument("--time-column", default="timestamp")
+    load.add_argument("--depth-column", default="depth_m")
+    load.add_argument("--description", default="")
+    load.add_argument("--kind", choices=KINDS, default="log", help="Sampled log or event list (new tables)")
+    commands.add_parser("list", help="List tables")
+    for command in ("rop", "excursions", "events", "summary"):
+        query = commands.add_parser(command)
+        query.add_argument("table")
+        query.add_argument("--depth", type=_parse_range, metavar="TOP:BOTTOM")
+        query.add_argument("--time", type=_parse_time_range, metavar="START/END",
+                           help="ISO 8601 or epoch seconds, e.g. 2026-03-01/2026-03-08")
+        if command == "rop":
+            query.add_argument("--interval", type=float, help="Interval in metres (default: automatic)")
+        elif command == "excursions":
+            query.add_argument("--threshold", type=float, default=BHCT_RANGE_C[1])
+            query.add_argument("--column", default="temperature_c")
+        elif command == "events":
+            query.add_argument("--kind", action="append", help="Substring of the event type")
+            query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    store = WellStore(args.store) if args.store else get_well_store()
+    if args.command == "import":
+        rows = store.import_csv(args.table, args.csv, args.time_column, args.depth_column or None,
+                                args.description, args.kind)
+        sys.stderr.write(f"{args.table}: {rows:,} rows\n")
+        return 0
+    if args.command == "list":
+        for name in store.tables():
+            table = store.open(name)
+            start, end = table.extent(0)
+            span = f"{_iso(start)} to {_iso(end)}" if table.rows else "empty"
+            sys.stdout.write(f"{name}\t{table.kind}\t{table.rows}\t{span}\t{table.meta.get('description', '')}\n")
+        return 0
+    try:
+        table = store.open(args.table)
+    except KeyError as e:
+        parser.error(str(e.args[0]))
+    if args.command == "rop":
+        top, bottom = args.depth or table.extent(1)
+        results = rop_by_interval(table, args.interval or default_interval(bottom - top), args.time, args.depth)
+    elif args.command == "excursions":
+        results = excursions(table, args.threshold, args.column, args.time, args.depth)
+    elif args.command == "events":
+        results = events(table, args.kind, None, args.time, args.depth, args.limit)
+    else:
+        results = [dict(column=name, **stats) for name, stats in summarize(table, None, args.time, args.depth).items()]
+    for row in results:
+        sys.stdout.write(json.dumps(row) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Regression tests for the audit log (sves.audit).
+
+    python -m unittest discover -s tests
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from sves.audit import INDEX_FILE, SEGMENT_PREFIX, AuditLog, AuditReader
+
+
+class CrashWhileSealingTest(unittest.TestCase):
+    """Every record stays searchable, exactly once, whichever step of _seal() a crash interrupts."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        log = AuditLog(self.directory, compress=False)
+        for i in range(3):
+            log.record("question", n=i)
+        log.close()
+        self.segment = [name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX)][0]
+        with open(os.path.join(self.directory, INDEX_FILE)) as f:
+            self.entry = json.loads(f.readline())
+        os.remove(os.path.join(self.directory, INDEX_FILE))  # Crashed before indexing
+        path = os.path.join(self.directory, self.segment)
+        with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+    def found(self):
+        return [record["n"] for record in AuditReader(self.directory).search()]
+
+    def index(self, name):
+        with open(os.path.join(self.directory, INDEX_FILE), "w") as f:
+            f.write(json.dumps(dict(self.entry, file=name)) + "\n")
+
+    def test_compressed_but_not_indexed(self):
+        self.assertEqual(self.found(), [0, 1, 2])
+        os.remove(os.path.join(self.directory, self.segment))
+        self.assertEqual(self.found(), [0, 1, 2])
+
+    def test_indexed_but_plain_segment_not_removed(self):
+        self.index(self.segment + ".gz")
+        self.assertEqual(self.found(), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+Regression tests for the conversation store (sves.conversations).
+
+    python -m unittest discover -s tests
+"""
+
+import threading
+import unittest
+
+from sves.conversations import Conversation, ConversationStore
+
+
+class ReadYourWritesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ConversationStore(":memory:")
+        self.resume = threading.Event()
+        self.addCleanup(self.store.close)
+        self.addCleanup(self.resume.set)
+
+    def stall_writer(self):
+        """Park the writer thread so every later write stays queued."""
+        parked = threading.Event()
+
+        def park():
+            parked.set()
+            self.resume.wait(10)
+
+        self.store._queue.put(("SELECT 1", (), park))
+        self.assertTrue(parked.wait(5))
+
+    def test_reads_see_queued_writes_without_waiting(self):
+        conversation = Conversation(self.store, memory_messages=2)
+        self.stall_writer()
+        for i in range(5):
+            conversation.append("user" if i % 2 == 0 else "assistant", f"message {i}")
+        conversation.record_summary("first two", 2)
+
+        # history() reads the messages older than the in-memory window from the store
+        self.assertEqual([m["content"] for m in conversation.history()],
+                         ["message 2", "message 3", "message 4"])
+        self.assertEqual(self.store.count_messages(conversation.id), 5)
+        self.assertEqual(self.store.load_summary(conversation.id), ("first two", 2))
+        self.assertEqual(self.store.list_conversations(), [])  # Committed state only
+        self.assertGreater(self.store._queue.unfinished_tasks, 0)
+
+        self.resume.set()
+        self.store.flush()
+        reopened = Conversation(self.store, conversation.id, memory_messages=2)
+        self.assertEqual(reopened.total, 5)
+        self.assertEqual((reopened.summary, reopened.summary_seq), ("first two", 2))
+        self.assertEqual([m["content"] for m in reopened.history()],
+                         ["message 2", "message 3", "message 4"])
+        self.assertEqual(self.store._pending_messages, {})
+        self.assertEqual(self.store.list_conversations()[0].message_count, 5)
+
+    def test_failed_writes_are_counted(self):
+        self.store._queue.put(("INSERT INTO missing VALUES (1)", (), None))
+        self.store.flush()
+        self.assertEqual(self.store.write_errors, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
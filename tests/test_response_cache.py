@@ -0,0 +1,40 @@
+"""
+Regression tests for the response cache (sves.response_cache).
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sves.response_cache import CacheKey, _DiskTier
+
+
+class DiskTierBoundsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "responses.sqlite")
+
+    def test_oldest_rows_over_the_cap_are_evicted(self):
+        disk = _DiskTier(self.path, max_rows=5)
+        for i in range(12):
+            disk.put(CacheKey(f"k{i}", "partition", f"question {i}"), f"answer {i}")
+        self.assertEqual(disk.count(), 5)
+        self.assertIsNone(disk.get("k6"))
+        self.assertEqual(disk.get("k11")[2], "answer 11")
+
+    def test_expired_rows_are_neither_served_nor_kept(self):
+        disk = _DiskTier(self.path, max_age_s=3600.0)
+        disk.put(CacheKey("old", "partition", "question"), "answer")
+        disk._conn.execute("UPDATE responses SET created_at = created_at - 7200")
+        self.assertIsNone(disk.get("old"))
+        disk.put(CacheKey("new", "partition", "question 2"), "answer 2")
+        self.assertEqual(disk.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Regression tests for the RTCR kinetics (sves.rtcr).
+
+    python -m unittest discover -s tests
+"""
+
+import unittest
+
+import numpy as np
+
+from sves.rtcr import RTCRConditions, design_rtcr_experiment, format_rtcr_design, simulate_rtcr
+
+
+class HydrogenBalanceTest(unittest.TestCase):
+
+    def test_h2_never_decays_without_oxygen(self):
+        temperatures = [400.0, 450.0, 500.0, 550.0, 600.0]
+        n = len(temperatures)
+        result = simulate_rtcr(RTCRConditions(temperatures, [28.0] * n, [1.0] * n, [0.0] * n))
+        for i, temperature in enumerate(temperatures):
+            h2 = result.h2_yield[i]
+            # Radical pool fluctuations are many orders below the yield
+            self.assertGreaterEqual(np.diff(h2).min(), -1e-9 * h2.max(), f"H2 decays at {temperature} °C")
+            self.assertGreater(h2[-1], 0.0)
+
+    def test_default_design_keeps_hydrogen(self):
+        design = design_rtcr_experiment()
+        end = design["expected_products"]["h2_mol_per_kg_rock"]["3600 s"]
+        self.assertGreater(end, 0.1)
+        self.assertGreater(design["expected_products"]["o2_consumed_fraction"], 0.0)
+
+    def test_zero_oxygen_reports_no_consumption(self):
+        design = design_rtcr_experiment(o2_fraction=0.0)
+        self.assertEqual(design["expected_products"]["o2_consumed_fraction"], 0.0)
+
+    def test_noise_is_not_printed(self):
+        text = format_rtcr_design(design_rtcr_experiment(temperature_c=500.0, o2_fraction=0.05))
+        self.assertNotRegex(text, r"\de-(?:[1-9]\d)\b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Regression tests for the telemetry monitor (sves.telemetry).
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from sves.telemetry import TelemetryMonitor
+
+
+class MixedRowsTest(unittest.TestCase):
+    """Rows that measure only temperature or only pressure, alternating."""
+
+    def ingest(self, monitor, rise_c_s):
+        n = 20
+        i = np.arange(n)
+        t = time.time() - n + i
+        temperature = np.where(i % 2 == 0, 400.0 + rise_c_s * i, np.nan)
+        pressure = np.where(i % 2 == 1, 25.0, np.nan)  # The last row is pressure-only
+        return monitor.ingest("s1", t, temperature, pressure)
+
+    def test_state_keeps_latest_reading_of_each_quantity(self):
+        monitor = TelemetryMonitor()
+        self.ingest(monitor, 3.0)
+        state = monitor.sensor_states()[0]
+        self.assertEqual(state["temperature_c"], 400.0 + 3.0 * 18)
+        self.assertEqual(state["pressure_mpa"], 25.0)
+        self.assertAlmostEqual(state["rate_c_s"], 3.0)
+        self.assertIn("454 °C", monitor.summary_text())
+
+    def test_heating_rate_is_checked(self):
+        kinds = {alert.kind for alert in self.ingest(TelemetryMonitor(), 40.0)}
+        self.assertIn("heating_rate", kinds)
+        self.assertIn("thermal_runaway", kinds)
+
+
+class CsvHeaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "sensors.csv")
+        self.monitor = TelemetryMonitor()
+        self.addCleanup(self.monitor.stop)
+
+    def wait_for_state(self):
+        deadline = time.monotonic() + 5.0
+        while not self.monitor.sensor_states() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return self.monitor.sensor_states()
+
+    def test_header_written_after_the_file_is_created(self):
+        open(self.path, "w").close()
+        self.monitor.start_sources(f"csv:{self.path}")
+        time.sleep(0.2)  # Opened while empty
+        with open(self.path, "a") as f:
+            f.write("sensor,pressure_mpa,temperature_c,timestamp\n")
+            f.flush()
+            time.sleep(0.2)
+            f.write(f"bh1,24.5,431.0,{time.time():.3f}\n")
+        state = self.wait_for_state()[0]
+        self.assertEqual(state["sensor"], "bh1")
+        self.assertEqual(state["temperature_c"], 431.0)
+        self.assertEqual(state["pressure_mpa"], 24.5)
+
+    def test_headerless_file_uses_default_columns(self):
+        open(self.path, "w").close()
+        self.monitor.start_sources(f"csv:{self.path}")
+        time.sleep(0.2)
+        with open(self.path, "a") as f:
+            f.write(f"{time.time():.3f},bh2,2500,433.0,24.0\n")
+        state = self.wait_for_state()[0]
+        self.assertEqual((state["sensor"], state["temperature_c"]), ("bh2", 433.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
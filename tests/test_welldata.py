@@ -0,0 +1,51 @@
+"""
+Regression tests for the well data store (sves.welldata).
+
+    python -m unittest discover -s tests
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from sves.welldata import WellStore, rop_by_interval
+
+
+class RopByIntervalTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = WellStore(directory)
+
+    def drill(self, depths, rop=14.4, on_bottom_at_td=10):
+        """A log drilling through ``depths`` at ``rop`` m/h, then sitting on bottom at TD."""
+        depth = np.concatenate([depths, np.full(on_bottom_at_td, depths[-1])])
+        t = np.concatenate([[0.0], np.cumsum(np.diff(depth) / rop * 3600.0)])
+        t[len(depths):] = t[len(depths) - 1] + 60.0 * np.arange(1, on_bottom_at_td + 1)
+        self.store.create("drilling", {"timestamp": "<f8", "depth_m": "<f8", "rop_m_h": "<f8"})
+        self.store.append("drilling", {"timestamp": t, "depth_m": depth, "rop_m_h": np.full(depth.size, rop)})
+        return self.store.open("drilling")
+
+    def test_td_on_a_boundary_closes_the_last_interval(self):
+        table = self.drill(np.arange(2000.0, 2500.1, 2.5))
+        rows = rop_by_interval(table, interval_m=250.0)
+        self.assertEqual([(row["top_m"], row["bottom_m"]) for row in rows], [(2000.0, 2250.0), (2250.0, 2500.0)])
+        self.assertAlmostEqual(sum(row["footage_m"] for row in rows), 500.0)
+        for row in rows:
+            self.assertAlmostEqual(row["rop_m_h"], 14.4)
+
+    def test_advance_across_a_boundary_is_split(self):
+        # Samples a few minutes apart (shorter than MAX_GAP_S), one advancing 2240 -> 2260 m
+        table = self.drill(np.array([2000.0, 2240.0, 2260.0, 2400.0]), rop=1000.0, on_bottom_at_td=0)
+        rows = rop_by_interval(table, interval_m=250.0)
+        self.assertEqual([(row["top_m"], row["bottom_m"]) for row in rows], [(2000.0, 2250.0), (2250.0, 2500.0)])
+        self.assertEqual([round(row["footage_m"], 6) for row in rows], [250.0, 150.0])
+        for row in rows:
+            self.assertAlmostEqual(row["rop_m_h"], 1000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()